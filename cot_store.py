@@ -0,0 +1,352 @@
+"""
+Chain of Thought 아티팩트 팩 저장소
+- prompt_*.txt / response_*.txt 를 하나의 append-only 압축 팩 파일로 저장
+- zlib 공유 사전(zdict: 프롬프트 템플릿 + 샘플 응답)으로 반복되는 템플릿 제거
+- 오프셋 인덱스(.idx)로 케이스 키 단위 랜덤 액세스, 인덱스 유실 시 팩 스캔으로 재구성
+- 팩 + 인덱스 추가는 배타적 파일 잠금(.lock) 구간에서 수행 (동시 writer 프로세스/스레드 직렬화)
+- 압축률 한계 (수용된 편차): 프롬프트는 사전으로 템플릿이 제거되어 파라미터(서술문)만 남으므로 ~13x
+  (별도 템플릿+파라미터 델타 인코딩은 추가 이득이 없어 미적용). 응답은 케이스별 고유 서술이라
+  ~3.4x에 그쳐 전체 팩은 ~3.1x. 파일 수는 팩 + 인덱스(+ 빈 잠금 파일)로 감소
+- CLI: import / export / list / stats / compact
+"""
+
+import json
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+RECORD_MAGIC = b"CoTR"
+# magic, key 길이, payload 길이, 사전 레코드 오프셋(없으면 NO_DICT), 원본 길이
+RECORD_HEADER = struct.Struct("<4sHQQI")
+NO_DICT = 0xFFFFFFFFFFFFFFFF
+DICT_KEY = "__dict__"
+MAX_DICT_SIZE = 32 * 1024  # zlib 사전 최대 크기
+# 사용 빈도 오름차순 (기본 템플릿인 CoT 프롬프트가 사전 끝에 오도록)
+TEMPLATE_FILES = [
+    "prompts/ttp_lean_prompt.txt",
+    "prompts/ttp_packed_prompt.txt",
+    "prompts/ttp_cot_prompt.txt",
+]
+
+
+def build_dictionary(samples=(), template_files=TEMPLATE_FILES):
+    """프롬프트 템플릿 + 샘플 응답으로 zlib 사전 생성
+
+    zlib은 사전의 끝부분을 가장 가까운 거리로 참조하고 초과분은 앞에서 잘리므로
+    샘플 응답 -> 템플릿(사용 빈도 오름차순) 순으로 배치
+    """
+    parts = []
+    for sample in samples:
+        parts.append(sample.encode("utf-8") if isinstance(sample, str) else sample)
+    for path in template_files:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                parts.append(f.read())
+    return b"\n".join(parts)[-MAX_DICT_SIZE:]
+
+
+class CoTPackStore:
+    def __init__(self, path="ttp_results/chain_of_thought.pack", level=9):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.level = level
+
+        self.index = {}       # key -> (offset, payload_len, dict_offset, raw_len)
+        self.dict_offset = None
+        self._dicts = {}      # dict_offset -> bytes
+        self._load_index()
+
+    # ------------------------------------------------------------------
+    # 잠금
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _locked(self):
+        """팩/인덱스 배타적 잠금 (flock은 열린 파일 단위라 같은 프로세스의 스레드 간에도 유효)"""
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            yield  # 파일을 닫으면 잠금 해제
+
+    # ------------------------------------------------------------------
+    # 인덱스
+    # ------------------------------------------------------------------
+    def _load_index(self):
+        if not self.path.exists():
+            return
+        # 다른 writer가 레코드를 기록 중이면 꼬리 레코드로 오인해 잘라내지 않도록 잠금 구간에서 확인
+        with self._locked():
+            self._load_index_locked()
+
+    def _load_index_locked(self):
+        pack_size = self.path.stat().st_size
+
+        entries = []
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entries.append(json.loads(line))
+
+        # 인덱스가 팩 끝까지 커버하지 않으면 (중단/유실) 스캔으로 재구성
+        covered = 0
+        if entries:
+            last = entries[-1]
+            covered = last["offset"] + RECORD_HEADER.size + len(last["key"].encode("utf-8")) + last["length"]
+        if covered != pack_size:
+            entries = self._rebuild_index_locked()
+
+        for e in entries:
+            self._apply_entry(e)
+
+    def _apply_entry(self, e):
+        if e["key"] == DICT_KEY:
+            self.dict_offset = e["offset"]
+        else:
+            self.index[e["key"]] = (e["offset"], e["length"], e["dict"], e["raw"])
+
+    def rebuild_index(self):
+        """팩 파일을 순차 스캔하여 인덱스 재작성"""
+        with self._locked():
+            return self._rebuild_index_locked()
+
+    def _rebuild_index_locked(self):
+        entries = []
+        with open(self.path, "rb") as f:
+            offset = 0
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                magic, key_len, length, dict_offset, raw_len = RECORD_HEADER.unpack(header)
+                if magic != RECORD_MAGIC:
+                    break
+                key = f.read(key_len).decode("utf-8")
+                payload = f.read(length)
+                if len(payload) < length:
+                    break  # 기록 중 중단된 마지막 레코드
+                entries.append({"key": key, "offset": offset, "length": length,
+                                "dict": None if dict_offset == NO_DICT else dict_offset, "raw": raw_len})
+                offset = f.tell()
+
+        # 불완전한 꼬리 레코드 제거
+        if offset != self.path.stat().st_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            for e in entries:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+        return entries
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+    def _append(self, key, payload, dict_offset, raw_len):
+        key_bytes = key.encode("utf-8")
+        header = RECORD_HEADER.pack(RECORD_MAGIC, len(key_bytes), len(payload),
+                                    NO_DICT if dict_offset is None else dict_offset, raw_len)
+        # 팩 추가와 인덱스 추가를 한 잠금 구간에서 수행해야 인덱스 순서가 팩 오프셋 순서와 일치
+        with self._locked():
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(header + key_bytes + payload)
+
+            entry = {"key": key, "offset": offset, "length": len(payload), "dict": dict_offset, "raw": raw_len}
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._apply_entry(entry)
+        return offset
+
+    def set_dictionary(self, zdict):
+        """이후 레코드에 사용할 공유 사전 기록"""
+        offset = self._append(DICT_KEY, zdict, None, len(zdict))
+        self._dicts[offset] = zdict
+        return offset
+
+    def put(self, key, text):
+        """아티팩트 추가 (같은 키는 마지막 기록이 유효)"""
+        if self.dict_offset is None:
+            self.set_dictionary(build_dictionary())
+        zdict = self._dictionary(self.dict_offset)
+
+        raw = text.encode("utf-8")
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+        payload = compressor.compress(raw) + compressor.flush()
+        self._append(key, payload, self.dict_offset, len(raw))
+
+    # ------------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------------
+    def _read_payload(self, offset, key_len, length):
+        with open(self.path, "rb") as f:
+            f.seek(offset + RECORD_HEADER.size + key_len)
+            return f.read(length)
+
+    def _dictionary(self, offset):
+        if offset not in self._dicts:
+            header_len = len(DICT_KEY.encode("utf-8"))
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                _, _, length, _, _ = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            self._dicts[offset] = self._read_payload(offset, header_len, length)
+        return self._dicts[offset]
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def keys(self):
+        return sorted(self.index)
+
+    def get(self, key):
+        """키로 원문 조회 (없으면 None)"""
+        if key not in self.index:
+            return None
+        offset, length, dict_offset, _ = self.index[key]
+        payload = self._read_payload(offset, len(key.encode("utf-8")), length)
+        if dict_offset is None:
+            decompressor = zlib.decompressobj(-15)
+        else:
+            decompressor = zlib.decompressobj(-15, self._dictionary(dict_offset))
+        return (decompressor.decompress(payload) + decompressor.flush()).decode("utf-8")
+
+    # ------------------------------------------------------------------
+    # 가져오기 / 내보내기 / 압축
+    # ------------------------------------------------------------------
+    def import_dir(self, cot_dir, delete=False, sample_count=8):
+        """기존 chain_of_thought/*.txt 를 팩으로 가져오기"""
+        files = sorted(Path(cot_dir).glob("*.txt"))
+        if self.dict_offset is None:
+            samples = [p.read_text(encoding="utf-8") for p in files
+                       if p.name.startswith("response_")][:sample_count]
+            self.set_dictionary(build_dictionary(samples))
+
+        imported = 0
+        for path in files:
+            self.put(path.stem, path.read_text(encoding="utf-8"))
+            imported += 1
+            if delete:
+                path.unlink()
+        return imported
+
+    def export(self, keys, out_dir):
+        """지정 키를 개별 .txt 파일로 내보내기"""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        exported = []
+        for key in keys:
+            text = self.get(key)
+            if text is None:
+                print(f"[!] 키 없음: {key}")
+                continue
+            path = out_dir / f"{key}.txt"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            exported.append(path)
+        return exported
+
+    def compact(self):
+        """최신 레코드만 남기고 팩 재작성 (덮어쓴 키의 이전 버전 제거)
+
+        재작성 중에는 잠금을 유지하여 다른 writer의 추가가 유실되지 않도록 함
+        """
+        with self._locked():
+            self.index, self._dicts, self.dict_offset = {}, {}, None
+            if self.path.exists():
+                self._load_index_locked()  # 잠금 전 다른 writer가 추가한 레코드 반영
+            tmp = CoTPackStore(self.path.with_name(self.path.name + ".compact"), level=self.level)
+            if self.dict_offset is not None:
+                tmp.set_dictionary(self._dictionary(self.dict_offset))
+            for key in self.keys():
+                tmp.put(key, self.get(key))
+
+            os.replace(tmp.path, self.path)
+            os.replace(tmp.index_path, self.index_path)
+            tmp.lock_path.unlink(missing_ok=True)
+        self.index, self._dicts, self.dict_offset = {}, {}, None
+        self._load_index()
+
+    def stats(self):
+        raw = sum(entry[3] for entry in self.index.values())
+        pack_bytes = self.path.stat().st_size if self.path.exists() else 0
+        index_bytes = self.index_path.stat().st_size if self.index_path.exists() else 0
+        return {"records": len(self.index), "raw_bytes": raw,
+                "pack_bytes": pack_bytes, "index_bytes": index_bytes}
+
+
+def _dir_usage(path):
+    files = [p for p in Path(path).glob("*.txt")]
+    return len(files), sum(p.stat().st_size for p in files)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chain of Thought artifact pack store")
+    parser.add_argument("--pack", type=str, default="ttp_results/chain_of_thought.pack", help="Pack file path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Pack existing .txt artifacts")
+    p_import.add_argument("--dir", type=str, default="ttp_results/chain_of_thought", help="Source directory")
+    p_import.add_argument("--delete", action="store_true", help="Delete .txt files after packing")
+
+    p_export = sub.add_parser("export", help="Export artifacts as .txt files")
+    p_export.add_argument("keys", nargs="*", help="Keys to export (e.g. response_pb001_case002)")
+    p_export.add_argument("--all", action="store_true", help="Export every key")
+    p_export.add_argument("--out", type=str, default="ttp_results/chain_of_thought", help="Output directory")
+
+    p_list = sub.add_parser("list", help="List keys")
+    p_list.add_argument("--prefix", type=str, default="", help="Key prefix filter")
+
+    sub.add_parser("stats", help="Show pack statistics")
+    sub.add_parser("compact", help="Drop superseded records")
+
+    args = parser.parse_args()
+    store = CoTPackStore(args.pack)
+
+    if args.command == "import":
+        n_files, n_bytes = _dir_usage(args.dir)
+        imported = store.import_dir(args.dir, delete=args.delete)
+        st = store.stats()
+        print(f"[+] {imported}개 파일 가져오기 완료: {store.path}")
+        print(f"[+] 기존: 파일 {n_files}개, {n_bytes / 1024:,.1f}KB")
+        print(f"[+] 팩: 파일 2개, {(st['pack_bytes'] + st['index_bytes']) / 1024:,.1f}KB "
+              f"(압축률 {n_bytes / max(st['pack_bytes'] + st['index_bytes'], 1):.1f}x)")
+
+    elif args.command == "export":
+        keys = store.keys() if args.all else args.keys
+        exported = store.export(keys, args.out)
+        print(f"[+] {len(exported)}개 파일 내보내기 완료: {args.out}")
+
+    elif args.command == "list":
+        for key in store.keys():
+            if key.startswith(args.prefix):
+                print(key)
+
+    elif args.command == "stats":
+        st = store.stats()
+        print(f"레코드: {st['records']}건")
+        print(f"원본 크기: {st['raw_bytes'] / 1024:,.1f}KB")
+        print(f"팩 크기: {st['pack_bytes'] / 1024:,.1f}KB (+ 인덱스 {st['index_bytes'] / 1024:,.1f}KB)")
+
+    elif args.command == "compact":
+        before = store.stats()["pack_bytes"]
+        store.compact()
+        after = store.stats()["pack_bytes"]
+        print(f"[+] 압축 완료: {before / 1024:,.1f}KB -> {after / 1024:,.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,10 @@ import requests
 import time
 from urllib.parse import urlparse
 
+import perf_trace
 
+
+@perf_trace.traced("download_screenshots")
 def download_screenshots(json_file, output_dir="screenshots"):
     """JSON 데이터에서 스크린샷 URL을 읽어 이미지 다운로드"""
 
@@ -35,7 +38,7 @@ def download_screenshots(json_file, output_dir="screenshots"):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     })
 
-    for idx, record in enumerate(data, 1):
+    for idx, record in perf_trace.items("download_screenshot", enumerate(data, 1), label=lambda x: x[0]):
         screenshot_url = record.get('screenshot', '').strip()
 
         # URL이 없거나 빈 경우 스킵
@@ -96,6 +99,7 @@ def download_screenshots(json_file, output_dir="screenshots"):
     return downloaded, skipped, failed
 
 
+@perf_trace.traced("update_csv_with_local_paths")
 def update_csv_with_local_paths(json_file, output_dir="screenshots"):
     """CSV 파일에 로컬 이미지 경로 추가"""
     import csv
@@ -138,19 +142,34 @@ def update_csv_with_local_paths(json_file, output_dir="screenshots"):
     return csv_file
 
 
-if __name__ == "__main__":
-    # 가장 최근 JSON 파일 찾기
+def main():
+    import argparse
     import glob
-    json_files = glob.glob("dfpi_scam_data_*.json")
-    if not json_files:
-        print("[!] JSON 파일을 찾을 수 없습니다.")
-        exit(1)
 
-    latest_json = max(json_files)
-    print(f"[*] 사용할 JSON 파일: {latest_json}")
+    parser = argparse.ArgumentParser(description="Download DFPI scam tracker screenshots")
+    parser.add_argument("--input", type=str, help="Scraped JSON file (default: newest dfpi_scam_data_*.json)")
+    parser.add_argument("--output-dir", type=str, default="screenshots", help="Image output directory")
+    perf_trace.add_arguments(parser)
+
+    args = parser.parse_args()
+    perf_trace.start(args, "download_screenshots")
+
+    json_file = args.input
+    if not json_file:
+        # 가장 최근 JSON 파일 찾기
+        json_files = glob.glob("dfpi_scam_data_*.json")
+        if not json_files:
+            print("[!] JSON 파일을 찾을 수 없습니다.")
+            exit(1)
+        json_file = max(json_files)
+    print(f"[*] 사용할 JSON 파일: {json_file}")
 
     # 스크린샷 다운로드
-    download_screenshots(latest_json, "screenshots")
+    download_screenshots(json_file, args.output_dir)
 
     # CSV 업데이트
-    update_csv_with_local_paths(latest_json, "screenshots")
+    update_csv_with_local_paths(json_file, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+VLM 제출용 스크린샷 전처리 캐시
+- pig_butchering_cases/screenshots/ 의 jpg/jpeg/png 를 디코딩 -> EXIF 회전 보정 -> 긴 변 기준 축소 -> 재인코딩
+- 원본 내용 해시(SHA-256) + 전처리 설정으로 캐시 키 생성, 이미 처리된 이미지는 건너뜀
+- 캐시 미스만 프로세스 풀에서 병렬 처리
+- manifest.json 에 원본/변환 해상도, 바이트 수, 추정 이미지 토큰 기록 및 절감량 요약
+- Pillow 필요 (pip install pillow)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+DEFAULT_MAX_SIDE = 1024        # 모바일 스크린샷 문자 판독 가능한 수준 (VLM 자체 축소 한도 1568보다 작게)
+DEFAULT_QUALITY = 85
+TOKENS_PER_PIXEL = 1 / 750     # 이미지 토큰 추정 (폭 x 높이 / 750)
+MANIFEST_NAME = "manifest.json"
+SAME_FORMAT = {"JPEG": {".jpg", ".jpeg"}, "PNG": {".png"}, "WEBP": {".webp"}}
+
+
+def _require_pil():
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise SystemExit("[!] Pillow가 필요합니다: pip install pillow")
+    return Image, ImageOps
+
+
+def estimate_tokens(width, height):
+    return int(round(width * height * TOKENS_PER_PIXEL))
+
+
+def fit_size(width, height, max_side):
+    """긴 변이 max_side 이하가 되도록 비율 유지 축소 (확대 없음)"""
+    scale = min(1.0, max_side / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PreprocessSettings:
+    def __init__(self, max_side=DEFAULT_MAX_SIDE, image_format="JPEG", quality=DEFAULT_QUALITY):
+        self.max_side = max_side
+        self.format = image_format.upper()
+        self.quality = quality
+
+    @property
+    def extension(self):
+        return {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}[self.format]
+
+    @property
+    def media_type(self):
+        return {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}[self.format]
+
+    def signature(self):
+        return f"{self.format}-{self.max_side}-q{self.quality}"
+
+    def cache_key(self, content_hash):
+        return f"{content_hash[:32]}-{self.signature()}"
+
+
+def preprocess_image(source, target, settings):
+    """원본 1장 처리 (프로세스 풀 워커) -> manifest 항목"""
+    Image, ImageOps = _require_pil()
+    with Image.open(source) as img:
+        original_size = img.size
+        img = ImageOps.exif_transpose(img)
+        upright_size = img.size
+        size = fit_size(*upright_size, settings.max_side)
+        if size != img.size:
+            img = img.resize(size, Image.LANCZOS)
+
+        if settings.format == "JPEG" and img.mode != "RGB":
+            # 투명 영역은 흰 배경으로 합성
+            rgba = img.convert("RGBA")
+            img = Image.new("RGB", rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel("A"))
+
+        tmp = Path(str(target) + ".tmp")
+        options = {"optimize": True}
+        if settings.format in ("JPEG", "WEBP"):
+            options["quality"] = settings.quality
+        img.save(tmp, settings.format, **options)
+
+    # 크기/방향 변화 없이 같은 포맷인데 재인코딩이 더 크면 원본 바이트 유지
+    reencoded = True
+    if (size == original_size and Path(source).suffix.lower() in SAME_FORMAT[settings.format]
+            and os.path.getsize(tmp) >= os.path.getsize(source)):
+        shutil.copyfile(source, tmp)
+        reencoded = False
+    os.replace(tmp, target)
+
+    return {
+        "original": {"width": upright_size[0], "height": upright_size[1], "bytes": os.path.getsize(source),
+                     "tokens": estimate_tokens(*upright_size), "rotated": upright_size != original_size},
+        "derived": {"width": size[0], "height": size[1], "bytes": os.path.getsize(target),
+                    "tokens": estimate_tokens(*size), "reencoded": reencoded},
+    }
+
+
+def _worker(job):
+    source, target, settings_args = job
+    try:
+        return source, preprocess_image(source, target, PreprocessSettings(*settings_args)), None
+    except Exception as e:
+        return source, None, str(e)
+
+
+class ImageCache:
+    """내용 해시 기반 전처리 이미지 캐시"""
+
+    def __init__(self, cache_dir="ttp_results/image_cache", settings=None):
+        self.cache_dir = Path(cache_dir)
+        self.settings = settings or PreprocessSettings()
+        self.manifest_path = self.cache_dir / MANIFEST_NAME
+        self.entries = {}          # 캐시 키 -> 항목
+        self.sources = {}          # 원본 경로 -> 캐시 키
+        if self.manifest_path.exists():
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.sources = data.get("sources", {})
+
+    def target_path(self, key):
+        return self.cache_dir / f"{key}{self.settings.extension}"
+
+    def lookup(self, source):
+        """이미 처리된 원본이면 (전처리 파일 경로, 항목), 아니면 None"""
+        key = self.settings.cache_key(file_hash(source))
+        entry = self.entries.get(key)
+        if entry and self.target_path(key).exists():
+            return self.target_path(key), entry
+        return None
+
+    def build(self, sources, workers=None):
+        """원본 목록 처리 -> (처리 수, 캐시 적중 수, 실패 목록)"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        jobs, pending, hits = [], {}, 0
+        for source in sources:
+            key = self.settings.cache_key(file_hash(source))
+            self.sources[str(source)] = key
+            if key in self.entries and self.target_path(key).exists():
+                hits += 1
+            elif key not in pending:
+                # 같은 내용의 중복 파일은 한 번만 처리
+                pending[key] = str(source)
+                jobs.append((str(source), str(self.target_path(key)),
+                             (self.settings.max_side, self.settings.format, self.settings.quality)))
+
+        failures = []
+        if jobs:
+            keys = {source: key for key, source in pending.items()}
+            workers = workers or min(len(jobs), os.cpu_count() or 1)
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_worker, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+            else:
+                results = [_worker(job) for job in jobs]
+            for source, entry, error in results:
+                if error:
+                    failures.append((source, error))
+                    print(f"[!] 처리 실패: {source} - {error}")
+                    continue
+                entry["source"] = source
+                entry["media_type"] = self.settings.media_type
+                self.entries[keys[source]] = entry
+
+        self.save()
+        return len(jobs) - len(failures), hits, failures
+
+    def save(self):
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings.signature(), "entries": self.entries, "sources": self.sources},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def summary(self, sources=None):
+        """원본 대비 전처리 후 바이트/토큰 합계"""
+        keys = [self.sources[str(s)] for s in sources if str(s) in self.sources] if sources else list(self.sources.values())
+        entries = [self.entries[k] for k in keys if k in self.entries]
+        total = {"images": len(entries)}
+        for side in ("original", "derived"):
+            total[f"{side}_bytes"] = sum(e[side]["bytes"] for e in entries)
+            total[f"{side}_tokens"] = sum(e[side]["tokens"] for e in entries)
+        total["bytes_saved"] = total["original_bytes"] - total["derived_bytes"]
+        total["tokens_saved"] = total["original_tokens"] - total["derived_tokens"]
+        return total
+
+
+def find_images(inputs):
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files.extend(p for p in sorted(path.iterdir()) if p.suffix.lower() in IMAGE_EXTENSIONS)
+        elif path.suffix.lower() in IMAGE_EXTENSIONS:
+            files.append(path)
+    return files
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Preprocess screenshots for VLM submission with a content-hash cache")
+    parser.add_argument("inputs", nargs="*", default=["pig_butchering_cases/screenshots"],
+                       help="Image files or directories (default: pig_butchering_cases/screenshots)")
+    parser.add_argument("--cache-dir", type=str, default="ttp_results/image_cache", help="Cache directory")
+    parser.add_argument("--max-side", type=int, default=DEFAULT_MAX_SIDE,
+                       help=f"Longest side in pixels after downscaling (default: {DEFAULT_MAX_SIDE})")
+    parser.add_argument("--format", type=str, default="JPEG", choices=["JPEG", "PNG", "WEBP"], help="Output format")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="JPEG/WEBP quality")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+
+    args = parser.parse_args()
+
+    sources = find_images(args.inputs)
+    if not sources:
+        print("[!] 처리할 이미지가 없습니다.")
+        return
+
+    cache = ImageCache(args.cache_dir, PreprocessSettings(args.max_side, args.format, args.quality))
+    print(f"[*] 이미지 {len(sources)}장 전처리 ({cache.settings.signature()})")
+    start = time.time()
+    processed, hits, failures = cache.build(sources, workers=args.workers)
+    print(f"[+] 처리 {processed}장, 캐시 적중 {hits}장, 실패 {len(failures)}장 ({time.time() - start:.2f}초)")
+
+    total = cache.summary(sources)
+    if total["original_bytes"]:
+        print(f"[+] 바이트: {total['original_bytes']:,} -> {total['derived_bytes']:,} "
+              f"({total['bytes_saved']:,} 절감, {total['bytes_saved'] / total['original_bytes']:.1%})")
+    if total["original_tokens"]:
+        print(f"[+] 추정 이미지 토큰: {total['original_tokens']:,} -> {total['derived_tokens']:,} "
+              f"({total['tokens_saved']:,} 절감, {total['tokens_saved'] / total['original_tokens']:.1%})")
+    print(f"[+] 매니페스트: {cache.manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
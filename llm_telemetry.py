@@ -0,0 +1,370 @@
+"""
+LLM 호출별 텔레메트리
+- 호출마다 제공자/모델/모드, 입력·출력·캐시 토큰, 첫 토큰 시간(TTFT, 스트리밍 시), 전체 지연,
+  재시도 횟수, 종료 사유(stop_reason / finish_reason), max_tokens 잘림 여부, 추정 비용 기록
+- 기록은 append-only JSONL (기본 ttp_results/llm_calls.jsonl), 실행(run_id) 단위로 구분
+- Prometheus 텍스트 형식 /metrics 엔드포인트 (실행 중 --metrics-port 또는 파일 기반 serve)
+- report: 실행별 지연/TTFT/토큰 백분위수, 모델별 비용, 종료 사유, 재시도/오류 요약
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+DEFAULT_METRICS_FILE = "ttp_results/llm_calls.jsonl"
+RUN_ID = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"   # 프로세스 내 모든 호출 공유
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+TRUNCATION_REASONS = {"max_tokens", "length"}
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_telemetry(path=DEFAULT_METRICS_FILE):
+    """경로별 공유 인스턴스 (한 프로세스의 여러 프로파일러가 같은 파일/실행 ID 사용)"""
+    key = str(Path(path)) if path else None
+    with _registry_lock:
+        if key not in _registry:
+            _registry[key] = LLMTelemetry(path)
+        return _registry[key]
+
+
+def _get(obj, name, default=None):
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def normalize_usage(usage):
+    """Anthropic / OpenAI usage 객체(또는 dict) -> 공통 토큰 필드"""
+    if usage is None:
+        return {}
+    if _get(usage, "input_tokens") is not None:
+        return {
+            "input_tokens": _get(usage, "input_tokens") or 0,
+            "output_tokens": _get(usage, "output_tokens") or 0,
+            "cache_write_tokens": _get(usage, "cache_creation_input_tokens") or 0,
+            "cache_read_tokens": _get(usage, "cache_read_input_tokens") or 0,
+        }
+    details = _get(usage, "prompt_tokens_details")
+    cached = _get(details, "cached_tokens") or 0
+    return {
+        # OpenAI prompt_tokens 는 캐시 적중분 포함 -> 분리
+        "input_tokens": (_get(usage, "prompt_tokens") or 0) - cached,
+        "output_tokens": _get(usage, "completion_tokens") or 0,
+        "cache_write_tokens": 0,
+        "cache_read_tokens": cached,
+    }
+
+
+class CallTimer:
+    """호출 1건 측정 (start -> first_token -> finish/fail -> record)"""
+
+    def __init__(self, telemetry, provider, model, mode, max_tokens, tag=None):
+        self.telemetry = telemetry
+        self.fields = {"provider": provider, "model": model, "mode": mode, "max_tokens": max_tokens,
+                       "tag": tag, "retries": 0, "stream": False}
+        self.started = time.perf_counter()
+        self.ttft = None
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+            self.fields["stream"] = True
+
+    def retry(self, error):
+        self.fields["retries"] += 1
+        self.fields["last_retry_error"] = str(error)[:200]
+
+    def finish(self, usage=None, stop_reason=None):
+        self.fields.update(normalize_usage(usage))
+        self.fields["stop_reason"] = stop_reason
+        self.fields["truncated"] = stop_reason in TRUNCATION_REASONS
+
+    def fail(self, error):
+        self.fields["error"] = f"{type(error).__name__}: {str(error)[:200]}"
+
+    def cancel(self):
+        """의도적으로 취소된 호출 (헤지 패자 등) - 오류로 집계하지 않음"""
+        self.fields["cancelled"] = True
+        self.fields["stop_reason"] = "cancelled"
+
+    def record(self, estimated_usage=None, pricing=None):
+        """기록 확정 (실제 usage가 없으면 estimated_usage로 채우고 usage_source 표시)
+
+        pricing: 토큰 필드 dict -> 비용(USD) 함수
+        """
+        fields = dict(self.fields)
+        if "input_tokens" not in fields and estimated_usage:
+            fields.update(estimated_usage)
+            fields["usage_source"] = "estimated"
+        elif "input_tokens" in fields:
+            fields["usage_source"] = "api"
+        fields["latency_ms"] = round((time.perf_counter() - self.started) * 1000, 1)
+        fields["ttft_ms"] = round(self.ttft * 1000, 1) if self.ttft is not None else None
+        fields["cost_usd"] = round(pricing(fields), 6) if pricing else 0.0
+        return self.telemetry.record(fields)
+
+
+class LLMTelemetry:
+    """호출 기록 저장소 (path가 None이면 파일 없이 메트릭만 집계)"""
+
+    def __init__(self, path=DEFAULT_METRICS_FILE, run_id=RUN_ID):
+        self.path = Path(path) if path else None
+        self.run_id = run_id
+        self.lock = threading.Lock()
+        self.metrics = PromMetrics()
+        self.server = None
+
+    def start_call(self, provider, model, mode, max_tokens, tag=None):
+        return CallTimer(self, provider, model, mode, max_tokens, tag)
+
+    def record(self, fields):
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "run_id": self.run_id, **fields}
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            if self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            self.metrics.observe(record)
+        return record
+
+    def serve(self, port, host="127.0.0.1"):
+        """실행 중 /metrics 노출 (백그라운드 스레드)"""
+        if self.server is None:
+            self.server = serve_metrics(lambda: self.metrics.render(), host, port)
+            print(f"[*] LLM 메트릭: http://{host}:{self.server.server_port}/metrics")
+        return self.server
+
+
+class PromMetrics:
+    """Prometheus 텍스트 형식 카운터/히스토그램"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}     # (이름, 라벨 튜플) -> 값
+        self.histograms = {}   # (이름, 라벨 튜플) -> [버킷 카운트..., 합, 개수]
+
+    def _inc(self, name, labels, value=1.0):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def _observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        hist = self.histograms.setdefault(key, [0] * len(LATENCY_BUCKETS) + [0.0, 0])
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                hist[i] += 1
+        hist[-2] += value
+        hist[-1] += 1
+
+    def observe(self, record):
+        labels = {"provider": record.get("provider") or "", "model": record.get("model") or ""}
+        with self.lock:
+            self._inc("llm_requests_total", {**labels, "stop_reason": str(record.get("stop_reason"))})
+            for kind in ("input", "output", "cache_read", "cache_write"):
+                self._inc("llm_tokens_total", {**labels, "type": kind}, record.get(f"{kind}_tokens") or 0)
+            self._inc("llm_cost_usd_total", labels, record.get("cost_usd") or 0.0)
+            self._inc("llm_retries_total", labels, record.get("retries") or 0)
+            if record.get("error"):
+                self._inc("llm_errors_total", labels)
+            if record.get("cancelled"):
+                self._inc("llm_cancelled_total", labels)
+            if record.get("truncated"):
+                self._inc("llm_truncated_total", labels)
+            self._observe("llm_request_latency_seconds", labels, (record.get("latency_ms") or 0) / 1000)
+            if record.get("ttft_ms") is not None:
+                self._observe("llm_time_to_first_token_seconds", labels, record["ttft_ms"] / 1000)
+
+    @staticmethod
+    def _labels(pairs, extra=None):
+        items = list(pairs) + (extra or [])
+        if not items:
+            return ""
+        return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items) + "}"
+
+    def render(self):
+        lines = []
+        with self.lock:
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                lines.append(f"{name}{self._labels(labels)} {value:g}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    lines.append(f"{name}_bucket{self._labels(labels, [('le', f'{bound:g}')])} {hist[i]}")
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {hist[-1]}")
+                lines.append(f"{name}_sum{self._labels(labels)} {hist[-2]:g}")
+                lines.append(f"{name}_count{self._labels(labels)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(render, host="127.0.0.1", port=9464):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_records(path=DEFAULT_METRICS_FILE, run=None):
+    """JSONL 기록 로드 (run: 실행 ID, 'last'면 마지막 실행)"""
+    records = []
+    if not Path(path).exists():
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue    # 기록 중 중단된 마지막 줄
+    if run == "last" and records:
+        run = records[-1]["run_id"]
+    if run:
+        records = [r for r in records if r.get("run_id") == run]
+    return records
+
+
+def percentile(values, q):
+    """선형 보간 백분위수 (q: 0~100)"""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def summarize(records):
+    """실행별 요약 {run_id: {...}}"""
+    runs = {}
+    for r in records:
+        runs.setdefault(r.get("run_id"), []).append(r)
+
+    summary = {}
+    for run_id, rows in runs.items():
+        def pcts(field):
+            return {f"p{q}": (round(v, 1) if v is not None else None)
+                    for q in (50, 90, 95, 99) for v in [percentile([x.get(field) for x in rows], q)]}
+
+        models = {}
+        for r in rows:
+            m = models.setdefault(f"{r.get('provider')}/{r.get('model')}", {
+                "calls": 0, "input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0,
+                "cache_write_tokens": 0, "cost_usd": 0.0})
+            m["calls"] += 1
+            for k in ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens"):
+                m[k] += r.get(k) or 0
+            m["cost_usd"] = round(m["cost_usd"] + (r.get("cost_usd") or 0), 6)
+
+        stop_reasons = {}
+        for r in rows:
+            key = str(r.get("stop_reason")) if not r.get("error") else "error"
+            stop_reasons[key] = stop_reasons.get(key, 0) + 1
+
+        summary[run_id] = {
+            "first_call": rows[0].get("ts"),
+            "last_call": rows[-1].get("ts"),
+            "calls": len(rows),
+            "errors": sum(1 for r in rows if r.get("error")),
+            "cancelled": sum(1 for r in rows if r.get("cancelled")),
+            "truncated": sum(1 for r in rows if r.get("truncated")),
+            "retries": sum(r.get("retries") or 0 for r in rows),
+            "estimated_usage_calls": sum(1 for r in rows if r.get("usage_source") == "estimated"),
+            "latency_ms": pcts("latency_ms"),
+            "ttft_ms": pcts("ttft_ms"),
+            "output_tokens": pcts("output_tokens"),
+            "stop_reasons": stop_reasons,
+            "models": models,
+            "cost_usd": round(sum(m["cost_usd"] for m in models.values()), 6),
+        }
+    return summary
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-call LLM telemetry report and Prometheus endpoint")
+    parser.add_argument("--metrics-file", type=str, default=DEFAULT_METRICS_FILE, help="Telemetry JSONL file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_report = sub.add_parser("report", help="Summarise runs")
+    p_report.add_argument("--run", type=str, help="Run ID or 'last' (default: all runs)")
+    p_report.add_argument("--json", type=str, help="Also write the summary to this JSON file")
+
+    p_serve = sub.add_parser("serve", help="Serve /metrics built from the telemetry file")
+    p_serve.add_argument("--host", type=str, default="127.0.0.1", help="Bind host")
+    p_serve.add_argument("--port", type=int, default=9464, help="Bind port")
+
+    args = parser.parse_args()
+
+    if args.command == "report":
+        summary = summarize(load_records(args.metrics_file, args.run))
+        if not summary:
+            print(f"[!] 기록이 없습니다: {args.metrics_file}")
+            return
+        for run_id, s in summary.items():
+            lat, ttft = s["latency_ms"], s["ttft_ms"]
+            print(f"\n[*] 실행 {run_id} ({s['first_call']} ~ {s['last_call']})")
+            print(f"    호출 {s['calls']}회, 오류 {s['errors']}, 취소 {s['cancelled']}, 잘림(max_tokens) {s['truncated']}, 재시도 {s['retries']}")
+            print(f"    지연 p50/p95/p99: {lat['p50']} / {lat['p95']} / {lat['p99']} ms")
+            if ttft["p50"] is not None:
+                print(f"    TTFT p50/p95: {ttft['p50']} / {ttft['p95']} ms")
+            print(f"    종료 사유: {s['stop_reasons']}")
+            for model, m in s["models"].items():
+                print(f"    {model}: {m['calls']}회, 입력 {m['input_tokens']:,} / 출력 {m['output_tokens']:,} / "
+                      f"캐시 읽기 {m['cache_read_tokens']:,} 토큰, ${m['cost_usd']:.4f}")
+            if s["estimated_usage_calls"]:
+                print(f"    (usage 미반환 {s['estimated_usage_calls']}회는 문자 수 기반 추정)")
+            print(f"    비용 합계: ${s['cost_usd']:.4f}")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            print(f"\n[+] 저장: {args.json}")
+
+    elif args.command == "serve":
+        def render():
+            metrics = PromMetrics()
+            for record in load_records(args.metrics_file):
+                metrics.observe(record)
+            return metrics.render()
+
+        server = serve_metrics(render, args.host, args.port)
+        print(f"[*] LLM 메트릭: http://{args.host}:{server.server_port}/metrics ({args.metrics_file})")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
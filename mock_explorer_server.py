@@ -0,0 +1,234 @@
+"""
+로컬 목(mock) 블록체인 익스플로러 서버
+- Etherscan 호환 /api (account: balancemulti, balance, txlist)
+- Blockchain.info 호환 /multiaddr, /rawaddr/<address>
+- 주소 해시 기반의 결정적(deterministic) 잔액/거래 내역 생성, --fixtures 로 특정 주소 데이터 지정
+- API별 초당 요청 제한 흉내 (Etherscan: NOTOK 응답, Blockchain.info: HTTP 429)
+- GET /__stats 로 요청 수 확인 (wallet_verifier.py 오프라인 테스트/벤치마크용)
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BASE_TIME = 1_640_995_200  # 2022-01-01 UTC
+DAY = 86_400
+
+
+def _seed(address):
+    return int.from_bytes(hashlib.sha256(address.lower().encode("utf-8")).digest()[:8], "big")
+
+
+class MockExplorerState:
+    def __init__(self, fixtures=None, rate_limit=0.0, latency=0.0):
+        self.fixtures = fixtures or {}     # address(소문자) -> {"balance", "txs": [...]}
+        self.rate_limit = rate_limit       # API별 초당 허용 요청 수 (0 = 무제한)
+        self.latency = latency
+        self.stats = {"requests": 0, "rate_limited": 0, "by_endpoint": {}}
+        self._windows = {}                 # API -> (초, 요청 수)
+        self.lock = threading.Lock()
+
+        # 거래 상대방 풀 (일부는 테스트용 거래소 라벨 대상)
+        self.eth_pool = ["0x" + hashlib.sha256(f"eth-peer-{i}".encode()).hexdigest()[:40] for i in range(20)]
+        self.btc_pool = ["1Peer" + hashlib.sha256(f"btc-peer-{i}".encode()).hexdigest()[:28] for i in range(20)]
+
+    def allow(self, api, endpoint):
+        """초 단위 고정 윈도우 요청 제한"""
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["by_endpoint"][endpoint] = self.stats["by_endpoint"].get(endpoint, 0) + 1
+            if not self.rate_limit:
+                return True
+            second = int(time.time())
+            window, count = self._windows.get(api, (second, 0))
+            if window != second:
+                window, count = second, 0
+            if count >= self.rate_limit:
+                self.stats["rate_limited"] += 1
+                return False
+            self._windows[api] = (window, count + 1)
+            return True
+
+    def eth_account(self, address):
+        """(잔액 wei, 거래 리스트 오름차순)"""
+        key = address.lower()
+        if key in self.fixtures:
+            fixture = self.fixtures[key]
+            return int(fixture.get("balance", 0)), fixture.get("txs", [])
+
+        seed = _seed(key)
+        n_tx = seed % 40
+        balance = (seed >> 8) % 10 ** 16 if seed % 3 == 0 else 0
+        start = BASE_TIME + (seed >> 16) % (900 * DAY)
+        txs = []
+        for i in range(n_tx):
+            peer = self.eth_pool[(seed >> (i % 48)) % len(self.eth_pool)]
+            incoming = (seed >> i) & 1
+            txs.append({
+                "blockNumber": str(14_000_000 + i * 1000),
+                "timeStamp": str(start + i * ((seed >> 24) % 5 + 1) * DAY),
+                "hash": "0x" + hashlib.sha256(f"{key}-{i}".encode()).hexdigest(),
+                "from": peer if incoming else key,
+                "to": key if incoming else peer,
+                "value": str(((seed >> (i % 32)) % 10 ** 6) * 10 ** 12),
+                "isError": "0",
+            })
+        return balance, txs
+
+    def btc_account(self, address):
+        """(n_tx, total_received, total_sent, 거래 리스트 최신순)"""
+        key = address.lower()
+        if key in self.fixtures:
+            fixture = self.fixtures[key]
+            txs = fixture.get("txs", [])
+            received = sum(o["value"] for tx in txs for o in tx["out"] if o.get("addr") == address)
+            sent = sum(i["prev_out"]["value"] for tx in txs for i in tx["inputs"]
+                       if i["prev_out"].get("addr") == address)
+            return len(txs), received, sent, txs
+
+        seed = _seed(key)
+        n_tx = seed % 30
+        start = BASE_TIME + (seed >> 16) % (900 * DAY)
+        txs, received, sent = [], 0, 0
+        for i in range(n_tx):
+            peer = self.btc_pool[(seed >> (i % 48)) % len(self.btc_pool)]
+            value = ((seed >> (i % 32)) % 10 ** 7) + 10_000
+            if i % 2 == 0:
+                inputs, outs = [{"prev_out": {"addr": peer, "value": value}}], [{"addr": address, "value": value}]
+                received += value
+            else:
+                value = min(value, received - sent)
+                inputs, outs = [{"prev_out": {"addr": address, "value": value}}], [{"addr": peer, "value": value}]
+                sent += value
+            txs.append({"hash": hashlib.sha256(f"{key}-{i}".encode()).hexdigest(),
+                        "time": start + i * 3 * DAY, "inputs": inputs, "out": outs})
+        txs.reverse()  # blockchain.info는 최신 거래부터 반환
+        return n_tx, received, sent, txs
+
+
+class MockExplorerHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        state = self.state
+        if state.latency:
+            time.sleep(state.latency)
+
+        if url.path == "/__stats":
+            with state.lock:
+                return self._send_json(json.loads(json.dumps(state.stats)))
+
+        if url.path == "/api":
+            action = query.get("action", "")
+            if not state.allow("etherscan", f"etherscan.{action}"):
+                return self._send_json({"status": "0", "message": "NOTOK",
+                                        "result": "Max rate limit reached"})
+            return self._etherscan(action, query)
+
+        if url.path == "/multiaddr":
+            if not state.allow("blockchain_info", "blockchain_info.multiaddr"):
+                return self._send_json({"error": "rate limited"}, status=429)
+            addresses = [a for a in query.get("active", "").split("|") if a]
+            summary = []
+            for address in addresses:
+                n_tx, received, sent, _ = state.btc_account(address)
+                summary.append({"address": address, "n_tx": n_tx, "total_received": received,
+                                "total_sent": sent, "final_balance": received - sent})
+            return self._send_json({"addresses": summary, "txs": []})
+
+        if url.path.startswith("/rawaddr/"):
+            if not state.allow("blockchain_info", "blockchain_info.rawaddr"):
+                return self._send_json({"error": "rate limited"}, status=429)
+            address = url.path[len("/rawaddr/"):]
+            n_tx, received, sent, txs = state.btc_account(address)
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", 50))
+            return self._send_json({"address": address, "n_tx": n_tx, "total_received": received,
+                                    "total_sent": sent, "final_balance": received - sent,
+                                    "txs": txs[offset:offset + limit]})
+
+        self._send_json({"error": "not found"}, status=404)
+
+    def _etherscan(self, action, query):
+        state = self.state
+        if action == "balancemulti":
+            addresses = [a for a in query.get("address", "").split(",") if a]
+            if len(addresses) > 20:
+                return self._send_json({"status": "0", "message": "NOTOK",
+                                        "result": "Maximum of 20 addresses per request"})
+            result = [{"account": a, "balance": str(state.eth_account(a)[0])} for a in addresses]
+            return self._send_json({"status": "1", "message": "OK", "result": result})
+
+        if action == "balance":
+            balance, _ = state.eth_account(query.get("address", ""))
+            return self._send_json({"status": "1", "message": "OK", "result": str(balance)})
+
+        if action == "txlist":
+            _, txs = state.eth_account(query.get("address", ""))
+            if query.get("sort") == "desc":
+                txs = list(reversed(txs))
+            page = int(query.get("page", 1))
+            offset = int(query.get("offset", 10000))
+            txs = txs[(page - 1) * offset:page * offset]
+            if not txs:
+                return self._send_json({"status": "0", "message": "No transactions found", "result": []})
+            return self._send_json({"status": "1", "message": "OK", "result": txs})
+
+        self._send_json({"status": "0", "message": "NOTOK", "result": f"Unknown action {action}"})
+
+
+def serve(host="127.0.0.1", port=8090, state=None, background=False):
+    """목 익스플로러 서버 실행 (background=True면 스레드로 실행 후 서버 반환)"""
+    handler = type("Handler", (MockExplorerHandler,), {"state": state or MockExplorerState()})
+    server = ThreadingHTTPServer((host, port), handler)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    print(f"[*] 목 익스플로러 서버: http://{host}:{server.server_port}")
+    print(f"    wallet_verifier.py --etherscan-url http://{host}:{server.server_port}/api "
+          f"--blockchain-info-url http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return server
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in blockchain explorer for offline tests")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind host")
+    parser.add_argument("--port", type=int, default=8090, help="Bind port")
+    parser.add_argument("--fixtures", type=str, help="JSON file of per-address balances/transactions")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                       help="Requests per second allowed per API (default: unlimited)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request (sec)")
+
+    args = parser.parse_args()
+
+    fixtures = None
+    if args.fixtures:
+        with open(args.fixtures, "r", encoding="utf-8") as f:
+            fixtures = {k.lower(): v for k, v in json.load(f).items()}
+    serve(args.host, args.port, MockExplorerState(fixtures, args.rate_limit, args.latency))
+
+
+if __name__ == "__main__":
+    main()
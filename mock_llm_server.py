@@ -0,0 +1,577 @@
+"""
+로컬 목(mock) LLM 서버
+- Anthropic Messages / OpenAI Chat Completions 엔드포인트 흉내 (지연 주입, "stream": true면 SSE)
+- 지연 분포: uniform / lognormal / exponential / pareto (--latency-dist, --latency-shape)
+- 장애 주입 (요청별 확률): 429(retry-after), 5xx, 잘린 응답, 깨진 JSON (--seed로 재현)
+- 잘림은 truncated 장애 주입 시에만 (stop_reason=max_tokens / finish_reason=length), 장애 없이는 기록 응답 그대로
+- tools 요청(구조화 출력 모드)은 기록 응답의 ttp_profile로 tool_use / tool_calls 응답 (스트리밍 미지원)
+- GET /mock/stats: 요청/장애 유형별 카운트
+- Anthropic Message Batches / OpenAI Files + Batches 엔드포인트 흉내
+- 기록된 response_*.txt 재생 (ttp_profile JSON이 있는 기록만), 없으면 최소 TTP JSON 생성
+- 패킹 프롬프트(**Case ID:** 가 여러 개)는 케이스별 {case_id, ttp_profile} JSON 배열로 응답
+- 실제 API 호출 없이 ttp_profiler.py / ttp_batch.py / ttp_hedge.py 테스트용
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+LATENCY_DISTRIBUTIONS = ("uniform", "lognormal", "exponential", "pareto")
+DEFAULT_LATENCY_SHAPE = {"lognormal": 0.5, "pareto": 2.5}
+FAULT_TYPES = ("rate_limit", "server_error", "truncated", "malformed")
+
+
+class MockLLMState:
+    def __init__(self, replay_dir="ttp_results/chain_of_thought", batch_delay=2.0,
+                 latency=0.0, latency_jitter=0.0, latency_dist="uniform", latency_shape=None,
+                 rate_limit_rate=0.0, server_error_rate=0.0, truncate_rate=0.0, malformed_rate=0.0,
+                 retry_after=1.0, seed=None):
+        self.replay_dir = Path(replay_dir) if replay_dir else None
+        self.batch_delay = batch_delay
+        self.latency = latency                # 동기 요청 기본 지연 (초, lognormal/pareto는 척도)
+        self.latency_jitter = latency_jitter  # 추가 지연 (uniform: 상한, exponential: 평균)
+        self.latency_dist = latency_dist
+        self.latency_shape = latency_shape or DEFAULT_LATENCY_SHAPE.get(latency_dist)
+        self.fault_rates = {"rate_limit": rate_limit_rate, "server_error": server_error_rate,
+                            "truncated": truncate_rate, "malformed": malformed_rate}
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.counters = {"requests": 0, **{f: 0 for f in FAULT_TYPES}}
+        self.files = {}      # file_id -> bytes
+        self.batches = {}    # batch_id -> dict
+        self.lock = threading.Lock()
+
+    def sample_latency(self):
+        with self.lock:
+            rng = self.random
+            if self.latency_dist == "lognormal":
+                # 중앙값 = latency, 꼬리 두께 = shape(sigma)
+                return self.latency * rng.lognormvariate(0, self.latency_shape) + rng.uniform(0, self.latency_jitter)
+            if self.latency_dist == "exponential":
+                return self.latency + (rng.expovariate(1 / self.latency_jitter) if self.latency_jitter else 0.0)
+            if self.latency_dist == "pareto":
+                # 최솟값 = latency, shape(alpha)가 작을수록 꼬리가 김
+                return self.latency * rng.paretovariate(self.latency_shape)
+            return self.latency + rng.uniform(0, self.latency_jitter)
+
+    def sample_fault(self):
+        """요청 1건의 장애 유형 (없으면 None) + 카운터 갱신"""
+        with self.lock:
+            self.counters["requests"] += 1
+            draw = self.random.random()
+            for fault in FAULT_TYPES:
+                draw -= self.fault_rates[fault]
+                if draw < 0:
+                    self.counters[fault] += 1
+                    return fault
+        return None
+
+    def corrupt_json(self, text):
+        """응답 내 JSON을 파싱 불가능하게 변형 (닫는 괄호 제거 / 후행 쉼표 / 콜론 제거)"""
+        end = text.rfind("}")
+        if end == -1:
+            return text[:len(text) // 2]
+        with self.lock:
+            mode = self.random.choice(("drop_brace", "trailing_comma", "drop_colon"))
+        if mode == "drop_brace":
+            return text[:end] + text[end + 1:]
+        if mode == "trailing_comma":
+            return text[:end].rstrip() + ",\n" + text[end:]
+        colon = text.find('": ')
+        return text[:colon + 1] + text[colon + 2:] if colon != -1 else text[:end]
+
+    def truncate(self, text):
+        with self.lock:
+            keep = self.random.uniform(0.3, 0.9)
+        return text[:int(len(text) * keep)]
+
+    def response_text(self, custom_id, prompt):
+        """기록된 응답 재생 (없으면 프롬프트의 case_id로 최소 응답 생성)
+        Case ID가 여러 개인 패킹 프롬프트는 케이스별 ttp_profile JSON 배열로 응답"""
+        case_ids = re.findall(r"\*\*Case ID:\*\*\s*(\S+)", prompt or "")
+        if len(case_ids) > 1:
+            items = []
+            for cid in case_ids:
+                text = self.response_text(None, f"**Case ID:** {cid}")
+                items.append({"case_id": int(cid) if cid.isdigit() else cid, "ttp_profile": self.profile_in(text)})
+            return "## Packed Analysis (mock)\n\n```json\n" + json.dumps(items, indent=2) + "\n```"
+        case_id = case_ids[0] if case_ids else "0"
+
+        if self.replay_dir:
+            if custom_id:
+                candidates = [self.replay_dir / f"response_{custom_id}.txt"]
+            elif case_id.isdigit():
+                candidates = sorted(self.replay_dir.glob(f"response_pb*_case{int(case_id):03d}.txt"))
+            else:
+                candidates = []
+            for path in candidates:
+                if path.exists():
+                    text = path.read_text(encoding="utf-8")
+                    # ttp_profile JSON이 없는 기록(자유 서술 응답)은 장애가 아니므로 재생하지 않음
+                    if self.profile_in(text) is not None:
+                        return text
+
+        profile = {
+            "chain_of_thought": {"step6_confidence_assessment": "mock response"},
+            "ttp_profile": self.minimal_profile(case_id),
+        }
+        return "## Chain of Thought Analysis (mock)\n\n```json\n" + json.dumps(profile, indent=2) + "\n```"
+
+    @staticmethod
+    def minimal_profile(case_id):
+        return {
+            "case_id": int(case_id) if case_id.isdigit() else case_id,
+            "approach_and_lure": {"initial_contact_platform": [], "lure_type": ["other"],
+                                  "communication_migration": "unknown"},
+            "impersonation_and_psychology": {"scammer_persona": {}, "psychological_tactics": []},
+            "fraud_mechanism": {"platform_type": "other"},
+            "extraction_metadata": {"confidence_score": 0.5, "missing_information": [], "notes": "mock"},
+        }
+
+    @staticmethod
+    def profile_in(text):
+        """응답 텍스트의 JSON 블록에서 ttp_profile dict (없으면 None)"""
+        text = text or ""
+        candidates = re.findall(r"```json\s*(\{.*?\})\s*```", text, re.DOTALL)
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            candidates.append(text[start:end + 1])
+        for candidate in candidates:
+            try:
+                data = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(data, dict) and isinstance(data.get("ttp_profile"), dict):
+                return data["ttp_profile"]
+        return None
+
+    def tool_input(self, text, prompt):
+        """구조화 출력 도구 입력 {"ttp_profile": ...} (응답 텍스트의 JSON, 없으면 최소 프로파일)"""
+        profile = self.profile_in(text)
+        if profile is None:
+            match = re.search(r"\*\*Case ID:\*\*\s*(\S+)", prompt or "")
+            profile = self.minimal_profile(match.group(1) if match else "0")
+        return {"ttp_profile": profile, "rationale": "mock replay"}
+
+    def batch_status(self, batch):
+        """제출 후 batch_delay 초가 지나면 완료"""
+        done = time.time() - batch["created"] >= self.batch_delay
+        if batch["kind"] == "anthropic":
+            return "ended" if done else "in_progress"
+        return "completed" if done else "in_progress"
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    state = None  # serve()에서 주입
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send_json(self, data, status=200, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_jsonl(self, lines):
+        body = ("\n".join(json.dumps(l) for l in lines) + "\n").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-jsonl")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_sse(self):
+        # HTTP/1.0 응답: Content-Length 없이 연결 종료로 스트림 끝 표시
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def _send_event(self, data, event=None):
+        payload = data if isinstance(data, str) else json.dumps(data)
+        chunk = (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
+        self.wfile.write(chunk.encode("utf-8"))
+        self.wfile.flush()
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    # ------------------------------------------------------------------
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        body = self._read_body()
+
+        if path == "/v1/messages":
+            return self._create_message(json.loads(body))
+        if path == "/v1/chat/completions":
+            return self._create_chat_completion(json.loads(body))
+        if path == "/v1/messages/batches":
+            return self._create_anthropic_batch(json.loads(body))
+        if path == "/v1/files":
+            return self._upload_file(body)
+        if path == "/v1/batches":
+            return self._create_openai_batch(json.loads(body))
+        self._send_json({"error": {"type": "not_found", "message": path}}, 404)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+
+        if path == "/mock/stats":
+            with self.state.lock:
+                return self._send_json(dict(self.state.counters))
+        m = re.fullmatch(r"/v1/messages/batches/([^/]+)(/results)?", path)
+        if m:
+            return self._get_anthropic_batch(m.group(1), bool(m.group(2)))
+        m = re.fullmatch(r"/v1/batches/([^/]+)", path)
+        if m:
+            return self._get_openai_batch(m.group(1))
+        m = re.fullmatch(r"/v1/files/([^/]+)/content", path)
+        if m:
+            return self._get_file_content(m.group(1))
+        self._send_json({"error": {"type": "not_found", "message": path}}, 404)
+
+    # ------------------------------------------------------------------
+    # 동기 API (Anthropic Messages / OpenAI Chat Completions)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _prompt_of(messages):
+        content = messages[-1].get("content", "") if messages else ""
+        if isinstance(content, list):
+            content = "".join(c.get("text", "") for c in content if isinstance(c, dict))
+        return content
+
+    @staticmethod
+    def _chunks(text, size=64):
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def _send_fault(self, fault, kind):
+        """429 / 5xx 오류 응답 (제공자별 오류 형식)"""
+        if fault == "rate_limit":
+            status, err_type, message = 429, "rate_limit_error", "mock rate limit"
+        else:
+            with self.state.lock:
+                status = self.state.random.choice((500, 502, 503, 529 if kind == "anthropic" else 500))
+            err_type, message = ("overloaded_error" if status == 529 else "api_error"), "mock server error"
+        if kind == "anthropic":
+            body = {"type": "error", "error": {"type": err_type, "message": message}}
+        else:
+            body = {"error": {"message": message, "type": err_type, "code": None}}
+        headers = {"retry-after": f"{self.state.retry_after:g}"} if fault == "rate_limit" else None
+        self._send_json(body, status, headers)
+
+    def _completion(self, payload, fault=None):
+        """(프롬프트, 응답 텍스트, 입력 토큰, 출력 토큰, 잘림 여부)
+
+        기록 응답은 실제 API가 max_tokens 안에서 반환한 것이므로 잘림은 truncated 장애 주입 시에만
+        (문자 수/4 토큰 추정은 실제보다 커서 한도 비교에 쓰면 정상 응답도 잘림)
+        tools 요청이면 응답 텍스트 대신 도구 입력 JSON 문자열
+        """
+        prompt = self._prompt_of(payload.get("messages", []))
+        text = self.state.response_text(None, prompt)
+        if payload.get("tools"):
+            text = json.dumps(self.state.tool_input(text, prompt), ensure_ascii=False)
+        if fault == "malformed":
+            text = self.state.corrupt_json(text)
+        truncated = fault == "truncated"
+        if truncated:
+            # 출력 한도에서 잘린 것처럼 응답 (max_tokens = 실제 출력 토큰)
+            text = self.state.truncate(text)
+        max_tokens = payload.get("max_tokens") or payload.get("max_completion_tokens")
+        output_tokens = min(len(text) // 4 + 1, max_tokens) if max_tokens else len(text) // 4 + 1
+        return prompt, text, len(prompt) // 4 + 1, output_tokens, truncated
+
+    @staticmethod
+    def _tool_name(tool):
+        return tool.get("name") or (tool.get("function") or {}).get("name")
+
+    def _reject_tool_stream(self, kind):
+        message = "mock server does not stream tool calls"
+        if kind == "anthropic":
+            body = {"type": "error", "error": {"type": "invalid_request_error", "message": message}}
+        else:
+            body = {"error": {"message": message, "type": "invalid_request_error", "code": None}}
+        self._send_json(body, 400)
+
+    def _create_message(self, payload):
+        state = self.state
+        fault = state.sample_fault()
+        time.sleep(state.sample_latency())
+        if fault in ("rate_limit", "server_error"):
+            return self._send_fault(fault, "anthropic")
+        if payload.get("tools") and payload.get("stream"):
+            return self._reject_tool_stream("anthropic")
+        prompt, text, input_tokens, output_tokens, truncated = self._completion(payload, fault)
+        stop_reason = "max_tokens" if truncated else "end_turn"
+        content = [{"type": "text", "text": text}]
+        if payload.get("tools"):
+            # 도구 입력은 dict여야 하므로 잘림/깨진 JSON이면 ttp_profile 없는 입력
+            try:
+                tool_input = json.loads(text)
+            except ValueError:
+                tool_input = {}
+            content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}",
+                        "name": self._tool_name(payload["tools"][0]), "input": tool_input}]
+            stop_reason = "max_tokens" if truncated else "tool_use"
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": payload.get("model", "mock"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+        if not payload.get("stream"):
+            return self._send_json(message)
+
+        self._start_sse()
+        start = dict(message, content=[], stop_reason=None, usage={"input_tokens": input_tokens, "output_tokens": 1})
+        self._send_event({"type": "message_start", "message": start}, "message_start")
+        self._send_event({"type": "content_block_start", "index": 0,
+                          "content_block": {"type": "text", "text": ""}}, "content_block_start")
+        for piece in self._chunks(text):
+            self._send_event({"type": "content_block_delta", "index": 0,
+                              "delta": {"type": "text_delta", "text": piece}}, "content_block_delta")
+        self._send_event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        self._send_event({"type": "message_delta", "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                          "usage": {"output_tokens": output_tokens}}, "message_delta")
+        self._send_event({"type": "message_stop"}, "message_stop")
+
+    def _create_chat_completion(self, payload):
+        state = self.state
+        fault = state.sample_fault()
+        time.sleep(state.sample_latency())
+        if fault in ("rate_limit", "server_error"):
+            return self._send_fault(fault, "openai")
+        if payload.get("tools") and payload.get("stream"):
+            return self._reject_tool_stream("openai")
+        prompt, text, input_tokens, output_tokens, truncated = self._completion(payload, fault)
+        finish_reason = "length" if truncated else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        usage = {"prompt_tokens": input_tokens, "completion_tokens": output_tokens,
+                 "total_tokens": input_tokens + output_tokens}
+        message = {"role": "assistant", "content": text}
+        if payload.get("tools"):
+            # 함수 인자는 문자열이므로 잘림/깨진 JSON을 그대로 전달
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+                "function": {"name": self._tool_name(payload["tools"][0]), "arguments": text}}]}
+            finish_reason = "length" if truncated else "tool_calls"
+        if not payload.get("stream"):
+            return self._send_json({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "mock"),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+
+        self._start_sse()
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": payload.get("model", "mock")}
+        self._send_event(dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                              "finish_reason": None}]))
+        for piece in self._chunks(text):
+            self._send_event(dict(base, choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}]))
+        self._send_event(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": finish_reason}]))
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            self._send_event(dict(base, choices=[], usage=usage))
+        self._send_event("[DONE]")
+
+    # ------------------------------------------------------------------
+    # Anthropic Message Batches
+    # ------------------------------------------------------------------
+    def _create_anthropic_batch(self, payload):
+        state = self.state
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        with state.lock:
+            state.batches[batch_id] = {
+                "kind": "anthropic",
+                "created": time.time(),
+                "requests": payload.get("requests", []),
+            }
+        self._get_anthropic_batch(batch_id, False)
+
+    def _get_anthropic_batch(self, batch_id, results):
+        state = self.state
+        batch = state.batches.get(batch_id)
+        if batch is None:
+            return self._send_json({"error": {"type": "not_found_error"}}, 404)
+        status = state.batch_status(batch)
+
+        if results:
+            if status != "ended":
+                return self._send_json({"error": {"type": "invalid_request_error",
+                                                  "message": "batch not ended"}}, 400)
+            lines = []
+            for req in batch["requests"]:
+                prompt = req["params"]["messages"][0]["content"]
+                text = state.response_text(req["custom_id"], prompt)
+                lines.append({
+                    "custom_id": req["custom_id"],
+                    "result": {"type": "succeeded", "message": {
+                        "type": "message", "role": "assistant",
+                        "content": [{"type": "text", "text": text}],
+                        "stop_reason": "end_turn",
+                    }},
+                })
+            return self._send_jsonl(lines)
+
+        n = len(batch["requests"])
+        host = self.headers.get("Host", "localhost")
+        self._send_json({
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": status,
+            "request_counts": {"processing": 0 if status == "ended" else n,
+                               "succeeded": n if status == "ended" else 0,
+                               "errored": 0, "canceled": 0, "expired": 0},
+            "results_url": f"http://{host}/v1/messages/batches/{batch_id}/results" if status == "ended" else None,
+        })
+
+    # ------------------------------------------------------------------
+    # OpenAI Files + Batches
+    # ------------------------------------------------------------------
+    def _upload_file(self, body):
+        msg = BytesParser(policy=default_policy).parsebytes(
+            b"Content-Type: " + self.headers.get("Content-Type", "").encode("utf-8") + b"\r\n\r\n" + body)
+        content = b""
+        for part in msg.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True)
+
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        with self.state.lock:
+            self.state.files[file_id] = content
+        self._send_json({"id": file_id, "object": "file", "bytes": len(content), "purpose": "batch"})
+
+    def _create_openai_batch(self, payload):
+        state = self.state
+        content = state.files.get(payload.get("input_file_id"), b"")
+        requests = [json.loads(l) for l in content.decode("utf-8").splitlines() if l.strip()]
+
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        with state.lock:
+            state.batches[batch_id] = {"kind": "openai", "created": time.time(), "requests": requests}
+        self._get_openai_batch(batch_id)
+
+    def _get_openai_batch(self, batch_id):
+        state = self.state
+        batch = state.batches.get(batch_id)
+        if batch is None:
+            return self._send_json({"error": {"message": "not found"}}, 404)
+        status = state.batch_status(batch)
+
+        output_file_id = None
+        if status == "completed":
+            output_file_id = batch.get("output_file_id")
+            if output_file_id is None:
+                lines = []
+                for req in batch["requests"]:
+                    prompt = req["body"]["messages"][0]["content"]
+                    text = state.response_text(req["custom_id"], prompt)
+                    lines.append(json.dumps({
+                        "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                        "custom_id": req["custom_id"],
+                        "response": {"status_code": 200, "body": {
+                            "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                         "finish_reason": "stop"}],
+                        }},
+                        "error": None,
+                    }))
+                output_file_id = f"file-{uuid.uuid4().hex[:24]}"
+                with state.lock:
+                    state.files[output_file_id] = ("\n".join(lines) + "\n").encode("utf-8")
+                    batch["output_file_id"] = output_file_id
+
+        n = len(batch["requests"])
+        self._send_json({
+            "id": batch_id,
+            "object": "batch",
+            "status": status,
+            "output_file_id": output_file_id,
+            "request_counts": {"total": n, "completed": n if status == "completed" else 0, "failed": 0},
+        })
+
+    def _get_file_content(self, file_id):
+        content = self.state.files.get(file_id)
+        if content is None:
+            return self._send_json({"error": {"message": "not found"}}, 404)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def serve(host="127.0.0.1", port=8765, state=None, background=False):
+    """목 서버 실행 (background=True면 데몬 스레드로 실행 후 서버 반환)"""
+    handler = type("BoundMockLLMHandler", (MockLLMHandler,), {"state": state or MockLLMState()})
+    server = ThreadingHTTPServer((host, port), handler)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    print(f"[*] Mock LLM 서버 실행: http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mock LLM server for TTP Profiler")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind host")
+    parser.add_argument("--port", type=int, default=8765, help="Bind port")
+    parser.add_argument("--replay-dir", type=str, default="ttp_results/chain_of_thought",
+                       help="Directory with recorded response_*.txt files")
+    parser.add_argument("--batch-delay", type=float, default=2.0,
+                       help="Seconds until a submitted batch completes")
+    parser.add_argument("--latency", type=float, default=0.0,
+                       help="Base latency for /v1/messages and /v1/chat/completions (sec)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0,
+                       help="Extra latency: uniform upper bound, or the mean for --latency-dist exponential")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="uniform",
+                       help="Latency distribution (lognormal: median=--latency, pareto: minimum=--latency)")
+    parser.add_argument("--latency-shape", type=float,
+                       help="Lognormal sigma or pareto alpha (default: 0.5 / 2.5)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="Fraction answered 5xx")
+    parser.add_argument("--truncate-rate", type=float, default=0.0,
+                       help="Fraction cut short with stop_reason=max_tokens / finish_reason=length")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction with corrupted JSON")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after header on 429 (sec)")
+    parser.add_argument("--seed", type=int, help="Random seed for latency and fault sampling")
+
+    args = parser.parse_args()
+    serve(args.host, args.port, MockLLMState(
+        args.replay_dir, args.batch_delay, args.latency, args.latency_jitter,
+        latency_dist=args.latency_dist, latency_shape=args.latency_shape,
+        rate_limit_rate=args.rate_limit_rate, server_error_rate=args.server_error_rate,
+        truncate_rate=args.truncate_rate, malformed_rate=args.malformed_rate,
+        retry_after=args.retry_after, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+피해 신고 서술문 의미 군집화 및 유사 케이스 검색 (CPU 전용)
+- complaint_narrative + 추출된 TTP 필드(ttp_* 토큰)를 TF-IDF (1~2-gram) 희소 행렬로 변환
+- 무작위 truncated SVD(NumPy, 대규모 데이터는 표본 학습 후 fold-in)로 저차원 임베딩, L2 정규화 후 코사인 유사도
+- IVF(k-means 조대 양자화 + 역 리스트) 근사 최근접 이웃 인덱스를 .npz로 저장
+- 증분 갱신: 학습된 어휘/IDF/SVD 기저로 신규(또는 서술문이 바뀐) 케이스만 임베딩 후 인덱스에 추가
+- 배치 군집화: 근사 이웃 중 유사도 임계값 이상을 union-find로 묶어 캠페인(공유 스크립트/페르소나/플랫폼) 추출
+"""
+
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+from ttp_aggregate import get_path
+from ttp_stats import CATEGORICAL_FIELDS, as_values, require_numpy, iter_profile_files
+from wallet_graph import UnionFind
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9.\-]*[a-z0-9]|[a-z0-9]")
+STOPWORDS = set("""
+a an and are as at be been but by for from had has have he her his i if in into is it its me my not of on or
+our she so than that the their them then there they this to was we were which who will with would you your
+""".split())
+TTP_TEXT_FIELDS = dict(CATEGORICAL_FIELDS, platform_names=("fraud_mechanism", "platform_names"),
+                       platform_urls=("fraud_mechanism", "platform_urls"))
+
+DEFAULT_DIMS = 128
+DEFAULT_MIN_DF = 2
+DEFAULT_MAX_DF = 0.5
+DEFAULT_MAX_FEATURES = 50_000
+DEFAULT_NPROBE = 8
+DEFAULT_FIT_SAMPLE = 20_000
+ROW_CHUNK = 2048
+
+
+def tokenize(text):
+    words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def ttp_tokens(profile):
+    """프로파일 필드값 -> ttp_<필드>=<값> 토큰 (서술문 어휘와 분리)"""
+    tokens = []
+    for field, path in TTP_TEXT_FIELDS.items():
+        for value in as_values(get_path(profile, path)):
+            tokens.append(f"ttp_{field}={value}")
+    persona = get_path(profile, ("impersonation_and_psychology", "scammer_persona"))
+    for p in (persona if isinstance(persona, list) else [persona]):
+        if isinstance(p, dict) and isinstance(p.get("name"), str):
+            tokens.append(f"ttp_persona={p['name'].strip().lower()}")
+    return tokens
+
+
+def load_documents(cases_file, profile_inputs):
+    """{pb 라벨: 토큰 리스트} (서술문 + 해당 케이스 프로파일 토큰)"""
+    profiles = {}
+    for _, pb_id, profile in iter_profile_files(profile_inputs):
+        if pb_id is not None and str(pb_id).isdigit():
+            profiles[f"pb_{int(pb_id):03d}"] = profile
+
+    with open(cases_file, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    docs = {}
+    for case in cases:
+        if not str(case.get("pb_case_id", "")).isdigit():
+            continue
+        label = f"pb_{int(case['pb_case_id']):03d}"
+        text = " ".join(str(case.get(k) or "") for k in ("complaint_narrative", "primary_subject", "website"))
+        docs[label] = tokenize(text) + ttp_tokens(profiles.get(label, {}))
+    return docs
+
+
+def doc_hash(tokens):
+    return hashlib.sha1("\x00".join(tokens).encode("utf-8")).hexdigest()[:16]
+
+
+class SparseRows:
+    """CSR 희소 행렬 (행: 문서, 열: 어휘)"""
+
+    def __init__(self, indptr, indices, data, n_cols):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_cols = n_cols
+
+    @property
+    def n_rows(self):
+        return len(self.indptr) - 1
+
+    def matmul(self, dense):
+        """(n, V) @ (V, k) -> (n, k), 행 묶음 단위로 reduceat"""
+        np = require_numpy()
+        dense = dense.astype(np.float32)
+        out = np.zeros((self.n_rows, dense.shape[1]), dtype=np.float32)
+        for start in range(0, self.n_rows, ROW_CHUNK):
+            stop = min(start + ROW_CHUNK, self.n_rows)
+            lo, hi = self.indptr[start], self.indptr[stop]
+            if lo == hi:
+                continue
+            prod = self.data[lo:hi, None] * dense[self.indices[lo:hi]]
+            offsets = self.indptr[start:stop] - lo
+            nonempty = self.indptr[start:stop] < self.indptr[start + 1:stop + 1]
+            out[start:stop][nonempty] = np.add.reduceat(prod, offsets[nonempty], axis=0)
+        return out
+
+    def transpose(self):
+        np = require_numpy()
+        rows = np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        indptr = np.zeros(self.n_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.n_cols), out=indptr[1:])
+        return SparseRows(indptr, rows[order], self.data[order], self.n_rows)
+
+
+class TfidfSvdModel:
+    """어휘 + IDF + SVD 기저 (학습 후 고정, 신규 문서는 fold-in)"""
+
+    def __init__(self, vocab, idf, components):
+        self.vocab = list(vocab)
+        self.index = {t: i for i, t in enumerate(self.vocab)}
+        self.idf = idf                  # (V,)
+        self.components = components    # (k, V)
+
+    @classmethod
+    def fit(cls, docs, dims=DEFAULT_DIMS, min_df=DEFAULT_MIN_DF, max_df=DEFAULT_MAX_DF,
+            max_features=DEFAULT_MAX_FEATURES, fit_sample=DEFAULT_FIT_SAMPLE, seed=0):
+        np = require_numpy()
+        n = len(docs)
+        df = Counter()
+        for tokens in docs:
+            df.update(set(tokens))
+        limit = max(min_df, int(max_df * n)) if n > 10 else n
+        terms = [t for t, c in df.items() if min_df <= c <= limit or t.startswith("ttp_") and c >= min_df]
+        terms = sorted(terms, key=lambda t: (-df[t], t))[:max_features]
+        terms.sort()
+        idf = np.asarray([math.log((1 + n) / (1 + df[t])) + 1 for t in terms], dtype=np.float32)
+
+        model = cls(terms, idf, None)
+        # SVD 기저는 표본으로 학습 (나머지 문서는 embed 시 fold-in)
+        if n > fit_sample:
+            picks = np.random.default_rng(seed).choice(n, fit_sample, replace=False)
+            docs = [docs[i] for i in np.sort(picks)]
+        matrix = model.tfidf(docs)
+        model.components = randomized_svd(matrix, min(dims, max(1, len(docs) - 1), len(terms)), seed=seed)
+        return model
+
+    def tfidf(self, docs):
+        """문서 토큰 -> sublinear TF x IDF, 행 L2 정규화 CSR"""
+        np = require_numpy()
+        index = self.index
+        lengths, cols = [], []
+        for tokens in docs:
+            ids = [index[t] for t in tokens if t in index]
+            lengths.append(len(ids))
+            cols.extend(ids)
+        rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        keys = np.sort(rows * len(self.vocab) + np.asarray(cols, dtype=np.int64))
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        starts = np.flatnonzero(first)
+        counts = np.diff(np.append(starts, len(keys)))
+        rows, cols = np.divmod(keys[starts], len(self.vocab))
+        data = (1 + np.log(counts)) * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(lengths)))
+        data = data / np.where(norms > 0, norms, 1)[rows]
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(lengths)), out=indptr[1:])
+        return SparseRows(indptr, cols, data.astype(np.float32), len(self.vocab))
+
+    def embed(self, docs):
+        np = require_numpy()
+        vectors = self.tfidf(docs).matmul(self.components.T).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+
+def randomized_svd(matrix, k, oversample=10, n_iter=4, seed=0):
+    """Halko et al. 무작위 SVD -> 상위 k개 우특이벡터 (k, V)"""
+    np = require_numpy()
+    rng = np.random.default_rng(seed)
+    transposed = matrix.transpose()
+    width = min(k + oversample, matrix.n_cols)
+    y = matrix.matmul(rng.standard_normal((matrix.n_cols, width)))
+    for _ in range(n_iter):
+        q, _ = np.linalg.qr(y)
+        z, _ = np.linalg.qr(transposed.matmul(q))
+        y = matrix.matmul(z)
+    q, _ = np.linalg.qr(y)
+    b = transposed.matmul(q).T            # (width, V)
+    _, _, vt = np.linalg.svd(b, full_matrices=False)
+    return vt[:k]
+
+
+class IVFIndex:
+    """k-means 조대 양자화 + 역 리스트 근사 최근접 이웃 (내적 = 코사인)"""
+
+    def __init__(self, centroids, vectors, assign):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.assign = assign
+        self._build_lists()
+
+    def _build_lists(self):
+        np = require_numpy()
+        self.order = np.argsort(self.assign, kind="stable")
+        self.offsets = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.assign, minlength=len(self.centroids)), out=self.offsets[1:])
+
+    @classmethod
+    def train(cls, vectors, n_lists=None, iters=20, seed=0):
+        np = require_numpy()
+        n = len(vectors)
+        n_lists = max(1, min(n, n_lists or int(math.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, n_lists, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            centroids = np.where(empty[:, None], centroids, sums / np.where(norms > 0, norms, 1))
+        return cls(centroids.astype(np.float32), vectors, np.argmax(vectors @ centroids.T, axis=1))
+
+    def add(self, vectors):
+        np = require_numpy()
+        self.vectors = np.vstack([self.vectors, vectors]) if len(self.vectors) else vectors
+        self.assign = np.concatenate([self.assign, np.argmax(vectors @ self.centroids.T, axis=1)])
+        self._build_lists()
+
+    def replace(self, rows, vectors):
+        np = require_numpy()
+        self.vectors[rows] = vectors
+        self.assign[rows] = np.argmax(vectors @ self.centroids.T, axis=1)
+        self._build_lists()
+
+    def search(self, query, k=10, nprobe=DEFAULT_NPROBE):
+        """-> (행 인덱스, 유사도) 유사도 내림차순"""
+        np = require_numpy()
+        probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        candidates = np.concatenate([self.order[self.offsets[p]:self.offsets[p + 1]] for p in probes])
+        if not len(candidates):
+            return candidates, np.zeros(0, dtype=np.float32)
+        scores = self.vectors[candidates] @ query
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return candidates[top], scores[top]
+
+
+class NarrativeIndex:
+    def __init__(self, model, ivf, ids, hashes):
+        self.model = model
+        self.ivf = ivf
+        self.ids = list(ids)
+        self.hashes = list(hashes)
+        self.row = {cid: i for i, cid in enumerate(self.ids)}
+
+    @classmethod
+    def build(cls, docs, dims=DEFAULT_DIMS, seed=0):
+        ids = sorted(docs)
+        model = TfidfSvdModel.fit([docs[i] for i in ids], dims=dims, seed=seed)
+        vectors = model.embed([docs[i] for i in ids])
+        return cls(model, IVFIndex.train(vectors, seed=seed), ids, [doc_hash(docs[i]) for i in ids])
+
+    def update(self, docs):
+        """신규/변경 케이스만 임베딩 -> (추가 수, 갱신 수)"""
+        new = sorted(cid for cid in docs if cid not in self.row)
+        changed = sorted(cid for cid in docs if cid in self.row and self.hashes[self.row[cid]] != doc_hash(docs[cid]))
+        if changed:
+            rows = [self.row[cid] for cid in changed]
+            self.ivf.replace(rows, self.model.embed([docs[cid] for cid in changed]))
+            for cid in changed:
+                self.hashes[self.row[cid]] = doc_hash(docs[cid])
+        if new:
+            self.ivf.add(self.model.embed([docs[cid] for cid in new]))
+            for cid in new:
+                self.row[cid] = len(self.ids)
+                self.ids.append(cid)
+                self.hashes.append(doc_hash(docs[cid]))
+        return len(new), len(changed)
+
+    def similar(self, case_id, k=10, nprobe=DEFAULT_NPROBE):
+        row = self.row[case_id]
+        rows, scores = self.ivf.search(self.ivf.vectors[row], k + 1, nprobe)
+        return [(self.ids[r], float(s)) for r, s in zip(rows, scores) if r != row][:k]
+
+    def campaigns(self, threshold=0.6, neighbors=10, nprobe=DEFAULT_NPROBE):
+        """근사 이웃 유사도 >= threshold 간선의 연결 요소 -> [(케이스 리스트, 평균 유사도)]"""
+        uf = UnionFind(len(self.ids))
+        edges = {}
+        for row in range(len(self.ids)):
+            rows, scores = self.ivf.search(self.ivf.vectors[row], neighbors + 1, nprobe)
+            for r, s in zip(rows, scores):
+                if r != row and s >= threshold:
+                    uf.union(row, int(r))
+                    edges[(min(row, int(r)), max(row, int(r)))] = float(s)
+
+        groups = {}
+        for row in range(len(self.ids)):
+            groups.setdefault(uf.find(row), []).append(row)
+        # 간선 1회 순회로 연결 요소(루트)별 유사도 합/개수 누적
+        sim_sums, sim_counts = {}, {}
+        for (a, _), s in edges.items():
+            root = uf.find(a)
+            sim_sums[root] = sim_sums.get(root, 0.0) + s
+            sim_counts[root] = sim_counts.get(root, 0) + 1
+        result = []
+        for root, members in groups.items():
+            if len(members) < 2:
+                continue
+            result.append((sorted(self.ids[m] for m in members), sim_sums[root] / sim_counts[root]))
+        result.sort(key=lambda x: (-len(x[0]), -x[1], x[0]))
+        return result
+
+    def top_terms(self, docs, case_ids, n=8):
+        """캠페인 구성 케이스의 TF-IDF 합 상위 어휘"""
+        np = require_numpy()
+        matrix = self.model.tfidf([docs[c] for c in case_ids if c in docs])
+        weights = np.bincount(matrix.indices, weights=matrix.data, minlength=len(self.model.vocab))
+        return [self.model.vocab[i] for i in np.argsort(-weights)[:n] if weights[i] > 0]
+
+    def save(self, path):
+        np = require_numpy()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, vocab=np.asarray(self.model.vocab, dtype=str), idf=self.model.idf,
+                     components=self.model.components, centroids=self.ivf.centroids,
+                     vectors=self.ivf.vectors, assign=self.ivf.assign,
+                     ids=np.asarray(self.ids, dtype=str), hashes=np.asarray(self.hashes, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        np = require_numpy()
+        with np.load(path, allow_pickle=False) as data:
+            model = TfidfSvdModel(data["vocab"].tolist(), data["idf"], data["components"])
+            ivf = IVFIndex(data["centroids"], data["vectors"], data["assign"])
+            return cls(model, ivf, data["ids"].tolist(), data["hashes"].tolist())
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Narrative embeddings, similar-case search and campaign clustering")
+    parser.add_argument("--index", type=str, default="ttp_results/narrative_index.npz", help="Index file")
+    parser.add_argument("--cases", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                       help="Case dataset with complaint_narrative")
+    parser.add_argument("--profiles", action="append",
+                       help="Profile directory or JSON file for TTP tokens, repeatable "
+                            "(default: ttp_results/individual)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Embed new/changed cases (fit the model on first run or --refit)")
+    p_build.add_argument("--refit", action="store_true", help="Refit vocabulary, SVD basis and IVF lists")
+    p_build.add_argument("--dims", type=int, default=DEFAULT_DIMS, help=f"SVD dimensions (default: {DEFAULT_DIMS})")
+
+    p_similar = sub.add_parser("similar", help="Find cases similar to a case")
+    p_similar.add_argument("case_id", help="Case label, e.g. pb_001")
+    p_similar.add_argument("-k", type=int, default=10, help="Number of results")
+    p_similar.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE, help="IVF lists to probe")
+
+    p_cluster = sub.add_parser("cluster", help="Group cases into campaigns")
+    p_cluster.add_argument("--threshold", type=float, default=0.6, help="Cosine similarity threshold")
+    p_cluster.add_argument("--neighbors", type=int, default=10, help="Neighbours per case")
+    p_cluster.add_argument("--output", type=str, default="ttp_results/campaign_clusters.json", help="Output JSON")
+
+    args = parser.parse_args()
+    args.profiles = args.profiles or ["ttp_results/individual"]
+
+    if args.command == "build":
+        start = time.time()
+        docs = load_documents(args.cases, args.profiles)
+        if args.refit or not Path(args.index).exists():
+            index = NarrativeIndex.build(docs, dims=args.dims)
+            print(f"[+] 모델 학습: 문서 {len(docs)}건, 어휘 {len(index.model.vocab):,}개, "
+                  f"{index.model.components.shape[0]}차원, IVF 리스트 {len(index.ivf.centroids)}개")
+        else:
+            index = NarrativeIndex.load(args.index)
+            added, changed = index.update(docs)
+            print(f"[+] 증분 갱신: 신규 {added}건, 변경 {changed}건 (전체 {len(index.ids)}건)")
+        index.save(args.index)
+        print(f"[+] 인덱스 저장: {args.index} ({time.time() - start:.2f}초)")
+        return
+
+    index = NarrativeIndex.load(args.index)
+    if args.command == "similar":
+        if args.case_id not in index.row:
+            print(f"[!] 인덱스에 없는 케이스: {args.case_id}")
+            return
+        start = time.perf_counter()
+        results = index.similar(args.case_id, k=args.k, nprobe=args.nprobe)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"[+] {args.case_id} 유사 케이스 ({elapsed:.2f}ms)")
+        for case_id, score in results:
+            print(f"    {case_id}  {score:.3f}")
+
+    elif args.command == "cluster":
+        docs = load_documents(args.cases, args.profiles)
+        groups = index.campaigns(threshold=args.threshold, neighbors=args.neighbors)
+        campaigns = [{"campaign_id": i, "size": len(cases), "cases": cases, "mean_similarity": round(sim, 4),
+                      "top_terms": index.top_terms(docs, cases)}
+                     for i, (cases, sim) in enumerate(groups, start=1)]
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"threshold": args.threshold, "neighbors": args.neighbors, "campaigns": campaigns},
+                      f, ensure_ascii=False, indent=2)
+        print(f"[+] 캠페인 {len(campaigns)}개 저장: {args.output}")
+        for c in campaigns[:10]:
+            print(f"    #{c['campaign_id']} ({c['size']}건, 유사도 {c['mean_similarity']:.2f}): "
+                  f"{', '.join(c['cases'][:6])}{' ...' if c['size'] > 6 else ''} | {', '.join(c['top_terms'][:4])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+오프라인 OCR 기반 텍스트-이미지 일관성 사전 선별
+- 스크린샷을 Tesseract(CLI)로 병렬 OCR, 결과 텍스트는 이미지 해시 + 엔진 설정 키로 캐시
+- OCR 텍스트를 website / platform_names / platform_urls / 서술문 금액 / 사칭 브랜드와 비교
+- MULTIMODAL_CONSISTENCY_REPORT.json 과 같은 0.0~1.0 척도, 0.7 미만 플래그
+- 도메인/플랫폼명/금액 중 하나도 비교할 수 없으면 점수 없음(null)으로 두고 VLM으로
+- 플래그 또는 판단 보류(ambiguous) 케이스만 VLM 정밀 분석 대상으로 분류
+- Tesseract 필요 (apt install tesseract-ocr / brew install tesseract)
+"""
+
+import difflib
+import json
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from image_cache import file_hash
+from text_patterns import find_domains, parse_amounts
+from ttp_aggregate import get_path
+from ttp_stats import as_values, iter_profile_files
+
+FLAG_THRESHOLD = 0.7
+AMBIGUOUS_MARGIN = 0.1       # 임계값 ± 이 범위 점수는 VLM으로
+MIN_OCR_CHARS = 30
+FUZZY_MIN_RATIO = 0.75
+FUZZY_MIN_LENGTH = 5         # 이보다 짧은 도메인 라벨/플랫폼명은 단어 경계 정확 일치만 인정
+
+# 구성 요소별 가중치 (적용 가능한 항목만 재정규화)
+WEIGHTS = {"domain_match": 0.35, "platform_name_match": 0.2, "ui_matches_description": 0.2,
+           "financial_claims_plausible": 0.15, "brand_consistency": 0.1}
+# 케이스 고유 정보와 비교하는 구성 요소: 하나 이상 있어야 점수 산출 (UI 키워드/브랜드만으로는 판단 불가)
+ANCHOR_COMPONENTS = ("domain_match", "platform_name_match", "financial_claims_plausible")
+
+UI_KEYWORDS = [
+    "deposit", "withdraw", "withdrawal", "balance", "assets", "wallet", "trade", "trading", "buy", "sell",
+    "market", "profit", "earnings", "usdt", "btc", "eth", "futures", "contract", "mining",
+    "recharge", "transfer", "history", "transaction", "record", "account", "login", "register", "invest",
+    "yield", "bonus", "reward",
+    # 메신저/고객센터 화면
+    "whatsapp", "telegram", "wechat", "message", "chat", "customer service",
+]
+KNOWN_BRANDS = {
+    "crypto.com": r"crypto\.com", "coinbase": r"coinbase", "binance": r"binance", "kraken": r"kraken",
+    "gemini": r"gemini", "bitmex": r"bitmex", "dydx": r"dydx", "okx": r"\bokx\b", "bybit": r"bybit",
+    "kucoin": r"kucoin", "bitget": r"bitget", "huobi": r"huobi|\bhtx\b", "metamask": r"metamask",
+    "trust wallet": r"trust ?wallet", "robinhood": r"robinhood", "etoro": r"etoro", "riot": r"\briot\b",
+    "tesla": r"tesla", "fidelity": r"fidelity", "goldman sachs": r"goldman",
+}
+OCR_AMOUNT_PATTERN = r"([\d,]+\.\d{2})\s*(?:usdt|usd)\b"
+
+
+def _require_tesseract(binary):
+    path = shutil.which(binary)
+    if not path:
+        raise SystemExit("[!] Tesseract가 필요합니다: apt install tesseract-ocr (또는 --tesseract 로 경로 지정)")
+    return path
+
+
+class TesseractOCR:
+    def __init__(self, binary="tesseract", lang="eng", psm=3):
+        self.binary = _require_tesseract(binary)
+        self.lang = lang
+        self.psm = psm
+        out = subprocess.run([self.binary, "--version"], capture_output=True, text=True)
+        self.version = (out.stdout or out.stderr).splitlines()[0].strip() if (out.stdout or out.stderr) else "unknown"
+
+    def signature(self):
+        return f"{self.version}|{self.lang}|psm{self.psm}"
+
+    def ocr(self, image_path):
+        out = subprocess.run([self.binary, str(image_path), "stdout", "-l", self.lang, "--psm", str(self.psm)],
+                             capture_output=True, text=True, timeout=120)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip()[:200])
+        return out.stdout
+
+
+class OCRCache:
+    """이미지 해시 + 엔진 설정 -> OCR 텍스트 (JSON 파일)"""
+
+    def __init__(self, path="ttp_results/ocr_cache.json"):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def run(self, engine, images, workers=4):
+        """images: {케이스: 경로} -> ({케이스: 텍스트}, OCR 실행 수, 실패 목록)"""
+        keys = {case: f"{file_hash(path)}|{engine.signature()}" for case, path in images.items()}
+        todo = {}
+        for case, key in keys.items():
+            if key not in self.entries and key not in todo:
+                todo[key] = images[case]
+
+        def work(item):
+            key, path = item
+            try:
+                return key, engine.ocr(path), None
+            except Exception as e:
+                return key, None, str(e)
+
+        failures = []
+        # OCR은 외부 프로세스이므로 스레드 풀로 병렬 실행
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for key, text, error in pool.map(work, todo.items()):
+                if error:
+                    failures.append((todo[key], error))
+                    print(f"[!] OCR 실패: {todo[key]} - {error}")
+                else:
+                    self.entries[key] = text
+        if todo:
+            self.save()
+        texts = {case: self.entries[key] for case, key in keys.items() if key in self.entries}
+        return texts, len(todo) - len(failures), failures
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def normalize_domain(value):
+    value = value.strip().lower()
+    value = re.sub(r"^[a-z]+://", "", value)
+    value = re.sub(r"^www\.", "", value)
+    return value.split("/")[0].strip(".")
+
+
+def fuzzy_find(needle, text, tokens):
+    """단어 경계 정확 일치 1.0, 아니면 비슷한 길이 OCR 토큰과의 최대 유사도 (OCR 오인식 허용)
+
+    짧은 라벨("up", "abc")이 다른 단어 안에서 일치하지 않도록 앞뒤가 영숫자가 아닌 경우만 일치로 봄
+    """
+    if not needle:
+        return 0.0
+    if re.search(rf"(?<![a-z0-9]){re.escape(needle)}(?![a-z0-9])", text):
+        return 1.0
+    if len(needle) < FUZZY_MIN_LENGTH:
+        return 0.0
+    best = 0.0
+    for token in tokens:
+        if abs(len(token) - len(needle)) <= max(2, len(needle) // 3):
+            best = max(best, difflib.SequenceMatcher(None, needle, token).ratio())
+    return best if best >= FUZZY_MIN_RATIO else 0.0
+
+
+class ConsistencyScorer:
+    """OCR 텍스트 vs 서술문/프로파일 일관성 점수 (VLM 보고서와 같은 척도)"""
+
+    def score(self, case, profile, ocr_text):
+        text = ocr_text.lower()
+        tokens = re.findall(r"[a-z0-9][a-z0-9.\-]*[a-z0-9]", text)
+        narrative = case.get("complaint_narrative", "") or ""
+        components, evidence, inconsistencies = {}, {}, []
+
+        # 도메인: website(여러 줄 가능) + platform_urls + 서술문 URL, 전체 도메인 또는 도메인 라벨
+        # 화면에 도메인이 안 보이면 비교 제외, 다른 도메인이 보이면 0
+        candidates = (case.get("website") or "").split() + as_values(get_path(profile, ("fraud_mechanism", "platform_urls")))
+        domains = {normalize_domain(d) for d in candidates if "." in d and normalize_domain(d)}
+        domains |= {normalize_domain(d) for d in find_domains(narrative)}
+        if domains:
+            best, found = 0.0, None
+            for domain in sorted(domains):
+                label = domain.rsplit(".", 1)[0]
+                ratio = max(fuzzy_find(domain, text, tokens), 0.9 * fuzzy_find(label, text, tokens))
+                if ratio > best:
+                    best, found = ratio, domain
+            visible = sorted(set(find_domains(text)))
+            if best:
+                components["domain_match"] = best
+                evidence["domain_visible"] = found
+            elif visible:
+                components["domain_match"] = 0.0
+                evidence["other_domains_visible"] = visible[:5]
+                inconsistencies.append("different domain visible in screenshot")
+
+        # 플랫폼명 (보이는 경우만 반영)
+        names = [n.lower() for n in as_values(get_path(profile, ("fraud_mechanism", "platform_names")))]
+        if names:
+            ratios = {n: fuzzy_find(n, text, tokens) for n in names}
+            best_name = max(ratios, key=ratios.get)
+            if ratios[best_name]:
+                components["platform_name_match"] = ratios[best_name]
+                evidence["platform_name_visible"] = best_name
+
+        # 거래 플랫폼 UI 키워드
+        ui_hits = sorted({k for k in UI_KEYWORDS if re.search(rf"\b{k}\b", text)})
+        components["ui_matches_description"] = min(1.0, len(ui_hits) / 3)
+        evidence["ui_keywords"] = ui_hits
+
+        # 금액: 화면 금액이 서술문 금액과 ±10% 일치하면 1.0, 금액만 보이면 0.7 (잔액 표시는 손실액과 다를 수 있음)
+        shown = parse_amounts(ocr_text) + [float(n.replace(",", "")) for n in re.findall(OCR_AMOUNT_PATTERN, text)]
+        claimed = parse_amounts(narrative)
+        if shown:
+            matched = any(abs(s - c) <= 0.1 * c for s in shown for c in claimed if c)
+            components["financial_claims_plausible"] = 1.0 if matched else 0.7
+            evidence["amounts_visible"] = sorted(set(shown))[:10]
+
+        # 사칭 브랜드: 화면 브랜드가 서술문/도메인에도 있으면 일관, 아니면 판단 보류
+        brands = sorted(b for b, p in KNOWN_BRANDS.items() if re.search(p, text))
+        if brands:
+            context = f"{narrative} {' '.join(domains)} {' '.join(names)}".lower()
+            consistent = [b for b in brands if re.search(KNOWN_BRANDS[b], context)]
+            components["brand_consistency"] = 1.0 if consistent else 0.5
+            evidence["brands_visible"] = brands
+
+        if not any(k in components for k in ANCHOR_COMPONENTS):
+            return None, components, evidence, inconsistencies
+
+        weight = sum(WEIGHTS[k] for k in components)
+        score = sum(WEIGHTS[k] * v for k, v in components.items()) / weight if weight else 0.0
+        return round(score, 3), components, evidence, inconsistencies
+
+
+def route(score, components, ocr_chars):
+    """-> (flag_for_review, 'vlm' | 'skip', 사유)"""
+    if score is None:
+        return False, "vlm", "no domain, platform name or amount visible"
+    flagged = score < FLAG_THRESHOLD
+    if flagged:
+        return True, "vlm", "score below threshold"
+    if ocr_chars < MIN_OCR_CHARS:
+        return False, "vlm", "too little OCR text"
+    if "domain_match" not in components and "platform_name_match" not in components:
+        return False, "vlm", "no domain or platform name visible"
+    if score < FLAG_THRESHOLD + AMBIGUOUS_MARGIN:
+        return False, "vlm", "score near threshold"
+    if components.get("brand_consistency") == 0.5:
+        return False, "vlm", "brand visible but not mentioned in narrative"
+    return False, "skip", "consistent"
+
+
+def load_cases_with_images(cases_file, base_dir="."):
+    """{pb 라벨: (케이스, 이미지 경로)} (screenshot_local 의 Windows 경로 구분자 보정)"""
+    with open(cases_file, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    result = {}
+    for case in cases:
+        local = (case.get("screenshot_local") or "").replace("\\", "/")
+        if not local or not str(case.get("pb_case_id", "")).isdigit():
+            continue
+        path = Path(base_dir) / local
+        if path.exists():
+            result[f"pb_{int(case['pb_case_id']):03d}"] = (case, path)
+    return result
+
+
+def build_report(cases, profiles, texts, vlm_report=None):
+    scorer = ConsistencyScorer()
+    vlm_scores = {}
+    if vlm_report:
+        vlm_scores = {c["case_id"]: c for c in vlm_report.get("individual_case_analysis", [])}
+
+    analyses = []
+    for label in sorted(texts):
+        case, path = cases[label]
+        text = texts[label]
+        score, components, evidence, inconsistencies = scorer.score(case, profiles.get(label, {}), text)
+        flagged, target, reason = route(score, components, len(text.strip()))
+        entry = {
+            "case_id": label,
+            "original_case_id": case.get("original_case_id"),
+            "platform": case.get("website"),
+            "image_file": path.name,
+            "ocr_chars": len(text.strip()),
+            "ocr_evidence": evidence,
+            "component_scores": {k: round(v, 3) for k, v in components.items()},
+            "inconsistencies_found": inconsistencies,
+            "consistency_score": score,
+            "flag_for_review": flagged,
+            "route": target,
+            "route_reason": reason,
+        }
+        if label in vlm_scores:
+            entry["vlm_consistency_score"] = vlm_scores[label].get("consistency_score")
+        analyses.append(entry)
+
+    n = len(analyses)
+    to_vlm = [a for a in analyses if a["route"] == "vlm"]
+    scored = [a for a in analyses if a["consistency_score"] is not None]
+    summary = {
+        "total_cases": n,
+        "high_consistency_cases": sum(1 for a in scored if a["consistency_score"] >= 0.9),
+        "medium_consistency_cases": sum(1 for a in scored if FLAG_THRESHOLD <= a["consistency_score"] < 0.9),
+        "low_consistency_cases": sum(1 for a in scored if a["consistency_score"] < FLAG_THRESHOLD),
+        "unscored_cases": n - len(scored),
+        "flagged_for_review": sum(1 for a in analyses if a["flag_for_review"]),
+        "routed_to_vlm": len(to_vlm),
+        "vlm_calls_avoided": n - len(to_vlm),
+        "average_consistency_score": round(sum(a["consistency_score"] for a in scored) / len(scored), 3)
+                                     if scored else 0.0,
+    }
+    compared = [a for a in scored if a.get("vlm_consistency_score") is not None]
+    if compared:
+        summary["vlm_flag_agreement"] = round(sum(
+            (a["vlm_consistency_score"] < FLAG_THRESHOLD) == a["flag_for_review"] for a in compared) / len(compared), 3)
+
+    return {
+        "report_metadata": {
+            "title": "OCR Pre-screen Consistency Report",
+            "generated_at": datetime.now().strftime("%Y-%m-%d"),
+            "methodology": "Offline Tesseract OCR text compared with narrative domain, platform names, amounts and brands",
+            "total_cases_analyzed": n,
+        },
+        "consistency_scoring_methodology": {
+            "score_range": "0.0 (complete mismatch) to 1.0 (perfect match); null when no domain, "
+                           "platform name or amount can be compared",
+            "threshold_for_flagging": FLAG_THRESHOLD,
+            "component_weights": WEIGHTS,
+            "routing": f"flagged, score within {AMBIGUOUS_MARGIN} above threshold, little OCR text, "
+                       "no comparable domain/name, or unexplained brand -> VLM pass",
+        },
+        "summary_statistics": summary,
+        "vlm_queue": [a["case_id"] for a in to_vlm],
+        "individual_case_analysis": analyses,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline OCR consistency pre-screen before the VLM pass")
+    parser.add_argument("--cases", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                       help="Case dataset with screenshot_local paths")
+    parser.add_argument("--profiles", nargs="+", default=["ttp_results/individual"],
+                       help="Profile directories or JSON files (platform_names/platform_urls)")
+    parser.add_argument("--vlm-report", type=str, default="ttp_results/MULTIMODAL_CONSISTENCY_REPORT.json",
+                       help="Existing VLM report for agreement statistics")
+    parser.add_argument("--cache", type=str, default="ttp_results/ocr_cache.json", help="OCR text cache")
+    parser.add_argument("--output", type=str, default="ttp_results/OCR_PRESCREEN_REPORT.json", help="Output report")
+    parser.add_argument("--tesseract", type=str, default="tesseract", help="Tesseract binary")
+    parser.add_argument("--lang", type=str, default="eng", help="Tesseract language(s), e.g. eng+chi_sim")
+    parser.add_argument("--psm", type=int, default=3, help="Tesseract page segmentation mode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel OCR processes")
+
+    args = parser.parse_args()
+
+    cases = load_cases_with_images(args.cases)
+    print(f"[*] 스크린샷 케이스 {len(cases)}건")
+    profiles = {}
+    for _, pb_id, profile in iter_profile_files(args.profiles):
+        if pb_id is not None and str(pb_id).isdigit():
+            profiles[f"pb_{int(pb_id):03d}"] = profile
+
+    engine = TesseractOCR(args.tesseract, args.lang, args.psm)
+    texts, ran, failures = OCRCache(args.cache).run(engine, {k: p for k, (_, p) in cases.items()}, args.workers)
+    print(f"[+] OCR: 신규 {ran}건, 캐시 {len(texts) - ran}건, 실패 {len(failures)}건 ({engine.version})")
+
+    vlm_report = None
+    if args.vlm_report and Path(args.vlm_report).exists():
+        with open(args.vlm_report, "r", encoding="utf-8") as f:
+            vlm_report = json.load(f)
+
+    report = build_report(cases, profiles, texts, vlm_report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    s = report["summary_statistics"]
+    print(f"[+] 평균 점수 {s['average_consistency_score']:.2f}, 플래그 {s['flagged_for_review']}건")
+    print(f"[+] VLM 대상 {s['routed_to_vlm']}건 / 생략 {s['vlm_calls_avoided']}건")
+    if "vlm_flag_agreement" in s:
+        print(f"[+] 기존 VLM 보고서 플래그 일치율: {s['vlm_flag_agreement']:.1%}")
+    print(f"[+] 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,26 +5,33 @@ Pig Butchering 케이스만 필터링하여 별도 정리
 import json
 import csv
 import os
+import re
 import shutil
 
-# 데이터 로드
-with open('dfpi_scam_data_v2_20251217_210125.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+import perf_trace
 
-# Pig Butchering 케이스 필터링 (공백 변형 포함)
-import re
-pb_cases = [d for d in data if re.search(r'pig\s+butchering', d.get('scam_type', ''), re.IGNORECASE)]
+DEFAULT_INPUT = 'dfpi_scam_data_v2_20251217_210125.json'
+
+
+PB_SCAM_TYPE_RE = re.compile(r'pig\s+butchering', re.IGNORECASE)
+CASE_FIELDS = [
+    'pb_case_id', 'original_case_id', 'primary_subject',
+    'complaint_narrative', 'scam_type', 'website',
+    'screenshot_url', 'screenshot_local'
+]
 
-# 출력 디렉토리 생성
-output_dir = 'pig_butchering_cases'
-img_dir = os.path.join(output_dir, 'screenshots')
-os.makedirs(img_dir, exist_ok=True)
 
-# 이미지 복사 및 데이터 정리
-pb_data = []
-for idx, case in enumerate(pb_cases, 1):
+def is_pig_butchering(case):
+    """Pig Butchering 케이스 여부 (공백 변형 포함)"""
+    return bool(PB_SCAM_TYPE_RE.search(case.get('scam_type', '')))
+
+
+def make_pb_case(case, idx, img_dir):
+    """수집 레코드 -> Pig Butchering 케이스 (이미지가 있으면 pb_XXX_case_XXX로 복사)"""
     original_case_id = case.get('case_id', 0)
-    local_img = case.get('screenshot_local', '')
+    # 수집 데이터는 Windows 경로 구분자(screenshots_v2\case_001.jpg)로 기록되어 있음
+    raw_img = case.get('screenshot_local') or ''
+    local_img = raw_img.replace('\\', os.sep)
 
     # 새 데이터 구조
     new_case = {
@@ -44,53 +51,89 @@ for idx, case in enumerate(pb_cases, 1):
         new_img_name = f'pb_{idx:03d}_case_{original_case_id:03d}{ext}'
         new_img_path = os.path.join(img_dir, new_img_name)
         shutil.copy2(local_img, new_img_path)
-        new_case['screenshot_local'] = new_img_path
+        # 기록은 원본과 같은 구분자로 (기존 케이스 파일과 동일한 표기 유지)
+        new_case['screenshot_local'] = new_img_path.replace(os.sep, '\\') if '\\' in raw_img else new_img_path
         print(f'[{idx:3d}] 이미지 복사: {new_img_name}')
 
-    pb_data.append(new_case)
-
-# JSON 저장
-json_path = os.path.join(output_dir, 'pig_butchering_data.json')
-with open(json_path, 'w', encoding='utf-8') as f:
-    json.dump(pb_data, f, ensure_ascii=False, indent=2)
-
-# CSV 저장
-csv_path = os.path.join(output_dir, 'pig_butchering_data.csv')
-with open(csv_path, 'w', newline='', encoding='utf-8-sig') as f:
-    writer = csv.DictWriter(f, fieldnames=[
-        'pb_case_id', 'original_case_id', 'primary_subject',
-        'complaint_narrative', 'scam_type', 'website',
-        'screenshot_url', 'screenshot_local'
-    ])
-    writer.writeheader()
-    writer.writerows(pb_data)
-
-# 이미지 있는 케이스만 별도 저장
-pb_with_images = [d for d in pb_data if d['screenshot_local']]
-
-img_json_path = os.path.join(output_dir, 'pig_butchering_with_images.json')
-with open(img_json_path, 'w', encoding='utf-8') as f:
-    json.dump(pb_with_images, f, ensure_ascii=False, indent=2)
-
-img_csv_path = os.path.join(output_dir, 'pig_butchering_with_images.csv')
-with open(img_csv_path, 'w', newline='', encoding='utf-8-sig') as f:
-    writer = csv.DictWriter(f, fieldnames=[
-        'pb_case_id', 'original_case_id', 'primary_subject',
-        'complaint_narrative', 'scam_type', 'website',
-        'screenshot_url', 'screenshot_local'
-    ])
-    writer.writeheader()
-    writer.writerows(pb_with_images)
-
-# 통계 출력
-print(f'\n{"="*50}')
-print(f'[Pig Butchering 데이터 정리 완료]')
-print(f'{"="*50}')
-print(f'총 Pig Butchering 사건: {len(pb_cases)}건')
-print(f'스크린샷 보유 사건: {len(pb_with_images)}건')
-print(f'\n저장 위치: {os.path.abspath(output_dir)}')
-print(f'├── pig_butchering_data.json       (전체 {len(pb_cases)}건)')
-print(f'├── pig_butchering_data.csv')
-print(f'├── pig_butchering_with_images.json (이미지 {len(pb_with_images)}건)')
-print(f'├── pig_butchering_with_images.csv')
-print(f'└── screenshots/                    (이미지 {len(pb_with_images)}개)')
+    return new_case
+
+
+def save_pb_cases(pb_data, output_dir):
+    """전체/이미지 보유 케이스 JSON, CSV 저장 -> 이미지 보유 케이스 리스트"""
+    # JSON 저장
+    json_path = os.path.join(output_dir, 'pig_butchering_data.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(pb_data, f, ensure_ascii=False, indent=2)
+
+    # CSV 저장
+    csv_path = os.path.join(output_dir, 'pig_butchering_data.csv')
+    with open(csv_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=CASE_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(pb_data)
+
+    # 이미지 있는 케이스만 별도 저장
+    pb_with_images = [d for d in pb_data if d['screenshot_local']]
+
+    img_json_path = os.path.join(output_dir, 'pig_butchering_with_images.json')
+    with open(img_json_path, 'w', encoding='utf-8') as f:
+        json.dump(pb_with_images, f, ensure_ascii=False, indent=2)
+
+    img_csv_path = os.path.join(output_dir, 'pig_butchering_with_images.csv')
+    with open(img_csv_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=CASE_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(pb_with_images)
+
+    return pb_with_images
+
+
+@perf_trace.traced("organize")
+def organize(input_file=DEFAULT_INPUT, output_dir='pig_butchering_cases'):
+    # 데이터 로드
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Pig Butchering 케이스 필터링 (공백 변형 포함)
+    pb_cases = [d for d in data if is_pig_butchering(d)]
+
+    # 출력 디렉토리 생성
+    img_dir = os.path.join(output_dir, 'screenshots')
+    os.makedirs(img_dir, exist_ok=True)
+
+    # 이미지 복사 및 데이터 정리
+    pb_data = []
+    for idx, case in perf_trace.items("organize_case", enumerate(pb_cases, 1), label=lambda x: x[0]):
+        pb_data.append(make_pb_case(case, idx, img_dir))
+
+    pb_with_images = save_pb_cases(pb_data, output_dir)
+
+    # 통계 출력
+    print(f'\n{"="*50}')
+    print(f'[Pig Butchering 데이터 정리 완료]')
+    print(f'{"="*50}')
+    print(f'총 Pig Butchering 사건: {len(pb_cases)}건')
+    print(f'스크린샷 보유 사건: {len(pb_with_images)}건')
+    print(f'\n저장 위치: {os.path.abspath(output_dir)}')
+    print(f'├── pig_butchering_data.json       (전체 {len(pb_cases)}건)')
+    print(f'├── pig_butchering_data.csv')
+    print(f'├── pig_butchering_with_images.json (이미지 {len(pb_with_images)}건)')
+    print(f'├── pig_butchering_with_images.csv')
+    print(f'└── screenshots/                    (이미지 {len(pb_with_images)}개)')
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Filter pig butchering cases out of the scraped DFPI data")
+    parser.add_argument("--input", type=str, default=DEFAULT_INPUT, help="Scraped DFPI JSON file")
+    parser.add_argument("--output-dir", type=str, default="pig_butchering_cases", help="Output directory")
+    perf_trace.add_arguments(parser)
+
+    args = parser.parse_args()
+    perf_trace.start(args, "organize")
+    organize(args.input, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
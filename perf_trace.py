@@ -0,0 +1,382 @@
+"""
+공용 성능 계측 (--profile)
+- 단계/항목 스팬: 실행 시간(wall), 스레드 CPU 시간, RSS, 최대 RSS, I/O 바이트(/proc/self/io), tracemalloc 피크(선택)
+- traced(데코레이터) / span(컨텍스트) / items(반복 래퍼: 항목마다 스팬) - 비활성 시 오버헤드 거의 없음
+- 출력: trace.json (Chrome/Perfetto traceEvents + 이름별 요약), speedscope.json, collapsed.txt (flamegraph.pl / speedscope)
+- 선택: --profile-sample-ms 로 파이썬 스택 샘플링 (스팬 경로 + 함수 스택, collapsed_samples.txt)
+"""
+
+import atexit
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+_NULL = nullcontext()
+_tracer = None
+
+
+def _io_bytes():
+    """(읽기, 쓰기) 바이트 - Linux /proc/self/io 의 rchar/wchar (소켓 포함), 없으면 블록 I/O 추정"""
+    try:
+        with open("/proc/self/io", "r") as f:
+            values = dict(line.split(":", 1) for line in f)
+        return int(values["rchar"]), int(values["wchar"])
+    except (OSError, KeyError, ValueError):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_inblock * 512, usage.ru_oublock * 512
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _max_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "start", "cpu", "io", "rss", "alloc", "alloc_peak")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        tracer = self.tracer
+        stack = tracer.stack()
+        if tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].alloc_peak = max(stack[-1].alloc_peak, peak)
+            tracemalloc.reset_peak()
+            self.alloc, self.alloc_peak = current, current
+        stack.append(self)
+        self.io = _io_bytes()
+        self.rss = _rss_bytes()
+        self.cpu = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        cpu = time.thread_time() - self.cpu
+        io = _io_bytes()
+        tracer = self.tracer
+        stack = tracer.stack()
+        stack.pop()
+        record = {
+            "name": self.name,
+            "path": ";".join([s.name for s in stack] + [self.name]),
+            "thread": threading.current_thread().name,
+            "start_ms": round((self.start - tracer.origin) * 1000, 3),
+            "wall_ms": round((end - self.start) * 1000, 3),
+            "cpu_ms": round(cpu * 1000, 3),
+            "io_read_bytes": io[0] - self.io[0],
+            "io_write_bytes": io[1] - self.io[1],
+            "rss_bytes": _rss_bytes(),
+            "rss_delta_bytes": _rss_bytes() - self.rss,
+        }
+        if tracer.memory:
+            peak = max(self.alloc_peak, tracemalloc.get_traced_memory()[1])
+            record["alloc_peak_bytes"] = peak - self.alloc
+            if stack:
+                stack[-1].alloc_peak = max(stack[-1].alloc_peak, peak)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if self.attrs:
+            record["attrs"] = self.attrs
+        tracer.add(record)
+        return False
+
+
+class Tracer:
+    def __init__(self, name, output_dir, memory=False, sample_ms=0.0):
+        self.name = name
+        self.output_dir = Path(output_dir)
+        self.memory = memory
+        self.sample_ms = sample_ms
+        self.records = []
+        self.samples = Counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stacks = {}               # 스레드 ID -> 열린 스팬 스택 (샘플러용)
+        self.origin = time.perf_counter()
+        self.started_at = datetime.now()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+            with self.lock:
+                self.stacks[threading.get_ident()] = stack
+        return stack
+
+    def span(self, name, **attrs):
+        return _Span(self, name, attrs)
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+
+    def start(self):
+        if self.memory:
+            tracemalloc.start()
+        if self.sample_ms > 0:
+            self._sampler = threading.Thread(target=self._sample_loop, name="perf-sampler", daemon=True)
+            self._sampler.start()
+        return self
+
+    def _sample_loop(self):
+        """주기적으로 모든 스레드의 파이썬 스택 수집 (열린 스팬 경로를 접두어로)"""
+        me = threading.get_ident()
+        while not self._stop.wait(self.sample_ms / 1000):
+            frames = sys._current_frames()
+            with self.lock:
+                stacks = {tid: [s.name for s in stack] for tid, stack in self.stacks.items()}
+            for tid, frame in frames.items():
+                if tid == me:
+                    continue
+                calls = []
+                while frame is not None:
+                    code = frame.f_code
+                    calls.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ";".join([f"[{s}]" for s in stacks.get(tid, [])] + calls[::-1])
+                self.samples[key] += 1
+
+    def summary(self):
+        """스팬 이름별 횟수/합계/평균/p50/p95/최대"""
+        by_name = {}
+        for r in self.records:
+            by_name.setdefault(r["name"], []).append(r)
+        result = {}
+        for name, rows in by_name.items():
+            walls = sorted(r["wall_ms"] for r in rows)
+            entry = {
+                "count": len(rows),
+                "wall_ms_total": round(sum(walls), 3),
+                "wall_ms_mean": round(sum(walls) / len(walls), 3),
+                "wall_ms_p50": walls[len(walls) // 2],
+                "wall_ms_p95": walls[min(len(walls) - 1, int(len(walls) * 0.95))],
+                "wall_ms_max": walls[-1],
+                "cpu_ms_total": round(sum(r["cpu_ms"] for r in rows), 3),
+                "io_read_bytes": sum(r["io_read_bytes"] for r in rows),
+                "io_write_bytes": sum(r["io_write_bytes"] for r in rows),
+                "errors": sum(1 for r in rows if "error" in r),
+            }
+            if self.memory:
+                entry["alloc_peak_bytes_max"] = max(r.get("alloc_peak_bytes", 0) for r in rows)
+            result[name] = entry
+        return dict(sorted(result.items(), key=lambda kv: -kv[1]["wall_ms_total"]))
+
+    def chrome_events(self):
+        threads = {}
+        events = []
+        for r in self.records:
+            tid = threads.setdefault(r["thread"], len(threads) + 1)
+            args = {k: v for k, v in r.items() if k not in ("name", "path", "thread", "start_ms", "wall_ms")}
+            events.append({"name": r["name"], "ph": "X", "pid": 1, "tid": tid,
+                           "ts": round(r["start_ms"] * 1000), "dur": round(r["wall_ms"] * 1000), "args": args})
+        for thread, tid in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+        return events
+
+    def speedscope(self):
+        """스레드별 evented 프로파일 (스팬 열기/닫기)"""
+        frames, index = [], {}
+        profiles = []
+        by_thread = {}
+        for r in self.records:
+            by_thread.setdefault(r["thread"], []).append(r)
+        for thread, rows in by_thread.items():
+            events = []
+            for r in rows:
+                if r["name"] not in index:
+                    index[r["name"]] = len(frames)
+                    frames.append({"name": r["name"]})
+                start, end = r["start_ms"], r["start_ms"] + r["wall_ms"]
+                # 같은 시각이면 닫기 먼저, 긴(바깥) 스팬을 먼저 열고 나중에 닫음
+                events.append((start, 1, -r["wall_ms"], {"type": "O", "frame": index[r["name"]], "at": start}))
+                events.append((end, 0, r["wall_ms"], {"type": "C", "frame": index[r["name"]], "at": end}))
+            events.sort(key=lambda e: e[:3])
+            ordered = [e[3] for e in events]
+            profiles.append({"type": "evented", "name": f"{self.name} ({thread})", "unit": "milliseconds",
+                             "startValue": ordered[0]["at"] if ordered else 0,
+                             "endValue": max((e["at"] for e in ordered), default=0), "events": ordered})
+        return {"$schema": "https://www.speedscope.app/file-format-schema.json",
+                "shared": {"frames": frames}, "profiles": profiles, "name": self.name,
+                "exporter": "perf_trace.py"}
+
+    def collapsed(self):
+        """스팬 경로별 self 시간(µs) - 'a;b;c 값' 형식"""
+        totals = Counter()
+        children = Counter()
+        for r in self.records:
+            totals[r["path"]] += r["wall_ms"]
+            parent = r["path"].rsplit(";", 1)[0] if ";" in r["path"] else None
+            if parent:
+                children[parent] += r["wall_ms"]
+        lines = []
+        for path, total in sorted(totals.items()):
+            self_us = int(round((total - children.get(path, 0)) * 1000))
+            if self_us > 0:
+                lines.append(f"{path} {self_us}")
+        return lines
+
+    def stop(self):
+        """출력 파일 저장 -> 출력 디렉토리"""
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        meta = {
+            "name": self.name,
+            "argv": sys.argv,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_ms": round((time.perf_counter() - self.origin) * 1000, 3),
+            "cpu_ms": round(time.process_time() * 1000, 3),
+            "max_rss_bytes": _max_rss_bytes(),
+            "io_read_bytes": _io_bytes()[0],
+            "io_write_bytes": _io_bytes()[1],
+        }
+        if self.memory:
+            meta["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.output_dir / "trace.json", "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "summary": self.summary(), "spans": self.records,
+                       "traceEvents": self.chrome_events(), "displayTimeUnit": "ms"}, f, ensure_ascii=False, indent=1)
+        with open(self.output_dir / "speedscope.json", "w", encoding="utf-8") as f:
+            json.dump(self.speedscope(), f, ensure_ascii=False)
+        with open(self.output_dir / "collapsed.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        if self.samples:
+            with open(self.output_dir / "collapsed_samples.txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(f"{k} {v}" for k, v in sorted(self.samples.items())) + "\n")
+        return self.output_dir
+
+    def print_summary(self, top=10):
+        print(f"\n[*] 프로파일 요약 ({self.name})")
+        print(f"    {'span':32s} {'count':>6s} {'total(s)':>9s} {'mean(ms)':>9s} {'p95(ms)':>9s} {'cpu(s)':>8s}")
+        for name, s in list(self.summary().items())[:top]:
+            print(f"    {name[:32]:32s} {s['count']:6d} {s['wall_ms_total'] / 1000:9.2f} "
+                  f"{s['wall_ms_mean']:9.1f} {s['wall_ms_p95']:9.1f} {s['cpu_ms_total'] / 1000:8.2f}")
+        print(f"    최대 RSS: {_max_rss_bytes() / 1e6:.1f}MB")
+
+
+def active():
+    return _tracer
+
+
+def span(name, **attrs):
+    """스팬 컨텍스트 (비활성 시 nullcontext)"""
+    return _tracer.span(name, **attrs) if _tracer else _NULL
+
+
+def traced(name=None):
+    """함수 호출 전체를 스팬으로 기록하는 데코레이터"""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def items(name, iterable, label=None):
+    """반복 래퍼: 각 항목 처리(다음 항목 요청 전까지)를 스팬으로 기록"""
+    if _tracer is None:
+        return iterable
+    return _traced_items(name, iterable, label)
+
+
+def _traced_items(name, iterable, label):
+    for i, item in enumerate(iterable):
+        attrs = {"item": label(item) if label else i}
+        with _tracer.span(name, **attrs):
+            yield item
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="DIR",
+                       help="Record a performance trace (default dir: ttp_results/profiles/<script>_<time>)")
+    parser.add_argument("--profile-memory", action="store_true", help="Track Python allocation peaks (tracemalloc)")
+    parser.add_argument("--profile-sample-ms", type=float, default=0.0,
+                       help="Also sample Python stacks every N ms for flamegraphs")
+
+
+def start(args, name):
+    """--profile 지정 시 전역 트레이서 시작 (아니면 None), 종료 시 자동 저장"""
+    global _tracer
+    if getattr(args, "profile", None) is None:
+        return None
+    output_dir = args.profile or f"ttp_results/profiles/{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    _tracer = Tracer(name, output_dir, memory=args.profile_memory, sample_ms=args.profile_sample_ms).start()
+    atexit.register(finish)
+    return _tracer
+
+
+def finish():
+    """트레이서 종료 및 저장"""
+    global _tracer
+    if _tracer is None:
+        return None
+    tracer, _tracer = _tracer, None
+    output_dir = tracer.stop()
+    tracer.print_summary()
+    print(f"[+] 프로파일 저장: {output_dir}/ (trace.json, speedscope.json, collapsed.txt)")
+    return output_dir
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarise a perf_trace trace.json")
+    parser.add_argument("trace", help="trace.json file or profile directory")
+    parser.add_argument("--compare", type=str, help="Baseline trace.json to compare total wall time per span")
+    parser.add_argument("--top", type=int, default=15, help="Rows to show")
+
+    args = parser.parse_args()
+
+    def load(path):
+        path = Path(path)
+        with open(path / "trace.json" if path.is_dir() else path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    trace = load(args.trace)
+    baseline = load(args.compare)["summary"] if args.compare else {}
+    meta = trace["meta"]
+    print(f"[*] {meta['name']}: {meta['wall_ms'] / 1000:.2f}초, CPU {meta['cpu_ms'] / 1000:.2f}초, "
+          f"최대 RSS {meta['max_rss_bytes'] / 1e6:.1f}MB")
+    for name, s in list(trace["summary"].items())[:args.top]:
+        line = f"    {name[:40]:40s} x{s['count']:<5d} {s['wall_ms_total'] / 1000:8.2f}s  p95 {s['wall_ms_p95']:8.1f}ms"
+        if name in baseline and baseline[name]["wall_ms_total"]:
+            change = s["wall_ms_total"] / baseline[name]["wall_ms_total"] - 1
+            line += f"  ({change:+.1%} vs baseline)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+수집 → 다운로드 → 정리 → 프로파일링 → 요약 → 보고서 DAG 파이프라인 오케스트레이터
+- 각 단계는 명령(스크립트 + 인자), 입력/출력 경로, 파라미터, 선행 단계로 정의
+- 단계 지문 = 코드 버전(스크립트 + 로컬 import 모듈 해시) + 입력 내용 해시 + 파라미터
+- 지문이 같고 출력이 기록 당시 그대로면 건너뜀 (선행 단계 출력이 바뀌지 않으면 후속 단계도 건너뜀)
+- 서로 독립된 단계(이미지 전처리 / LLM 프로파일링 등)는 병렬 실행
+- --stream: 수집/다운로드/정리/프로파일링을 stream_pipeline.py 한 단계로 (레코드 단위 스트리밍)
+- 수작업 보정된 공개 산출물(KEY_DATA_SUMMARY.csv, TTP_STATISTICS_ANALYSIS.json, COMPREHENSIVE_REPORT_*.txt)을
+  덮어쓰는 summarize / report 단계는 --publish, 스크린샷 재다운로드 단계는 --download 지정 시에만 포함
+- 유료 API 호출 단계(profile)는 케이스 파일 변경만으로 재실행하지 않음 (새 케이스는 --force profile)
+- 파일 해시는 (크기, mtime) 기준으로 캐시, 상태는 ttp_results/pipeline_state.json
+"""
+
+import ast
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+STATE_FILE = "ttp_results/pipeline_state.json"
+LOG_DIR = "ttp_results/pipeline_logs"
+
+
+class Stage:
+    def __init__(self, name, commands, deps=(), inputs=(), outputs=(), params=None):
+        self.name = name
+        self.commands = [list(c) for c in commands]    # [["script.py", "--arg", ...], ...]
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+
+    @property
+    def scripts(self):
+        return [c[0] for c in self.commands if c[0].endswith(".py")]
+
+
+def local_imports(script, seen=None):
+    """스크립트가 import 하는 저장소 내 모듈 (재귀)"""
+    seen = set() if seen is None else seen
+    path = REPO_DIR / script
+    if script in seen or not path.exists():
+        return seen
+    seen.add(script)
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        names = []
+        if isinstance(node, ast.Import):
+            names = [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        for name in names:
+            module = f"{name.split('.')[0]}.py"
+            if (REPO_DIR / module).exists():
+                local_imports(module, seen)
+    return seen
+
+
+class FileHasher:
+    """경로(파일/디렉토리) 내용 해시, (크기, mtime_ns)가 같으면 이전 해시 재사용"""
+
+    def __init__(self, cache=None):
+        self.cache = cache or {}
+
+    def file_digest(self, path):
+        st = os.stat(path)
+        key = str(path)
+        cached = self.cache.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.cache[key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def digest(self, path):
+        path = Path(path)
+        if path.is_file():
+            return self.file_digest(path)
+        if path.is_dir():
+            h = hashlib.sha256()
+            for file in sorted(p for p in path.rglob("*") if p.is_file()):
+                h.update(f"{file.relative_to(path).as_posix()}\0{self.file_digest(file)}\n".encode("utf-8"))
+            return h.hexdigest()
+        return "missing"
+
+
+class Pipeline:
+    def __init__(self, stages, state_file=STATE_FILE, log_dir=LOG_DIR):
+        self.stages = {s.name: s for s in stages}
+        self.state_file = Path(state_file)
+        self.log_dir = Path(log_dir)
+        state = {}
+        if self.state_file.exists():
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        self.records = state.get("stages", {})
+        self.hasher = FileHasher(state.get("hashes", {}))
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"{stage.name}: 알 수 없는 선행 단계 {missing}")
+
+    def save_state(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.records, "hashes": self.hasher.cache}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.state_file)
+
+    def select(self, targets=None):
+        """대상 단계 + 모든 선행 단계 (위상 정렬 순서)"""
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"순환 의존성: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in targets or self.stages:
+            if name not in self.stages:
+                raise ValueError(f"알 수 없는 단계: {name} (가능: {', '.join(self.stages)})")
+            visit(name)
+        return order
+
+    def fingerprint(self, stage):
+        code = {script: self.hasher.digest(REPO_DIR / script)
+                for s in stage.scripts for script in sorted(local_imports(s))}
+        inputs = {path: self.hasher.digest(path) for path in stage.inputs}
+        payload = json.dumps({"commands": stage.commands, "params": stage.params, "code": code, "inputs": inputs},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def output_digests(self, stage):
+        return {path: self.hasher.digest(path) for path in stage.outputs}
+
+    def is_fresh(self, stage, fingerprint):
+        """-> (최신 여부, 사유)"""
+        record = self.records.get(stage.name)
+        if not record:
+            return False, "never run"
+        if record.get("fingerprint") != fingerprint:
+            return False, "inputs/code/params changed"
+        current = self.output_digests(stage)
+        if any(d == "missing" for d in current.values()):
+            return False, "output missing"
+        if current != record.get("outputs"):
+            return False, "output modified"
+        return True, "up to date"
+
+    def execute(self, stage):
+        """단계 명령 순차 실행 (출력은 단계별 로그 파일) -> (성공 여부, 소요 시간)"""
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        start = time.time()
+        with open(self.log_dir / f"{stage.name}.log", "w", encoding="utf-8") as log:
+            for command in stage.commands:
+                argv = [sys.executable, *command] if command[0].endswith(".py") else command
+                log.write(f"$ {' '.join(argv)}\n")
+                log.flush()
+                code = subprocess.run(argv, cwd=REPO_DIR, stdout=log, stderr=subprocess.STDOUT,
+                                      env={**os.environ, "PYTHONUNBUFFERED": "1"}).returncode
+                if code != 0:
+                    log.write(f"[!] 종료 코드 {code}\n")
+                    return False, time.time() - start
+        return True, time.time() - start
+
+    def run(self, targets=None, jobs=2, force=(), dry_run=False):
+        """DAG 실행 -> {단계: 상태} (ran / skipped / failed / blocked / pending)"""
+        order = self.select(targets)
+        status = {name: "pending" for name in order}
+        fingerprints = {}
+        running = {}
+
+        def ready(name):
+            return status[name] == "pending" and all(status[d] in ("ran", "skipped") for d in self.stages[name].deps)
+
+        def block_dependents():
+            changed = True
+            while changed:
+                changed = False
+                for name in order:
+                    if status[name] == "pending" and any(status[d] in ("failed", "blocked")
+                                                         for d in self.stages[name].deps):
+                        status[name] = "blocked"
+                        print(f"[!] {name}: 선행 단계 실패로 건너뜀")
+                        changed = True
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while True:
+                for name in order:
+                    if not ready(name) or name in running:
+                        continue
+                    stage = self.stages[name]
+                    fingerprints[name] = self.fingerprint(stage)
+                    fresh, reason = self.is_fresh(stage, fingerprints[name])
+                    if fresh and name not in force:
+                        status[name] = "skipped"
+                        print(f"[*] {name}: 건너뜀 ({reason})")
+                        continue
+                    if name in force:
+                        reason = "forced"
+                    if dry_run:
+                        # 실행하지 않으므로 후속 단계 지문은 현재 파일 기준
+                        status[name] = "ran"
+                        print(f"[*] {name}: 실행 예정 ({reason})")
+                        continue
+                    print(f"[*] {name}: 실행 ({reason})")
+                    running[name] = pool.submit(self.execute, stage)
+
+                if not running:
+                    if any(ready(n) for n in order):
+                        continue
+                    break
+                finished, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name in [n for n, f in running.items() if f in finished]:
+                    ok, elapsed = running.pop(name).result()
+                    stage = self.stages[name]
+                    if ok:
+                        status[name] = "ran"
+                        # 출력 해시는 실행 후 다시 계산 (mtime 변경으로 캐시 무효화됨)
+                        self.records[name] = {"fingerprint": fingerprints[name],
+                                              "outputs": self.output_digests(stage),
+                                              "finished_at": datetime.now().isoformat(timespec="seconds"),
+                                              "duration_sec": round(elapsed, 2)}
+                        self.save_state()
+                        print(f"[+] {name}: 완료 ({elapsed:.1f}초)")
+                    else:
+                        status[name] = "failed"
+                        print(f"[!] {name}: 실패 ({elapsed:.1f}초) - 로그 {self.log_dir / (name + '.log')}")
+                        block_dependents()
+
+        if not dry_run:
+            self.save_state()
+        return status
+
+
+def latest_raw_file():
+    files = glob.glob("dfpi_scam_data_v2_*.json")
+    return max(files) if files else None
+
+
+def build_stages(args):
+    """기본 DAG: [scrape] → [download] ∥ organize → (images ∥ profile) → ([summarize → report] ∥ cooccur ∥ campaigns)
+
+    [ ]: --scrape / --download / --publish 지정 시에만 포함
+
+    --stream: stream(수집~프로파일링 동시 진행) → (images ∥ summarize → report ∥ cooccur ∥ campaigns)
+    """
+    cases_dir = "pig_butchering_cases"
+    cases = f"{cases_dir}/pig_butchering_data.json"
+    screenshots = f"{cases_dir}/screenshots"
+    individual = "ttp_results/individual"
+    raw = args.raw or ("dfpi_scam_data_v2_pipeline.json" if args.scrape else latest_raw_file())
+    if not raw:
+        raise SystemExit("[!] 수집 데이터(dfpi_scam_data_v2_*.json)가 없습니다. --scrape 또는 --raw 지정")
+
+    stages = []
+    if args.scrape:
+        stages.append(Stage("scrape", [["scraper_v2.py", "--output", raw, "--image-dir", "screenshots_v2"]],
+                            outputs=[raw, "screenshots_v2"]))
+    raw_deps = ["scrape"] if args.scrape else []
+
+    if args.download:
+        # screenshot_url 재다운로드 (screenshots/ + CSV): organize는 수집 시 저장된 screenshots_v2 를 쓰므로 독립
+        stages.append(Stage("download", [["download_screenshots.py", "--input", raw, "--output-dir", "screenshots"]],
+                            deps=raw_deps, inputs=[raw],
+                            outputs=["screenshots", raw.replace(".json", "_with_images.csv")]))
+    stages += [
+        Stage("organize", [["organize_pig_butchering.py", "--input", raw, "--output-dir", cases_dir]],
+              deps=raw_deps, inputs=[raw, "screenshots_v2"], outputs=[cases_dir]),
+        Stage("images", [["image_cache.py", screenshots, "--max-side", str(args.max_side)]],
+              deps=["organize"], inputs=[screenshots], outputs=["ttp_results/image_cache"]),
+    ]
+
+    api_flags = ["--api", args.api]
+    for flag, value in (("--model", args.model), ("--base-url", args.base_url)):
+        if value is not None:
+            api_flags += [flag, str(value)]
+    if args.structured:
+        api_flags.append("--structured")
+    limit_flags = ["--limit", str(args.limit)] if args.limit is not None else []
+    if args.profile_workers > 1:
+        # 공유 작업 큐 모드: 새로 등록 -> 로컬 워커 n개 -> 병합
+        profile_cmds = [["ttp_queue.py", "init", "--reset", "--input", cases] + limit_flags,
+                        ["ttp_queue.py", "worker", "-p", str(args.profile_workers)] + api_flags,
+                        ["ttp_queue.py", "merge"]]
+    else:
+        profile_cmds = [["ttp_profiler.py", "--input", cases] + api_flags + limit_flags]
+    # 케이스 파일은 지문에서 제외: 정리 단계가 다시 돌았다고 유료 프로파일링을 전부 재실행하지 않음
+    stages.append(Stage("profile", profile_cmds, deps=["organize"], inputs=["prompts"],
+                        outputs=[individual, "ttp_results/ttp_summary.json"]))
+
+    if args.stream:
+        # 수집(--scrape) / 다운로드 / 정리 / 프로파일링을 하나의 스트리밍 단계로 대체
+        stream_cmd = ["stream_pipeline.py", "--cases-dir", cases_dir, "--profile-workers",
+                      str(max(args.profile_workers, 2))] + api_flags + limit_flags
+        if args.scrape:
+            stream_cmd += ["--output", raw, "--image-dir", "screenshots_v2"]
+            stream_inputs, stream_outputs = ["prompts"], [raw, "screenshots_v2"]
+        else:
+            stream_cmd += ["--raw", raw]
+            stream_inputs, stream_outputs = [raw, "screenshots_v2", "prompts"], []
+        replaced = {"scrape", "download", "organize", "profile"}
+        stages = [s for s in stages if s.name not in replaced]
+        for stage in stages:
+            stage.deps = ["stream"]  # images
+        stages.append(Stage("stream", [stream_cmd], inputs=stream_inputs,
+                            outputs=stream_outputs + [cases_dir, individual, "ttp_results/ttp_summary.json"]))
+        upstream = "stream"
+    else:
+        upstream = "profile"
+
+    if args.publish:
+        # 공개 산출물 덮어쓰기: 명시적으로 요청한 경우에만
+        stages += [
+            Stage("summarize", [["ttp_stats.py", individual, "--dataset", cases]],
+                  deps=[upstream], inputs=[individual, cases],
+                  outputs=["ttp_results/TTP_STATISTICS_ANALYSIS.json", "KEY_DATA_SUMMARY.csv"]),
+            Stage("report", [["report_render.py", "--raw", raw, "--cases-dir", cases_dir]], deps=["summarize"],
+                  inputs=[raw, cases_dir, individual, "report_templates", "ttp_results/TTP_STATISTICS_ANALYSIS.json",
+                          "ttp_results/MULTIMODAL_CONSISTENCY_REPORT.json",
+                          "ttp_results/WALLET_VERIFICATION_REPORT.json"],
+                  outputs=["COMPREHENSIVE_REPORT_KOR.txt", "COMPREHENSIVE_REPORT_ENG.txt",
+                           "ttp_results/FINAL_ANALYSIS_REPORT.json", "ttp_results/RESEARCH_DATASET_SUMMARY.json"]),
+        ]
+    stages += [
+        Stage("cooccur", [["ttp_cooccur.py", individual]], deps=[upstream], inputs=[individual],
+              outputs=["ttp_results/ttp_cooccurrence.json"]),
+        Stage("campaigns", [["narrative_index.py", "--profiles", individual, "--cases", cases, "build"],
+                            ["narrative_index.py", "--profiles", individual, "--cases", cases, "cluster"]],
+              deps=[upstream], inputs=[cases, individual],
+              outputs=["ttp_results/narrative_index.npz", "ttp_results/campaign_clusters.json"]),
+    ]
+
+    # --exclude 단계는 제거하고 그 출력은 고정 입력으로 취급
+    excluded = set(args.exclude or [])
+    unknown = excluded - {s.name for s in stages}
+    if unknown:
+        raise SystemExit(f"[!] 알 수 없는 단계: {', '.join(sorted(unknown))}")
+    for stage in stages:
+        stage.deps = [d for d in stage.deps if d not in excluded]
+    return [s for s in stages if s.name not in excluded]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the scrape-to-summary workflow as a cached DAG")
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all)")
+    parser.add_argument("--jobs", "-j", type=int, default=2, help="Stages to run in parallel")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE", help="Re-run these stages")
+    parser.add_argument("--exclude", nargs="+", default=[], metavar="STAGE",
+                       help="Drop stages and treat their outputs as fixed inputs (e.g. download)")
+    parser.add_argument("--dry-run", action="store_true", help="Show which stages would run")
+    parser.add_argument("--list", action="store_true", help="List stages and dependencies")
+    parser.add_argument("--scrape", action="store_true", help="Include the Selenium scrape stage")
+    parser.add_argument("--download", action="store_true",
+                       help="Include the screenshot re-download stage (screenshots/ + CSV)")
+    parser.add_argument("--publish", action="store_true",
+                       help="Include summarize/report, which overwrite the published summary CSV, "
+                            "statistics JSON and comprehensive reports")
+    parser.add_argument("--raw", type=str, help="Scraped JSON (default: newest dfpi_scam_data_v2_*.json)")
+    parser.add_argument("--api", choices=["anthropic", "openai"], default="anthropic", help="Profiling API")
+    parser.add_argument("--model", type=str, help="Profiling model")
+    parser.add_argument("--base-url", type=str, help="Profiling API base URL (e.g. local mock server)")
+    parser.add_argument("--limit", type=int, help="Profile only the first N cases")
+    parser.add_argument("--structured", action="store_true", help="Lean structured-output profiling")
+    parser.add_argument("--profile-workers", type=int, default=1,
+                       help="Profile through the shared work queue with this many local worker processes")
+    parser.add_argument("--stream", action="store_true",
+                       help="Replace scrape/download/organize/profile with one streaming stage (stream_pipeline.py)")
+    parser.add_argument("--max-side", type=int, default=1024, help="Screenshot preprocessing max side")
+
+    args = parser.parse_args()
+    os.chdir(REPO_DIR)
+
+    pipeline = Pipeline(build_stages(args))
+    if args.list:
+        for name in pipeline.select():
+            stage = pipeline.stages[name]
+            print(f"{name:10s} <- {', '.join(stage.deps) or '-'}")
+            print(f"{'':10s}    outputs: {', '.join(stage.outputs)}")
+        return
+
+    start = time.time()
+    status = pipeline.run(args.targets or None, jobs=args.jobs, force=set(args.force), dry_run=args.dry_run)
+    counts = {s: sum(1 for v in status.values() if v == s) for s in ("ran", "skipped", "failed", "blocked")}
+    label = "실행 예정" if args.dry_run else "실행"
+    print(f"\n[+] {label} {counts['ran']} / 건너뜀 {counts['skipped']} / 실패 {counts['failed']} / "
+          f"차단 {counts['blocked']} ({time.time() - start:.1f}초)")
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
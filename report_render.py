@@ -0,0 +1,656 @@
+"""
+총괄 보고서 증분 렌더링
+- COMPREHENSIVE_REPORT_KOR/ENG.txt: report_templates/의 한/영 섹션 템플릿에 분석 산출물 수치를 바인딩
+- FINAL_ANALYSIS_REPORT.json, RESEARCH_DATASET_SUMMARY.json: 수작업 본문은 유지하고 수치 필드만 갱신
+- 템플릿 문법: {stats.profiles}, {stats.mean_loss:,} (format spec), {stats.top_migration:label} (언어별 라벨),
+  {@rank_table stats.contact_platforms width=17 top=10} (표/목록 블록)
+- 의존성 추적: 데이터 항목(fact)은 입력 파일 (크기, mtime) 서명이 바뀔 때만 다시 계산하고,
+  섹션은 참조하는 fact 값 / 템플릿 / 라벨 / 코드가 바뀔 때만 다시 렌더링
+- 상태(fact 값, 렌더링된 섹션)는 ttp_results/report_state.json, 출력은 내용이 바뀐 파일만 다시 기록
+- KEY_DATA_SUMMARY.csv는 ttp_stats.py(summarize 단계)가 재생성
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+
+from ttp_stats import LOSS_BIN_KEYS, display_label
+
+TEMPLATE_DIR = "report_templates"
+STATE_FILE = "ttp_results/report_state.json"
+CODE_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+SECTION_RE = re.compile(r"^@@ (\S+)[ \t]*\n", re.M)
+VALUE_RE = re.compile(r"\{(\w+)\.(\w+)(?::([^{}]*))?\}")
+BLOCK_RE = re.compile(r"\{@(\w+) (\w+)\.(\w+)((?: \w+=\w+)*)\}")
+MISSING = "-"
+# 순위/목록에서 빼는 미상 키 (no_migration, online_unspecified, unknown_online_platform ...)
+UNKNOWN_KEY_RE = re.compile(r"(^|_)(unknown|unspecified|none|no_migration)(_|$)")
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _pct_value(value):
+    """'22.3%' / 22.3 -> 22.3"""
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _ratio(count, total, digits=1):
+    return round(100.0 * count / total, digits) if count is not None and total else None
+
+
+def latest_raw_file():
+    files = glob.glob("dfpi_scam_data_v2_*.json")
+    return max(files) if files else None
+
+
+# ---------------------------------------------------------------------------
+# 데이터 항목 (fact): 입력 파일 -> 값 dict
+# ---------------------------------------------------------------------------
+
+class Fact:
+    def __init__(self, name, inputs, compute):
+        self.name = name
+        self.inputs = [str(p) for p in inputs if p]
+        self.compute = compute
+
+    def signature(self):
+        """입력별 (크기, mtime_ns); 디렉토리는 파일 추가/삭제 시 mtime이 바뀜"""
+        sig = []
+        for path in self.inputs:
+            try:
+                st = os.stat(path)
+                sig.append([path, st.st_size, st.st_mtime_ns])
+            except FileNotFoundError:
+                sig.append([path, None, None])
+        return sig
+
+
+def _known(items):
+    """[[key, count, pct], ...] 중 미상 키 제외"""
+    return [item for item in items if not UNKNOWN_KEY_RE.search(str(item[0]).lower())]
+
+
+def _merge_cases(primary, extra):
+    """[[case, platform, loss], ...] 두 목록 병합 (케이스 중복은 앞 목록 우선, 피해액 내림차순)"""
+    merged = {}
+    for case, platform, loss in primary + extra:
+        if case and isinstance(loss, (int, float)):
+            merged.setdefault(case, [case, platform, loss])
+    return sorted(merged.values(), key=lambda item: -item[2])
+
+
+def _frequency_items(freq):
+    """{key: {count, percentage}} -> [[key, count, percentage], ...] (건수 내림차순)"""
+    items = [[k, v.get("count", 0), v.get("percentage")] for k, v in (freq or {}).items() if isinstance(v, dict)]
+    return sorted(items, key=lambda item: -item[1])
+
+
+def dataset_fact(raw, cases_dir):
+    cases = f"{cases_dir}/pig_butchering_data.json"
+    with_images = f"{cases_dir}/pig_butchering_with_images.json"
+    screenshots = f"{cases_dir}/screenshots"
+
+    def compute():
+        values = {}
+        if raw and Path(raw).exists():
+            values["total_reports"] = len(_load_json(raw))
+        values["pb_cases"] = len(_load_json(cases))
+        values["pb_pct"] = _ratio(values["pb_cases"], values.get("total_reports"), 2)
+        if Path(with_images).exists():
+            values["screenshot_cases"] = len(_load_json(with_images))
+        if Path(screenshots).is_dir():
+            values["screenshot_files"] = sum(1 for p in Path(screenshots).iterdir() if p.is_file())
+        return values
+
+    return Fact("dataset", [raw, cases, with_images, screenshots], compute)
+
+
+def profiles_fact(individual, cot_dir):
+    def compute():
+        values = {"profile_files": len(glob.glob(f"{individual}/ttp_*.json"))}
+        if Path(cot_dir).is_dir():
+            values["cot_files"] = len(glob.glob(f"{cot_dir}/response_*.txt"))
+        return values
+
+    return Fact("profiles", [individual, cot_dir], compute)
+
+
+def stats_fact(path, curated):
+    """TTP_STATISTICS_ANALYSIS.json (ttp_stats.py 생성본 / 기존 수작업본 모두 지원)
+    고액 피해 사례는 FINAL_ANALYSIS_REPORT.json 의 수작업 목록(cases_over_500k)으로 보충"""
+
+    def compute():
+        stats = _load_json(path)
+        meta = stats.get("statistics_metadata", {})
+        blockchain = stats.get("blockchain_intelligence", {})
+        loss = stats.get("financial_loss_analysis", {})
+        persona = stats.get("scammer_persona_analysis", {})
+        brand = stats.get("brand_impersonation_analysis", {})
+        status = stats.get("temporal_patterns", {}).get("platform_operational_status", {})
+        extraction = blockchain.get("wallet_extraction_rate", {})
+        chains = _frequency_items(blockchain.get("wallet_distribution"))
+        migration = _known(_frequency_items(
+            stats.get("communication_migration_patterns", {}).get("migration_patterns")))
+        extra_cases = []
+        if Path(curated).exists():
+            extra_cases = [[c.get("case"), c.get("platform"), c.get("loss")] for c in
+                           _load_json(curated).get("high_value_cases", {}).get("cases_over_500k", [])]
+
+        values = {
+            "profiles": meta.get("total_cases_analyzed"),
+            "dataset_total": meta.get("total_cases_in_dataset"),
+            "unique_wallets": blockchain.get("unique_wallets", sum(item[1] for item in chains)),
+            "cases_with_wallets": extraction.get("cases_with_wallets"),
+            "wallet_rate": _pct_value(extraction.get("extraction_rate")),
+            "wallet_chains": chains,
+            "brand_cases": brand.get("total_brand_impersonation_cases"),
+            "total_losses": loss.get("total_tracked_losses"),
+            "cases_with_loss": loss.get("cases_with_loss"),
+            "loss_distribution": [[k, v.get("count", 0), v.get("percentage")]
+                                  for k, v in loss.get("loss_distribution", {}).items()],
+            "high_value_cases": _merge_cases([[c.get("case"), c.get("platform"), c.get("loss")]
+                                              for c in loss.get("high_value_cases", [])], extra_cases),
+            "contact_platforms": _frequency_items(
+                stats.get("initial_contact_analysis", {}).get("platform_frequency")),
+            "gender": _frequency_items(persona.get("gender_distribution")),
+            "professions": _frequency_items(persona.get("claimed_professions")),
+            "relationship_types": _frequency_items(persona.get("relationship_types")),
+            "lure_types": _frequency_items(stats.get("lure_type_analysis", {}).get("lure_frequency")),
+            "psychological_tactics": _frequency_items(
+                stats.get("psychological_tactics_analysis", {}).get("tactic_frequency")),
+            "withdrawal_tactics": _frequency_items(
+                stats.get("withdrawal_blocking_tactics", {}).get("tactic_frequency")),
+            "active_platforms": (status.get("active") or status.get("operational") or {}).get("count"),
+        }
+        for chain, count, _ in chains:
+            values[f"wallets_{chain.split('_')[-1].lower()}"] = count
+        values["coverage"] = _ratio(values["profiles"], values["dataset_total"])
+        values["brand_pct"] = _ratio(values["brand_cases"], values["profiles"])
+        if migration:
+            values["top_migration"], _, values["top_migration_pct"] = migration[0]
+        for key in ("mean_loss", "median_loss", "min_loss", "max_loss"):
+            values[key] = loss.get("statistics", {}).get(key)
+        return values
+
+    return Fact("stats", [path, curated], compute)
+
+
+def multimodal_fact(path):
+    def compute():
+        report = _load_json(path)
+        summary = report.get("summary_statistics", {})
+        values = {
+            "total_cases": summary.get("total_cases"),
+            "average_score": summary.get("average_consistency_score"),
+            "high_consistency": summary.get("high_consistency_cases"),
+            "flagged": summary.get("flagged_for_review"),
+            "brand_confirmed": summary.get("brand_impersonation_confirmed"),
+            "new_wallets": len(report.get("new_wallet_addresses_extracted", [])),
+        }
+        values["high_pct"] = _ratio(values["high_consistency"], values["total_cases"], 0)
+        return values
+
+    return Fact("multimodal", [path], compute)
+
+
+def validation_fact(generated, legacy):
+    """ttp_validation.py 표본 우선, 없으면 기존 10% 표본 파일"""
+
+    def compute():
+        path = generated if Path(generated).exists() else legacy
+        try:
+            meta = _load_json(path).get("validation_metadata", {})
+        except json.JSONDecodeError:
+            # 수작업 표본 파일은 본문에 JSON 문법 오류가 있어 메타데이터 수치만 직접 읽음
+            text = Path(path).read_text(encoding="utf-8")
+            size = re.search(r'"sample_size":\s*(\d+)', text)
+            pct = re.search(r'"sample_percentage":\s*"([^"]+)"', text)
+            meta = {"sample_size": int(size.group(1)) if size else None,
+                    "sample_percentage": pct.group(1) if pct else None}
+        return {"sample_size": meta.get("sample_size"),
+                "sample_pct": _pct_value(meta.get("sample_percentage")),
+                "sample_file": Path(path).name}
+
+    return Fact("validation", [generated, legacy], compute)
+
+
+def wallets_fact(path):
+    def compute():
+        summary = _load_json(path).get("summary", {})
+        return {"verified": summary.get("total_wallets_verified"),
+                "eth_verified": summary.get("ethereum_verified"),
+                "btc_verified": summary.get("bitcoin_verified")}
+
+    return Fact("wallets", [path], compute)
+
+
+def meta_fact(stats_path, individual):
+    """생성일 = 통계 파일에 기록된 generated_at, 없으면 프로파일의 analysis_date 중 최신
+    (파일 mtime 은 checkout/복사만으로 바뀌므로 사용하지 않음)"""
+
+    def compute():
+        generated = None
+        if Path(stats_path).exists():
+            generated = _load_json(stats_path).get("statistics_metadata", {}).get("generated_at")
+        if not generated:
+            dates = []
+            for file in glob.glob(f"{individual}/ttp_*.json"):
+                data = _load_json(file)
+                if isinstance(data, dict) and isinstance(data.get("analysis_date"), str):
+                    dates.append(data["analysis_date"][:10])
+            generated = max(dates, default=None)
+        return {"generated_at": generated}
+
+    return Fact("meta", [stats_path, individual], compute)
+
+
+def build_facts(raw=None, cases_dir="pig_butchering_cases", results_dir="ttp_results"):
+    facts = [
+        dataset_fact(raw, cases_dir),
+        profiles_fact(f"{results_dir}/individual", f"{results_dir}/chain_of_thought"),
+        stats_fact(f"{results_dir}/TTP_STATISTICS_ANALYSIS.json", f"{results_dir}/FINAL_ANALYSIS_REPORT.json"),
+        multimodal_fact(f"{results_dir}/MULTIMODAL_CONSISTENCY_REPORT.json"),
+        validation_fact(f"{results_dir}/validation_sample.json", f"{results_dir}/VALIDATION_SAMPLE_10PERCENT.json"),
+        wallets_fact(f"{results_dir}/WALLET_VERIFICATION_REPORT.json"),
+        meta_fact(f"{results_dir}/TTP_STATISTICS_ANALYSIS.json", f"{results_dir}/individual"),
+    ]
+    return facts
+
+
+# ---------------------------------------------------------------------------
+# 블록: 목록/표 값 -> 여러 줄 텍스트 (언어별 라벨 적용)
+# ---------------------------------------------------------------------------
+
+def _width(text):
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def _pad(text, width):
+    """한글 등 전각 문자를 2칸으로 계산하여 왼쪽 정렬"""
+    text = str(text)
+    return text + " " * max(width - _width(text), 1)
+
+
+def _value_label(labels, value):
+    """라벨 사전 우선, 없으면 dating_apps -> Dating Apps (WhatsApp 등 대소문자 혼용 단어는 유지)"""
+    return labels.get("values", {}).get(value) or " ".join(
+        w if w != w.lower() else display_label(w) for w in re.split(r"[_\s]+", str(value)) if w)
+
+
+def _pct_text(pct):
+    return f"{pct}%" if pct is not None else MISSING
+
+
+def block_rank_table(items, labels, width=17, top=10):
+    unit = labels.get("units", {}).get("cases", "")
+    items = _known(items)
+    width = max([width] + [_width(_value_label(labels, key)) + 2 for key, _, _ in items[:top]])
+    return [f"{_pad(rank, 6)}{_pad(_value_label(labels, key), width)}{_pad(f'{count}{unit}', 8)}{_pct_text(pct)}"
+            for rank, (key, count, pct) in enumerate(items[:top], 1)]
+
+
+def block_pct_list(items, labels, top=10):
+    return [f"- {_value_label(labels, key)}: {_pct_text(pct)}" for key, _, pct in _known(items)[:top]]
+
+
+def block_loss_table(items, labels):
+    unit = labels.get("units", {}).get("cases", "")
+    bins = labels.get("loss_bins", {})
+    return [f"{_pad(bins.get(key, key), 18)}{_pad(f'{count}{unit}', 8)}{_pct_text(pct)}"
+            for key, count, pct in sorted(items, key=lambda item: LOSS_BIN_KEYS.index(item[0])
+                                          if item[0] in LOSS_BIN_KEYS else len(LOSS_BIN_KEYS))]
+
+
+def block_case_table(items, labels, top=10):
+    notes = labels.get("case_notes", {})
+    return [f"{_pad(rank, 6)}{_pad(case, 8)}{_pad(platform, 20)}{_pad(f'${loss:,}', 14)}{notes.get(case, '')}".rstrip()
+            for rank, (case, platform, loss) in enumerate(items[:top], 1)]
+
+
+def block_chain_rows(items, labels):
+    unit = labels.get("units", {}).get("items", "")
+    chains = labels.get("chains", {})
+    rows = []
+    for chain, count, _ in items:
+        name, _, symbol = chain.partition("_")
+        rows.append(f"| - {chains.get(chain, f'{name.capitalize()} ({symbol})')} | {count}{unit} |")
+    return rows
+
+
+BLOCKS = {
+    "rank_table": block_rank_table,
+    "pct_list": block_pct_list,
+    "loss_table": block_loss_table,
+    "case_table": block_case_table,
+    "chain_rows": block_chain_rows,
+}
+
+
+def align_tables(text):
+    """'|'로 시작/끝나는 연속 줄을 표로 보고 열 너비를 내용에 맞춰 다시 정렬"""
+    lines = text.split("\n")
+    out, i = [], 0
+    while i < len(lines):
+        if not (lines[i].startswith("|") and lines[i].rstrip().endswith("|")):
+            out.append(lines[i])
+            i += 1
+            continue
+        rows = []
+        while i < len(lines) and lines[i].startswith("|") and lines[i].rstrip().endswith("|"):
+            rows.append([c.strip() for c in lines[i].rstrip()[1:-1].split("|")])
+            i += 1
+        ncols = max(len(r) for r in rows)
+        widths = [max((_width(r[c]) for r in rows if c < len(r) and set(r[c]) != {"-"}), default=0)
+                  for c in range(ncols)]
+        for row in rows:
+            if all(set(cell) == {"-"} for cell in row):
+                out.append("|" + "|".join("-" * (w + 2) for w in widths) + "|")
+            else:
+                out.append("|" + "|".join(f" {_pad(cell, widths[c] + 1)}" for c, cell in enumerate(row)) + "|")
+    return "\n".join(out)
+
+
+# ---------------------------------------------------------------------------
+# 템플릿 렌더링
+# ---------------------------------------------------------------------------
+
+def section_facts(text):
+    """섹션 템플릿이 참조하는 fact 이름"""
+    return sorted({m.group(1) for m in VALUE_RE.finditer(text)} | {m.group(2) for m in BLOCK_RE.finditer(text)})
+
+
+class Renderer:
+    def __init__(self, facts, labels, warnings):
+        self.facts = facts          # name -> values
+        self.labels = labels        # 언어별 라벨
+        self.warnings = warnings
+
+    def lookup(self, fact, key):
+        value = self.facts.get(fact, {}).get(key)
+        if value is None:
+            self.warnings.add(f"{fact}.{key}")
+        return value
+
+    def value(self, match, labels):
+        value = self.lookup(match.group(1), match.group(2))
+        spec = match.group(3) or ""
+        if value is None:
+            return MISSING
+        if spec == "label":
+            return _value_label(labels, value)
+        try:
+            return format(value, spec)
+        except (TypeError, ValueError):
+            return str(value)
+
+    def block(self, match, labels):
+        items = self.lookup(match.group(2), match.group(3))
+        options = dict(opt.split("=") for opt in match.group(4).split())
+        options = {k: int(v) for k, v in options.items()}
+        lines = BLOCKS[match.group(1)](items, labels, **options) if items else []
+        return "\n".join(lines or [labels.get("no_data", MISSING)])
+
+    def render_text(self, template, lang):
+        labels = self.labels.get(lang, {})
+        text = BLOCK_RE.sub(lambda m: self.block(m, labels), template)
+        text = VALUE_RE.sub(lambda m: self.value(m, labels), text)
+        return align_tables(text)
+
+    def render_value(self, template, lang):
+        """JSON 필드: 템플릿 전체가 자리표시자 하나면 원래 타입(숫자 등) 유지"""
+        match = VALUE_RE.fullmatch(template)
+        if match and not match.group(3):
+            value = self.lookup(match.group(1), match.group(2))
+            if value is not None:
+                return value
+        return self.render_text(template, lang)
+
+
+class TextOutput:
+    """섹션 템플릿 파일 -> 텍스트 보고서"""
+
+    def __init__(self, path, template, lang):
+        self.path = path
+        self.template = template
+        self.lang = lang
+
+    def sections(self):
+        text = (Path(TEMPLATE_DIR) / self.template).read_text(encoding="utf-8")
+        parts = SECTION_RE.split(text)[1:]
+        return [(f"{Path(self.template).stem}/{name}", body, section_facts(body))
+                for name, body in zip(parts[0::2], parts[1::2])]
+
+    def render(self, renderer, body):
+        return renderer.render_text(body, self.lang)
+
+    def assemble(self, rendered):
+        return "".join(rendered)
+
+
+class JsonOutput:
+    """{필드 경로: 템플릿} 바인딩 -> 기존 JSON 보고서의 수치 필드 갱신 (최상위 키 단위 섹션)"""
+
+    def __init__(self, path, template, lang="eng"):
+        self.path = path
+        self.template = template
+        self.lang = lang
+
+    def sections(self):
+        bindings = _load_json(Path(TEMPLATE_DIR) / self.template)
+        groups = {}
+        for field, template in bindings.items():
+            groups.setdefault(field.split(".")[0], {})[field] = template
+        return [(f"{Path(self.template).stem}/{name}", group, section_facts(json.dumps(group, ensure_ascii=False)))
+                for name, group in groups.items()]
+
+    def render(self, renderer, body):
+        return {field: renderer.render_value(template, self.lang) for field, template in body.items()}
+
+    def assemble(self, rendered):
+        """바인딩된 필드 값만 원문에서 교체 (수작업 파일의 들여쓰기/한 줄 객체 등 서식 유지)"""
+        if not Path(self.path).exists():
+            raise FileNotFoundError(f"{self.path} (수치를 채울 기존 보고서가 없음)")
+        text = Path(self.path).read_text(encoding="utf-8")
+        for group in rendered:
+            for field, value in group.items():
+                start, end = _value_span(text, field.split("."))
+                text = text[:start] + json.dumps(value, ensure_ascii=False) + text[end:]
+        return text
+
+
+_WS_RE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
+
+
+def _value_span(text, keys):
+    """JSON 원문에서 keys 경로 값의 (시작, 끝) 위치 (없는 경로는 KeyError)"""
+    pos = _WS_RE.match(text, 0).end()
+    for key in keys:
+        opener = text[pos]
+        if opener not in "{[":
+            raise KeyError(".".join(keys))
+        pos = _WS_RE.match(text, pos + 1).end()
+        index = 0
+        while text[pos] not in "}]":
+            if opener == "{":
+                name, pos = _DECODER.raw_decode(text, pos)
+                pos = _WS_RE.match(text, pos).end() + 1   # ':'
+                pos = _WS_RE.match(text, pos).end()
+                found = name == key
+            else:
+                found = str(index) == key
+                index += 1
+            if found:
+                break
+            _, pos = _DECODER.raw_decode(text, pos)
+            pos = _WS_RE.match(text, pos).end()
+            if text[pos] == ",":
+                pos = _WS_RE.match(text, pos + 1).end()
+        else:
+            raise KeyError(".".join(keys))
+    _, end = _DECODER.raw_decode(text, pos)
+    return pos, end
+
+
+OUTPUTS = {
+    "kor": TextOutput("COMPREHENSIVE_REPORT_KOR.txt", "comprehensive_kor.txt", "kor"),
+    "eng": TextOutput("COMPREHENSIVE_REPORT_ENG.txt", "comprehensive_eng.txt", "eng"),
+    "final": JsonOutput("ttp_results/FINAL_ANALYSIS_REPORT.json", "final_analysis_report.json"),
+    "research": JsonOutput("ttp_results/RESEARCH_DATASET_SUMMARY.json", "research_dataset_summary.json"),
+}
+
+
+# ---------------------------------------------------------------------------
+# 증분 빌드
+# ---------------------------------------------------------------------------
+
+class ReportBuilder:
+    def __init__(self, facts, outputs, state_file=STATE_FILE, force=False):
+        self.facts = facts
+        self.outputs = outputs
+        self.state_file = Path(state_file)
+        state = {}
+        if self.state_file.exists() and not force:
+            state = _load_json(self.state_file)
+        if state.get("code_version") != CODE_VERSION:
+            state = {}
+        self.fact_state = state.get("facts", {})
+        self.section_state = state.get("sections", {})
+        self.output_state = state.get("outputs", {})
+        self.warnings = set()
+        self.counts = {"facts": 0, "sections": 0, "rendered": 0, "written": 0}
+
+    def refresh_facts(self):
+        """입력 서명이 바뀐 fact만 다시 계산 -> {name: values}, {name: digest}"""
+        values, digests = {}, {}
+        for fact in self.facts:
+            signature = fact.signature()
+            cached = self.fact_state.get(fact.name)
+            if not cached or cached["signature"] != signature:
+                try:
+                    result = fact.compute()
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"[!] {fact.name}: 입력을 읽을 수 없음 ({e})")
+                    result = {}
+                cached = {"signature": signature, "values": result, "digest": _digest(result)}
+                self.fact_state[fact.name] = cached
+                self.counts["facts"] += 1
+            values[fact.name] = cached["values"]
+            digests[fact.name] = cached["digest"]
+        return values, digests
+
+    def build(self, labels):
+        values, digests = self.refresh_facts()
+        renderer = Renderer(values, labels, self.warnings)
+        changed = []
+        for name, output in self.outputs.items():
+            lang_digest = _digest(labels.get(output.lang, {}))
+            rendered, dirty = [], False
+            for section_id, body, deps in output.sections():
+                key = _digest([CODE_VERSION, body, lang_digest, {d: digests.get(d) for d in deps}])
+                cached = self.section_state.get(section_id)
+                self.counts["sections"] += 1
+                if not cached or cached["key"] != key:
+                    cached = {"key": key, "deps": deps, "content": output.render(renderer, body)}
+                    self.section_state[section_id] = cached
+                    self.counts["rendered"] += 1
+                    dirty = True
+                rendered.append(cached["content"])
+            if self.write_output(output, rendered, dirty):
+                changed.append(output.path)
+        self.save_state()
+        return changed
+
+    def write_output(self, output, rendered, dirty):
+        """섹션이 바뀌었거나 출력 파일이 기록 당시와 다를 때만 조립, 내용이 다를 때만 기록"""
+        path = Path(output.path)
+        record = self.output_state.get(output.path)
+        if not dirty and record and path.exists():
+            st = path.stat()
+            if [st.st_size, st.st_mtime_ns] == record["stat"]:
+                return False
+        try:
+            content = output.assemble(rendered)
+        except FileNotFoundError as e:
+            print(f"[!] 건너뜀: {e}")
+            return False
+        except KeyError as e:
+            print(f"[!] 건너뜀: {output.path} (바인딩 필드가 없음: {e.args[0]})")
+            return False
+        written = not path.exists() or path.read_text(encoding="utf-8") != content
+        if written:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+            self.counts["written"] += 1
+        st = path.stat()
+        self.output_state[output.path] = {"stat": [st.st_size, st.st_mtime_ns]}
+        return written
+
+    def save_state(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"code_version": CODE_VERSION, "facts": self.fact_state, "sections": self.section_state,
+                       "outputs": self.output_state}, f, ensure_ascii=False)
+        os.replace(tmp, self.state_file)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render the comprehensive reports from analytics outputs")
+    parser.add_argument("--raw", type=str, help="Scraped JSON (default: newest dfpi_scam_data_v2_*.json)")
+    parser.add_argument("--cases-dir", type=str, default="pig_butchering_cases", help="Organized case directory")
+    parser.add_argument("--results-dir", type=str, default="ttp_results", help="Analytics output directory")
+    parser.add_argument("--only", nargs="+", choices=sorted(OUTPUTS), help="Render only these reports")
+    parser.add_argument("--state", type=str, default=STATE_FILE, help="Render cache file")
+    parser.add_argument("--force", action="store_true", help="Ignore the render cache")
+    parser.add_argument("--list", action="store_true", help="List sections and the data they depend on")
+
+    args = parser.parse_args()
+
+    outputs = {name: OUTPUTS[name] for name in (args.only or OUTPUTS)}
+    if args.list:
+        for name, output in outputs.items():
+            print(f"[{name}] {output.path}")
+            for section_id, _, deps in output.sections():
+                print(f"  {section_id:40s} {', '.join(deps) or '(정적)'}")
+        return
+
+    start = time.time()
+    facts = build_facts(args.raw or latest_raw_file(), args.cases_dir, args.results_dir)
+    labels = _load_json(Path(TEMPLATE_DIR) / "labels.json")
+    builder = ReportBuilder(facts, outputs, state_file=args.state, force=args.force)
+    changed = builder.build(labels)
+
+    c = builder.counts
+    print(f"[*] 데이터 항목 재계산 {c['facts']}/{len(facts)}, 섹션 재렌더링 {c['rendered']}/{c['sections']}")
+    for path in changed:
+        print(f"[+] 갱신: {path}")
+    if not changed:
+        print("[*] 변경된 보고서 없음")
+    if builder.warnings:
+        print(f"[!] 값이 없는 항목 ({len(builder.warnings)}): {', '.join(sorted(builder.warnings))}")
+    print(f"[+] 완료 ({time.time() - start:.3f}초)")
+
+
+if __name__ == "__main__":
+    main()
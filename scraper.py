@@ -9,6 +9,8 @@ import json
 import csv
 import re
 from datetime import datetime
+
+import perf_trace
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -76,6 +78,7 @@ class DFPIScamScraper:
                 pass
             return {"totalRecords": 0, "pageLength": 10, "totalPages": 1}
 
+    @perf_trace.traced("extract_all_data_via_js")
     def extract_all_data_via_js(self):
         """JavaScript로 모든 데이터를 한번에 추출"""
         print("[*] JavaScript API를 통해 전체 데이터 추출 시도...")
@@ -184,6 +187,7 @@ class DFPIScamScraper:
             print(f"[!] 페이지 {page_num} 이동 실패: {e}")
             return False
 
+    @perf_trace.traced("scrape_all")
     def scrape_all(self):
         """전체 데이터 수집"""
         self.load_page()
@@ -200,7 +204,7 @@ class DFPIScamScraper:
         info = self.get_table_info()
         total_pages = info.get("totalPages", 1)
 
-        for page_num in range(total_pages):
+        for page_num in perf_trace.items("scrape_page", range(total_pages)):
             print(f"[*] 페이지 {page_num + 1}/{total_pages} 수집 중...")
 
             if page_num > 0:
@@ -250,6 +254,13 @@ class DFPIScamScraper:
 
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape the DFPI crypto scam tracker table")
+    perf_trace.add_arguments(parser)
+    args = parser.parse_args()
+    perf_trace.start(args, "scraper")
+
     scraper = DFPIScamScraper(headless=True)
 
     try:
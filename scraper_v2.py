@@ -18,6 +18,8 @@ from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from urllib.parse import urljoin
 
+import perf_trace
+
 
 class DFPIScamScraperV2:
     def __init__(self, headless=True):
@@ -51,6 +53,7 @@ class DFPIScamScraperV2:
         time.sleep(3)
         print("[+] 페이지 로드 완료")
 
+    @perf_trace.traced("extract_all_data_via_js")
     def extract_all_data_via_js(self):
         """JavaScript로 전체 데이터 추출 (상세 페이지 링크 포함)"""
         print("[*] JavaScript API로 전체 데이터 추출 중...")
@@ -110,6 +113,7 @@ class DFPIScamScraperV2:
             print(f"[!] 추출 실패: {e}")
         return None
 
+    @perf_trace.traced("fetch_actual_screenshot")
     def fetch_actual_screenshot(self, detail_url, case_id, output_dir):
         """상세 페이지에서 실제 스크린샷 이미지 다운로드"""
         if not detail_url or detail_url == '':
@@ -183,6 +187,7 @@ class DFPIScamScraperV2:
         except Exception as e:
             return None
 
+    @perf_trace.traced("scrape_all")
     def scrape_all(self, download_images=True, output_dir="screenshots"):
         """전체 데이터 수집"""
         self.load_page()
@@ -201,7 +206,7 @@ class DFPIScamScraperV2:
             downloaded = 0
             skipped = 0
 
-            for idx, record in enumerate(self.data, 1):
+            for idx, record in perf_trace.items("scrape_screenshot", enumerate(self.data, 1), label=lambda x: x[0]):
                 detail_url = record.get('screenshot_detail_url', '')
 
                 if not detail_url:
@@ -283,12 +288,23 @@ class DFPIScamScraperV2:
 
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape the DFPI crypto scam tracker")
+    parser.add_argument("--output", type=str, help="JSON output file (default: timestamped)")
+    parser.add_argument("--csv-output", type=str, help="CSV output file (default: timestamped)")
+    parser.add_argument("--image-dir", type=str, default="screenshots_v2", help="Screenshot directory")
+    perf_trace.add_arguments(parser)
+
+    args = parser.parse_args()
+    perf_trace.start(args, "scraper_v2")
+
     scraper = DFPIScamScraperV2(headless=True)
 
     try:
-        data = scraper.scrape_all(download_images=True, output_dir="screenshots_v2")
-        scraper.save_to_csv()
-        scraper.save_to_json()
+        data = scraper.scrape_all(download_images=True, output_dir=args.image_dir)
+        scraper.save_to_csv(args.csv_output)
+        scraper.save_to_json(args.output)
 
         # 통계
         if data:
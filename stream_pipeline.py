@@ -0,0 +1,395 @@
+"""
+스트리밍 수집 → 필터 → 스크린샷 → TTP 프로파일링 파이프라인 (수집 중에 프로파일링 시작)
+- 단계마다 유한 큐(queue.Queue maxsize) + 워커 스레드 n개: 큐가 차면 앞 단계가 대기 (backpressure)
+- 추출(표 한 번에 JS 추출 후 한 건씩 방출) → 필터(Pig Butchering, pb 번호 부여) → 스크린샷(상세 페이지) → 프로파일링 → 수집
+- 총 실행 시간은 단계 합이 아니라 가장 느린 단계(보통 LLM 호출)에 수렴, 케이스별 지연(추출 → 결과)도 기록
+- 출력은 기존 배치 단계와 동일: 원본 JSON/CSV, pb 케이스, ttp_results/individual, ttp_profiles_all_*.json, ttp_summary.json
+  (pb 케이스 기본 위치는 ttp_results/stream_cases: 커밋된 pig_butchering_cases/ 는 --cases-dir 로 지정할 때만 갱신)
+- --raw 지정 시 Selenium/네트워크 없이 수집 JSON을 재생 (기존 screenshot_local 재사용)
+- 스크린샷은 Pig Butchering 케이스만 다운로드 (다른 유형 상세 페이지는 요청하지 않음)
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import llm_telemetry
+import perf_trace
+from organize_pig_butchering import is_pig_butchering, make_pb_case, save_pb_cases
+from ttp_aggregate import SummaryAggregate, case_key
+from ttp_profiler import MAX_RETRIES, REQUEST_DELAY, TTPProfiler
+
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_FETCH_DELAY = 0.5
+
+_DONE = object()  # 스트림 종료 표시
+
+
+class StreamStage:
+    """유한 입력 큐 + 워커 스레드로 항목을 처리해 다음 단계 큐로 넘기는 단계
+
+    fn(item)이 None을 반환하면 항목을 버림, 예외는 해당 항목만 실패 처리
+    """
+
+    def __init__(self, name, fn, workers=1, maxsize=DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.inbox = queue.Queue(maxsize)
+        self.next = None
+        self.stats = {"in": 0, "out": 0, "dropped": 0, "errors": 0,
+                      "busy": 0.0, "blocked": 0.0, "max_queue": 0}
+        self._lock = threading.Lock()
+        self._alive = 0
+        self._threads = []
+
+    def put(self, item):
+        """입력 큐에 넣기 (가득 차면 대기) -> 대기 시간(초)"""
+        started = time.perf_counter()
+        self.inbox.put(item)
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.stats["max_queue"] = max(self.stats["max_queue"], self.inbox.qsize())
+        return waited
+
+    def start(self, stop):
+        self._alive = self.workers
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(stop,), name=f"{self.name}-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self, stop):
+        try:
+            while True:
+                item = self.inbox.get()
+                if item is _DONE:
+                    self.inbox.put(_DONE)  # 같은 단계의 다른 워커도 종료
+                    break
+                try:
+                    self._process(item, stop)
+                except Exception as e:
+                    # 처리 함수 밖(통계/다음 단계 전달)의 예외로도 워커가 죽지 않도록
+                    with self._lock:
+                        self.stats["errors"] += 1
+                    print(f"[!] {self.name}: {_case_label(item)} 처리 실패: {e}")
+        finally:
+            # 마지막 워커가 종료를 다음 단계로 전달 (예외로 루프를 벗어나도 반드시 수행)
+            with self._lock:
+                self._alive -= 1
+                last = self._alive == 0
+            if last and self.next is not None:
+                self.next.put(_DONE)
+
+    def _process(self, item, stop):
+        stats = self.stats
+        with self._lock:
+            stats["in"] += 1
+        if stop.is_set():
+            # 중단 시 남은 항목은 처리하지 않고 비움
+            with self._lock:
+                stats["dropped"] += 1
+            return
+
+        started = time.perf_counter()
+        try:
+            with perf_trace.span(f"stream_{self.name}", item=item.get("case_id")):
+                out = self.fn(item)
+        except Exception as e:
+            out = None
+            with self._lock:
+                stats["errors"] += 1
+            print(f"[!] {self.name}: {_case_label(item)} 오류: {e}")
+        busy = time.perf_counter() - started
+
+        blocked = 0.0
+        if out is not None and self.next is not None:
+            blocked = self.next.put(out)
+        with self._lock:
+            stats["busy"] += busy
+            stats["blocked"] += blocked
+            stats["out" if out is not None else "dropped"] += 1
+
+
+def _case_label(item):
+    """로그용 케이스 표기 (case_id가 정수가 아니거나 없어도 예외 없이)"""
+    case_id = item.get("case_id") if isinstance(item, dict) else None
+    return f"case_{case_id:03d}" if isinstance(case_id, int) and not isinstance(case_id, bool) else f"case_{case_id!s}"
+
+
+class StreamPipeline:
+    """추출 → 필터 → 스크린샷 → 프로파일링 → 수집 스트리밍 실행"""
+
+    def __init__(self, args):
+        self.args = args
+        self.scraper = None
+        self.rows = []
+        self.cases = []     # (pb_case_id, pb 케이스)
+        self.results = []   # (pb_case_id, TTP 결과)
+        self.latencies = []
+        self.aggregate = SummaryAggregate()
+        self.failed = 0
+        self.wall = 0.0
+        self.source_stats = {"in": 0, "out": 0, "dropped": 0, "errors": 0,
+                             "busy": 0.0, "blocked": 0.0, "max_queue": 0}
+        self._pb_count = 0
+        self._local = threading.local()  # 스레드별 TTPProfiler
+        self.stop = threading.Event()
+
+        self.img_dir = os.path.join(args.cases_dir, "screenshots")
+        os.makedirs(self.img_dir, exist_ok=True)
+        if not args.raw:
+            os.makedirs(args.image_dir, exist_ok=True)
+
+        self.stages = [
+            StreamStage("filter", self.filter_case, 1, args.queue_size),
+            StreamStage("fetch", self.fetch_screenshot, args.fetch_workers, args.queue_size),
+            StreamStage("profile", self.profile_case, args.profile_workers, args.queue_size),
+            StreamStage("collect", self.collect, 1, args.queue_size),
+        ]
+        for stage, nxt in zip(self.stages, self.stages[1:]):
+            stage.next = nxt
+
+    def _new_profiler(self):
+        args = self.args
+        return TTPProfiler(api_provider=args.api, model=args.model,
+                           output_mode="structured" if args.structured else "cot",
+                           base_url=args.base_url, stream=args.stream, max_retries=args.max_retries,
+                           metrics_file=args.metrics_file or None, output_dir=args.results_dir,
+                           request_delay=args.delay)
+
+    def _profiler(self):
+        profiler = getattr(self._local, "profiler", None)
+        if profiler is None:
+            profiler = self._local.profiler = self._new_profiler()
+        return profiler
+
+    # ---- 단계 함수 ----
+
+    def source(self):
+        """수집 레코드를 한 건씩 반환 (라이브: 표 JS 추출, --raw: JSON 재생)"""
+        if self.args.raw:
+            with open(self.args.raw, "r", encoding="utf-8") as f:
+                self.rows = json.load(f)
+            print(f"[*] 수집 데이터 재생: {self.args.raw} ({len(self.rows)}건)")
+            for idx, row in enumerate(self.rows, 1):
+                yield row.get("case_id", idx), row
+            return
+
+        from scraper_v2 import DFPIScamScraperV2
+
+        self.scraper = DFPIScamScraperV2(headless=True)
+        self.scraper.load_page()
+        self.rows = self.scraper.data = self.scraper.extract_all_data_via_js() or []
+        for idx, row in enumerate(self.rows, 1):
+            yield idx, row
+
+    def filter_case(self, item):
+        """Pig Butchering만 통과, 도착 순서대로 pb 번호 부여 (워커 1개)"""
+        if not is_pig_butchering(item["row"]):
+            return None
+        self._pb_count += 1
+        item["pb_case_id"] = self._pb_count
+        return item
+
+    def fetch_screenshot(self, item):
+        """상세 페이지 스크린샷 다운로드 후 pb 케이스로 정리"""
+        row = item["row"]
+        if self.scraper is not None:
+            result = None
+            if row.get("screenshot_detail_url"):
+                result = self.scraper.fetch_actual_screenshot(row["screenshot_detail_url"], item["case_id"],
+                                                              self.args.image_dir)
+                time.sleep(self.args.fetch_delay)  # 서버 부하 방지
+            row["screenshot_local"] = result[0] if result else ""
+            row["screenshot_actual_url"] = result[2] if result else ""
+        item["case"] = make_pb_case({"case_id": item["case_id"], **row}, item["pb_case_id"], self.img_dir)
+        return item
+
+    def profile_case(self, item):
+        """TTP 프로파일링 (--limit 밖의 케이스는 그대로 통과, 실패해도 케이스는 수집 단계로 전달)"""
+        limit = self.args.limit
+        if limit is not None and item["pb_case_id"] > limit:
+            return item
+        profiler = self._profiler()
+        try:
+            item["result"] = profiler.analyze_case(item["case"])
+        except Exception as e:
+            item["result"], item["error"] = None, e
+        else:
+            if not item["result"]:
+                item["error"] = profiler._failure_reason()
+        time.sleep(profiler.request_delay)  # Rate limiting (워커별)
+        return item
+
+    def collect(self, item):
+        """케이스/결과 수집 및 케이스별 지연 기록 (워커 1개)"""
+        pb_case_id = item["pb_case_id"]
+        latency = time.perf_counter() - item["emitted"]
+        self.cases.append((pb_case_id, item["case"]))
+        if "result" in item:
+            self.latencies.append(latency)
+
+        tag = f"[pb_{pb_case_id:03d}] {_case_label(item)}"
+        result = item.get("result")
+        if result:
+            self.results.append((pb_case_id, result))
+            self.aggregate.add(result, case_key(item["case"]))
+            confidence = result.get("ttp_profile", {}).get("extraction_metadata", {}).get("confidence_score", 0)
+            print(f"{tag} OK (confidence: {confidence:.2f}, {latency:.1f}초)")
+        elif "error" in item:
+            self.failed += 1
+            print(f"{tag} FAIL ({item['error']}, {latency:.1f}초)")
+        else:
+            print(f"{tag} 정리 완료 ({latency:.1f}초)")
+        return item
+
+    # ---- 실행 ----
+
+    def run(self):
+        started = time.perf_counter()
+        for stage in self.stages:
+            stage.start(self.stop)
+        first = self.stages[0]
+        stats = self.source_stats
+
+        try:
+            emit_started = time.perf_counter()
+            for case_id, row in self.source():
+                stats["in"] += 1
+                stats["out"] += 1
+                stats["busy"] += time.perf_counter() - emit_started
+                stats["blocked"] += first.put({"case_id": case_id, "row": row, "emitted": time.perf_counter()})
+                if self.stop.is_set():
+                    break
+                emit_started = time.perf_counter()
+        except KeyboardInterrupt:
+            print("\n[!] 중단: 처리 중인 항목만 마치고 종료")
+            self.stop.set()
+        except Exception:
+            self.stop.set()
+            raise
+        finally:
+            first.put(_DONE)
+            try:
+                for stage in self.stages:
+                    stage.join()
+            except KeyboardInterrupt:
+                self.stop.set()
+                for stage in self.stages:
+                    stage.join()
+
+        self.wall = time.perf_counter() - started
+        return self.wall
+
+    def save(self):
+        """원본 / pb 케이스 / TTP 결과 저장 (기존 배치 단계와 같은 파일)"""
+        args = self.args
+        if self.scraper is not None:
+            self.scraper.save_to_csv(args.csv_output)
+            self.scraper.save_to_json(args.output)
+
+        pb_data = [case for _, case in sorted(self.cases, key=lambda x: x[0])]
+        pb_with_images = save_pb_cases(pb_data, args.cases_dir)
+        print(f"[+] Pig Butchering 케이스 저장: {len(pb_data)}건 (이미지 {len(pb_with_images)}건) -> "
+              f"{os.path.abspath(args.cases_dir)}")
+
+        if not self.results:
+            return
+        results = [result for _, result in sorted(self.results, key=lambda x: x[0])]
+        profiler = self._profiler()
+        all_results_file = profiler.save_all_results(results, self.aggregate)
+        summary = self.aggregate.to_summary()
+        with open(profiler.output_dir / "ttp_summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"[+] TTP 결과 저장: {all_results_file} ({len(results)}건, 실패 {self.failed}건)")
+
+    def print_report(self):
+        """단계별 처리량/대기 시간, 병목 단계, 케이스별 지연"""
+        rows = [("extract", 1, self.source_stats)] + [(s.name, s.workers, s.stats) for s in self.stages]
+        print(f"\n{'='*78}")
+        print("[스트리밍 파이프라인 단계별 통계]")
+        print(f"{'='*78}")
+        print("단계       스레드    입력    출력    실패    처리(초)    스레드당    대기(초)   최대큐")
+        for name, workers, st in rows:
+            max_queue = st["max_queue"] if name != "extract" else "-"
+            print(f"{name:<10}{workers:>7}{st['in']:>8}{st['out']:>8}{st['errors']:>8}{st['busy']:>12.2f}"
+                  f"{st['busy'] / workers:>12.2f}{st['blocked']:>12.2f}{max_queue:>9}")
+
+        # 단계 합 = 순차 실행 시 예상 시간, 병목 = 스레드당 처리 시간이 가장 긴 단계
+        sequential = sum(st["busy"] for _, _, st in rows)
+        bottleneck, workers, st = max(rows, key=lambda r: r[2]["busy"] / r[1])
+        print(f"\n[*] 실행 시간: {self.wall:.2f}초 (단계 처리 합계 {sequential:.2f}초, "
+              f"병목 {bottleneck} {st['busy'] / workers:.2f}초/스레드)")
+        if self.latencies:
+            p50 = llm_telemetry.percentile(self.latencies, 50)
+            p95 = llm_telemetry.percentile(self.latencies, 95)
+            print(f"[*] 케이스별 지연 (추출 → 결과): p50 {p50:.2f}초 / p95 {p95:.2f}초 / "
+                  f"최대 {max(self.latencies):.2f}초 ({len(self.latencies)}건)")
+        print("[*] 대기(초) = 다음 단계 큐가 가득 차서 기다린 시간 (backpressure)")
+
+    def close(self):
+        if self.scraper is not None:
+            self.scraper.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Stream scrape -> filter -> screenshot -> TTP profiling through bounded queues")
+    parser.add_argument("--raw", type=str, help="Replay a scraped JSON instead of running Selenium")
+    parser.add_argument("--output", type=str, help="Scraped JSON output file (live mode, default: timestamped)")
+    parser.add_argument("--csv-output", type=str, help="Scraped CSV output file (live mode, default: timestamped)")
+    parser.add_argument("--image-dir", type=str, default="screenshots_v2",
+                       help="Downloaded screenshot directory (live mode)")
+    parser.add_argument("--cases-dir", type=str, default="ttp_results/stream_cases",
+                       help="Pig Butchering case output directory (pass pig_butchering_cases to update the "
+                            "committed case files)")
+    parser.add_argument("--results-dir", type=str, default="ttp_results", help="TTP result directory")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                       help=f"Bounded queue size per stage (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--fetch-workers", type=int, default=2, help="Screenshot fetch threads")
+    parser.add_argument("--fetch-delay", type=float, default=DEFAULT_FETCH_DELAY,
+                       help=f"Seconds between detail-page requests per fetch thread (default: {DEFAULT_FETCH_DELAY:g})")
+    parser.add_argument("--profile-workers", type=int, default=2, help="TTP profiling threads")
+    parser.add_argument("--limit", type=int, help="Profile only the first N Pig Butchering cases")
+    parser.add_argument("--api", choices=["anthropic", "openai"], default="anthropic",
+                       help="API provider (default: anthropic)")
+    parser.add_argument("--model", type=str, help="Model name")
+    parser.add_argument("--base-url", type=str, help="API base URL (e.g. local mock server)")
+    parser.add_argument("--structured", action="store_true",
+                       help="Lean structured-output mode (tool/function calling, no chain-of-thought)")
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream chain-of-thought responses (records time-to-first-token)")
+    parser.add_argument("--delay", type=float, default=REQUEST_DELAY,
+                       help=f"Seconds between requests per profiling thread (default: {REQUEST_DELAY:g})")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES,
+                       help=f"Retries on 429/5xx/timeouts, counted per call (default: {MAX_RETRIES})")
+    parser.add_argument("--metrics-file", type=str, default=llm_telemetry.DEFAULT_METRICS_FILE,
+                       help="Append-only per-call telemetry JSONL ('' to disable)")
+    perf_trace.add_arguments(parser)
+
+    args = parser.parse_args()
+    perf_trace.start(args, "stream_pipeline")
+
+    pipeline = StreamPipeline(args)
+    print(f"[*] 스트리밍 시작: 스크린샷 {args.fetch_workers}스레드, 프로파일링 {args.profile_workers}스레드, "
+          f"큐 {args.queue_size}건 ({datetime.now():%Y-%m-%d %H:%M:%S})")
+    try:
+        pipeline.run()
+        pipeline.save()
+    finally:
+        pipeline.close()
+    pipeline.print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+서술문/OCR 텍스트 공용 추출 패턴
+- 달러 금액 ($12,500 / $1.2 million / $30k) -> float
+- 사기 플랫폼 도메인 (스킴/www 제외, 소문자)
+- ttp_cascade 규칙 기반 추출기와 ocr_prescreen 일관성 검사에서 공유
+"""
+
+import re
+
+AMOUNT_PATTERN = r"\$\s?([\d,]+(?:\.\d+)?)\s*(k|K|thousand|million|M)?"
+URL_PATTERN = r"\b(?:https?://)?(?:www\.)?([a-z0-9][a-z0-9\-]*(?:\.[a-z0-9\-]+)*\.(?:com|net|org|io|app|cc|vip|top|xyz|rest|pro|co|me|info|biz|shop|site|online))\b"
+
+
+def parse_amounts(text):
+    """텍스트의 달러 금액 목록 (k/thousand/million 단위 환산)"""
+    amounts = []
+    for number, unit in re.findall(AMOUNT_PATTERN, text or ""):
+        try:
+            value = float(number.replace(",", ""))
+        except ValueError:
+            continue
+        if unit in ("k", "K", "thousand"):
+            value *= 1_000
+        elif unit in ("million", "M"):
+            value *= 1_000_000
+        amounts.append(value)
+    return amounts
+
+
+def find_domains(text):
+    """텍스트의 도메인 목록 (소문자, 등장 순서, 중복 제거)"""
+    domains = []
+    for domain in re.findall(URL_PATTERN, text or "", re.IGNORECASE):
+        domain = domain.lower()
+        if domain not in domains:
+            domains.append(domain)
+    return domains
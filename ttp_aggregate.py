@@ -0,0 +1,305 @@
+"""
+증분/병합 가능한 TTP 요약 집계
+- 프로파일 1건당 O(1) 갱신 (카운터, 평균용 합계/건수, 고유값 HyperLogLog 스케치)
+- 여러 실행/샤드의 집계를 병합하여 전체 재스캔 없이 요약 생성 (같은 케이스 키는 한 번만 반영)
+- ttp_profiles_all_*.json 옆에 *.agg.json 으로 저장
+"""
+
+import base64
+import hashlib
+import json
+import math
+from pathlib import Path
+
+# 빈도 카운터: 요약 키 -> (섹션 경로, 다중값 여부)
+COUNTER_FIELDS = {
+    "contact_platforms": (("approach_and_lure", "initial_contact_platform"), True),
+    "lure_types": (("approach_and_lure", "lure_type"), True),
+    "relationship_types": (("impersonation_and_psychology", "scammer_persona", "relationship_type"), False),
+    "psychological_tactics": (("impersonation_and_psychology", "psychological_tactics"), True),
+    "platform_types": (("fraud_mechanism", "platform_type"), False),
+    "withdrawal_tactics": (("fraud_mechanism", "withdrawal_block_tactics"), True),
+}
+
+# *.agg.json 형식 버전 (다른 버전은 읽지 않고 프로파일 파일에서 다시 생성)
+AGGREGATE_VERSION = 2
+
+# 고유값 개수 추정 (HyperLogLog)
+DISTINCT_FIELDS = {
+    "platform_names": ("fraud_mechanism", "platform_names"),
+    "platform_urls": ("fraud_mechanism", "platform_urls"),
+    "wallet_addresses": ("financial_tracking", "wallet_addresses"),
+}
+
+
+def get_path(profile, path):
+    value = profile
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def profile_of(result):
+    """결과 형식({"ttp_profile": ...} 또는 평탄화된 프로파일)에 관계없이 프로파일 반환"""
+    if isinstance(result, dict) and isinstance(result.get("ttp_profile"), dict):
+        return result["ttp_profile"]
+    return result if isinstance(result, dict) else {}
+
+
+class HyperLogLog:
+    """병합 가능한 고유값 개수 추정 스케치 (표준 오차 ~1.04/sqrt(2^p))"""
+
+    def __init__(self, p=10, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("HyperLogLog precision mismatch")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)  # 소규모 보정 (linear counting)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {"p": self.p, "registers": base64.b64encode(bytes(self.registers)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["p"], base64.b64decode(data["registers"]))
+
+
+def case_key(case):
+    """파이프라인 케이스 키 (프롬프트/응답 아티팩트 이름과 동일한 형식, 예: pb001_case002)"""
+    case_id = case.get("original_case_id", case.get("case_id", 0))
+    pb_case_id = case.get("pb_case_id", case_id)
+    return f"pb{pb_case_id:03d}_case{case_id:03d}"
+
+
+def _contribution(profile):
+    """프로파일 1건이 집계에 더하는 값 (병합 시 중복 케이스 차감용)"""
+    counters = {}
+    for key, (path, multi) in COUNTER_FIELDS.items():
+        value = get_path(profile, path)
+        values = (value or []) if multi else ([value] if value else [])
+        values = [v for v in values if isinstance(v, (str, int, float))]
+        if values:
+            counters[key] = values
+
+    conf = get_path(profile, ("extraction_metadata", "confidence_score"))
+    loss = get_path(profile, ("financial_tracking", "estimated_loss_usd"))
+    return {
+        "counters": counters,
+        "confidence": conf if conf and isinstance(conf, (int, float)) else None,
+        "loss": loss if loss and isinstance(loss, (int, float)) else None,
+    }
+
+
+class SummaryAggregate:
+    def __init__(self):
+        self.total_cases = 0
+        self.counters = {key: {} for key in COUNTER_FIELDS}
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.loss_sum = 0
+        self.loss_count = 0
+        self.distinct = {key: HyperLogLog() for key in DISTINCT_FIELDS}
+        self.cases = {}  # 케이스 키 -> 반영한 값 (중복 추가 방지 / 병합 시 중복 차감)
+
+    @property
+    def case_keys(self):
+        return set(self.cases)
+
+    def _apply(self, contribution, sign=1):
+        self.total_cases += sign
+        for key, values in contribution["counters"].items():
+            counter = self.counters[key]
+            for v in values:
+                counter[v] = counter.get(v, 0) + sign
+                if counter[v] <= 0:
+                    del counter[v]
+        if contribution["confidence"] is not None:
+            self.confidence_sum += sign * contribution["confidence"]
+            self.confidence_count += sign
+        if contribution["loss"] is not None:
+            self.loss_sum += sign * contribution["loss"]
+            self.loss_count += sign
+
+    def add(self, result, key=None):
+        """프로파일 1건 반영 (이미 반영된 케이스 키면 False)
+
+        key: 파이프라인 케이스 키 (case_key). LLM이 되돌려준 case_id는 누락/중복이 많아 사용하지 않으며,
+        키가 없으면 중복 검사 없이 반영
+        """
+        profile = profile_of(result)
+        if key is not None and key in self.cases:
+            return False
+
+        contribution = _contribution(profile)
+        self._apply(contribution)
+        if key is not None:
+            self.cases[key] = contribution
+
+        for name, path in DISTINCT_FIELDS.items():
+            for v in get_path(profile, path) or []:
+                if v:
+                    self.distinct[name].add(str(v).strip().lower())
+        return True
+
+    def merge(self, other):
+        """다른 집계(다른 실행/샤드)를 병합 -> 제외한 중복 케이스 수
+
+        양쪽에 같은 케이스 키가 있으면 먼저 반영된 쪽을 유지하고 다른 쪽 값은 차감
+        (고유값 스케치는 차감할 수 없어 양쪽 값의 합집합으로 남음)
+        """
+        overlap = self.case_keys & other.case_keys
+        self.total_cases += other.total_cases
+        for key, counter in other.counters.items():
+            mine = self.counters[key]
+            for v, n in counter.items():
+                mine[v] = mine.get(v, 0) + n
+        self.confidence_sum += other.confidence_sum
+        self.confidence_count += other.confidence_count
+        self.loss_sum += other.loss_sum
+        self.loss_count += other.loss_count
+        for key, sketch in other.distinct.items():
+            self.distinct[key].merge(sketch)
+
+        for key in overlap:
+            self._apply(other.cases[key], sign=-1)
+        for key, contribution in other.cases.items():
+            self.cases.setdefault(key, contribution)
+        return len(overlap)
+
+    def to_summary(self):
+        """generate_summary와 같은 형식의 요약 (+ 고유값 추정치)"""
+        summary = {"total_cases": self.total_cases}
+        for key in COUNTER_FIELDS:
+            # 정렬 (빈도순)
+            summary[key] = dict(sorted(self.counters[key].items(), key=lambda x: -x[1]))
+        summary["avg_confidence"] = self.confidence_sum / self.confidence_count if self.confidence_count else 0
+        summary["total_estimated_loss"] = self.loss_sum
+        summary["distinct_estimates"] = {key: sketch.count() for key, sketch in self.distinct.items()}
+        return summary
+
+    def to_dict(self):
+        return {
+            "version": AGGREGATE_VERSION,
+            "total_cases": self.total_cases,
+            "counters": self.counters,
+            "confidence": {"sum": self.confidence_sum, "count": self.confidence_count},
+            "loss": {"sum": self.loss_sum, "count": self.loss_count},
+            "distinct": {key: sketch.to_dict() for key, sketch in self.distinct.items()},
+            "cases": dict(sorted(self.cases.items())),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != AGGREGATE_VERSION:
+            raise ValueError(f"지원하지 않는 집계 버전: {data.get('version')} (필요: {AGGREGATE_VERSION})")
+        agg = cls()
+        agg.total_cases = data["total_cases"]
+        for key, counter in data["counters"].items():
+            agg.counters[key] = dict(counter)
+        agg.confidence_sum = data["confidence"]["sum"]
+        agg.confidence_count = data["confidence"]["count"]
+        agg.loss_sum = data["loss"]["sum"]
+        agg.loss_count = data["loss"]["count"]
+        for key, sketch in data["distinct"].items():
+            agg.distinct[key] = HyperLogLog.from_dict(sketch)
+        agg.cases = dict(data["cases"])
+        return agg
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_results(cls, results, keys=None):
+        """결과 리스트로 집계 생성 (keys: 결과와 같은 순서의 케이스 키)"""
+        agg = cls()
+        keys = keys if keys is not None else [None] * len(results)
+        for r, key in zip(results, keys):
+            agg.add(r, key)
+        return agg
+
+
+def aggregate_path(profiles_file):
+    """ttp_profiles_all_X.json -> ttp_profiles_all_X.agg.json"""
+    profiles_file = Path(profiles_file)
+    return profiles_file.with_name(profiles_file.stem + ".agg.json")
+
+
+def load_or_build(profiles_file):
+    """저장된 집계가 있으면 로드, 없거나 이전 형식이면 프로파일 파일을 한 번 스캔하여 생성/저장"""
+    agg_file = aggregate_path(profiles_file)
+    if agg_file.exists():
+        try:
+            return SummaryAggregate.load(agg_file)
+        except ValueError as e:
+            print(f"[!] {agg_file}: {e} - 다시 생성")
+
+    with open(profiles_file, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    agg = SummaryAggregate.from_results(results)
+    agg.save(agg_file)
+    return agg
+
+
+def main():
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Merge TTP summary aggregates across runs")
+    parser.add_argument("inputs", nargs="*",
+                       help="ttp_profiles_all_*.json or *.agg.json files (default: all runs in ttp_results)")
+    parser.add_argument("--output", type=str, default="ttp_results/ttp_summary.json", help="Summary output file")
+    parser.add_argument("--save-merged", type=str, help="Also save the merged aggregate to this file")
+
+    args = parser.parse_args()
+
+    inputs = args.inputs or sorted(glob.glob("ttp_results/ttp_profiles_all_*[0-9].json"))
+    merged = SummaryAggregate()
+    for path in inputs:
+        try:
+            agg = SummaryAggregate.load(path) if path.endswith(".agg.json") else load_or_build(path)
+        except ValueError as e:
+            print(f"[!] {path}: {e} - 건너뜀 (프로파일 파일을 입력으로 주면 다시 생성)")
+            continue
+        overlap = merged.merge(agg)
+        print(f"[*] {path}: {agg.total_cases}건" + (f" (중복 케이스 {overlap}건 제외)" if overlap else ""))
+
+    summary = merged.to_summary()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    if args.save_merged:
+        merged.save(args.save_merged)
+
+    print(f"[+] 병합 요약 저장: {args.output} (총 {summary['total_cases']}건)")
+    print(f"평균 신뢰도: {summary['avg_confidence']:.2f}")
+    print(f"추정 총 피해액: ${summary['total_estimated_loss']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
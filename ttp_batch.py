@@ -0,0 +1,416 @@
+"""
+TTP Profiler 배치 작업 모드
+- 렌더링된 전체 프롬프트를 하나의 비동기 배치 작업으로 제출
+  (Anthropic Message Batches 또는 OpenAI Batch JSONL)
+- 백오프 폴링, 재시작 후 폴링 재개 (batch_jobs/ 매니페스트, 제출 전에 먼저 기록)
+- 결과를 기존 chain_of_thought/, individual/ 구조로 스트리밍 저장
+- --base-url 로 로컬 목 서버(mock_llm_server.py) 대상 테스트 가능
+"""
+
+import json
+import os
+import time
+import uuid
+import urllib.request
+import urllib.error
+from datetime import datetime
+
+from ttp_aggregate import SummaryAggregate, case_key
+from ttp_profiler import TTPProfiler
+
+DEFAULT_BASE_URLS = {
+    "anthropic": "https://api.anthropic.com",
+    "openai": "https://api.openai.com",
+}
+ANTHROPIC_VERSION = "2023-06-01"
+FINAL_STATUSES = {"ended", "completed", "failed", "expired", "cancelled"}
+
+
+class BatchJobRunner:
+    def __init__(self, profiler, base_url=None, api_key=None,
+                 poll_initial=10.0, poll_max=300.0, poll_factor=1.5):
+        self.profiler = profiler
+        self.provider = profiler.api_provider
+        self.base_url = (base_url or DEFAULT_BASE_URLS[self.provider]).rstrip("/")
+        self.api_key = api_key or os.environ.get(
+            "ANTHROPIC_API_KEY" if self.provider == "anthropic" else "OPENAI_API_KEY", "")
+
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_factor = poll_factor
+
+        # 배치 매니페스트 저장 (재시작 시 폴링 재개용)
+        self.jobs_dir = profiler.output_dir / "batch_jobs"
+        self.jobs_dir.mkdir(exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def _headers(self, content_type="application/json"):
+        if self.provider == "anthropic":
+            headers = {"x-api-key": self.api_key, "anthropic-version": ANTHROPIC_VERSION}
+        else:
+            headers = {"Authorization": f"Bearer {self.api_key}"}
+        if content_type:
+            headers["Content-Type"] = content_type
+        return headers
+
+    def _request(self, method, url, body=None, content_type="application/json"):
+        """HTTP 요청 후 응답 객체 반환 (호출 측에서 닫음)"""
+        if not url.startswith("http"):
+            url = self.base_url + url
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        req = urllib.request.Request(url, data=body, method=method,
+                                     headers=self._headers(content_type if body else None))
+        return urllib.request.urlopen(req, timeout=120)
+
+    def _request_json(self, method, url, body=None, content_type="application/json"):
+        with self._request(method, url, body, content_type) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    # ------------------------------------------------------------------
+    # 매니페스트
+    # ------------------------------------------------------------------
+    def _manifest_path(self, batch_id):
+        return self.jobs_dir / f"{batch_id}.json"
+
+    def _save_manifest(self, manifest):
+        path = self._manifest_path(manifest["batch_id"] or f"pending_{manifest['local_id']}")
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def load_manifest(self, batch_id):
+        with open(self._manifest_path(batch_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def pending_batches(self):
+        """결과 수집이 끝나지 않은 배치 ID 목록 (제출 응답을 못 받은 매니페스트는 경고만)"""
+        pending = []
+        for path in sorted(self.jobs_dir.glob("*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("provider") != self.provider or manifest.get("collected"):
+                continue
+            if not manifest.get("batch_id"):
+                print(f"[!] 배치 ID 없이 중단된 제출: {path.name} ({manifest.get('submitted_at')}, "
+                      f"{len(manifest.get('cases', {}))}건) - 콘솔에서 제출 여부 확인 필요")
+                continue
+            pending.append(manifest["batch_id"])
+        return pending
+
+    # ------------------------------------------------------------------
+    # 제출
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _custom_id(case):
+        case_id = case.get("original_case_id", case.get("case_id", 0))
+        pb_case_id = case.get("pb_case_id", case_id)
+        return f"pb{pb_case_id:03d}_case{case_id:03d}"
+
+    def submit(self, cases):
+        """전체 케이스 프롬프트를 배치 작업으로 제출하고 매니페스트 반환"""
+        requests = []
+        case_map = {}
+        for case in cases:
+            custom_id = self._custom_id(case)
+            prompt = self.profiler._build_prompt(case)
+
+            # 프롬프트 저장 (단일 모드와 동일한 파일명)
+            self.profiler._write_artifact(f"prompt_{custom_id}", prompt)
+
+            requests.append((custom_id, prompt))
+            case_map[custom_id] = {
+                "pb_case_id": case.get("pb_case_id", case.get("original_case_id", case.get("case_id", 0))),
+                "original_case_id": case.get("original_case_id", case.get("case_id", 0)),
+            }
+
+        # 제출 전에 매니페스트부터 기록 (제출 직후 중단돼도 흔적이 남도록)
+        manifest = {
+            "batch_id": None,
+            "local_id": uuid.uuid4().hex[:12],
+            "provider": self.provider,
+            "model": self.profiler.model,
+            "base_url": self.base_url,
+            "submitted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "submitting",
+            "cases": case_map,
+            "saved": [],
+            "failed": [],
+            "collected": False,
+        }
+        self._save_manifest(manifest)
+        pending_path = self._manifest_path(f"pending_{manifest['local_id']}")
+
+        if self.provider == "anthropic":
+            batch = self._submit_anthropic(requests)
+        else:
+            batch = self._submit_openai(requests)
+
+        manifest["batch_id"] = batch["id"]
+        manifest["status"] = batch.get("processing_status") or batch.get("status", "")
+        self._save_manifest(manifest)
+        pending_path.unlink(missing_ok=True)
+        print(f"[+] 배치 제출 완료: {batch['id']} ({len(requests)}건)")
+        return manifest
+
+    def _submit_anthropic(self, requests):
+        body = {"requests": [
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": self.profiler.model,
+                    "max_tokens": 4096,
+                    "messages": [{"role": "user", "content": prompt}],
+                },
+            }
+            for custom_id, prompt in requests
+        ]}
+        return self._request_json("POST", "/v1/messages/batches", body)
+
+    def _submit_openai(self, requests):
+        # 1) JSONL 입력 파일 업로드
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.profiler.model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "max_tokens": 4096,
+                },
+            }, ensure_ascii=False)
+            for custom_id, prompt in requests
+        ]
+        jsonl = ("\n".join(lines) + "\n").encode("utf-8")
+
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"purpose\"\r\n\r\nbatch\r\n"
+            f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"file\"; filename=\"ttp_batch.jsonl\"\r\n"
+            f"Content-Type: application/jsonl\r\n\r\n"
+        ).encode("utf-8") + jsonl + f"\r\n--{boundary}--\r\n".encode("utf-8")
+        uploaded = self._request_json("POST", "/v1/files", body,
+                                      content_type=f"multipart/form-data; boundary={boundary}")
+
+        # 2) 배치 생성
+        return self._request_json("POST", "/v1/batches", {
+            "input_file_id": uploaded["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        })
+
+    # ------------------------------------------------------------------
+    # 폴링 및 결과 수집
+    # ------------------------------------------------------------------
+    def _retrieve(self, batch_id):
+        if self.provider == "anthropic":
+            return self._request_json("GET", f"/v1/messages/batches/{batch_id}")
+        return self._request_json("GET", f"/v1/batches/{batch_id}")
+
+    def poll(self, batch_id):
+        """배치 완료까지 지수 백오프로 폴링"""
+        manifest = self.load_manifest(batch_id)
+        interval = self.poll_initial
+
+        while True:
+            try:
+                batch = self._retrieve(batch_id)
+            except urllib.error.HTTPError as e:
+                # 인증 오류/없는 배치 등 4xx는 재시도해도 바뀌지 않음 (429 제외)
+                if 400 <= e.code < 500 and e.code != 429:
+                    raise
+                print(f"[!] 배치 조회 실패 (HTTP {e.code}) - {interval:.0f}초 후 재시도")
+                time.sleep(interval)
+                interval = min(interval * self.poll_factor, self.poll_max)
+                continue
+            except (urllib.error.URLError, OSError) as e:
+                print(f"[!] 배치 조회 실패 ({e}) - {interval:.0f}초 후 재시도")
+                time.sleep(interval)
+                interval = min(interval * self.poll_factor, self.poll_max)
+                continue
+
+            status = batch.get("processing_status") or batch.get("status", "")
+            counts = batch.get("request_counts", {})
+            if status != manifest.get("status"):
+                manifest["status"] = status
+                self._save_manifest(manifest)
+            print(f"[*] 배치 {batch_id}: {status} {counts}")
+
+            if status in FINAL_STATUSES:
+                return batch
+
+            time.sleep(interval)
+            interval = min(interval * self.poll_factor, self.poll_max)
+
+    def _iter_results(self, batch):
+        """(custom_id, 응답 텍스트 또는 None, 오류 메시지) 스트리밍
+        OpenAI는 output_file(성공)과 error_file(실패 요청) 모두 읽음"""
+        if self.provider == "anthropic":
+            urls = [batch.get("results_url") or f"/v1/messages/batches/{batch['id']}/results"]
+        else:
+            urls = [f"/v1/files/{batch[key]}/content" for key in ("output_file_id", "error_file_id")
+                    if batch.get(key)]
+
+        for url in urls:
+            with self._request("GET", url) as resp:
+                for raw in resp:
+                    line = raw.decode("utf-8").strip()
+                    if line:
+                        yield self._parse_result(json.loads(line))
+
+    def _parse_result(self, entry):
+        text, error = None, None
+        if self.provider == "anthropic":
+            result = entry.get("result", {})
+            if result.get("type") == "succeeded":
+                content = result.get("message", {}).get("content", [])
+                text = "".join(c.get("text", "") for c in content if c.get("type") == "text")
+            else:
+                error = (result.get("error") or {}).get("message") or result.get("type")
+        else:
+            response = entry.get("response") or {}
+            if response.get("status_code") == 200:
+                choices = response.get("body", {}).get("choices", [])
+                if choices:
+                    text = choices[0].get("message", {}).get("content")
+            else:
+                detail = entry.get("error") or (response.get("body") or {}).get("error") or {}
+                error = detail.get("message") or f"HTTP {response.get('status_code')}"
+        return entry.get("custom_id"), text, error
+
+    def collect(self, batch_id, batch=None):
+        """완료된 배치 결과를 chain_of_thought/, individual/ 에 저장"""
+        manifest = self.load_manifest(batch_id)
+        if batch is None:
+            batch = self._retrieve(batch_id)
+
+        saved = set(manifest["saved"])
+        failed = set(manifest["failed"])
+        results = []
+        aggregate = SummaryAggregate()
+
+        for custom_id, text, error in self._iter_results(batch):
+            meta = manifest["cases"].get(custom_id)
+            if meta is None:
+                continue
+            case = {"pb_case_id": meta["pb_case_id"], "original_case_id": meta["original_case_id"]}
+
+            # 이전 수집에서 이미 저장한 케이스는 다시 쓰지 않고 저장본만 요약에 포함
+            existing = self.profiler.individual_dir / f"ttp_{custom_id}.json"
+            if custom_id in saved and existing.exists():
+                with open(existing, "r", encoding="utf-8") as f:
+                    results.append(json.load(f))
+                aggregate.add(results[-1], case_key(case))
+                continue
+
+            result = None
+            if text:
+                self.profiler._write_artifact(f"response_{custom_id}", text)
+                result = self.profiler._extract_json(text)
+
+            if result:
+                self.profiler._save_result(case, result)
+                results.append(result)
+                aggregate.add(result, case_key(case))
+                saved.add(custom_id)
+                failed.discard(custom_id)
+                print(f"    {custom_id}: OK")
+            else:
+                failed.add(custom_id)
+                print(f"    {custom_id}: FAIL" + (f" ({error})" if error else ""))
+
+            # 진행 상황을 주기적으로 기록 (중단 후 재개 대비)
+            if (len(saved) + len(failed)) % 25 == 0:
+                manifest["saved"], manifest["failed"] = sorted(saved), sorted(failed)
+                self._save_manifest(manifest)
+
+        manifest["saved"], manifest["failed"] = sorted(saved), sorted(failed)
+        manifest["collected"] = True
+        manifest["collected_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._save_manifest(manifest)
+
+        all_results_file = self.profiler.save_all_results(results, aggregate)
+
+        print(f"[+] 배치 결과 수집 완료: {len(saved)}/{len(manifest['cases'])}건 성공")
+        print(f"[+] 결과 저장: {all_results_file}")
+        return results
+
+    def run(self, cases):
+        """제출 → 폴링 → 수집"""
+        manifest = self.submit(cases)
+        batch = self.poll(manifest["batch_id"])
+        return self.collect(manifest["batch_id"], batch)
+
+    def resume(self, batch_id=None):
+        """재시작 후 미수집 배치 폴링 재개"""
+        batch_ids = [batch_id] if batch_id else self.pending_batches()
+        if not batch_ids:
+            print("[*] 재개할 배치가 없습니다")
+            return []
+
+        results = []
+        default_url = self.base_url
+        for bid in batch_ids:
+            # 배치는 제출한 엔드포인트에서만 조회 가능
+            self.base_url = self.load_manifest(bid).get("base_url") or default_url
+            print(f"[*] 배치 폴링 재개: {bid} ({self.base_url})")
+            batch = self.poll(bid)
+            results.extend(self.collect(bid, batch))
+        self.base_url = default_url
+        return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pig Butchering TTP Profiler - Batch job mode")
+    parser.add_argument("--api", choices=["anthropic", "openai"], default="anthropic",
+                       help="API provider (default: anthropic)")
+    parser.add_argument("--model", type=str, help="Model name")
+    parser.add_argument("--start", type=int, default=0, help="Start index")
+    parser.add_argument("--limit", type=int, help="Number of cases to process")
+    parser.add_argument("--input", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                       help="Input JSON file")
+    parser.add_argument("--base-url", type=str, help="API base URL (e.g. local mock server)")
+    parser.add_argument("--resume", nargs="?", const="", default=None, metavar="BATCH_ID",
+                       help="Resume polling pending batches (or the given batch id)")
+    parser.add_argument("--poll-interval", type=float, default=10.0, help="Initial poll interval (sec)")
+    parser.add_argument("--poll-max", type=float, default=300.0, help="Max poll interval (sec)")
+    parser.add_argument("--artifact-store", choices=["files", "pack"], default="files",
+                       help="Store prompts/responses as .txt files or in a compressed pack file")
+
+    args = parser.parse_args()
+
+    profiler = TTPProfiler(api_provider=args.api, model=args.model, artifact_store=args.artifact_store)
+    runner = BatchJobRunner(profiler, base_url=args.base_url,
+                            poll_initial=args.poll_interval, poll_max=args.poll_max)
+
+    if args.resume is not None:
+        results = runner.resume(args.resume or None)
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            cases = json.load(f)
+        print(f"[*] 데이터 로드: {len(cases)}건")
+
+        if args.limit:
+            cases = cases[args.start:args.start + args.limit]
+        else:
+            cases = cases[args.start:]
+        results = runner.run(cases)
+
+    if results:
+        summary = profiler.generate_summary(results)
+        summary_file = profiler.output_dir / "ttp_summary.json"
+        with open(summary_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"[+] 요약 저장: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+TTPProfiler 처리량 벤치마크 (로컬 목 서버, 실제 API 비용 없음)
+- mock_llm_server를 프로세스 내에서 실행: 기록된 response_*.txt 재생, 지연 분포, 429/5xx/잘림/깨진 JSON 주입
+- 데이터셋 크기 x 동시성 조합마다 analyze_all 실행
+  (동시성 n: 케이스를 n개로 나눠 스레드마다 별도 TTPProfiler로 analyze_all, 요청 간 대기 없음)
+- 지표: 케이스/분, 요청 지연 p50/p95/p99 (llm_telemetry 기록), 파싱 실패율, API 오류, 재시도, 잘림, 메모리
+- 결과는 ttp_results/benchmarks/bench_<시각>.json 에 누적 저장, --compare 로 이전 실행과 비교
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import llm_telemetry
+import mock_llm_server
+from perf_trace import _rss_bytes
+from ttp_profiler import TTPProfiler
+
+DEFAULT_BENCH_DIR = "ttp_results/benchmarks"
+RSS_SAMPLE_SECONDS = 0.02
+
+
+def make_dataset(cases, size):
+    """앞에서 size건 (부족하면 순환하며 pb_case_id를 새로 매겨 확장)"""
+    if size <= len(cases):
+        return cases[:size]
+    return [dict(cases[i % len(cases)], pb_case_id=i + 1) for i in range(size)]
+
+
+class RSSSampler:
+    """실행 중 RSS 최댓값 샘플링 (ru_maxrss는 프로세스 전체 최댓값이라 구성별 비교 불가)"""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.baseline = self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def run_config(cases, size, concurrency, args, base_url, state=None):
+    """한 구성(size, concurrency) 실행 후 지표 dict 반환"""
+    workdir = Path(tempfile.mkdtemp(prefix="ttp_bench_"))
+    metrics_file = workdir / "llm_calls.jsonl"
+    dataset = make_dataset(cases, size)
+    shards = [dataset[i::concurrency] for i in range(concurrency)]
+    profilers = [TTPProfiler(api_provider=args.api, model=args.model, base_url=base_url, output_dir=workdir,
+                             output_mode="structured" if args.structured else "cot", stream=args.stream, max_retries=args.max_retries, metrics_file=metrics_file,
+                             request_delay=0.0)
+                 for _ in shards]
+    results = [None] * len(shards)
+    faults_before = dict(state.counters) if state else {}
+
+    def work(i):
+        results[i] = profilers[i].analyze_all(shards[i])
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with RSSSampler() as rss, contextlib.redirect_stdout(io.StringIO()):
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(len(shards))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - started
+    traced_peak = None
+    if args.tracemalloc:
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    records = llm_telemetry.load_records(metrics_file)
+    api_errors = sum(1 for r in records if r.get("error"))
+    valid = sum(1 for shard in results for r in (shard or [])
+                if isinstance(r, dict) and isinstance(r.get("ttp_profile"), dict))
+    answered = size - api_errors
+    parse_failures = answered - valid
+
+    def pct(field, q):
+        value = llm_telemetry.percentile([r.get(field) for r in records if not r.get("error")], q)
+        return round(value, 1) if value is not None else None
+
+    row = {
+        "size": size,
+        "concurrency": concurrency,
+        "ok": valid,
+        "api_errors": api_errors,
+        "parse_failures": parse_failures,
+        "parse_failure_rate": round(parse_failures / answered, 4) if answered else None,
+        "truncated": sum(1 for r in records if r.get("truncated")),
+        "retries": sum(r.get("retries") or 0 for r in records),
+        "wall_s": round(wall, 3),
+        "cases_per_min": round(size / wall * 60, 1) if wall > 0 else None,
+        "latency_ms": {f"p{q}": pct("latency_ms", q) for q in (50, 95, 99)},
+        "ttft_ms": {f"p{q}": pct("ttft_ms", q) for q in (50, 95, 99)} if args.stream else None,
+        "rss_peak_delta_mb": round((rss.peak - rss.baseline) / 1e6, 1),
+        "rss_peak_mb": round(rss.peak / 1e6, 1),
+        "tracemalloc_peak_mb": round(traced_peak / 1e6, 1) if traced_peak is not None else None,
+    }
+    if state:
+        row["injected"] = {k: state.counters[k] - faults_before.get(k, 0) for k in state.counters}
+
+    if args.keep_artifacts:
+        row["workdir"] = str(workdir)
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return row
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=10, cwd=Path(__file__).parent).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_bench(path, bench_dir=DEFAULT_BENCH_DIR):
+    """벤치마크 파일 로드 ('last'면 가장 최근 파일)"""
+    if path == "last":
+        files = sorted(Path(bench_dir).glob("bench_*.json"))
+        if not files:
+            return None
+        path = files[-1]
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_results(bench, baseline=None):
+    base_rows = {(r["size"], r["concurrency"]): r for r in (baseline or {}).get("results", [])}
+    meta = bench["meta"]
+    mock = meta.get("mock") or {}
+    faults = {k: v for k, v in mock.items() if k.endswith("_rate") and v}
+    target = meta["base_url"]
+    if mock:
+        target = f"mock {mock.get('latency_dist')} {mock.get('latency')}s {faults or ''}"
+    print(f"\n[*] 벤치마크 {meta['timestamp']} (commit {meta.get('commit')}, {meta['api']}, "
+          f"stream={meta['stream']}, {target})")
+    print(f"    {'size':>5} {'conc':>4} {'cases/min':>10} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'parse_fail':>10} {'api_err':>7} {'retry':>5} {'rss+MB':>7}")
+    for r in bench["results"]:
+        lat = r["latency_ms"]
+        line = (f"    {r['size']:5d} {r['concurrency']:4d} {r['cases_per_min'] or 0:10.1f} "
+                f"{lat['p50'] or 0:8.1f} {lat['p95'] or 0:8.1f} {lat['p99'] or 0:8.1f} "
+                f"{(r['parse_failure_rate'] or 0):10.1%} {r['api_errors']:7d} {r['retries']:5d} "
+                f"{r['rss_peak_delta_mb']:7.1f}")
+        base = base_rows.get((r["size"], r["concurrency"]))
+        if base and base.get("cases_per_min") and r.get("cases_per_min"):
+            line += f"  (처리량 {r['cases_per_min'] / base['cases_per_min'] - 1:+.1%}"
+            if base["latency_ms"].get("p95") and lat.get("p95"):
+                line += f", p95 {lat['p95'] / base['latency_ms']['p95'] - 1:+.1%}"
+            line += " vs baseline)"
+        print(line)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Throughput benchmark for TTPProfiler against the local mock server")
+    parser.add_argument("--input", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                       help="Input JSON file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50], help="Dataset sizes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="Concurrency levels")
+    parser.add_argument("--api", choices=["anthropic", "openai"], default="anthropic", help="API flavour")
+    parser.add_argument("--model", type=str, help="Model name")
+    parser.add_argument("--structured", action="store_true",
+                       help="Lean structured-output mode (mock answers with tool_use / tool_calls)")
+    parser.add_argument("--stream", action="store_true", help="Stream responses (adds TTFT percentiles)")
+    parser.add_argument("--max-retries", type=int, default=2, help="Profiler retries on 429/5xx")
+    parser.add_argument("--base-url", type=str,
+                       help="Use an already running server instead of the in-process mock")
+    parser.add_argument("--replay-dir", type=str, default="ttp_results/chain_of_thought",
+                       help="Recorded response_*.txt files for the mock to replay")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock base latency (sec)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Mock extra latency (sec)")
+    parser.add_argument("--latency-dist", choices=mock_llm_server.LATENCY_DISTRIBUTIONS, default="lognormal",
+                       help="Mock latency distribution (default: lognormal)")
+    parser.add_argument("--latency-shape", type=float, help="Lognormal sigma or pareto alpha")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Mock 429 fraction")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="Mock 5xx fraction")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Mock truncated-response fraction")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Mock malformed-JSON fraction")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Mock retry-after on 429 (sec)")
+    parser.add_argument("--seed", type=int, default=0, help="Mock random seed")
+    parser.add_argument("--tracemalloc", action="store_true",
+                       help="Also record Python heap peak (slows the run)")
+    parser.add_argument("--keep-artifacts", action="store_true", help="Keep per-run working directories")
+    parser.add_argument("--output-dir", type=str, default=DEFAULT_BENCH_DIR, help="Where results are stored")
+    parser.add_argument("--compare", type=str, metavar="BENCH_JSON",
+                       help="Baseline benchmark file to compare against ('last' for the previous run)")
+    parser.add_argument("--show", type=str, metavar="BENCH_JSON", help="Print a stored result and exit")
+
+    args = parser.parse_args()
+
+    if args.show:
+        print_results(load_bench(args.show, args.output_dir),
+                      load_bench(args.compare, args.output_dir) if args.compare else None)
+        return
+
+    baseline = load_bench(args.compare, args.output_dir) if args.compare else None
+    with open(args.input, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    server = state = None
+    base_url = args.base_url
+    mock_config = None
+    if not base_url:
+        mock_config = {
+            "latency": args.latency, "latency_jitter": args.latency_jitter, "latency_dist": args.latency_dist,
+            "latency_shape": args.latency_shape, "rate_limit_rate": args.rate_limit_rate,
+            "server_error_rate": args.server_error_rate, "truncate_rate": args.truncate_rate,
+            "malformed_rate": args.malformed_rate, "retry_after": args.retry_after, "seed": args.seed,
+        }
+        state = mock_llm_server.MockLLMState(replay_dir=args.replay_dir, **mock_config)
+        server = mock_llm_server.serve(port=0, state=state, background=True)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}" + ("/v1" if args.api == "openai" else "")
+        os.environ.setdefault("ANTHROPIC_API_KEY" if args.api == "anthropic" else "OPENAI_API_KEY", "mock")
+        print(f"[*] 목 서버: {base_url} ({args.latency_dist}, 지연 {args.latency}초)")
+
+    # SDK import 비용이 첫 구성의 시간/메모리에 섞이지 않도록 미리 로드
+    try:
+        importlib.import_module("anthropic" if args.api == "anthropic" else "openai")
+    except ImportError:
+        pass
+
+    bench = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "api": args.api,
+            "model": args.model,
+            "structured": args.structured,
+            "stream": args.stream,
+            "max_retries": args.max_retries,
+            "base_url": args.base_url,
+            "mock": mock_config,
+        },
+        "results": [],
+    }
+    try:
+        for size in args.sizes:
+            for concurrency in args.concurrency:
+                print(f"[*] size={size}, concurrency={concurrency}...", end=" ", flush=True)
+                row = run_config(cases, size, concurrency, args, base_url, state)
+                bench["results"].append(row)
+                print(f"{row['cases_per_min']}건/분, p95 {row['latency_ms']['p95']}ms, "
+                      f"파싱 실패 {row['parse_failures']}, API 오류 {row['api_errors']}")
+    finally:
+        if server:
+            server.shutdown()
+
+    out_dir = Path(args.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(bench, f, ensure_ascii=False, indent=2)
+
+    print_results(bench, baseline)
+    print(f"\n[+] 저장: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+TTP 추출 모델 캐스케이드
+- 1단계: 저비용 티어 (규칙 기반 추출기 또는 소형 모델)
+- 2단계: 신뢰도 미달 / 필수 필드 누락 / 스키마 검증 실패 시에만 대형 모델로 승격
+- 승격률, 티어별 지연 및 비용 리포트
+"""
+
+import json
+import re
+import time
+
+from ttp_aggregate import SummaryAggregate, case_key
+from text_patterns import find_domains, parse_amounts
+from ttp_profiler import REQUEST_DELAY, TTPProfiler
+
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_SMALL_MODELS = {
+    "anthropic": "claude-3-5-haiku-20241022",
+    "openai": "gpt-4o-mini",
+}
+
+# 승격 판단에 사용하는 필수 필드 (값이 비었거나 unknown이면 누락)
+REQUIRED_FIELDS = [
+    ("approach_and_lure", "initial_contact_platform"),
+    ("approach_and_lure", "lure_type"),
+    ("fraud_mechanism", "platform_type"),
+    ("extraction_metadata", "confidence_score"),
+]
+
+
+class RuleBasedExtractor:
+    """키워드/정규식 기반 결정적 TTP 추출기 (API 호출 없음)"""
+
+    CONTACT_PLATFORMS = {
+        "WhatsApp": r"whats\s?app",
+        "Telegram": r"telegram",
+        "Facebook": r"facebook|\bfb\b|messenger",
+        "Instagram": r"instagram",
+        "LinkedIn": r"linked\s?in",
+        "WeChat": r"we\s?chat",
+        "TikTok": r"tik\s?tok",
+        "Twitter": r"twitter|\bx\.com\b",
+        "YouTube": r"youtube",
+        "Line": r"\bline app\b|\bline messenger\b",
+        "Tinder": r"tinder",
+        "Hinge": r"\bhinge\b",
+        "Bumble": r"bumble",
+        "Dating_App": r"dating (?:app|site|website)",
+        "Text_SMS": r"text message|\bsms\b|texted",
+    }
+    LURE_TYPES = {
+        "romance": r"romantic|romance|dating|girlfriend|boyfriend|love",
+        "friendship": r"\bfriend",
+        "investment_opportunity": r"invest",
+        "job_offer": r"\bjob\b|employment|recruit",
+        "celebrity_endorsement": r"celebrity|elon musk",
+        "social_media_ad": r"\bad\b|advertisement",
+        "random_message": r"wrong number|random (?:text|message)",
+        "referral": r"referr|introduced (?:them|him|her) to",
+    }
+    RELATIONSHIPS = [
+        ("romantic_partner", r"romantic|romance|dating|girlfriend|boyfriend"),
+        ("mentor", r"mentor|teacher|coach"),
+        ("investment_advisor", r"advisor|adviser|financial (?:expert|analyst)|broker"),
+        ("company_representative", r"customer service|representative|agent of|employee of"),
+        ("celebrity", r"celebrity"),
+        ("friend", r"\bfriend"),
+    ]
+    TACTICS = {
+        "trust_building": r"trust|relationship|after (?:a while|some time|several)",
+        "urgency": r"urgent|immediately|deadline|within \d+ (?:hours|days)",
+        "fear_of_missing_out": r"limited time|opportunity|huge (?:profit|return)",
+        "authority": r"expert|professional|licensed|regulated",
+        "social_proof": r"screenshots? of (?:their|his|her) (?:profit|earning)|other investors",
+        "love_bombing": r"love|sweetheart|darling",
+        "sunk_cost_exploitation": r"(?:fee|tax|deposit).{0,60}withdraw|withdraw.{0,60}(?:fee|tax|deposit)",
+    }
+    PLATFORM_TYPES = [
+        ("liquidity_mining", r"liquidity (?:mining|pool)"),
+        ("staking_platform", r"staking"),
+        ("fake_wallet", r"\bwallet app\b|fake wallet"),
+        ("fake_exchange", r"\bexchange\b"),
+        ("fake_trading_platform", r"trading platform|trading (?:app|website)|platform"),
+    ]
+    WITHDRAWAL_TACTICS = {
+        "tax_payment_demand": r"\btax(?:es)?\b",
+        "withdrawal_fee_demand": r"\bfees?\b",
+        "security_deposit_demand": r"deposit|security (?:fee|check)|verification",
+        "account_frozen": r"frozen|freeze|locked|suspended",
+    }
+    CRYPTO_TYPES = {
+        "USDT": r"usdt|tether",
+        "BTC": r"bitcoin|\bbtc\b",
+        "ETH": r"ethereum|\beth\b",
+        "USDC": r"usdc",
+        "XRP": r"\bxrp\b|ripple",
+    }
+    PAYMENT_METHODS = {
+        "bank_transfer": r"wire|bank transfer|\bbank\b",
+        "crypto_atm": r"(?:bitcoin|crypto) atm",
+        "crypto_exchange": r"coinbase|kraken|crypto\.com|binance|gemini",
+        "cash": r"\bcash\b",
+    }
+
+    WALLET_PATTERNS = [
+        r"\b0x[a-fA-F0-9]{40}\b",                   # ETH/EVM
+        r"\b(?:bc1|[13])[a-zA-HJ-NP-Z0-9]{25,59}\b",  # BTC
+        r"\bT[1-9A-HJ-NP-Za-km-z]{33}\b",            # TRON
+        r"\br[1-9A-HJ-NP-Za-km-z]{24,34}\b",          # XRP
+    ]
+    TX_HASH_PATTERN = r"\b(?:0x)?[a-fA-F0-9]{64}\b"
+
+    def _match_all(self, patterns, text):
+        return [name for name, pattern in patterns.items() if re.search(pattern, text, re.IGNORECASE)]
+
+    def _match_ordered(self, patterns, text):
+        """매칭된 이름을 본문 첫 등장 위치 순으로"""
+        found = []
+        for name, pattern in patterns.items():
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                found.append((match.start(), name))
+        return [name for _, name in sorted(found)]
+
+    def _match_first(self, patterns, text, default="other"):
+        for name, pattern in patterns:
+            if re.search(pattern, text, re.IGNORECASE):
+                return name
+        return default
+
+    def extract(self, case):
+        """케이스 1건에서 ttp_profile 생성 (결과 형식은 LLM 출력과 동일)"""
+        narrative = case.get("complaint_narrative", "") or ""
+        website = case.get("website", "") or ""
+        text = f"{case.get('primary_subject', '')}\n{narrative}"
+
+        # 본문에서 가장 먼저 언급된 플랫폼 = 최초 접촉, 그다음 언급된 플랫폼 = 이동 경로
+        contact = self._match_ordered(self.CONTACT_PLATFORMS, narrative)
+        lures = self._match_all(self.LURE_TYPES, narrative)
+        tactics = self._match_all(self.TACTICS, narrative)
+        withdrawal = self._match_all(self.WITHDRAWAL_TACTICS, narrative)
+
+        wallets = []
+        for pattern in self.WALLET_PATTERNS:
+            wallets.extend(m for m in re.findall(pattern, narrative) if m not in wallets)
+        tx_hashes = [h for h in re.findall(self.TX_HASH_PATTERN, narrative)
+                     if not any(h in w for w in wallets)]
+
+        urls = [d for d in find_domains(f"{website}\n{text}") if "dfpi.ca.gov" not in d]
+
+        amounts = parse_amounts(narrative)
+        if re.search(r"no longer (?:operational|active|available)|shut down|taken down", narrative, re.IGNORECASE):
+            status = "defunct"
+        elif re.search(r"still (?:operational|active|online)", narrative, re.IGNORECASE):
+            status = "operational"
+        else:
+            status = "unknown"
+
+        # 신뢰도 = 찾은 신호 비율 (0~1, 승격 임계값과 같은 척도)
+        signals = [bool(contact), bool(lures), bool(withdrawal), bool(urls), bool(amounts)]
+        confidence = round(sum(signals) / len(signals), 2)
+        missing = [name for name, found in zip(
+            ["initial contact platform", "lure type", "withdrawal block tactics", "platform url", "loss amount"],
+            signals) if not found]
+
+        case_id = case.get("original_case_id", case.get("case_id", 0))
+        profile = {
+            "case_id": case_id,
+            "approach_and_lure": {
+                "initial_contact_platform": contact[:1],
+                "lure_type": lures,
+                "communication_migration": contact[1] if len(contact) > 1 else "unknown",
+            },
+            "impersonation_and_psychology": {
+                "scammer_persona": {
+                    "claimed_identity": "unknown",
+                    "wealth_indicators": [],
+                    "relationship_type": self._match_first(self.RELATIONSHIPS, narrative),
+                },
+                "psychological_tactics": tactics,
+                "trust_building_period": "unknown",
+            },
+            "fraud_mechanism": {
+                "platform_type": self._match_first(self.PLATFORM_TYPES, narrative),
+                "platform_names": [u.split(".")[0] for u in urls],
+                "platform_urls": urls,
+                "fake_profit_shown": bool(re.search(r"profit|earning|gain|balance (?:grew|increased)",
+                                                    narrative, re.IGNORECASE)),
+                "withdrawal_block_tactics": withdrawal,
+            },
+            "financial_tracking": {
+                "cryptocurrency_types": self._match_all(self.CRYPTO_TYPES, narrative),
+                "wallet_addresses": wallets,
+                "transaction_hashes": tx_hashes,
+                "estimated_loss_usd": max(amounts) if amounts else None,
+                "payment_methods": self._match_all(self.PAYMENT_METHODS, narrative),
+            },
+            "temporal_indicators": {
+                "scam_duration": "unknown",
+                "platform_status": status,
+            },
+            "extraction_metadata": {
+                "confidence_score": confidence,
+                "missing_information": missing,
+                "notes": "rule-based extraction",
+            },
+        }
+        return {"ttp_profile": profile}
+
+
+class CascadeProfiler:
+    def __init__(self, api_provider="anthropic", model=None, cheap_tier="rules",
+                 small_model=None, threshold=DEFAULT_THRESHOLD, base_url=None, request_delay=REQUEST_DELAY):
+        # 최종(대형) 티어
+        self.large = TTPProfiler(api_provider=api_provider, model=model, base_url=base_url,
+                                 request_delay=request_delay)
+        self.output_dir = self.large.output_dir
+        self.threshold = threshold
+
+        # 저비용 티어: 규칙 기반 또는 소형 모델 (구조화 출력 모드)
+        self.cheap_tier = cheap_tier
+        if cheap_tier == "rules":
+            self.rules = RuleBasedExtractor()
+            self.small = None
+        else:
+            self.rules = None
+            self.small = TTPProfiler(api_provider=api_provider,
+                                     model=small_model or DEFAULT_SMALL_MODELS.get(api_provider),
+                                     output_mode="structured", base_url=base_url,
+                                     request_delay=request_delay)
+
+        self.tier_stats = {
+            name: {"cases": 0, "accepted": 0, "seconds": 0.0, "prompt_tokens": 0, "response_tokens": 0, "cost": 0.0}
+            for name in ("cheap", "large")
+        }
+
+    def escalation_reasons(self, result):
+        """저비용 티어 결과의 승격 사유 목록 (빈 리스트면 채택)"""
+        if not result or not isinstance(result.get("ttp_profile"), dict):
+            return ["no_result"]
+        profile = result["ttp_profile"]
+        reasons = []
+
+        confidence = profile.get("extraction_metadata", {}).get("confidence_score") or 0
+        if confidence < self.threshold:
+            reasons.append(f"low_confidence({confidence:.2f})")
+
+        for section, field in REQUIRED_FIELDS:
+            value = profile.get(section, {}).get(field)
+            if value in (None, "", [], "unknown", "other"):
+                reasons.append(f"missing:{section}.{field}")
+
+        errors = self.large.validate_profile(profile)
+        if errors:
+            reasons.append(f"schema({len(errors)})")
+        return reasons
+
+    def _run_tier(self, name, profiler, case):
+        """티어 실행 후 지연/토큰/비용 누적 (비용은 프로파일러 통계 = 다른 모드와 동일 산정)"""
+        stats = self.tier_stats[name]
+        before = dict(profiler.stats) if profiler else None
+        started = time.time()
+
+        if profiler is None:
+            result = self.rules.extract(case)
+        else:
+            result = profiler.analyze_case(case)
+
+        stats["cases"] += 1
+        stats["seconds"] += time.time() - started
+        if profiler is not None:
+            prompt_tokens = profiler.stats["prompt_tokens"] - before["prompt_tokens"]
+            response_tokens = profiler.stats["response_tokens"] - before["response_tokens"]
+            stats["prompt_tokens"] += prompt_tokens
+            stats["response_tokens"] += response_tokens
+            stats["cost"] += profiler.stats["cost_usd"] - before["cost_usd"]
+        return result
+
+    def analyze_case(self, case):
+        """캐스케이드 단일 케이스 분석"""
+        result = self._run_tier("cheap", self.small, case)
+        reasons = self.escalation_reasons(result)
+
+        if not reasons:
+            self.tier_stats["cheap"]["accepted"] += 1
+            if self.small is None:
+                self.large._save_result(case, result)
+            result["cascade"] = {"tier": "cheap", "escalation_reasons": []}
+            return result
+
+        result = self._run_tier("large", self.large, case)
+        if result:
+            self.tier_stats["large"]["accepted"] += 1
+            result["cascade"] = {"tier": "large", "escalation_reasons": reasons}
+        return result
+
+    def analyze_all(self, cases, start_from=0, limit=None):
+        """전체 케이스 캐스케이드 분석"""
+        results = []
+        aggregate = SummaryAggregate()
+        total = len(cases)
+
+        if limit:
+            cases = cases[start_from:start_from + limit]
+        else:
+            cases = cases[start_from:]
+
+        cheap_name = "rules" if self.small is None else self.small.model
+        print(f"[*] 캐스케이드 TTP 프로파일링 시작: {len(cases)}건 (전체 {total}건)")
+        print(f"[*] 저비용 티어: {cheap_name}, 대형 티어: {self.large.model}, 임계값: {self.threshold}")
+        print()
+
+        for i, case in enumerate(cases, 1):
+            case_id = case.get("original_case_id", case.get("case_id", 0))
+            pb_case_id = case.get("pb_case_id", case_id)
+            subject = case.get("primary_subject", "N/A")[:30]
+
+            print(f"[{i:3d}/{len(cases)}] pb_{pb_case_id:03d} (case_{case_id:03d}): {subject}...", end=" ")
+
+            large_before = self.tier_stats["large"]["cases"]
+            try:
+                result = self.analyze_case(case)
+                if result:
+                    results.append(result)
+                    aggregate.add(result, case_key(case))
+                    tier = result["cascade"]["tier"]
+                    confidence = result.get("ttp_profile", {}).get("extraction_metadata", {}).get("confidence_score", 0) or 0
+                    reasons = result["cascade"]["escalation_reasons"]
+                    print(f"OK [{tier}] (confidence: {confidence:.2f})" + (f" <- {', '.join(reasons)}" if reasons else ""))
+                else:
+                    print("FAIL (extraction failed)")
+            except Exception as e:
+                print(f"ERROR: {e}")
+
+            # Rate limiting (API 호출이 있었던 경우만)
+            if self.small is not None or self.tier_stats["large"]["cases"] > large_before:
+                time.sleep(self.large.request_delay)
+
+        all_results_file = self.large.save_all_results(results, aggregate)
+
+        print()
+        print(f"[+] 분석 완료: {len(results)}/{len(cases)}건 성공")
+        print(f"[+] 결과 저장: {all_results_file}")
+        self.print_report()
+        return results
+
+    def report(self):
+        """승격률 및 티어별 지연/비용 집계"""
+        cheap = self.tier_stats["cheap"]
+        large = self.tier_stats["large"]
+        report = {
+            "cases": cheap["cases"],
+            "escalated": large["cases"],
+            "escalation_rate": large["cases"] / cheap["cases"] if cheap["cases"] else 0,
+            "tiers": {},
+        }
+        for name, stats in self.tier_stats.items():
+            report["tiers"][name] = {
+                **stats,
+                "avg_latency": stats["seconds"] / stats["cases"] if stats["cases"] else 0,
+            }
+        # 전 케이스를 대형 모델로 처리했을 때의 비용 추정 (승격 케이스 평균 기준)
+        if large["cases"]:
+            report["large_only_cost_estimate"] = large["cost"] / large["cases"] * cheap["cases"]
+        return report
+
+    def print_report(self):
+        report = self.report()
+        print(f"[+] 승격률: {report['escalated']}/{report['cases']}건 ({report['escalation_rate']:.1%})")
+        for name, stats in report["tiers"].items():
+            print(f"    {name:5s}: {stats['cases']}건, 평균 지연 {stats['avg_latency']:.2f}초, "
+                  f"비용 ${stats['cost']:.4f}")
+        if "large_only_cost_estimate" in report:
+            total = sum(s["cost"] for s in report["tiers"].values())
+            print(f"    전체 ${total:.4f} vs 대형 모델 단독 ${report['large_only_cost_estimate']:.4f} (추정)")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pig Butchering TTP Profiler - Model cascade")
+    parser.add_argument("--api", choices=["anthropic", "openai"], default="anthropic",
+                       help="API provider (default: anthropic)")
+    parser.add_argument("--model", type=str, help="Large (final tier) model name")
+    parser.add_argument("--base-url", type=str, help="API base URL (e.g. local mock server)")
+    parser.add_argument("--cheap", choices=["rules", "model"], default="rules",
+                       help="Cheap tier: deterministic rules or a small model (default: rules)")
+    parser.add_argument("--small-model", type=str, help="Small model name when --cheap model")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                       help=f"Escalate below this confidence (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--delay", type=float, default=REQUEST_DELAY,
+                       help=f"Seconds between requests (default: {REQUEST_DELAY:g})")
+    parser.add_argument("--start", type=int, default=0, help="Start index")
+    parser.add_argument("--limit", type=int, help="Number of cases to process")
+    parser.add_argument("--input", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                       help="Input JSON file")
+
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    print(f"[*] 데이터 로드: {len(cases)}건")
+
+    profiler = CascadeProfiler(api_provider=args.api, model=args.model, cheap_tier=args.cheap,
+                               small_model=args.small_model, threshold=args.threshold,
+                               base_url=args.base_url, request_delay=args.delay)
+    results = profiler.analyze_all(cases, start_from=args.start, limit=args.limit)
+
+    if results:
+        summary = profiler.large.generate_summary(results)
+        summary["cascade"] = profiler.report()
+        summary_file = profiler.output_dir / "ttp_summary.json"
+        with open(summary_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"[+] 요약 저장: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
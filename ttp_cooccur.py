@@ -0,0 +1,219 @@
+"""
+TTP 동시 출현 분석 및 연관 규칙 마이닝 (비트셋)
+- 프로파일별 접근 플랫폼/유인 유형/심리 전술/플랫폼 유형/출금 차단 전술을 항목 비트셋(uint64 워드)으로 인코딩
+- 쌍별 동시 출현 행렬, Eclat 방식(비트셋 AND + popcount)으로 고차 빈발 항목집합 탐색
+- 지지도/신뢰도/향상도(lift) 임계값으로 연관 규칙 추출 후 JSON 저장
+- 후보 확장은 항목 행렬 단위로 벡터화되어 Python 쌍별 루프 없이 대규모 프로파일에 대응
+"""
+
+import json
+import math
+from pathlib import Path
+
+from ttp_stats import ProfileTable, require_numpy
+
+DEFAULT_FIELDS = ["contact_platforms", "lure_types", "psychological_tactics",
+                  "platform_types", "withdrawal_tactics"]
+DEFAULT_MIN_SUPPORT = 0.05
+DEFAULT_MIN_CONFIDENCE = 0.5
+DEFAULT_MIN_LIFT = 1.2
+DEFAULT_MAX_LEN = 3
+
+_BYTE_POPCOUNT = None
+
+
+def popcount_rows(words):
+    """(k, w) uint64 행렬의 행별 1비트 개수"""
+    np = require_numpy()
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+
+    global _BYTE_POPCOUNT
+    if _BYTE_POPCOUNT is None:
+        _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+class BitsetIndex:
+    """항목(필드=값)별 케이스 비트셋"""
+
+    def __init__(self, items, bits, n_cases):
+        self.items = items          # [(field, value)]
+        self.bits = bits            # (k, ceil(n/64)) uint64
+        self.n_cases = n_cases
+        self.counts = popcount_rows(bits) if len(items) else []
+
+    @classmethod
+    def from_table(cls, table, fields=DEFAULT_FIELDS, min_count=1):
+        """ProfileTable 범주형 열 -> 비트셋 (min_count 미만 항목 제외)"""
+        np = require_numpy()
+        n = len(table)
+        n_words = max(1, (n + 63) // 64)
+        items, blocks = [], []
+        for field in fields:
+            column = table.columns[field]
+            counts = column.counts()
+            keep = np.flatnonzero(counts >= min_count)
+            if not len(keep):
+                continue
+            lookup = np.full(len(column.vocab), -1, dtype=np.int64)
+            lookup[keep] = np.arange(len(keep))
+            mapped = lookup[column.cols]
+            mask = mapped >= 0
+            rows = column.rows[mask]
+
+            block = np.zeros((len(keep), n_words), dtype=np.uint64)
+            np.bitwise_or.at(block, (mapped[mask], rows >> 6),
+                             np.left_shift(np.uint64(1), (rows & 63).astype(np.uint64)))
+            blocks.append(block)
+            items.extend((field, column.vocab[i]) for i in keep)
+
+        bits = np.vstack(blocks) if blocks else np.zeros((0, n_words), dtype=np.uint64)
+        return cls(items, bits, n)
+
+    def item_label(self, index):
+        field, value = self.items[index]
+        return f"{field}={value}"
+
+    def pair_matrix(self):
+        """(k, k) 동시 출현 건수 (대각선 = 단일 항목 빈도)"""
+        np = require_numpy()
+        k = len(self.items)
+        matrix = np.zeros((k, k), dtype=np.int64)
+        for i in range(k):
+            # 항목 i와 나머지 전체를 한 번에 AND
+            matrix[i, i:] = popcount_rows(self.bits[i] & self.bits[i:])
+        return matrix + np.triu(matrix, 1).T
+
+    def frequent_itemsets(self, min_count, max_len=DEFAULT_MAX_LEN):
+        """Eclat 깊이 우선 탐색: {frozenset(항목 인덱스): 건수}"""
+        np = require_numpy()
+        frequent = {}
+        singles = np.flatnonzero(np.asarray(self.counts) >= min_count)
+        for i in singles:
+            frequent[frozenset([int(i)])] = int(self.counts[i])
+
+        # (접두 항목, 접두 비트셋, 확장 후보 인덱스)
+        stack = [((int(i),), self.bits[i], singles[singles > i]) for i in singles[::-1]]
+        while stack:
+            prefix, prefix_bits, candidates = stack.pop()
+            if len(prefix) >= max_len or not len(candidates):
+                continue
+            # 모든 후보 확장의 지지도를 한 번에 계산
+            joined = prefix_bits & self.bits[candidates]
+            supports = popcount_rows(joined)
+            ok = supports >= min_count
+            kept, kept_bits, kept_supports = candidates[ok], joined[ok], supports[ok]
+            for j in range(len(kept) - 1, -1, -1):
+                itemset = prefix + (int(kept[j]),)
+                frequent[frozenset(itemset)] = int(kept_supports[j])
+                stack.append((itemset, kept_bits[j], kept[j + 1:]))
+        return frequent
+
+    def rules(self, frequent, min_confidence=DEFAULT_MIN_CONFIDENCE, min_lift=DEFAULT_MIN_LIFT):
+        """단일 결론 연관 규칙 X -> y (X ∪ {y} 빈발, 부분집합 지지도는 frequent에서 조회)"""
+        n = self.n_cases
+        rules = []
+        for itemset, count in frequent.items():
+            if len(itemset) < 2:
+                continue
+            for consequent in itemset:
+                antecedent = itemset - {consequent}
+                confidence = count / frequent[antecedent]
+                lift = confidence / (frequent[frozenset([consequent])] / n)
+                if confidence >= min_confidence and lift >= min_lift:
+                    rules.append({
+                        "antecedent": sorted(self.item_label(i) for i in antecedent),
+                        "consequent": self.item_label(consequent),
+                        "count": count,
+                        "support": round(count / n, 4),
+                        "confidence": round(confidence, 4),
+                        "lift": round(lift, 4),
+                    })
+        rules.sort(key=lambda r: (-r["lift"], -r["support"], r["antecedent"], r["consequent"]))
+        return rules
+
+
+def mine(table, fields=DEFAULT_FIELDS, min_support=DEFAULT_MIN_SUPPORT, min_confidence=DEFAULT_MIN_CONFIDENCE,
+         min_lift=DEFAULT_MIN_LIFT, max_len=DEFAULT_MAX_LEN):
+    """동시 출현 행렬 + 빈발 항목집합 + 연관 규칙 (JSON 직렬화 가능한 dict)"""
+    n = len(table)
+    min_count = max(1, math.ceil(min_support * n))
+    index = BitsetIndex.from_table(table, fields, min_count=min_count)
+    frequent = index.frequent_itemsets(min_count, max_len=max_len)
+    pairs = index.pair_matrix()
+
+    itemsets = [{"items": sorted(index.item_label(i) for i in itemset), "count": count,
+                 "support": round(count / n, 4)}
+                for itemset, count in frequent.items() if len(itemset) >= 2]
+    itemsets.sort(key=lambda x: (-len(x["items"]), -x["count"], x["items"]))
+
+    return {
+        "metadata": {
+            "total_cases": n,
+            "fields": list(fields),
+            "min_support": min_support,
+            "min_count": min_count,
+            "min_confidence": min_confidence,
+            "min_lift": min_lift,
+            "max_len": max_len,
+            "frequent_items": len(index.items),
+            "frequent_itemsets": len(itemsets),
+        },
+        "items": [{"item": index.item_label(i), "count": int(index.counts[i]),
+                   "support": round(int(index.counts[i]) / n, 4)} for i in range(len(index.items))],
+        "cooccurrence": {
+            "items": [index.item_label(i) for i in range(len(index.items))],
+            "counts": pairs.tolist(),
+        },
+        "itemsets": itemsets,
+        "rules": index.rules(frequent, min_confidence=min_confidence, min_lift=min_lift),
+    }
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="TTP co-occurrence and association rule mining")
+    parser.add_argument("inputs", nargs="*", default=["ttp_results/individual"],
+                       help="Profile directories or JSON files (default: ttp_results/individual)")
+    parser.add_argument("--cache", type=str, help="Columnar .npz cache (see ttp_stats.py)")
+    parser.add_argument("--fields", nargs="+", default=DEFAULT_FIELDS,
+                       help=f"Categorical fields to encode (default: {' '.join(DEFAULT_FIELDS)})")
+    parser.add_argument("--min-support", type=float, default=DEFAULT_MIN_SUPPORT,
+                       help=f"Minimum itemset support as a fraction of cases (default: {DEFAULT_MIN_SUPPORT})")
+    parser.add_argument("--min-confidence", type=float, default=DEFAULT_MIN_CONFIDENCE,
+                       help=f"Minimum rule confidence (default: {DEFAULT_MIN_CONFIDENCE})")
+    parser.add_argument("--min-lift", type=float, default=DEFAULT_MIN_LIFT,
+                       help=f"Minimum rule lift (default: {DEFAULT_MIN_LIFT})")
+    parser.add_argument("--max-len", type=int, default=DEFAULT_MAX_LEN,
+                       help=f"Maximum itemset size (default: {DEFAULT_MAX_LEN})")
+    parser.add_argument("--output", type=str, default="ttp_results/ttp_cooccurrence.json", help="Output JSON")
+    parser.add_argument("--show", type=int, default=10, help="Number of rules to print")
+
+    args = parser.parse_args()
+
+    table = ProfileTable.load(args.inputs, cache=args.cache)
+    print(f"[*] 프로파일 적재: {len(table)}건")
+
+    start = time.time()
+    result = mine(table, fields=args.fields, min_support=args.min_support, min_confidence=args.min_confidence,
+                  min_lift=args.min_lift, max_len=args.max_len)
+    meta = result["metadata"]
+    print(f"[+] 빈발 항목 {meta['frequent_items']}개, 항목집합 {meta['frequent_itemsets']}개, "
+          f"규칙 {len(result['rules'])}개 ({time.time() - start:.2f}초)")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"[+] 저장: {args.output}")
+
+    for rule in result["rules"][:args.show]:
+        print(f"    {' + '.join(rule['antecedent'])} -> {rule['consequent']} "
+              f"(지지도 {rule['support']:.1%}, 신뢰도 {rule['confidence']:.1%}, lift {rule['lift']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
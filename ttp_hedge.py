@@ -0,0 +1,322 @@
+"""
+제공자 간 헤지(hedged) 요청으로 꼬리 지연 단축
+- 1차 제공자가 적응형 데드라인(관측 지연의 p90 등) 내에 응답하지 않으면
+  2차 제공자/모델로 중복 요청
+- 먼저 도착한 유효한(스키마 검사 통과) 응답 채택, 나머지 요청은 클라이언트 종료로 취소
+  (취소는 오류로 집계하지 않고, 채택되지 않은 요청의 토큰/비용은 전체 비용에 합산)
+- 헤지 비율 및 p50/p90/p99 지연 개선 리포트
+- 지연이 주입된 로컬 목 서버 2대로 테스트 가능 (mock_llm_server.py --latency)
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from llm_telemetry import percentile
+from ttp_profiler import COT_MAX_TOKENS, TTPProfiler
+
+DEFAULT_HEDGE_QUANTILE = 0.9
+DEFAULT_INITIAL_DEADLINE = 20.0
+MIN_LATENCY_SAMPLES = 5
+LATENCY_WINDOW = 100
+
+
+class HedgedProfiler(TTPProfiler):
+    def __init__(self, api_provider="anthropic", model=None, base_url=None,
+                 secondary_provider="openai", secondary_model=None, secondary_base_url=None,
+                 hedge_quantile=DEFAULT_HEDGE_QUANTILE, initial_deadline=DEFAULT_INITIAL_DEADLINE,
+                 timeout=None):
+        super().__init__(api_provider=api_provider, model=model, base_url=base_url, timeout=timeout)
+        self.secondary = TTPProfiler(api_provider=secondary_provider, model=secondary_model,
+                                     base_url=secondary_base_url, timeout=timeout)
+
+        self.hedge_quantile = hedge_quantile
+        self.initial_deadline = initial_deadline
+        self.primary_latencies = deque(maxlen=LATENCY_WINDOW)  # 1차 제공자 지연 (데드라인 산정용, 취소 시 하한)
+
+        self.hedge_stats = {
+            "requests": 0,
+            "hedged": 0,
+            "secondary_wins": 0,
+            "failed": 0,
+            "latencies": [],          # 헤지 적용 시 실제 지연
+            "primary_only": [],       # 1차 단독 지연 (취소 후 미도착 시 취소 시점까지의 하한)
+            "primary_censored": 0,
+            # 채택되지 않은 요청(늦게 도착/무효/취소)의 사용량과 비용
+            "loser_requests": 0,
+            "loser_cancelled": 0,
+            "loser_input_tokens": 0,
+            "loser_output_tokens": 0,
+            "loser_cost_usd": 0.0,
+        }
+        self._censored_slots = set()
+        self._stats_lock = threading.Lock()
+
+    def hedge_deadline(self):
+        """적응형 데드라인: 최근 1차 지연(취소된 요청은 취소 시점 하한 포함)의 hedge_quantile 백분위수"""
+        with self._stats_lock:
+            if len(self.primary_latencies) < MIN_LATENCY_SAMPLES:
+                return self.initial_deadline
+            return percentile(self.primary_latencies, self.hedge_quantile * 100)
+
+    def _is_valid(self, text):
+        """응답이 ttp_profile을 포함하고 스키마 구조 검사를 통과하는지
+
+        enum 불일치는 기존 결과에도 흔하므로 허용하고, 타입/필수 필드 오류만 거부
+        """
+        if not text:
+            return False
+        result = self._extract_json(text)
+        if not isinstance(result, dict) or not isinstance(result.get("ttp_profile"), dict):
+            return False
+        errors = [e for e in self.validate_profile(result["ttp_profile"]) if "not in enum" not in e]
+        return not errors
+
+    @staticmethod
+    def _new_client(profiler):
+        try:
+            return profiler.make_client()
+        except ImportError:
+            return None  # _call_* 에서 설치 안내 출력
+
+    def _account_loser(self, record):
+        """채택되지 않은 요청의 토큰/비용을 헤지 통계와 전체 비용에 합산"""
+        if record is None:
+            return
+        input_tokens = sum(record.get(k) or 0 for k in ("input_tokens", "cache_read_tokens", "cache_write_tokens"))
+        output_tokens = record.get("output_tokens") or 0
+        with self._stats_lock:
+            stats = self.hedge_stats
+            stats["loser_requests"] += 1
+            stats["loser_cancelled"] += int(bool(record.get("cancelled")))
+            stats["loser_input_tokens"] += input_tokens
+            stats["loser_output_tokens"] += output_tokens
+            stats["loser_cost_usd"] += record.get("cost_usd") or 0.0
+            self.stats["prompt_tokens"] += input_tokens
+            self.stats["response_tokens"] += output_tokens
+            self.stats["cost_usd"] += record.get("cost_usd") or 0.0
+
+    def _call_api(self, prompt, client=None, max_tokens=COT_MAX_TOKENS):
+        """1차 호출 후 데드라인 초과/무효 응답 시 2차로 헤지"""
+        started = time.time()
+        deadline = self.hedge_deadline()
+        pool = ThreadPoolExecutor(max_workers=2)
+        pending = {}
+        records = []  # 완료된 요청의 텔레메트리 기록 (채택분 외에는 패자로 합산)
+        finished = threading.Event()
+        stats = self.hedge_stats
+        with self._stats_lock:
+            slot = len(stats["primary_only"])
+            stats["primary_only"].append(None)
+
+        def launch(name, profiler, call):
+            api_client = self._new_client(profiler)
+
+            def attempt():
+                # 채택 후 클라이언트 종료로 끊긴 요청은 오류 로그/집계 대신 취소로 기록
+                profiler._local.cancel_event = finished
+                t0 = time.time()
+                text = call(prompt, api_client, max_tokens)
+                elapsed = time.time() - t0
+                # 텔레메트리 기록은 풀 스레드의 thread-local에 남으므로 결과와 함께 반환
+                record = getattr(profiler._local, "last_call", None)
+                profiler._local.last_call = None
+                profiler._local.cancel_event = None
+                # 취소 후에도 응답이 도착하면 1차 단독 지연을 실제 값으로 보정
+                if name == "primary" and text and finished.is_set():
+                    with self._stats_lock:
+                        if stats["primary_only"][slot] is not None and slot in self._censored_slots:
+                            stats["primary_only"][slot] = elapsed
+                            self._censored_slots.discard(slot)
+                            stats["primary_censored"] -= 1
+                return text, elapsed, record
+            pending[pool.submit(attempt)] = (name, api_client)
+
+        launch("primary", self, super()._call_api)
+        hedged = False
+        winner = None
+        fallback = None
+        fallback_record = None
+        primary_elapsed = None
+
+        done, _ = wait(list(pending), timeout=deadline)
+        if not done:
+            hedged = True
+            launch("secondary", self.secondary, self.secondary._call_api)
+
+        while pending and winner is None:
+            remaining = None
+            if self.timeout:
+                remaining = max(0.0, self.timeout - (time.time() - started))
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # 전체 타임아웃
+
+            for future in done:
+                name, _client = pending.pop(future)
+                text, elapsed, record = future.result()
+                records.append(record)
+                if name == "primary":
+                    primary_elapsed = elapsed
+                if self._is_valid(text):
+                    winner = (name, text, record)
+                    break
+                if not fallback:
+                    fallback, fallback_record = text, record or fallback_record
+
+                # 1차가 데드라인 전에 무효 응답을 주면 즉시 헤지
+                if name == "primary" and not hedged:
+                    hedged = True
+                    launch("secondary", self.secondary, self.secondary._call_api)
+
+        total = time.time() - started
+        with self._stats_lock:
+            stats["requests"] += 1
+            stats["hedged"] += int(hedged)
+            stats["latencies"].append(total)
+            if primary_elapsed is not None:
+                stats["primary_only"][slot] = primary_elapsed
+                self.primary_latencies.append(primary_elapsed)
+            else:
+                # 취소된 1차 요청도 취소 시점까지의 지연(하한)으로 데드라인 표본에 포함
+                # (완료된 요청만 쓰면 느린 요청이 빠져 데드라인이 계속 낮아지고 헤지 비율이 100%로 수렴)
+                stats["primary_only"][slot] = total
+                self.primary_latencies.append(total)
+                self._censored_slots.add(slot)
+                stats["primary_censored"] += 1
+            if winner is None:
+                stats["failed"] += 1
+            elif winner[0] == "secondary":
+                stats["secondary_wins"] += 1
+        finished.set()
+
+        used = winner[2] if winner else fallback_record
+        for record in records:
+            if record is not used:
+                self._account_loser(record)
+
+        # 패자 요청 취소: 미시작 future 취소, 진행 중 요청은 클라이언트 종료 (종료 후 기록을 패자로 합산)
+        for future, (name, api_client) in pending.items():
+            if not future.cancel():
+                future.add_done_callback(lambda f: self._account_loser(f.result()[2]))
+            if api_client is not None:
+                try:
+                    api_client.close()
+                except Exception:
+                    pass
+        pool.shutdown(wait=False)
+
+        # 채택된 응답의 텔레메트리 기록을 호출 스레드로 전달 (_record_call에서 소비)
+        if winner is None:
+            self._local.hedge_call = fallback_record
+            return fallback
+        self._local.hedge_call = winner[2]
+        return winner[1]
+
+    def _record_call(self, prompt, response, seconds, record=None):
+        """헤지 호출은 채택된 요청(1차/2차)의 기록으로 통계 누적 (비용은 해당 모델 단가)"""
+        if record is None:
+            record = getattr(self._local, "hedge_call", None)
+        self._local.hedge_call = None
+        super()._record_call(prompt, response, seconds, record=record)
+
+    def hedge_report(self):
+        """헤지 비율과 지연 백분위수 (1차 단독 대비)"""
+        stats = self.hedge_stats
+        n = stats["requests"]
+        with self._stats_lock:
+            primary_only = [v for v in stats["primary_only"] if v is not None]
+        report = {
+            "requests": n,
+            "hedged": stats["hedged"],
+            "hedge_rate": stats["hedged"] / n if n else 0,
+            "secondary_wins": stats["secondary_wins"],
+            "failed": stats["failed"],
+            "primary_censored": stats["primary_censored"],
+            "current_deadline": self.hedge_deadline(),
+            "losers": {
+                "requests": stats["loser_requests"],
+                "cancelled": stats["loser_cancelled"],
+                "input_tokens": stats["loser_input_tokens"],
+                "output_tokens": stats["loser_output_tokens"],
+                "cost_usd": round(stats["loser_cost_usd"], 6),
+            },
+            "latency": {},
+        }
+        for label, q in (("p50", 50), ("p90", 90), ("p99", 99)):
+            hedged = percentile(stats["latencies"], q) or 0.0
+            primary = percentile(primary_only, q) or 0.0
+            report["latency"][label] = {"hedged": hedged, "primary_only": primary,
+                                        "reduction": primary - hedged}
+        return report
+
+    def print_hedge_report(self):
+        report = self.hedge_report()
+        print(f"[+] 헤지 비율: {report['hedged']}/{report['requests']}건 ({report['hedge_rate']:.1%}), "
+              f"2차 응답 채택: {report['secondary_wins']}건, 현재 데드라인: {report['current_deadline']:.2f}초")
+        for label, values in report["latency"].items():
+            print(f"    {label}: 헤지 {values['hedged']:.2f}초 vs 1차 단독 {values['primary_only']:.2f}초 "
+                  f"(단축 {values['reduction']:+.2f}초)")
+        losers = report["losers"]
+        if losers["requests"]:
+            print(f"    채택되지 않은 요청 {losers['requests']}건 (취소 {losers['cancelled']}건): "
+                  f"입력 {losers['input_tokens']:,} / 출력 {losers['output_tokens']:,} 토큰, "
+                  f"${losers['cost_usd']:.4f} (전체 비용에 포함)")
+        if report["primary_censored"]:
+            print(f"    * 응답이 끝내 도착하지 않은 1차 요청 {report['primary_censored']}건은 취소 시점 지연(하한)으로 집계")
+
+    def analyze_all(self, cases, start_from=0, limit=None, **kwargs):
+        results = super().analyze_all(cases, start_from=start_from, limit=limit, **kwargs)
+        self.print_hedge_report()
+        return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pig Butchering TTP Profiler - Hedged requests")
+    parser.add_argument("--api", choices=["anthropic", "openai"], default="anthropic",
+                       help="Primary API provider (default: anthropic)")
+    parser.add_argument("--model", type=str, help="Primary model name")
+    parser.add_argument("--base-url", type=str, help="Primary API base URL")
+    parser.add_argument("--secondary-api", choices=["anthropic", "openai"], default="openai",
+                       help="Secondary API provider (default: openai)")
+    parser.add_argument("--secondary-model", type=str, help="Secondary model name")
+    parser.add_argument("--secondary-base-url", type=str,
+                       help="Secondary API base URL (OpenAI-compatible URLs end with /v1)")
+    parser.add_argument("--hedge-quantile", type=float, default=DEFAULT_HEDGE_QUANTILE,
+                       help=f"Hedge after this quantile of primary latency (default: {DEFAULT_HEDGE_QUANTILE})")
+    parser.add_argument("--initial-deadline", type=float, default=DEFAULT_INITIAL_DEADLINE,
+                       help=f"Hedge deadline before enough samples (default: {DEFAULT_INITIAL_DEADLINE}s)")
+    parser.add_argument("--timeout", type=float, help="Overall per-request timeout (sec)")
+    parser.add_argument("--start", type=int, default=0, help="Start index")
+    parser.add_argument("--limit", type=int, help="Number of cases to process")
+    parser.add_argument("--input", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                       help="Input JSON file")
+
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    print(f"[*] 데이터 로드: {len(cases)}건")
+
+    profiler = HedgedProfiler(api_provider=args.api, model=args.model, base_url=args.base_url,
+                              secondary_provider=args.secondary_api, secondary_model=args.secondary_model,
+                              secondary_base_url=args.secondary_base_url,
+                              hedge_quantile=args.hedge_quantile, initial_deadline=args.initial_deadline,
+                              timeout=args.timeout)
+    results = profiler.analyze_all(cases, start_from=args.start, limit=args.limit)
+
+    if results:
+        summary = profiler.generate_summary()
+        summary["hedging"] = profiler.hedge_report()
+        summary_file = profiler.output_dir / "ttp_summary.json"
+        with open(summary_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"[+] 요약 저장: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,153 @@
 TTP Profiler for Pig Butchering Cases
 - Chain of Thought 기반 LLM 분석
 - 프롬프트 및 결과 저장
+- 호출별 텔레메트리 (토큰/지연/TTFT/재시도/종료 사유/비용 -> llm_telemetry.py)
 """
 
 import json
 import os
+import threading
 import time
 import re
 from datetime import datetime
 from pathlib import Path
 
+import llm_telemetry
+import perf_trace
+from ttp_aggregate import SummaryAggregate, aggregate_path, case_key
+
 # API 설정 (환경변수 또는 직접 입력)
 # ANTHROPIC_API_KEY 또는 OPENAI_API_KEY 필요
 
+# 패킹 모드 기본값 (토큰 수는 문자 수 기반 추정치)
+PACK_TOKEN_BUDGET = 6000
+PACK_MAX_CASES = 8
+CHARS_PER_TOKEN = 4
+# 패킹 응답은 케이스 수만큼 길어지므로 max_tokens를 케이스 수에 비례해 늘리고, 상한을 넘지 않게 팩 크기 제한
+PACK_OUTPUT_TOKENS_PER_CASE = 1200
+PACK_OUTPUT_OVERHEAD = 512
+PACK_MAX_OUTPUT_TOKENS = 16000
+
+# 구조화 출력 모드 (tool/function calling)
+TTP_TOOL_NAME = "record_ttp_profile"
+STRUCTURED_MAX_TOKENS = 2048
+COT_MAX_TOKENS = 4096
+
+# 재시도 (SDK 내부 재시도는 끄고 직접 재시도해야 횟수가 기록됨)
+MAX_RETRIES = 2
+RETRY_BACKOFF = 1.0
+RETRYABLE_STATUS = {408, 409, 429}
+REQUEST_DELAY = 1.0
+
+# 모델별 가격 (USD / 1M 토큰: 입력, 출력) - 비용 추정용
+MODEL_PRICING = {
+    "claude-sonnet-4-20250514": (3.00, 15.00),
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+
+# 프롬프트 캐시 토큰 가격 배수 (입력 단가 대비: 쓰기, 읽기)
+CACHE_PRICING = {
+    "anthropic": (1.25, 0.10),
+    "openai": (1.00, 0.50),
+}
+
+
+def estimate_cost(model, prompt_tokens, response_tokens, cache_read_tokens=0, cache_write_tokens=0):
+    """토큰 수로 비용(USD) 추정 (가격표에 없는 모델은 0)
+
+    prompt_tokens는 캐시 적중/기록분을 제외한 일반 입력 토큰
+    """
+    price_in, price_out = MODEL_PRICING.get(model, (0.0, 0.0))
+    write_mult, read_mult = CACHE_PRICING["anthropic" if model.startswith("claude") else "openai"]
+    prompt_cost = (prompt_tokens + cache_write_tokens * write_mult + cache_read_tokens * read_mult) * price_in
+    return (prompt_cost + response_tokens * price_out) / 1_000_000
+
+
+def _is_retryable(error):
+    """429/5xx/타임아웃/연결 오류만 재시도"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_delay(error, attempt):
+    """retry-after 헤더 우선, 없으면 지수 백오프"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return min(float(headers.get("retry-after")), 60.0)
+    except (TypeError, ValueError):
+        return RETRY_BACKOFF * (2 ** attempt)
+
+
+def validate_against_schema(value, schema, path="ttp_profile"):
+    """JSON Schema(draft-07 부분집합: type/enum/required/properties/items/min/max) 검증
+
+    Returns:
+        오류 메시지 리스트 (빈 리스트면 통과)
+    """
+    errors = []
+    expected = schema.get("type")
+    type_checks = {
+        "object": lambda v: isinstance(v, dict),
+        "array": lambda v: isinstance(v, list),
+        "string": lambda v: isinstance(v, str),
+        "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+        "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+        "boolean": lambda v: isinstance(v, bool),
+    }
+    if value is None:
+        # null은 "정보 없음"으로 허용 (프롬프트 지침: unknown 또는 null)
+        return errors
+    if expected in type_checks and not type_checks[expected](value):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} not in enum")
+    if "minimum" in schema and isinstance(value, (int, float)) and value < schema["minimum"]:
+        errors.append(f"{path}: {value} < {schema['minimum']}")
+    if "maximum" in schema and isinstance(value, (int, float)) and value > schema["maximum"]:
+        errors.append(f"{path}: {value} > {schema['maximum']}")
+
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: missing")
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate_against_schema(value[key], sub, f"{path}.{key}"))
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate_against_schema(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
 class TTPProfiler:
-    def __init__(self, api_provider="anthropic", model=None):
+    def __init__(self, api_provider="anthropic", model=None, output_mode="cot", base_url=None, timeout=None,
+                 artifact_store="files", stream=False, max_retries=MAX_RETRIES,
+                 metrics_file=llm_telemetry.DEFAULT_METRICS_FILE, output_dir="ttp_results",
+                 request_delay=REQUEST_DELAY):
         self.api_provider = api_provider
         self.model = model or self._default_model()
-        self.prompt_template = self._load_prompt_template()
+        self.base_url = base_url  # 로컬 목 서버 등 API 엔드포인트 변경
+        self.timeout = timeout    # 요청 타임아웃 (초)
+        self.stream = stream      # CoT 호출 스트리밍 (TTFT 측정)
+        self.max_retries = max_retries
+        self.request_delay = request_delay  # 요청 간 간격 (rate limiting)
+        self.output_mode = output_mode  # "cot" 또는 "structured"
+        if output_mode == "structured":
+            self.prompt_template = self._load_prompt_template("prompts/ttp_lean_prompt.txt")
+        else:
+            self.prompt_template = self._load_prompt_template()
         self.schema = self._load_schema()
 
         # 결과 저장 디렉토리
-        self.output_dir = Path("ttp_results")
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
 
         # 개별 결과 저장
         self.individual_dir = self.output_dir / "individual"
@@ -33,6 +158,23 @@ class TTPProfiler:
         self.cot_dir = self.output_dir / "chain_of_thought"
         self.cot_dir.mkdir(exist_ok=True)
 
+        # "pack"이면 개별 .txt 대신 압축 팩 파일에 저장 (cot_store.py)
+        self.cot_store = None
+        if artifact_store == "pack":
+            from cot_store import CoTPackStore
+            self.cot_store = CoTPackStore(self.output_dir / "chain_of_thought.pack")
+
+        # 요청/토큰 통계 (API usage가 있으면 실측, 없으면 문자 수 추정)
+        self.stats = {"requests": 0, "prompt_tokens": 0, "response_tokens": 0, "api_seconds": 0.0,
+                      "cost_usd": 0.0, "truncated": 0}
+
+        # 호출별 텔레메트리 (metrics_file=None이면 파일 기록 없이 메트릭만 집계)
+        self.telemetry = llm_telemetry.get_telemetry(metrics_file)
+        self._local = threading.local()  # 스레드별 마지막 호출 기록 (_record_call에서 소비)
+
+        # 요약 집계 (성공 결과마다 O(1) 갱신)
+        self.aggregate = SummaryAggregate()
+
     def _default_model(self):
         if self.api_provider == "anthropic":
             return "claude-sonnet-4-20250514"
@@ -40,38 +182,145 @@ class TTPProfiler:
             return "gpt-4o"
         return "claude-sonnet-4-20250514"
 
-    def _load_prompt_template(self):
-        with open("prompts/ttp_cot_prompt.txt", "r", encoding="utf-8") as f:
+    def _load_prompt_template(self, path="prompts/ttp_cot_prompt.txt"):
+        with open(path, "r", encoding="utf-8") as f:
             return f.read()
 
     def _load_schema(self):
         with open("prompts/ttp_schema.json", "r", encoding="utf-8") as f:
             return json.load(f)
 
-    def _build_prompt(self, case):
-        """케이스 데이터로 프롬프트 생성"""
+    def _fill_case(self, template, case):
+        """템플릿에 케이스 필드 치환"""
         case_id = case.get("original_case_id", case.get("case_id", 0))
-        prompt = self.prompt_template.replace("{case_id}", str(case_id))
+        prompt = template.replace("{case_id}", str(case_id))
         prompt = prompt.replace("{primary_subject}", case.get("primary_subject", "N/A"))
         prompt = prompt.replace("{scam_type}", case.get("scam_type", "N/A"))
         prompt = prompt.replace("{website}", case.get("website", "N/A"))
         prompt = prompt.replace("{complaint_narrative}", case.get("complaint_narrative", "N/A"))
         return prompt
 
-    def _call_anthropic(self, prompt):
+    def _tool_schema(self):
+        """ttp_schema.json 기반 도구 입력 스키마 (프로파일 + 짧은 근거)"""
+        profile_schema = {k: v for k, v in self.schema.items() if k not in ("$schema", "title")}
+        return {
+            "type": "object",
+            "properties": {
+                "ttp_profile": profile_schema,
+                "rationale": {
+                    "type": "string",
+                    "description": "Optional short rationale (max two sentences)"
+                }
+            },
+            "required": ["ttp_profile"]
+        }
+
+    def validate_profile(self, profile):
+        """ttp_profile을 prompts/ttp_schema.json으로 검증 (오류 메시지 리스트 반환)"""
+        return validate_against_schema(profile, self.schema)
+
+    def _build_prompt(self, case):
+        """케이스 데이터로 프롬프트 생성"""
+        return self._fill_case(self.prompt_template, case)
+
+    def _build_packed_prompt(self, cases):
+        """여러 케이스를 하나의 프롬프트로 묶기"""
+        if not hasattr(self, "packed_template"):
+            self.packed_template = self._load_prompt_template("prompts/ttp_packed_prompt.txt")
+            self.packed_case_template = self._load_prompt_template("prompts/ttp_packed_case.txt")
+
+        blocks = [self._fill_case(self.packed_case_template, c).strip() for c in cases]
+        return self.packed_template.replace("{cases_block}", "\n\n".join(blocks))
+
+    @staticmethod
+    def _estimate_tokens(text):
+        """토큰 수 추정 (문자 수 / CHARS_PER_TOKEN)"""
+        return len(text or "") // CHARS_PER_TOKEN + 1
+
+    def _client_kwargs(self):
+        kwargs = {"max_retries": 0}  # 재시도는 _tracked_call에서 (횟수 기록)
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        if self.timeout:
+            kwargs["timeout"] = self.timeout
+        return kwargs
+
+    def make_client(self):
+        """API 클라이언트 생성 (close()로 진행 중인 요청 취소 가능)"""
+        if self.api_provider == "anthropic":
+            import anthropic
+            return anthropic.Anthropic(**self._client_kwargs())
+        elif self.api_provider == "openai":
+            from openai import OpenAI
+            return OpenAI(**self._client_kwargs())
+        return None
+
+    def _cancelled(self):
+        """현재 스레드의 호출이 의도적으로 취소되었는지 (_local.cancel_event: threading.Event)"""
+        event = getattr(self._local, "cancel_event", None)
+        return event is not None and event.is_set()
+
+    def _tracked_call(self, mode, prompt, max_tokens, request):
+        """재시도 + 텔레메트리 기록
+
+        request(call) -> (결과, usage, stop_reason); 결과는 텍스트 또는 도구 입력 dict
+        """
+        call = self.telemetry.start_call(self.api_provider, self.model, mode, max_tokens)
+        self._local.last_call = None
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result, usage, stop_reason = request(call)
+                    break
+                except Exception as e:
+                    if attempt >= self.max_retries or not _is_retryable(e) or self._cancelled():
+                        raise
+                    call.retry(e)
+                    time.sleep(_retry_delay(e, attempt))
+            call.finish(usage, stop_reason)
+        except Exception as e:
+            if self._cancelled():
+                # 의도적 취소(헤지 패자 등)는 오류가 아님: 입력 토큰 추정치로 기록하고 None 반환
+                call.cancel()
+                self._local.last_call = call.record(
+                    estimated_usage={"input_tokens": self._estimate_tokens(prompt), "output_tokens": 0},
+                    pricing=self._pricing)
+                return None
+            call.fail(e)
+            self._local.last_call = call.record(pricing=self._pricing)
+            raise
+
+        text = result if isinstance(result, str) or result is None else json.dumps(result, ensure_ascii=False)
+        estimated = {"input_tokens": self._estimate_tokens(prompt), "output_tokens": self._estimate_tokens(text)}
+        self._local.last_call = call.record(estimated_usage=estimated, pricing=self._pricing)
+        if self._local.last_call["truncated"]:
+            print(f"\n    [!] 응답이 max_tokens={max_tokens}에서 잘렸습니다", end=" ")
+        return result
+
+    def _pricing(self, fields):
+        return estimate_cost(self.model, fields.get("input_tokens") or 0, fields.get("output_tokens") or 0,
+                             fields.get("cache_read_tokens") or 0, fields.get("cache_write_tokens") or 0)
+
+    def _call_anthropic(self, prompt, client=None, max_tokens=COT_MAX_TOKENS):
         """Anthropic Claude API 호출"""
         try:
             import anthropic
-            client = anthropic.Anthropic()
-
-            message = client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            return message.content[0].text
+            client = client or anthropic.Anthropic(**self._client_kwargs())
+            params = {"model": self.model, "max_tokens": max_tokens,
+                      "messages": [{"role": "user", "content": prompt}]}
+
+            def request(call):
+                if self.stream:
+                    with client.messages.stream(**params) as stream:
+                        for _ in stream.text_stream:
+                            call.first_token()
+                        message = stream.get_final_message()
+                else:
+                    message = client.messages.create(**params)
+                text = "".join(b.text for b in message.content if b.type == "text")
+                return text, message.usage, message.stop_reason
+
+            return self._tracked_call("cot", prompt, max_tokens, request)
         except ImportError:
             print("[!] anthropic 패키지가 설치되지 않았습니다: pip install anthropic")
             return None
@@ -79,27 +328,175 @@ class TTPProfiler:
             print(f"[!] Anthropic API 오류: {e}")
             return None
 
-    def _call_openai(self, prompt):
+    def _call_openai(self, prompt, client=None, max_tokens=COT_MAX_TOKENS):
         """OpenAI GPT API 호출"""
         try:
             from openai import OpenAI
-            client = OpenAI()
-
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=4096
-            )
-            return response.choices[0].message.content
+            client = client or OpenAI(**self._client_kwargs())
+            params = {"model": self.model, "messages": [{"role": "user", "content": prompt}],
+                      "max_tokens": max_tokens}
+
+            def request(call):
+                if not self.stream:
+                    response = client.chat.completions.create(**params)
+                    choice = response.choices[0]
+                    return choice.message.content, response.usage, choice.finish_reason
+
+                parts, usage, finish_reason = [], None, None
+                stream = client.chat.completions.create(**params, stream=True,
+                                                        stream_options={"include_usage": True})
+                for chunk in stream:
+                    usage = chunk.usage or usage  # 마지막 청크에 usage
+                    for choice in chunk.choices:
+                        if choice.delta and choice.delta.content:
+                            call.first_token()
+                            parts.append(choice.delta.content)
+                        finish_reason = choice.finish_reason or finish_reason
+                return "".join(parts), usage, finish_reason
+
+            return self._tracked_call("cot", prompt, max_tokens, request)
+        except ImportError:
+            print("[!] openai 패키지가 설치되지 않았습니다: pip install openai")
+            return None
+        except Exception as e:
+            print(f"[!] OpenAI API 오류: {e}")
+            return None
+
+    def _call_anthropic_structured(self, prompt):
+        """Anthropic tool use로 구조화 출력 호출 (도구 입력 dict 반환)"""
+        try:
+            import anthropic
+            client = anthropic.Anthropic(**self._client_kwargs())
+
+            def request(call):
+                message = client.messages.create(
+                    model=self.model,
+                    max_tokens=STRUCTURED_MAX_TOKENS,
+                    tools=[{
+                        "name": TTP_TOOL_NAME,
+                        "description": "Record the extracted Pig Butchering TTP profile",
+                        "input_schema": self._tool_schema()
+                    }],
+                    tool_choice={"type": "tool", "name": TTP_TOOL_NAME},
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+                data = None
+                for block in message.content:
+                    if block.type == "tool_use" and block.name == TTP_TOOL_NAME:
+                        data = block.input
+                        break
+                return data, message.usage, message.stop_reason
+
+            return self._tracked_call("structured", prompt, STRUCTURED_MAX_TOKENS, request)
+        except ImportError:
+            print("[!] anthropic 패키지가 설치되지 않았습니다: pip install anthropic")
+            return None
+        except Exception as e:
+            print(f"[!] Anthropic API 오류: {e}")
+            return None
+
+    def _call_openai_structured(self, prompt):
+        """OpenAI function calling으로 구조화 출력 호출 (함수 인자 dict 반환)"""
+        try:
+            from openai import OpenAI
+            client = OpenAI(**self._client_kwargs())
+
+            def request(call):
+                response = client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    tools=[{
+                        "type": "function",
+                        "function": {
+                            "name": TTP_TOOL_NAME,
+                            "description": "Record the extracted Pig Butchering TTP profile",
+                            "parameters": self._tool_schema()
+                        }
+                    }],
+                    tool_choice={"type": "function", "function": {"name": TTP_TOOL_NAME}},
+                    max_tokens=STRUCTURED_MAX_TOKENS
+                )
+                choice = response.choices[0]
+                arguments = None
+                for tool_call in choice.message.tool_calls or []:
+                    if tool_call.function.name == TTP_TOOL_NAME:
+                        arguments = tool_call.function.arguments
+                        break
+                return arguments, response.usage, choice.finish_reason
+
+            arguments = self._tracked_call("structured", prompt, STRUCTURED_MAX_TOKENS, request)
+            return json.loads(arguments) if arguments is not None else None
         except ImportError:
             print("[!] openai 패키지가 설치되지 않았습니다: pip install openai")
             return None
+        except json.JSONDecodeError as e:
+            print(f"[!] OpenAI 함수 인자 파싱 오류: {e}")
+            return None
         except Exception as e:
             print(f"[!] OpenAI API 오류: {e}")
             return None
 
+    @perf_trace.traced("api_call")
+    def _call_api(self, prompt, client=None, max_tokens=COT_MAX_TOKENS):
+        """설정된 API 제공자로 호출"""
+        if self.api_provider == "anthropic":
+            return self._call_anthropic(prompt, client, max_tokens)
+        elif self.api_provider == "openai":
+            return self._call_openai(prompt, client, max_tokens)
+        print(f"[!] 지원하지 않는 API: {self.api_provider}")
+        return None
+
+    @perf_trace.traced("api_call_structured")
+    def _call_structured(self, prompt):
+        """설정된 API 제공자로 구조화 출력 호출"""
+        if self.api_provider == "anthropic":
+            return self._call_anthropic_structured(prompt)
+        elif self.api_provider == "openai":
+            return self._call_openai_structured(prompt)
+        print(f"[!] 지원하지 않는 API: {self.api_provider}")
+        return None
+
+    def _record_call(self, prompt, response, seconds, record=None):
+        """요청/토큰/지연/비용 통계 누적 (텔레메트리 기록이 있으면 실측 usage 사용)
+
+        record가 없으면 같은 스레드의 마지막 호출 기록 사용 (다른 스레드에서 호출한 경우 명시적으로 전달)
+        """
+        if record is None:
+            record = getattr(self._local, "last_call", None)
+        self._local.last_call = None
+        self._local.last_outcome = record
+
+        self.stats["requests"] += 1
+        self.stats["api_seconds"] += seconds
+        if record and (record.get("usage_source") == "api" or record.get("error")):
+            # 실패한 호출은 과금 토큰 없음
+            self.stats["prompt_tokens"] += sum(record.get(k) or 0 for k in
+                                               ("input_tokens", "cache_read_tokens", "cache_write_tokens"))
+            self.stats["response_tokens"] += record.get("output_tokens") or 0
+            self.stats["cost_usd"] += record["cost_usd"]
+        else:
+            prompt_tokens, response_tokens = self._estimate_tokens(prompt), self._estimate_tokens(response)
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["response_tokens"] += response_tokens
+            # 기록이 있으면 호출한 모델 단가로 산정된 비용 사용 (헤지 2차 모델 등)
+            self.stats["cost_usd"] += (record["cost_usd"] if record else
+                                       estimate_cost(self.model, prompt_tokens, response_tokens))
+        if record and record.get("truncated"):
+            self.stats["truncated"] += 1
+
+    def _failure_reason(self):
+        """직전 호출 실패 원인 (잘림/API 오류/추출 실패)"""
+        record = getattr(self._local, "last_outcome", None) or {}
+        if record.get("truncated"):
+            return f"truncated at max_tokens={record.get('max_tokens')}"
+        if record.get("error"):
+            return "API error"
+        return "extraction failed"
+
     def _extract_json(self, response_text):
         """응답에서 JSON 추출"""
         # JSON 블록 찾기
@@ -111,27 +508,138 @@ class TTPProfiler:
                 pass
 
         # JSON 블록 없이 직접 파싱 시도
-        try:
-            # { 로 시작하는 부분 찾기
-            start = response_text.find('{')
-            if start != -1:
-                # 중괄호 매칭으로 JSON 끝 찾기
-                depth = 0
-                end = start
-                for i, char in enumerate(response_text[start:], start):
-                    if char == '{':
-                        depth += 1
-                    elif char == '}':
-                        depth -= 1
-                        if depth == 0:
-                            end = i + 1
-                            break
-                return json.loads(response_text[start:end])
-        except json.JSONDecodeError:
-            pass
+        # raw_decode는 문자열 안의 중괄호를 올바르게 처리함
+        decoder = json.JSONDecoder()
+        start = response_text.find('{')
+        while start != -1:
+            try:
+                data, _ = decoder.raw_decode(response_text, start)
+                if isinstance(data, dict):
+                    return data
+            except json.JSONDecodeError:
+                pass
+            start = response_text.find('{', start + 1)
 
         return None
 
+    def _extract_json_array(self, response_text):
+        """패킹 응답에서 JSON 배열 추출"""
+        candidates = []
+        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+        if json_match:
+            candidates.append(json_match.group(1))
+        start = response_text.find('[')
+        if start != -1:
+            candidates.append(response_text[start:])
+
+        decoder = json.JSONDecoder()
+        for text in candidates:
+            try:
+                data, _ = decoder.raw_decode(text.strip())
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, list):
+                return data
+        return None
+
+    def _write_artifact(self, name, text):
+        """프롬프트/응답 아티팩트 저장 (name: 확장자 없는 파일명)"""
+        if self.cot_store is not None:
+            self.cot_store.put(name, text)
+            return
+        with open(self.cot_dir / f"{name}.txt", "w", encoding="utf-8") as f:
+            f.write(text)
+
+    @perf_trace.traced("save_result")
+    def _save_result(self, case, result):
+        """개별 결과 저장"""
+        case_id = case.get("original_case_id", case.get("case_id", 0))
+        pb_case_id = case.get("pb_case_id", case_id)
+        result_file = self.individual_dir / f"ttp_pb{pb_case_id:03d}_case{case_id:03d}.json"
+        with open(result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _packed_max_tokens(n_cases):
+        """팩 응답 max_tokens (케이스당 출력 예산 x 케이스 수, 상한 PACK_MAX_OUTPUT_TOKENS)"""
+        return min(PACK_OUTPUT_OVERHEAD + PACK_OUTPUT_TOKENS_PER_CASE * n_cases, PACK_MAX_OUTPUT_TOKENS)
+
+    def _pack_cases(self, cases, token_budget=PACK_TOKEN_BUDGET, max_cases=PACK_MAX_CASES):
+        """토큰 예산 내에서 케이스를 요청 단위로 묶기 (greedy, 출력 예산으로도 케이스 수 제한)"""
+        if not hasattr(self, "packed_template"):
+            self._build_packed_prompt([])
+        base_tokens = self._estimate_tokens(self.packed_template)
+        max_cases = min(max_cases, (PACK_MAX_OUTPUT_TOKENS - PACK_OUTPUT_OVERHEAD) // PACK_OUTPUT_TOKENS_PER_CASE)
+
+        packs = []
+        current = []
+        current_tokens = base_tokens
+        for case in cases:
+            case_tokens = self._estimate_tokens(self._fill_case(self.packed_case_template, case))
+            if current and (current_tokens + case_tokens > token_budget or len(current) >= max_cases):
+                packs.append(current)
+                current = []
+                current_tokens = base_tokens
+            current.append(case)
+            current_tokens += case_tokens
+        if current:
+            packs.append(current)
+        return packs
+
+    def analyze_packed(self, cases):
+        """여러 케이스를 한 번에 분석 (실패 시 이분할 재시도)
+
+        Returns:
+            {case_id: result} 딕셔너리 (실패한 케이스는 제외)
+        """
+        if len(cases) == 1:
+            # 단일 케이스는 기존 CoT 모드로 처리
+            case = cases[0]
+            case_id = case.get("original_case_id", case.get("case_id", 0))
+            result = self.analyze_case(case)
+            return {case_id: result} if result else {}
+
+        case_ids = [c.get("original_case_id", c.get("case_id", 0)) for c in cases]
+        pb_ids = [c.get("pb_case_id", cid) for c, cid in zip(cases, case_ids)]
+        tag = f"packed_pb{pb_ids[0]:03d}-pb{pb_ids[-1]:03d}_n{len(cases)}"
+
+        prompt = self._build_packed_prompt(cases)
+        self._write_artifact(f"prompt_{tag}", prompt)
+
+        call_started = time.time()
+        response = self._call_api(prompt, max_tokens=self._packed_max_tokens(len(cases)))
+        self._record_call(prompt, response, time.time() - call_started)
+
+        results = {}
+        if response:
+            self._write_artifact(f"response_{tag}", response)
+
+            items = self._extract_json_array(response) or []
+            by_id = {}
+            for item in items:
+                if isinstance(item, dict) and isinstance(item.get("ttp_profile"), dict):
+                    by_id[str(item.get("case_id"))] = item
+
+            for case, case_id in zip(cases, case_ids):
+                item = by_id.get(str(case_id))
+                if item:
+                    result = {"ttp_profile": item["ttp_profile"]}
+                    self._save_result(case, result)
+                    results[case_id] = result
+
+        missing = [c for c, cid in zip(cases, case_ids) if cid not in results]
+        if missing:
+            # 누락/파싱 실패 케이스만 이분할하여 재시도
+            print(f"\n    [!] {tag}: {len(missing)}/{len(cases)}건 누락 ({self._failure_reason()}) - 분할 재시도",
+                  end=" ")
+            mid = len(missing) // 2
+            for half in (missing[:mid], missing[mid:]):
+                if half:
+                    time.sleep(self.request_delay)
+                    results.update(self.analyze_packed(half))
+
+        return results
+
     def analyze_case(self, case):
         """단일 케이스 분석"""
         case_id = case.get("original_case_id", case.get("case_id", 0))
@@ -141,40 +649,67 @@ class TTPProfiler:
         prompt = self._build_prompt(case)
 
         # 프롬프트 저장
-        prompt_file = self.cot_dir / f"prompt_pb{pb_case_id:03d}_case{case_id:03d}.txt"
-        with open(prompt_file, "w", encoding="utf-8") as f:
-            f.write(prompt)
+        self._write_artifact(f"prompt_pb{pb_case_id:03d}_case{case_id:03d}", prompt)
+
+        # 구조화 출력 모드: 도구 입력을 그대로 사용 (정규식 추출 없음)
+        if self.output_mode == "structured":
+            return self._analyze_structured(case, prompt)
 
         # API 호출
-        if self.api_provider == "anthropic":
-            response = self._call_anthropic(prompt)
-        elif self.api_provider == "openai":
-            response = self._call_openai(prompt)
-        else:
-            print(f"[!] 지원하지 않는 API: {self.api_provider}")
-            return None
+        call_started = time.time()
+        response = self._call_api(prompt)
+        self._record_call(prompt, response, time.time() - call_started)
 
         if not response:
             return None
 
         # 응답 저장 (전체)
-        response_file = self.cot_dir / f"response_pb{pb_case_id:03d}_case{case_id:03d}.txt"
-        with open(response_file, "w", encoding="utf-8") as f:
-            f.write(response)
+        self._write_artifact(f"response_pb{pb_case_id:03d}_case{case_id:03d}", response)
 
         # JSON 추출
         result = self._extract_json(response)
 
+        # 잘린 응답에서 중간의 다른 객체를 잡은 경우는 실패 처리
+        outcome = getattr(self._local, "last_outcome", None) or {}
+        if result and outcome.get("truncated") and not isinstance(result.get("ttp_profile"), dict):
+            result = None
+
         if result:
             # 개별 결과 저장
-            result_file = self.individual_dir / f"ttp_pb{pb_case_id:03d}_case{case_id:03d}.json"
-            with open(result_file, "w", encoding="utf-8") as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            self._save_result(case, result)
+
+        return result
+
+    def _analyze_structured(self, case, prompt):
+        """구조화 출력 모드 단일 케이스 분석"""
+        case_id = case.get("original_case_id", case.get("case_id", 0))
+        pb_case_id = case.get("pb_case_id", case_id)
+
+        call_started = time.time()
+        data = self._call_structured(prompt)
+        response = json.dumps(data, ensure_ascii=False, indent=2) if data is not None else None
+        self._record_call(prompt, response, time.time() - call_started)
+
+        if not isinstance(data, dict) or not isinstance(data.get("ttp_profile"), dict):
+            return None
+
+        # 응답 저장 (도구 입력 JSON)
+        self._write_artifact(f"response_pb{pb_case_id:03d}_case{case_id:03d}", response)
 
+        result = {"ttp_profile": data["ttp_profile"]}
+        if data.get("rationale"):
+            result["rationale"] = data["rationale"]
+        self._save_result(case, result)
         return result
 
-    def analyze_all(self, cases, start_from=0, limit=None):
-        """전체 케이스 분석"""
+    @perf_trace.traced("analyze_all")
+    def analyze_all(self, cases, start_from=0, limit=None, pack_budget=None, pack_max_cases=PACK_MAX_CASES):
+        """전체 케이스 분석
+
+        pack_budget이 주어지면 토큰 예산 내에서 여러 케이스를 한 요청으로 묶어 분석 (CoT 모드 전용)
+        """
+        if pack_budget and self.output_mode == "structured":
+            raise ValueError("패킹 모드는 CoT 출력 전용입니다 (structured 모드와 함께 사용 불가)")
         results = []
         total = len(cases)
 
@@ -185,106 +720,118 @@ class TTPProfiler:
 
         print(f"[*] TTP 프로파일링 시작: {len(cases)}건 (전체 {total}건)")
         print(f"[*] API: {self.api_provider}, Model: {self.model}")
+        if pack_budget:
+            print(f"[*] 패킹 모드: 요청당 최대 {pack_budget} 토큰 / {pack_max_cases}건")
         print(f"[*] 결과 저장: {self.output_dir.absolute()}")
         print()
 
-        for i, case in enumerate(cases, 1):
-            case_id = case.get("original_case_id", case.get("case_id", 0))
-            pb_case_id = case.get("pb_case_id", case_id)
-            subject = case.get("primary_subject", "N/A")[:30]
-
-            print(f"[{i:3d}/{len(cases)}] pb_{pb_case_id:03d} (case_{case_id:03d}): {subject}...", end=" ")
-
-            try:
-                result = self.analyze_case(case)
-                if result:
-                    results.append(result)
-                    confidence = result.get("ttp_profile", {}).get("extraction_metadata", {}).get("confidence_score", 0)
-                    print(f"OK (confidence: {confidence:.2f})")
-                else:
-                    print("FAIL (extraction failed)")
-            except Exception as e:
-                print(f"ERROR: {e}")
-
-            # Rate limiting
-            time.sleep(1)
+        started = time.time()
+        stats_before = dict(self.stats)
+        self.aggregate = SummaryAggregate()
+
+        if pack_budget:
+            packs = self._pack_cases(cases, token_budget=pack_budget, max_cases=pack_max_cases)
+            for i, pack in perf_trace.items("analyze_pack", enumerate(packs, 1), label=lambda x: x[0]):
+                pb_ids = [c.get("pb_case_id", c.get("original_case_id", c.get("case_id", 0))) for c in pack]
+                print(f"[{i:3d}/{len(packs)}] pb_{pb_ids[0]:03d}~pb_{pb_ids[-1]:03d} ({len(pack)}건)...", end=" ")
+
+                try:
+                    pack_results = self.analyze_packed(pack)
+                    for case in pack:
+                        case_id = case.get("original_case_id", case.get("case_id", 0))
+                        if case_id in pack_results:
+                            results.append(pack_results[case_id])
+                            self.aggregate.add(pack_results[case_id], case_key(case))
+                    print(f"OK ({len(pack_results)}/{len(pack)})")
+                except Exception as e:
+                    print(f"ERROR: {e}")
+
+                # Rate limiting
+                time.sleep(self.request_delay)
+        else:
+            for i, case in perf_trace.items("analyze_case", enumerate(cases, 1),
+                                            label=lambda x: x[1].get("pb_case_id", x[0])):
+                case_id = case.get("original_case_id", case.get("case_id", 0))
+                pb_case_id = case.get("pb_case_id", case_id)
+                subject = case.get("primary_subject", "N/A")[:30]
+
+                print(f"[{i:3d}/{len(cases)}] pb_{pb_case_id:03d} (case_{case_id:03d}): {subject}...", end=" ")
+
+                try:
+                    result = self.analyze_case(case)
+                    if result:
+                        results.append(result)
+                        self.aggregate.add(result, case_key(case))
+                        confidence = result.get("ttp_profile", {}).get("extraction_metadata", {}).get("confidence_score", 0)
+                        print(f"OK (confidence: {confidence:.2f})")
+                    else:
+                        print(f"FAIL ({self._failure_reason()})")
+                except Exception as e:
+                    print(f"ERROR: {e}")
+
+                # Rate limiting
+                time.sleep(self.request_delay)
+
+        elapsed = time.time() - started
 
         # 전체 결과 저장
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        all_results_file = self.output_dir / f"ttp_profiles_all_{timestamp}.json"
-        with open(all_results_file, "w", encoding="utf-8") as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        all_results_file = self.save_all_results(results, self.aggregate)
 
         print()
         print(f"[+] 분석 완료: {len(results)}/{len(cases)}건 성공")
         print(f"[+] 결과 저장: {all_results_file}")
+        self._print_efficiency(cases, elapsed, stats_before, packed=bool(pack_budget))
 
         return results
 
-    def generate_summary(self, results):
-        """TTP 분석 요약 생성"""
-        summary = {
-            "total_cases": len(results),
-            "contact_platforms": {},
-            "lure_types": {},
-            "relationship_types": {},
-            "psychological_tactics": {},
-            "platform_types": {},
-            "withdrawal_tactics": {},
-            "avg_confidence": 0,
-            "total_estimated_loss": 0
-        }
-
-        confidences = []
-
-        for r in results:
-            profile = r.get("ttp_profile", {})
-
-            # 접근 플랫폼
-            for p in profile.get("approach_and_lure", {}).get("initial_contact_platform", []):
-                summary["contact_platforms"][p] = summary["contact_platforms"].get(p, 0) + 1
-
-            # 유인 유형
-            for l in profile.get("approach_and_lure", {}).get("lure_type", []):
-                summary["lure_types"][l] = summary["lure_types"].get(l, 0) + 1
-
-            # 관계 유형
-            rel = profile.get("impersonation_and_psychology", {}).get("scammer_persona", {}).get("relationship_type", "")
-            if rel:
-                summary["relationship_types"][rel] = summary["relationship_types"].get(rel, 0) + 1
-
-            # 심리 전술
-            for t in profile.get("impersonation_and_psychology", {}).get("psychological_tactics", []):
-                summary["psychological_tactics"][t] = summary["psychological_tactics"].get(t, 0) + 1
-
-            # 플랫폼 유형
-            pt = profile.get("fraud_mechanism", {}).get("platform_type", "")
-            if pt:
-                summary["platform_types"][pt] = summary["platform_types"].get(pt, 0) + 1
-
-            # 출금 차단 전술
-            for w in profile.get("fraud_mechanism", {}).get("withdrawal_block_tactics", []):
-                summary["withdrawal_tactics"][w] = summary["withdrawal_tactics"].get(w, 0) + 1
-
-            # 신뢰도
-            conf = profile.get("extraction_metadata", {}).get("confidence_score", 0)
-            if conf:
-                confidences.append(conf)
-
-            # 피해액
-            loss = profile.get("financial_tracking", {}).get("estimated_loss_usd", 0)
-            if loss:
-                summary["total_estimated_loss"] += loss
-
-        if confidences:
-            summary["avg_confidence"] = sum(confidences) / len(confidences)
-
-        # 정렬 (빈도순)
-        for key in ["contact_platforms", "lure_types", "relationship_types",
-                    "psychological_tactics", "platform_types", "withdrawal_tactics"]:
-            summary[key] = dict(sorted(summary[key].items(), key=lambda x: -x[1]))
+    def _print_efficiency(self, cases, elapsed, stats_before, packed=False):
+        """요청 수, 케이스당 토큰, 분당 처리 건수 출력 (단일 모드 추정치와 비교)"""
+        if not cases:
+            return
+        requests = self.stats["requests"] - stats_before["requests"]
+        prompt_tokens = self.stats["prompt_tokens"] - stats_before["prompt_tokens"]
+        response_tokens = self.stats["response_tokens"] - stats_before["response_tokens"]
+        per_case = (prompt_tokens + response_tokens) / len(cases)
+        per_minute = len(cases) / elapsed * 60 if elapsed > 0 else 0
+        api_seconds = self.stats["api_seconds"] - stats_before["api_seconds"]
+
+        print(f"[+] 요청 수: {requests}회, 케이스당 토큰(추정): {per_case:,.0f}, 처리량: {per_minute:.1f}건/분")
+        print(f"[+] 케이스당 응답 토큰(추정): {response_tokens / len(cases):,.0f}, "
+              f"요청당 평균 지연: {api_seconds / max(requests, 1):.2f}초")
+        truncated = self.stats["truncated"] - stats_before["truncated"]
+        print(f"[+] 비용: ${self.stats['cost_usd'] - stats_before['cost_usd']:.4f}, "
+              f"max_tokens 잘림: {truncated}회")
+        if self.telemetry.path:
+            print(f"[+] 호출별 기록: {self.telemetry.path} "
+                  f"(python llm_telemetry.py report --run {self.telemetry.run_id})")
+        if packed:
+            # 단일 모드 프롬프트 토큰 추정 (응답 토큰은 제외)
+            single_prompt = sum(self._estimate_tokens(self._build_prompt(c)) for c in cases) / len(cases)
+            packed_prompt = prompt_tokens / len(cases)
+            print(f"[+] 케이스당 프롬프트 토큰: 패킹 {packed_prompt:,.0f} vs 단일 {single_prompt:,.0f} (추정)")
+            print(f"[+] 요청 수: 패킹 {requests}회 vs 단일 {len(cases)}회")
+
+    @perf_trace.traced("generate_summary")
+    def generate_summary(self, results=None):
+        """TTP 분석 요약 생성
+
+        results가 없으면 analyze_all 중 증분 갱신된 집계를 그대로 사용 (재스캔 없음)
+        """
+        if results is None:
+            return self.aggregate.to_summary()
+        return SummaryAggregate.from_results(results).to_summary()
+
+    def save_all_results(self, results, aggregate=None):
+        """전체 결과와 병합 가능한 요약 집계(*.agg.json)를 함께 저장"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        all_results_file = self.output_dir / f"ttp_profiles_all_{timestamp}.json"
+        with open(all_results_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
 
-        return summary
+        if aggregate is None:
+            aggregate = SummaryAggregate.from_results(results)
+        aggregate.save(aggregate_path(all_results_file))
+        return all_results_file
 
 
 def main():
@@ -294,12 +841,38 @@ def main():
     parser.add_argument("--api", choices=["anthropic", "openai"], default="anthropic",
                        help="API provider (default: anthropic)")
     parser.add_argument("--model", type=str, help="Model name")
+    parser.add_argument("--base-url", type=str, help="API base URL (e.g. local mock server)")
     parser.add_argument("--start", type=int, default=0, help="Start index")
     parser.add_argument("--limit", type=int, help="Number of cases to process")
     parser.add_argument("--input", type=str, default="pig_butchering_cases/pig_butchering_data.json",
                        help="Input JSON file")
+    parser.add_argument("--structured", action="store_true",
+                       help="Lean structured-output mode (tool/function calling, no chain-of-thought)")
+    parser.add_argument("--artifact-store", choices=["files", "pack"], default="files",
+                       help="Store prompts/responses as .txt files or in a compressed pack file")
+    parser.add_argument("--pack", action="store_true", help="Pack multiple cases per request")
+    parser.add_argument("--pack-budget", type=int, default=PACK_TOKEN_BUDGET,
+                       help=f"Token budget per packed request (default: {PACK_TOKEN_BUDGET})")
+    parser.add_argument("--pack-max-cases", type=int, default=PACK_MAX_CASES,
+                       help=f"Max cases per packed request (default: {PACK_MAX_CASES})")
+
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream chain-of-thought responses (records time-to-first-token)")
+    parser.add_argument("--delay", type=float, default=REQUEST_DELAY,
+                       help=f"Seconds between requests (default: {REQUEST_DELAY:g})")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES,
+                       help=f"Retries on 429/5xx/timeouts, counted per call (default: {MAX_RETRIES})")
+    parser.add_argument("--metrics-file", type=str, default=llm_telemetry.DEFAULT_METRICS_FILE,
+                       help="Append-only per-call telemetry JSONL ('' to disable)")
+    parser.add_argument("--metrics-port", type=int,
+                       help="Serve Prometheus /metrics on this port while running")
+
+    perf_trace.add_arguments(parser)
 
     args = parser.parse_args()
+    if args.pack and args.structured:
+        parser.error("--pack packs chain-of-thought prompts and cannot be combined with --structured")
+    perf_trace.start(args, "ttp_profiler")
 
     # 데이터 로드
     with open(args.input, "r", encoding="utf-8") as f:
@@ -308,14 +881,22 @@ def main():
     print(f"[*] 데이터 로드: {len(cases)}건")
 
     # 프로파일러 초기화
-    profiler = TTPProfiler(api_provider=args.api, model=args.model)
+    profiler = TTPProfiler(api_provider=args.api, model=args.model,
+                           output_mode="structured" if args.structured else "cot",
+                           base_url=args.base_url, artifact_store=args.artifact_store,
+                           stream=args.stream, max_retries=args.max_retries, request_delay=args.delay,
+                           metrics_file=args.metrics_file or None)
+    if args.metrics_port:
+        profiler.telemetry.serve(args.metrics_port)
 
     # 분석 실행
-    results = profiler.analyze_all(cases, start_from=args.start, limit=args.limit)
+    results = profiler.analyze_all(cases, start_from=args.start, limit=args.limit,
+                                   pack_budget=args.pack_budget if args.pack else None,
+                                   pack_max_cases=args.pack_max_cases)
 
     # 요약 생성
     if results:
-        summary = profiler.generate_summary(results)
+        summary = profiler.generate_summary()
         summary_file = profiler.output_dir / "ttp_summary.json"
         with open(summary_file, "w", encoding="utf-8") as f:
             json.dump(summary, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,451 @@
+"""
+TTP 프로파일링 공유 작업 큐 (여러 프로세스 / 여러 노드)
+- SQLite 큐 파일(기본 ttp_results/work_queue.sqlite)을 공유 저장소에 두고 워커가 케이스를 리스(lease)로 가져감
+- 하트비트 스레드가 보유 리스를 연장, 워커가 죽으면 리스 만료 후 다른 워커가 회수 (max_attempts 초과 시 failed)
+- 워커는 claim_size건씩 미리 가져가고, 대기 작업이 없으면 가장 많이 쌓인 워커의 미시작 작업 절반을 훔침
+- 결과는 케이스 키(pb001_case002) 단위로 멱등 기록 (먼저 완료된 결과 채택, 중복 완료는 무시)
+- merge: 완료 결과를 pb_case_id 순으로 하나의 ttp_profiles_all_*.json + 요약 집계로 병합
+- 공유 저장소는 POSIX 파일 잠금이 동작해야 함 (WAL 미사용, 롤백 저널 + BEGIN IMMEDIATE)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from ttp_aggregate import SummaryAggregate, aggregate_path, case_key
+
+DEFAULT_QUEUE_DB = "ttp_results/work_queue.sqlite"
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_CLAIM_SIZE = 2
+DEFAULT_MAX_ATTEMPTS = 3
+BUSY_TIMEOUT_MS = 30000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    case_key TEXT PRIMARY KEY,
+    pb_case_id INTEGER,
+    original_case_id INTEGER,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',   -- pending / leased(미시작) / running / done / failed
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status, pb_case_id);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    host TEXT,
+    pid INTEGER,
+    started REAL,
+    heartbeat REAL,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    stolen INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class WorkQueue:
+    def __init__(self, path=DEFAULT_QUEUE_DB, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._read() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        # 스레드마다 별도 연결 (하트비트 스레드 포함)
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        db.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        db.row_factory = sqlite3.Row
+        return db
+
+    @contextmanager
+    def _read(self):
+        db = self._connect()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 잠금을 먼저 잡는 트랜잭션 (claim 경쟁 시 중복 할당 방지)"""
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # 생산자
+    # ------------------------------------------------------------------
+    def enqueue(self, cases, retry_failed=False, reset=False):
+        """케이스 등록 (이미 있는 키는 유지 -> 재실행해도 멱등, reset이면 기존 작업/결과 삭제)"""
+        now = time.time()
+        added = 0
+        with self._transaction() as db:
+            if reset:
+                db.execute("DELETE FROM tasks")
+                db.execute("DELETE FROM workers")
+            for case in cases:
+                case_id = case.get("original_case_id", case.get("case_id", 0))
+                cur = db.execute(
+                    "INSERT OR IGNORE INTO tasks (case_key, pb_case_id, original_case_id, payload, updated) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (case_key(case), case.get("pb_case_id", case_id), case_id,
+                     json.dumps(case, ensure_ascii=False), now))
+                added += cur.rowcount
+            reset = 0
+            if retry_failed:
+                reset = db.execute("UPDATE tasks SET status = 'pending', attempts = 0, error = NULL, "
+                                   "worker = NULL, updated = ? WHERE status = 'failed'", (now,)).rowcount
+        return added, reset
+
+    # ------------------------------------------------------------------
+    # 워커
+    # ------------------------------------------------------------------
+    def register(self, worker):
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO workers (worker, host, pid, started, heartbeat) "
+                       "VALUES (?, ?, ?, ?, ?)", (worker, socket.gethostname(), os.getpid(), now, now))
+
+    def claim(self, worker, n=DEFAULT_CLAIM_SIZE):
+        """대기/만료 작업을 n건 리스, 없으면 다른 워커의 미시작 작업 절반을 훔침
+
+        Returns:
+            (작업 리스트 [(case_key, case)], 훔친 건수)
+        """
+        now = time.time()
+        with self._transaction() as db:
+            # 재시도 한도를 넘긴 만료 리스는 failed
+            db.execute("UPDATE tasks SET status = 'failed', worker = NULL, updated = ?, "
+                       "error = COALESCE(error, 'lease expired') "
+                       "WHERE status IN ('leased', 'running') AND lease_expires < ? AND attempts >= ?",
+                       (now, now, self.max_attempts))
+            rows = db.execute(
+                "SELECT case_key FROM tasks WHERE status = 'pending' "
+                "OR (status IN ('leased', 'running') AND lease_expires < ?) "
+                "ORDER BY status != 'pending', pb_case_id LIMIT ?", (now, n)).fetchall()
+
+            stolen = 0
+            if not rows:
+                victim = db.execute(
+                    "SELECT worker, COUNT(*) AS queued FROM tasks WHERE status = 'leased' AND worker != ? "
+                    "GROUP BY worker ORDER BY queued DESC LIMIT 1", (worker,)).fetchone()
+                if victim:
+                    # 피해 워커가 처리할 순서의 반대쪽(뒤)에서 가져감
+                    rows = db.execute(
+                        "SELECT case_key FROM tasks WHERE status = 'leased' AND worker = ? "
+                        "ORDER BY pb_case_id DESC LIMIT ?",
+                        (victim["worker"], min(n, max(1, victim["queued"] // 2)))).fetchall()
+                    stolen = len(rows)
+
+            keys = [r["case_key"] for r in rows]
+            db.executemany("UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, updated = ? "
+                           "WHERE case_key = ?",
+                           [(worker, now + self.lease_seconds, now, k) for k in keys])
+            if stolen:
+                db.execute("UPDATE workers SET stolen = stolen + ? WHERE worker = ?", (stolen, worker))
+            tasks = [(r["case_key"], json.loads(r["payload"])) for r in db.execute(
+                f"SELECT case_key, payload FROM tasks WHERE case_key IN ({','.join('?' * len(keys))}) "
+                "ORDER BY pb_case_id", keys)] if keys else []
+        return tasks, stolen
+
+    def start(self, worker, key):
+        """리스한 작업 시작 (다른 워커가 훔쳐갔거나 회수했으면 False)"""
+        now = time.time()
+        with self._transaction() as db:
+            cur = db.execute("UPDATE tasks SET status = 'running', attempts = attempts + 1, "
+                             "lease_expires = ?, updated = ? "
+                             "WHERE case_key = ? AND worker = ? AND status = 'leased'",
+                             (now + self.lease_seconds, now, key, worker))
+        return cur.rowcount == 1
+
+    def complete(self, worker, key, result):
+        """결과 기록 (멱등: 이미 done이면 무시하고 False)
+
+        리스가 만료돼 다른 워커가 회수한 뒤라도 먼저 끝낸 결과를 채택
+        """
+        now = time.time()
+        with self._transaction() as db:
+            cur = db.execute("UPDATE tasks SET status = 'done', result = ?, worker = ?, lease_expires = NULL, "
+                             "error = NULL, updated = ? WHERE case_key = ? AND status != 'done'",
+                             (json.dumps(result, ensure_ascii=False), worker, now, key))
+            if cur.rowcount:
+                db.execute("UPDATE workers SET done = done + 1 WHERE worker = ?", (worker,))
+        return cur.rowcount == 1
+
+    def fail(self, worker, key, error):
+        """실패 기록 (시도 횟수가 남았으면 다시 pending)"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                       "worker = NULL, lease_expires = NULL, error = ?, updated = ? "
+                       "WHERE case_key = ? AND worker = ? AND status = 'running'",
+                       (self.max_attempts, str(error)[:500], now, key, worker))
+            db.execute("UPDATE workers SET failed = failed + 1 WHERE worker = ?", (worker,))
+
+    def heartbeat(self, worker):
+        """보유 리스 연장 + 워커 생존 기록"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("UPDATE tasks SET lease_expires = ? WHERE worker = ? AND status IN ('leased', 'running')",
+                       (now + self.lease_seconds, worker))
+            db.execute("UPDATE workers SET heartbeat = ? WHERE worker = ?", (now, worker))
+
+    def release(self, worker):
+        """종료 시 보유 작업 반환 (시도 횟수는 유지)"""
+        with self._transaction() as db:
+            return db.execute("UPDATE tasks SET status = 'pending', worker = NULL, lease_expires = NULL, "
+                              "updated = ? WHERE worker = ? AND status IN ('leased', 'running')",
+                              (time.time(), worker)).rowcount
+
+    def in_flight(self):
+        """다른 워커가 보유 중인 작업 수 (만료 시 회수 대상이므로 종료하지 않고 대기)"""
+        with self._read() as db:
+            return db.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('leased', 'running')").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # 조회 / 병합
+    # ------------------------------------------------------------------
+    def status(self):
+        now = time.time()
+        with self._read() as db:
+            counts = {r["status"]: r["n"] for r in
+                      db.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status")}
+            expired = db.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('leased', 'running') "
+                                 "AND lease_expires < ?", (now,)).fetchone()[0]
+            workers = [dict(r) for r in db.execute("SELECT * FROM workers ORDER BY started")]
+            errors = [dict(r) for r in db.execute(
+                "SELECT case_key, attempts, error FROM tasks WHERE status = 'failed' ORDER BY pb_case_id")]
+        return {"counts": counts, "expired_leases": expired, "workers": workers, "failed": errors}
+
+    def results(self):
+        """완료 결과 [(case, result)] (pb_case_id 순)"""
+        with self._read() as db:
+            return [(json.loads(r["payload"]), json.loads(r["result"])) for r in db.execute(
+                "SELECT payload, result FROM tasks WHERE status = 'done' ORDER BY pb_case_id, case_key")]
+
+
+class QueueWorker:
+    """큐에서 케이스를 가져와 TTPProfiler.analyze_case로 처리"""
+
+    def __init__(self, queue, profiler, worker_id=None, claim_size=DEFAULT_CLAIM_SIZE,
+                 delay=1.0, poll_interval=5.0):
+        self.queue = queue
+        self.profiler = profiler
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.claim_size = claim_size
+        self.delay = delay                  # 요청 간 간격 (rate limiting)
+        self.poll_interval = poll_interval  # 다른 워커 리스 만료 대기 간격
+        self._stop = threading.Event()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            try:
+                self.queue.heartbeat(self.worker_id)
+            except sqlite3.Error as e:
+                print(f"\n[!] 하트비트 실패: {e}")
+
+    def run(self):
+        queue = self.queue
+        queue.register(self.worker_id)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        print(f"[*] 워커 시작: {self.worker_id} (리스 {queue.lease_seconds:.0f}초, {self.claim_size}건씩)")
+
+        done = failed = 0
+        try:
+            while True:
+                tasks, stolen = queue.claim(self.worker_id, self.claim_size)
+                if stolen:
+                    print(f"[*] {self.worker_id}: 다른 워커의 작업 {stolen}건 가져옴")
+                if not tasks:
+                    if not queue.in_flight():
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                for key, case in tasks:
+                    if not queue.start(self.worker_id, key):
+                        continue  # 다른 워커가 가져감
+                    print(f"[{self.worker_id}] {key}...", end=" ")
+                    try:
+                        result = self.profiler.analyze_case(case)
+                    except Exception as e:
+                        result, error = None, e
+                    else:
+                        error = None if result else self.profiler._failure_reason()
+
+                    if result:
+                        accepted = queue.complete(self.worker_id, key, result)
+                        print("OK" if accepted else "OK (이미 완료됨 - 중복 결과 무시)")
+                        done += 1
+                    else:
+                        queue.fail(self.worker_id, key, error)
+                        print(f"FAIL ({error})")
+                        failed += 1
+                    time.sleep(self.delay)
+        except KeyboardInterrupt:
+            print(f"\n[!] 중단: 보유 작업 {queue.release(self.worker_id)}건 반환")
+        finally:
+            self._stop.set()
+
+        print(f"[+] 워커 종료: {self.worker_id} (성공 {done}, 실패 {failed})")
+        return done, failed
+
+
+def merge(queue, output_dir="ttp_results", write_individual=True):
+    """완료 결과를 하나의 프로파일 세트로 병합
+
+    다른 노드에서 처리된 결과도 individual/ 에 다시 써서 로컬 파일 구조를 맞춤
+    """
+    output_dir = Path(output_dir)
+    pairs = queue.results()
+    results = [result for _case, result in pairs]
+
+    if write_individual:
+        individual_dir = output_dir / "individual"
+        individual_dir.mkdir(parents=True, exist_ok=True)
+        for case, result in pairs:
+            with open(individual_dir / f"ttp_{case_key(case)}.json", "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    all_results_file = output_dir / f"ttp_profiles_all_{timestamp}.json"
+    with open(all_results_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    aggregate = SummaryAggregate.from_results(results, keys=[case_key(case) for case, _result in pairs])
+    aggregate.save(aggregate_path(all_results_file))
+    with open(output_dir / "ttp_summary.json", "w", encoding="utf-8") as f:
+        json.dump(aggregate.to_summary(), f, ensure_ascii=False, indent=2)
+    return all_results_file, len(results)
+
+
+def spawn_workers(n, argv):
+    """로컬 워커 프로세스 n개 실행 후 종료 대기"""
+    procs = [subprocess.Popen([sys.executable, os.path.abspath(__file__)] + argv) for _ in range(n)]
+    print(f"[*] 워커 프로세스 {n}개 실행: {[p.pid for p in procs]}")
+    try:
+        return max(p.wait() for p in procs)
+    except KeyboardInterrupt:
+        for p in procs:
+            p.wait()
+        return 1
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared work queue for multi-process / multi-node TTP profiling")
+    parser.add_argument("--db", type=str, default=DEFAULT_QUEUE_DB, help="Queue SQLite file (on shared storage)")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                       help=f"Lease length in seconds, renewed by heartbeats (default: {DEFAULT_LEASE_SECONDS:.0f})")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                       help=f"Attempts per case before it is marked failed (default: {DEFAULT_MAX_ATTEMPTS})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_init = sub.add_parser("init", help="Enqueue cases (idempotent)")
+    p_init.add_argument("--input", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                        help="Input JSON file")
+    p_init.add_argument("--start", type=int, default=0, help="Start index")
+    p_init.add_argument("--limit", type=int, help="Number of cases to enqueue")
+    p_init.add_argument("--retry-failed", action="store_true", help="Reset failed cases to pending")
+    p_init.add_argument("--reset", action="store_true", help="Drop all existing tasks and results first")
+
+    p_worker = sub.add_parser("worker", help="Claim and profile cases until the queue is drained")
+    p_worker.add_argument("--processes", "-p", type=int, default=1, help="Local worker processes to launch")
+    p_worker.add_argument("--worker-id", type=str, help="Worker name (default: host-pid-random)")
+    p_worker.add_argument("--claim-size", type=int, default=DEFAULT_CLAIM_SIZE,
+                          help=f"Cases leased per claim (default: {DEFAULT_CLAIM_SIZE})")
+    p_worker.add_argument("--delay", type=float, default=1.0, help="Seconds between requests per worker")
+    p_worker.add_argument("--poll-interval", type=float, default=5.0,
+                          help="Seconds to wait for other workers' leases before re-checking")
+    p_worker.add_argument("--api", choices=["anthropic", "openai"], default="anthropic",
+                          help="API provider (default: anthropic)")
+    p_worker.add_argument("--model", type=str, help="Model name")
+    p_worker.add_argument("--base-url", type=str, help="API base URL (e.g. local mock server)")
+    p_worker.add_argument("--structured", action="store_true", help="Lean structured-output mode")
+    p_worker.add_argument("--stream", action="store_true", help="Stream chain-of-thought responses")
+
+    sub.add_parser("status", help="Show queue and worker state")
+
+    p_merge = sub.add_parser("merge", help="Merge finished results into one canonical profile set")
+    p_merge.add_argument("--output-dir", type=str, default="ttp_results", help="Output directory")
+    p_merge.add_argument("--no-individual", action="store_true", help="Do not rewrite individual/ files")
+
+    args = parser.parse_args()
+
+    if args.command == "worker" and args.processes > 1:
+        # 같은 인자로 단일 워커 프로세스 n개 실행
+        argv = sys.argv[1:]
+        for flag in ("--processes", "-p"):
+            if flag in argv:
+                i = argv.index(flag)
+                del argv[i:i + 2]
+        argv = [a for a in argv if not a.startswith("--processes=")]
+        sys.exit(spawn_workers(args.processes, argv))
+
+    queue = WorkQueue(args.db, lease_seconds=args.lease, max_attempts=args.max_attempts)
+
+    if args.command == "init":
+        with open(args.input, "r", encoding="utf-8") as f:
+            cases = json.load(f)
+        cases = cases[args.start:args.start + args.limit] if args.limit else cases[args.start:]
+        added, reset = queue.enqueue(cases, retry_failed=args.retry_failed, reset=args.reset)
+        print(f"[+] 큐 등록: {added}건 추가 (기존 {len(cases) - added}건 유지), 실패 재설정 {reset}건 -> {args.db}")
+
+    elif args.command == "worker":
+        from ttp_profiler import TTPProfiler
+
+        # 팩 저장소는 다중 프로세스 append를 지원하지 않으므로 파일 저장소 사용
+        profiler = TTPProfiler(api_provider=args.api, model=args.model,
+                               output_mode="structured" if args.structured else "cot",
+                               base_url=args.base_url, stream=args.stream)
+        QueueWorker(queue, profiler, worker_id=args.worker_id, claim_size=args.claim_size,
+                    delay=args.delay, poll_interval=args.poll_interval).run()
+
+    elif args.command == "status":
+        state = queue.status()
+        print(f"[*] 큐: {args.db}")
+        print(f"    상태: {state['counts']}, 만료 리스: {state['expired_leases']}")
+        now = time.time()
+        for w in state["workers"]:
+            print(f"    {w['worker']} ({w['host']}, pid {w['pid']}): 성공 {w['done']}, 실패 {w['failed']}, "
+                  f"훔침 {w['stolen']}, 하트비트 {now - w['heartbeat']:.0f}초 전")
+        for f in state["failed"][:20]:
+            print(f"    [!] {f['case_key']} ({f['attempts']}회): {f['error']}")
+
+    elif args.command == "merge":
+        path, n = merge(queue, args.output_dir, write_individual=not args.no_individual)
+        counts = queue.status()["counts"]
+        print(f"[+] 병합: {n}건 -> {path}")
+        remaining = sum(v for k, v in counts.items() if k != "done")
+        if remaining:
+            print(f"[!] 미완료 {remaining}건: {counts}")
+
+
+if __name__ == "__main__":
+    main()
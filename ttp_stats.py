@@ -0,0 +1,766 @@
+"""
+TTP 통계 분석 엔진 (벡터화)
+- 모든 프로파일을 열 단위 배열로 적재 (범주형 필드는 희소 원-핫 좌표, 수치 필드는 float 배열)
+- 빈도/비율, 교차표, 피해액 분포/분위수, 신뢰도 히스토그램을 NumPy 연산으로 계산
+- ttp_results/TTP_STATISTICS_ANALYSIS.json, KEY_DATA_SUMMARY.csv 재생성 (같은 입력이면 같은 출력)
+- 열 배열을 .npz 캐시로 저장하여 10만건 이상에서도 대화형 분석 가능
+  예) table = ProfileTable.load(); table.frequency("lure_types"); table.crosstab("contact_platforms", "lure_types")
+"""
+
+import csv
+import json
+import re
+from datetime import date
+from pathlib import Path
+
+from ttp_aggregate import get_path, profile_of
+
+# 범주형 필드: 열 이름 -> 섹션 경로 (리스트/단일값 모두 원-핫으로 적재)
+CATEGORICAL_FIELDS = {
+    "contact_platforms": ("approach_and_lure", "initial_contact_platform"),
+    "lure_types": ("approach_and_lure", "lure_type"),
+    "communication_migration": ("approach_and_lure", "communication_migration"),
+    "relationship_types": ("impersonation_and_psychology", "scammer_persona", "relationship_type"),
+    "psychological_tactics": ("impersonation_and_psychology", "psychological_tactics"),
+    "platform_types": ("fraud_mechanism", "platform_type"),
+    "withdrawal_tactics": ("fraud_mechanism", "withdrawal_block_tactics"),
+    "cryptocurrency_types": ("financial_tracking", "cryptocurrency_types"),
+    "payment_methods": ("financial_tracking", "payment_methods"),
+    "platform_status": ("temporal_indicators", "platform_status"),
+}
+
+# 빈도 계산에서 "값 없음"으로 취급
+UNKNOWN_VALUES = {"", "unknown", "none", "n/a", "null", "unspecified"}
+
+# 범주형 값 정규화: 한정어 토큰 제거 후 동의어 통합 (dating app / dating_app_unspecified -> dating_app)
+QUALIFIER_TOKENS = {"unspecified", "unknown", "likely", "possibly", "popular", "inferred", "implied"}
+EDGE_TOKENS = {"for", "and", "or", "of"}
+VICTIM_TOKEN_RE = re.compile(r"^victim\d*$")
+LABEL_ALIASES = {
+    "online": "online_unspecified",
+    "online_platform": "online_unspecified",
+    "whatsapp_group": "whatsapp",
+    "whatsapp_groups": "whatsapp",
+    "whatsapp_group_chat": "whatsapp",
+    "whatsapp_trading_group": "whatsapp",
+    "private_whatsapp_chat": "whatsapp",
+    "telegram_group": "telegram",
+    "telegram_investment_group": "telegram",
+    "instagram_dm": "instagram",
+    "facebook_messenger": "facebook",
+    "facebook_ad": "facebook",
+    "line_chat": "line",
+    "line_app": "line",
+    "sms_text": "sms",
+    "text_message": "sms",
+    "cell_phone_sms": "sms",
+    "phone_calls": "phone_call",
+    "bitcoin": "btc",
+    "ethereum": "eth",
+    "tether": "usdt",
+    "crypto": "crypto_assets",
+    "cryptocurrency": "crypto_assets",
+    "no_longer_operational": "defunct",
+    "defunct_no_longer_operational": "defunct",
+    "fake_profits_display": "fake_profit_display",
+    "fomo": "fear_of_missing_out",
+    "fomo_fear_of_missing_out": "fear_of_missing_out",
+    "crypto_transfer": "cryptocurrency_transfer",
+    "fake_cryptocurrency_exchange": "fake_exchange",
+    "fake_crypto_trading_platform": "fake_trading_platform",
+}
+# CSV/보고서 표시명 (정규화 키 -> 고유 표기)
+DISPLAY_NAMES = {
+    "whatsapp": "WhatsApp", "linkedin": "LinkedIn", "tiktok": "TikTok", "wechat": "WeChat",
+    "kakaotalk": "KakaoTalk", "youtube": "YouTube", "sms": "SMS/Text",
+    "btc": "BTC", "eth": "ETH", "usdt": "USDT", "xrp": "XRP",
+    "online_unspecified": "Unknown (Online)",
+}
+# 접촉 플랫폼 중 "플랫폼 확인" 건수에서 빼는 포괄 값
+GENERIC_PLATFORMS = ("online_unspecified", "social_media", "social_media_messaging_platform", "group_chat")
+# 표준 스키마 판별 섹션 (둘 다 없으면 레거시/자유형식 -> 통계에서 제외하고 보고)
+SCHEMA_SECTIONS = ("approach_and_lure", "fraud_mechanism")
+
+# 피해액 구간 (TTP_STATISTICS_ANALYSIS.json 기존 구간과 동일)
+LOSS_BINS = [0, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, float("inf")]
+LOSS_BIN_KEYS = ["under_10k", "10k_to_50k", "50k_to_100k", "100k_to_250k",
+                 "250k_to_500k", "500k_to_1m", "over_1m"]
+LOSS_BIN_LABELS = ["<$10K", "$10K-$50K", "$50K-$100K", "$100K-$250K", "$250K-$500K", "$500K-$1M", ">$1M"]
+LOSS_QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99]
+
+# 지갑 주소 형식 -> 체인 (순서대로 첫 일치)
+WALLET_CHAINS = [
+    ("ethereum_ETH", re.compile(r"^0x[0-9a-fA-F]{40}$")),
+    ("bitcoin_BTC", re.compile(r"^(bc1[0-9a-z]{20,}|[13][1-9A-HJ-NP-Za-km-z]{25,34})$")),
+    ("tron_TRX", re.compile(r"^T[1-9A-HJ-NP-Za-km-z]{33}$")),
+    ("xrp_XRP", re.compile(r"^r[1-9A-HJ-NP-Za-km-z]{24,34}$")),
+]
+# 체인 -> (KEY_DATA_SUMMARY.csv 체인명, 심볼) (report_templates/labels.json 의 chains 와 동일한 표기)
+CHAIN_LABELS = {
+    "ethereum_ETH": ("Ethereum", "ETH"),
+    "bitcoin_BTC": ("Bitcoin", "BTC"),
+    "tron_TRX": ("Tron", "TRX"),
+    "xrp_XRP": ("XRP", "XRP"),
+    "other": ("Other", "Other"),
+}
+
+# 기존 파일에서 그대로 유지하는 수작업 섹션 (프로파일에서 계산할 수 없는 항목)
+CURATED_SECTIONS = ["brand_impersonation_analysis", "victim_vulnerability_factors",
+                    "novel_attack_vectors", "research_implications"]
+
+# .npz 캐시 형식 (키/정규화 규칙이 바뀌면 올려서 기존 캐시 무효화)
+TABLE_VERSION = 2
+
+CASE_FILE_RE = re.compile(r"ttp_pb(\d+)_case(\d+)")
+CSV_SEPARATOR = ["================"] * 6
+
+
+def require_numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        print("[!] numpy 패키지가 필요합니다: pip install numpy")
+        raise
+    return np
+
+
+def as_values(value):
+    """단일값/리스트를 정규화된 문자열 리스트로 (중복 제거, 순서 유지)"""
+    if value is None:
+        return []
+    items = value if isinstance(value, list) else [value]
+    out = []
+    for v in items:
+        if isinstance(v, (str, int, float)) and not isinstance(v, bool):
+            v = str(v).strip().lower()
+            if v not in UNKNOWN_VALUES and v not in out:
+                out.append(v)
+    return out
+
+
+def normalize_label(value):
+    """범주형 값 -> 정규화 키 (None: 값 없음)
+    예) "Dating App (primary)" / dating_app_unspecified -> dating_app, "instagram → whatsapp" -> whatsapp"""
+    text = re.split(r"→|->", value)[-1].lower()
+    text = re.sub(r"\([^)]*\)", " ", text)
+    tokens = [t for t in re.split(r"[^a-z0-9]+", text)
+              if t and t not in QUALIFIER_TOKENS and not VICTIM_TOKEN_RE.match(t)]
+    while tokens and tokens[0] in EDGE_TOKENS:
+        tokens.pop(0)
+    while tokens and tokens[-1] in EDGE_TOKENS:
+        tokens.pop()
+    key = "_".join(tokens)
+    key = LABEL_ALIASES.get(key, key)
+    if key in UNKNOWN_VALUES or key.startswith(("not_", "none_")):
+        return None
+    return key
+
+
+def is_standard_profile(profile):
+    return any(isinstance(profile.get(section), dict) for section in SCHEMA_SECTIONS)
+
+
+def as_loss(value):
+    """estimated_loss_usd (숫자, 또는 피해자별 dict) -> float"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        for key, v in value.items():
+            if key.startswith("total") and isinstance(v, (int, float)):
+                return float(v)
+        numbers = [v for v in value.values() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        return float(sum(numbers)) if numbers else None
+    return None
+
+
+def wallet_chain(address):
+    for chain, pattern in WALLET_CHAINS:
+        if pattern.match(address):
+            return chain
+    return "other"
+
+
+def _pct(count, total):
+    return round(100.0 * count / total, 1) if total else 0.0
+
+
+def display_label(value):
+    """CSV 표시용: fake_trading_platform -> Fake Trading Platform, whatsapp -> WhatsApp"""
+    if value in DISPLAY_NAMES:
+        return DISPLAY_NAMES[value]
+    return " ".join(w if w.isupper() else w.capitalize() for w in re.split(r"[_\s]+", value) if w)
+
+
+def _newest_mtime(inputs):
+    newest = 0.0
+    for item in inputs:
+        path = Path(item)
+        for file in (path.glob("*.json") if path.is_dir() else [path]):
+            newest = max(newest, file.stat().st_mtime)
+    return newest
+
+
+def iter_profile_files(inputs):
+    """입력(디렉토리/개별 JSON/ttp_profiles_all 리스트)에서 (레코드 키, pb 번호, 결과) 생성"""
+    for item in inputs:
+        path = Path(item)
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            records = data if isinstance(data, list) else [data]
+            m = CASE_FILE_RE.search(file.name)
+            for i, result in enumerate(records):
+                if not isinstance(result, dict):
+                    continue
+                profile = profile_of(result)
+                if m and len(records) == 1:
+                    pb_id, case_id = int(m.group(1)), int(m.group(2))
+                else:
+                    pb_id, case_id = result.get("pb_case_id"), result.get("original_case_id")
+                # 키는 파일명/레코드의 pb·case 번호 (프로파일 본문의 case_id 는 형식이 제각각)
+                if isinstance(pb_id, int) and isinstance(case_id, int):
+                    key = f"pb{pb_id:03d}_case{case_id:03d}"
+                else:
+                    key = f"{file.name}#{i}"
+                yield key, pb_id, profile
+
+
+class CategoricalColumn:
+    """희소 원-핫 열: vocab[cols[i]] 값이 rows[i] 케이스에 존재"""
+
+    def __init__(self, vocab, rows, cols):
+        self.vocab = list(vocab)
+        self.rows = rows
+        self.cols = cols
+
+    def counts(self):
+        np = require_numpy()
+        return np.bincount(self.cols, minlength=len(self.vocab))
+
+    def known_cases(self, n, exclude=()):
+        """값이 하나 이상 있는 케이스 수 (exclude: 미상으로 취급할 값)"""
+        np = require_numpy()
+        keep = ~np.isin(np.asarray(self.vocab, dtype=str)[self.cols], list(exclude)) if exclude else slice(None)
+        return int(np.count_nonzero(np.bincount(self.rows[keep], minlength=n)))
+
+    def onehot(self, n, columns=None):
+        """(n, k) bool 행렬 (columns: vocab 인덱스 부분집합)"""
+        np = require_numpy()
+        columns = np.arange(len(self.vocab)) if columns is None else np.asarray(columns)
+        lookup = np.full(len(self.vocab), -1, dtype=np.int64)
+        lookup[columns] = np.arange(len(columns))
+        mapped = lookup[self.cols]
+        keep = mapped >= 0
+        matrix = np.zeros((n, len(columns)), dtype=bool)
+        matrix[self.rows[keep], mapped[keep]] = True
+        return matrix
+
+
+class ProfileTable:
+    def __init__(self, case_keys, pb_ids, platforms, columns, loss, confidence,
+                 wallets, wallet_rows, sources=(), excluded=()):
+        self.case_keys = case_keys          # (n,) str
+        self.pb_ids = pb_ids                # (n,) int, 미상 -1
+        self.platforms = platforms          # (n,) str, 첫 번째 플랫폼명
+        self.columns = columns              # name -> CategoricalColumn
+        self.loss = loss                    # (n,) float, 미상 nan
+        self.confidence = confidence        # (n,) float, 미상 nan
+        self.wallets = wallets              # (m,) str
+        self.wallet_rows = wallet_rows      # (m,) int
+        self.sources = list(sources)
+        self.excluded = list(excluded)      # 비표준 스키마로 제외된 레코드 키
+
+    def __len__(self):
+        return len(self.case_keys)
+
+    # ------------------------------------------------------------------
+    # 적재
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_profiles(cls, records, sources=()):
+        """(레코드 키, pb 번호, 프로파일) 반복자 -> 열 배열 (같은 키는 마지막 레코드 유지)
+        표준 스키마가 아닌 프로파일은 분모에서 빼고 excluded 에 기록"""
+        np = require_numpy()
+        latest = {}
+        for key, pb_id, profile in records:
+            latest[key] = (pb_id, profile)
+        excluded = sorted(key for key, (_, profile) in latest.items() if not is_standard_profile(profile))
+        for key in excluded:
+            del latest[key]
+
+        n = len(latest)
+        case_keys, pb_ids, platforms = [], np.full(n, -1, dtype=np.int64), []
+        loss = np.full(n, np.nan)
+        confidence = np.full(n, np.nan)
+        vocab = {name: {} for name in CATEGORICAL_FIELDS}
+        coords = {name: ([], []) for name in CATEGORICAL_FIELDS}
+        wallets, wallet_rows = [], []
+
+        for row, (key, (pb_id, profile)) in enumerate(latest.items()):
+            case_keys.append(key)
+            if isinstance(pb_id, int):
+                pb_ids[row] = pb_id
+            names = get_path(profile, ("fraud_mechanism", "platform_names"))
+            platforms.append(str(names[0]) if isinstance(names, list) and names else "")
+
+            for name, path in CATEGORICAL_FIELDS.items():
+                rows, cols = coords[name]
+                index = vocab[name]
+                labels = [normalize_label(v) for v in as_values(get_path(profile, path))]
+                for v in dict.fromkeys(v for v in labels if v):
+                    rows.append(row)
+                    cols.append(index.setdefault(v, len(index)))
+
+            value = as_loss(get_path(profile, ("financial_tracking", "estimated_loss_usd")))
+            if value is not None and value > 0:
+                loss[row] = value
+            conf = get_path(profile, ("extraction_metadata", "confidence_score"))
+            if isinstance(conf, (int, float)) and not isinstance(conf, bool):
+                confidence[row] = conf
+
+            seen = set()
+            for address in get_path(profile, ("financial_tracking", "wallet_addresses")) or []:
+                if isinstance(address, str) and address.strip() and address.strip() not in seen:
+                    seen.add(address.strip())
+                    wallets.append(address.strip())
+                    wallet_rows.append(row)
+
+        columns = {}
+        for name in CATEGORICAL_FIELDS:
+            rows, cols = coords[name]
+            columns[name] = CategoricalColumn(list(vocab[name]),
+                                              np.asarray(rows, dtype=np.int64),
+                                              np.asarray(cols, dtype=np.int64))
+        return cls(np.asarray(case_keys, dtype=str), pb_ids, np.asarray(platforms, dtype=str), columns,
+                   loss, confidence, np.asarray(wallets, dtype=str),
+                   np.asarray(wallet_rows, dtype=np.int64), sources, excluded)
+
+    @classmethod
+    def load(cls, inputs=("ttp_results/individual",), cache=None):
+        """프로파일 적재 (cache .npz가 입력보다 최신이면 캐시 사용)"""
+        inputs = [str(p) for p in inputs]
+        newest = _newest_mtime(inputs)
+
+        if cache and Path(cache).exists() and Path(cache).stat().st_mtime >= newest:
+            table = cls.load_npz(cache)
+            if table is not None and table.sources == inputs:
+                return table
+
+        table = cls.from_profiles(iter_profile_files(inputs), sources=inputs)
+        if cache:
+            table.save_npz(cache)
+        return table
+
+    def save_npz(self, path):
+        np = require_numpy()
+        arrays = {
+            "case_keys": self.case_keys, "pb_ids": self.pb_ids, "platforms": self.platforms,
+            "loss": self.loss, "confidence": self.confidence,
+            "wallets": self.wallets, "wallet_rows": self.wallet_rows,
+            "sources": np.asarray(self.sources, dtype=str),
+            "excluded": np.asarray(self.excluded, dtype=str),
+            "version": np.asarray(TABLE_VERSION),
+        }
+        for name, column in self.columns.items():
+            arrays[f"{name}.vocab"] = np.asarray(column.vocab, dtype=str)
+            arrays[f"{name}.rows"] = column.rows
+            arrays[f"{name}.cols"] = column.cols
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load_npz(cls, path):
+        np = require_numpy()
+        """캐시 적재 (TABLE_VERSION 이 다르면 None -> 재계산)"""
+        with np.load(path, allow_pickle=False) as data:
+            if "version" not in data.files or int(data["version"]) != TABLE_VERSION:
+                return None
+            columns = {}
+            for name in CATEGORICAL_FIELDS:
+                columns[name] = CategoricalColumn(data[f"{name}.vocab"].tolist(),
+                                                  data[f"{name}.rows"], data[f"{name}.cols"])
+            return cls(data["case_keys"], data["pb_ids"], data["platforms"], columns,
+                       data["loss"], data["confidence"], data["wallets"], data["wallet_rows"],
+                       data["sources"].tolist(), data["excluded"].tolist())
+
+    def to_dataframe(self):
+        """pandas DataFrame (다중값 필드는 '필드=값' 원-핫 열)"""
+        try:
+            import pandas as pd
+        except ImportError:
+            print("[!] pandas 패키지가 필요합니다: pip install pandas")
+            raise
+        frame = pd.DataFrame({"case_key": self.case_keys, "pb_id": self.pb_ids, "platform": self.platforms,
+                              "loss_usd": self.loss, "confidence": self.confidence})
+        for name, column in self.columns.items():
+            onehot = column.onehot(len(self))
+            frame = pd.concat([frame, pd.DataFrame(onehot, columns=[f"{name}={v}" for v in column.vocab])],
+                              axis=1)
+        return frame
+
+    # ------------------------------------------------------------------
+    # 계산
+    # ------------------------------------------------------------------
+    def frequency(self, name, denominator=None, top=None):
+        """{값: {"count", "percentage"}} (빈도순, 동률은 값 이름순)"""
+        np = require_numpy()
+        column = self.columns[name]
+        counts = column.counts()
+        denominator = len(self) if denominator is None else denominator
+        order = np.lexsort((np.asarray(column.vocab, dtype=str), -counts)) if len(counts) else []
+        if top:
+            order = order[:top]
+        return {column.vocab[i]: {"count": int(counts[i]), "percentage": _pct(counts[i], denominator)}
+                for i in order}
+
+    def top_indices(self, name, top):
+        np = require_numpy()
+        column = self.columns[name]
+        counts = column.counts()
+        return np.lexsort((np.asarray(column.vocab, dtype=str), -counts))[:top]
+
+    def crosstab(self, row_field, col_field, top=10):
+        """두 범주형 필드의 동시 출현 교차표 (상위 top 값끼리, 원-핫 행렬 곱)"""
+        np = require_numpy()
+        a_idx = self.top_indices(row_field, top)
+        b_idx = self.top_indices(col_field, top)
+        a = self.columns[row_field].onehot(len(self), a_idx).astype(np.float32)
+        b = self.columns[col_field].onehot(len(self), b_idx).astype(np.float32)
+        table = np.rint(a.T @ b).astype(np.int64)
+        row_vocab = self.columns[row_field].vocab
+        col_vocab = self.columns[col_field].vocab
+        return {
+            "rows": [row_vocab[i] for i in a_idx],
+            "columns": [col_vocab[i] for i in b_idx],
+            "counts": table.tolist(),
+        }
+
+    def loss_statistics(self):
+        np = require_numpy()
+        values = self.loss[~np.isnan(self.loss)]
+        if not len(values):
+            return {"cases_with_loss": 0, "total_tracked_losses": 0}
+        counts, _ = np.histogram(values, bins=LOSS_BINS)
+        quantiles = np.quantile(values, LOSS_QUANTILES)
+        return {
+            "cases_with_loss": int(len(values)),
+            "total_tracked_losses": int(round(values.sum())),
+            "distribution": counts.astype(int).tolist(),
+            "mean_loss": int(round(values.mean())),
+            "median_loss": int(round(np.median(values))),
+            "min_loss": int(round(values.min())),
+            "max_loss": int(round(values.max())),
+            "standard_deviation": int(round(values.std(ddof=1))) if len(values) > 1 else 0,
+            "quantiles": {f"p{int(q * 100)}": int(round(v)) for q, v in zip(LOSS_QUANTILES, quantiles)},
+        }
+
+    def loss_by(self, name, top=10):
+        """범주별 피해액 (건수/합계/평균/중앙값)"""
+        np = require_numpy()
+        column = self.columns[name]
+        indices = self.top_indices(name, top)
+        onehot = column.onehot(len(self), indices)
+        known = ~np.isnan(self.loss)
+        result = {}
+        for j, i in enumerate(indices):
+            values = self.loss[onehot[:, j] & known]
+            if len(values):
+                result[column.vocab[i]] = {"count": int(len(values)), "total": int(round(values.sum())),
+                                           "mean": int(round(values.mean())),
+                                           "median": int(round(np.median(values)))}
+        return result
+
+    def high_value_cases(self, top=10):
+        np = require_numpy()
+        known = np.flatnonzero(~np.isnan(self.loss))
+        order = known[np.lexsort((self.case_keys[known], -self.loss[known]))][:top]
+        return [{"case": self.case_label(i), "loss": int(round(self.loss[i])), "platform": str(self.platforms[i])}
+                for i in order]
+
+    def case_label(self, row):
+        if self.pb_ids[row] >= 0:
+            return f"pb_{int(self.pb_ids[row]):03d}"
+        return str(self.case_keys[row])
+
+    def confidence_histogram(self, bins=10):
+        np = require_numpy()
+        values = self.confidence[~np.isnan(self.confidence)]
+        counts, edges = np.histogram(values, bins=bins, range=(0.0, 1.0))
+        return {
+            "cases_with_confidence": int(len(values)),
+            "mean": round(float(values.mean()), 3) if len(values) else 0.0,
+            "median": round(float(np.median(values)), 3) if len(values) else 0.0,
+            "bins": [f"{edges[i]:.1f}-{edges[i + 1]:.1f}" for i in range(bins)],
+            "counts": counts.astype(int).tolist(),
+        }
+
+    def wallet_statistics(self):
+        np = require_numpy()
+        unique, first = np.unique(np.char.lower(self.wallets), return_index=True) if len(self.wallets) \
+            else (np.asarray([], dtype=str), np.asarray([], dtype=np.int64))
+        chains = np.asarray([wallet_chain(a) for a in self.wallets[first]], dtype=str)
+        names, counts = np.unique(chains, return_counts=True)
+        order = np.lexsort((names, -counts))
+        cases_with_wallets = int(len(np.unique(self.wallet_rows)))
+        return {
+            "cases_with_wallets": cases_with_wallets,
+            "unique_wallets": int(len(unique)),
+            "distribution": {str(names[i]): {"count": int(counts[i]), "percentage": _pct(counts[i], len(unique))}
+                             for i in order},
+        }
+
+
+class StatisticsReport:
+    """ProfileTable -> TTP_STATISTICS_ANALYSIS.json / KEY_DATA_SUMMARY.csv"""
+
+    def __init__(self, table, dataset_total=None, top=10):
+        self.table = table
+        self.dataset_total = dataset_total
+        self.top = top
+
+    def generated_at(self):
+        """입력 파일 중 가장 최근 수정일 (재실행해도 출력이 바뀌지 않도록)"""
+        newest = _newest_mtime(self.table.sources)
+        return date.fromtimestamp(newest).isoformat() if newest else None
+
+    def build(self, previous=None):
+        t = self.table
+        n = len(t)
+        loss = t.loss_statistics()
+        wallets = t.wallet_statistics()
+        contact_known = t.columns["contact_platforms"].known_cases(n, exclude=GENERIC_PLATFORMS)
+        contact = t.frequency("contact_platforms", denominator=contact_known)
+        top_contact = list(contact.items())[:self.top]
+
+        stats = {
+            "statistics_metadata": {
+                "title": "TTP Pattern Statistical Analysis",
+                "subtitle": "Fraud-TTPs Frequency and Distribution Analysis",
+                "data_source": "DFPI Crypto Scam Tracker - Pig Butchering Cases",
+                "total_cases_analyzed": n,
+                "total_cases_in_dataset": self.dataset_total,
+                "analysis_coverage": f"{_pct(n, self.dataset_total)}%" if self.dataset_total else None,
+                "generated_at": self.generated_at(),
+                "methodology": "LLM-based extraction with Chain-of-Thought reasoning; "
+                               "statistics regenerated by ttp_stats.py",
+                "sources": t.sources,
+                "schema_coverage": {
+                    "profiles_loaded": n + len(t.excluded),
+                    "standard_schema": n,
+                    "excluded_nonstandard": len(t.excluded),
+                    "excluded_cases": t.excluded,
+                },
+            },
+            "initial_contact_analysis": {
+                "description": "Distribution of platforms used for initial victim contact",
+                "total_cases_with_known_platform": contact_known,
+                "platform_frequency": contact,
+                "visualization_data": {
+                    "chart_type": "horizontal_bar",
+                    "labels": [k for k, _ in top_contact],
+                    "values": [v["count"] for _, v in top_contact],
+                },
+            },
+            "communication_migration_patterns": {
+                "description": "How scammers migrate victims from initial contact to controlled channels",
+                "migration_patterns": t.frequency("communication_migration"),
+            },
+            "scammer_persona_analysis": {
+                "description": "Analysis of fake identities used by scammers",
+                "relationship_types": t.frequency("relationship_types"),
+            },
+            "lure_type_analysis": {
+                "description": "Types of investment opportunities presented to victims",
+                "lure_frequency": t.frequency("lure_types"),
+            },
+            "psychological_tactics_analysis": {
+                "description": "Manipulation techniques used to build trust and pressure victims",
+                "tactic_frequency": t.frequency("psychological_tactics"),
+            },
+            "withdrawal_blocking_tactics": {
+                "description": "Methods used to prevent victims from withdrawing funds",
+                "tactic_frequency": t.frequency("withdrawal_tactics"),
+            },
+            "platform_type_analysis": {
+                "description": "Types of fraudulent platforms",
+                "platform_frequency": t.frequency("platform_types"),
+            },
+            "financial_loss_analysis": {
+                "description": "Distribution of victim losses",
+                "total_tracked_losses": loss["total_tracked_losses"],
+                "cases_with_loss": loss["cases_with_loss"],
+            },
+            "blockchain_intelligence": {
+                "description": "Cryptocurrency tracking data",
+                "wallet_extraction_rate": {
+                    "cases_with_wallets": wallets["cases_with_wallets"],
+                    "total_cases": n,
+                    "extraction_rate": f"{_pct(wallets['cases_with_wallets'], n)}%",
+                },
+                "unique_wallets": wallets["unique_wallets"],
+                "wallet_distribution": wallets["distribution"],
+                "cryptocurrency_types": t.frequency("cryptocurrency_types", top=self.top),
+                "payment_methods": t.frequency("payment_methods", top=self.top),
+            },
+            "temporal_patterns": {
+                "description": "Time-based analysis of scam operations",
+                "platform_operational_status": t.frequency("platform_status"),
+            },
+            "confidence_analysis": {
+                "description": "Distribution of extraction confidence scores",
+                **t.confidence_histogram(),
+            },
+            "cross_tabulations": {
+                "description": "Co-occurrence counts between top categories",
+                "contact_platform_x_lure_type": t.crosstab("contact_platforms", "lure_types", self.top),
+                "relationship_type_x_platform_type": t.crosstab("relationship_types", "platform_types", self.top),
+                "platform_type_x_withdrawal_tactic": t.crosstab("platform_types", "withdrawal_tactics", self.top),
+            },
+        }
+
+        if loss["cases_with_loss"]:
+            distribution = {key: {"count": c, "percentage": _pct(c, loss["cases_with_loss"])}
+                            for key, c in zip(LOSS_BIN_KEYS, loss["distribution"])}
+            stats["financial_loss_analysis"].update({
+                "loss_distribution": distribution,
+                "statistics": {key: loss[key] for key in ("mean_loss", "median_loss", "min_loss",
+                                                          "max_loss", "standard_deviation")},
+                "quantiles": loss["quantiles"],
+                "visualization_data": {"chart_type": "histogram", "bins": LOSS_BIN_LABELS,
+                                       "counts": loss["distribution"]},
+                "high_value_cases": t.high_value_cases(self.top),
+                "loss_by_platform_type": t.loss_by("platform_types", self.top),
+            })
+
+        # 프로파일에서 계산할 수 없는 수작업 섹션은 기존 파일 값을 유지
+        curated = [key for key in CURATED_SECTIONS if previous and key in previous]
+        for key in curated:
+            stats[key] = previous[key]
+        stats["statistics_metadata"]["curated_sections"] = curated
+        return stats
+
+    def csv_rows(self, stats):
+        n = stats["statistics_metadata"]["total_cases_analyzed"]
+        rows = [["SECTION", "CATEGORY", "ITEM", "VALUE", "PERCENTAGE", "NOTES"], CSV_SEPARATOR]
+
+        def section(name, category, freq, note_fn=None):
+            rows.append(CSV_SEPARATOR)
+            for value, entry in list(freq.items())[:self.top]:
+                rows.append([name, category, display_label(value), entry["count"], f"{entry['percentage']}%",
+                             note_fn(value) if note_fn else ""])
+
+        blockchain = stats["blockchain_intelligence"]
+        loss = stats["financial_loss_analysis"]
+        dataset_total = stats["statistics_metadata"]["total_cases_in_dataset"]
+        rows.append(["OVERVIEW", "Dataset", "Pig Butchering Cases", dataset_total or "", "", ""])
+        rows.append(["OVERVIEW", "Analysis", "TTP Profiles Created", n,
+                     stats["statistics_metadata"]["analysis_coverage"] or "",
+                     f"of {dataset_total} cases" if dataset_total else ""])
+        excluded = stats["statistics_metadata"]["schema_coverage"]["excluded_nonstandard"]
+        if excluded:
+            rows.append(["OVERVIEW", "Analysis", "Profiles Excluded (Non-standard Schema)", excluded, "",
+                         "legacy/free-form profiles not counted"])
+        rows.append(["OVERVIEW", "Analysis", "Cases with Wallet Addresses",
+                     blockchain["wallet_extraction_rate"]["cases_with_wallets"],
+                     blockchain["wallet_extraction_rate"]["extraction_rate"], f"of {n} profiled cases"])
+        rows.append(["OVERVIEW", "Analysis", "Unique Wallet Addresses", blockchain["unique_wallets"], "", ""])
+        rows.append(["OVERVIEW", "Financial", "Estimated Total Losses", f"${loss['total_tracked_losses']}", "",
+                     f"{loss['cases_with_loss']} cases with known loss"])
+
+        rows.append(CSV_SEPARATOR)
+        for chain, entry in blockchain["wallet_distribution"].items():
+            name, symbol = CHAIN_LABELS.get(chain, (chain, chain))
+            rows.append(["WALLET_SUMMARY", name, f"{symbol} Wallets", entry["count"], f"{entry['percentage']}%", ""])
+
+        known = stats["initial_contact_analysis"]["total_cases_with_known_platform"]
+        section("INITIAL_CONTACT", "Platform", stats["initial_contact_analysis"]["platform_frequency"])
+        rows.append(["INITIAL_CONTACT", "Summary", "Cases with Known Platform", known, f"{_pct(known, n)}%", ""])
+        section("COMMUNICATION_MIGRATION", "Channel",
+                stats["communication_migration_patterns"]["migration_patterns"])
+        section("SCAMMER_PERSONA", "Relationship", stats["scammer_persona_analysis"]["relationship_types"])
+        section("LURE_TYPE", "Lure", stats["lure_type_analysis"]["lure_frequency"])
+        section("PSYCHOLOGICAL_TACTICS", "Tactic", stats["psychological_tactics_analysis"]["tactic_frequency"])
+        section("WITHDRAWAL_BLOCKING", "Tactic", stats["withdrawal_blocking_tactics"]["tactic_frequency"])
+        section("PLATFORM_TYPE", "Platform", stats["platform_type_analysis"]["platform_frequency"])
+        section("PLATFORM_STATUS", "Status", stats["temporal_patterns"]["platform_operational_status"])
+
+        if "loss_distribution" in loss:
+            rows.append(CSV_SEPARATOR)
+            for label, entry in zip(LOSS_BIN_LABELS, loss["loss_distribution"].values()):
+                rows.append(["LOSS_DISTRIBUTION", "Range", label, entry["count"], f"{entry['percentage']}%", ""])
+            for key, value in loss["statistics"].items():
+                rows.append(["LOSS_DISTRIBUTION", "Statistics", display_label(key), f"${value}", "", ""])
+            for key, value in loss["quantiles"].items():
+                rows.append(["LOSS_DISTRIBUTION", "Quantile", key.upper(), f"${value}", "", ""])
+            rows.append(CSV_SEPARATOR)
+            for case in loss["high_value_cases"]:
+                rows.append(["HIGH_VALUE_CASES", case["case"], case["platform"], f"${case['loss']}", "", ""])
+
+        confidence = stats["confidence_analysis"]
+        rows.append(CSV_SEPARATOR)
+        rows.append(["CONFIDENCE", "Summary", "Mean Confidence", confidence["mean"], "",
+                     f"{confidence['cases_with_confidence']} cases"])
+        rows.append(["CONFIDENCE", "Summary", "Median Confidence", confidence["median"], "", ""])
+        for label, count in zip(confidence["bins"], confidence["counts"]):
+            if count:
+                rows.append(["CONFIDENCE", "Histogram", label, count,
+                             f"{_pct(count, confidence['cases_with_confidence'])}%", ""])
+        return rows
+
+    def write(self, json_path, csv_path):
+        previous = None
+        if Path(json_path).exists():
+            with open(json_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+
+        stats = self.build(previous)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerows(self.csv_rows(stats))
+        return stats
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Regenerate TTP statistics from extracted profiles")
+    parser.add_argument("inputs", nargs="*", default=["ttp_results/individual"],
+                       help="Profile directories or JSON files (default: ttp_results/individual)")
+    parser.add_argument("--dataset", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                       help="Case dataset used for coverage")
+    parser.add_argument("--json-output", type=str, default="ttp_results/TTP_STATISTICS_ANALYSIS.json",
+                       help="Statistics JSON output")
+    parser.add_argument("--csv-output", type=str, default="KEY_DATA_SUMMARY.csv", help="Key data CSV output")
+    parser.add_argument("--cache", type=str, help="Columnar .npz cache (reused while inputs are unchanged)")
+    parser.add_argument("--top", type=int, default=10, help="Top-N rows for CSV and cross tabulations")
+
+    args = parser.parse_args()
+
+    start = time.time()
+    table = ProfileTable.load(args.inputs, cache=args.cache)
+    print(f"[*] 프로파일 적재: {len(table)}건 ({time.time() - start:.2f}초)")
+    if table.excluded:
+        print(f"[!] 비표준 스키마 프로파일 {len(table.excluded)}건 통계에서 제외: {', '.join(table.excluded)}")
+
+    dataset_total = None
+    if args.dataset and Path(args.dataset).exists():
+        with open(args.dataset, "r", encoding="utf-8") as f:
+            dataset_total = len(json.load(f))
+
+    start = time.time()
+    report = StatisticsReport(table, dataset_total=dataset_total, top=args.top)
+    stats = report.write(args.json_output, args.csv_output)
+    print(f"[+] 통계 계산 완료 ({time.time() - start:.2f}초)")
+    print(f"[+] 저장: {args.json_output}, {args.csv_output}")
+    if stats["statistics_metadata"]["curated_sections"]:
+        print(f"[*] 기존 수작업 섹션 유지: {', '.join(stats['statistics_metadata']['curated_sections'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+"""
+LLM 추출 결과 검증 표본 및 평가자 간 일치도 분석
+- 프로파일 저장소에서 재현 가능한 층화 무작위 표본 추출 (층: platform_type x 피해액 구간, 고정 seed)
+  - 표준 스키마가 아닌 레거시/자유형식 프로파일은 ttp_stats와 같이 제외하고 보고
+- 인간 전문가 주석 파일 입력 후 필드별 일치도 계산
+  - 범주형: Cohen's kappa (LLM vs 각 평가자, 평가자 쌍), Fleiss' kappa (전체 평가자)
+    (자유 서술인 communication_migration은 ttp_stats.normalize_label로 이동 대상 플랫폼 키로 정규화 후 비교)
+  - 다중 라벨: 케이스별 Jaccard 평균, micro F1
+  - estimated_loss_usd: 값 기입 여부 일치율, 상대 오차 구간(±10/25/50%) 비율, 상대 오차 중앙값
+  - 주석의 명시적 null은 NO_VALUE("(none)") 범주로 비교, 미주석 필드(NOT_ANNOTATED)는 제외
+- 모든 지표의 부트스트랩 신뢰구간을 재표본 축으로 벡터화하여 계산 (프롬프트 변경 후 재검증 수 초 내)
+"""
+
+import json
+import math
+import random
+from datetime import date
+from pathlib import Path
+
+from ttp_aggregate import get_path
+from ttp_stats import as_loss, as_values, is_standard_profile, iter_profile_files, normalize_label, require_numpy
+
+# 검증 필드: 주석 파일의 평탄화된 필드명 -> 프로파일 경로
+CATEGORICAL_FIELDS = {
+    "relationship_type": ("impersonation_and_psychology", "scammer_persona", "relationship_type"),
+    "platform_type": ("fraud_mechanism", "platform_type"),
+    "communication_migration": ("approach_and_lure", "communication_migration"),
+    "platform_status": ("temporal_indicators", "platform_status"),
+}
+MULTI_LABEL_FIELDS = {
+    "initial_contact_platform": ("approach_and_lure", "initial_contact_platform"),
+    "lure_type": ("approach_and_lure", "lure_type"),
+    "psychological_tactics": ("impersonation_and_psychology", "psychological_tactics"),
+    "withdrawal_block_tactics": ("fraud_mechanism", "withdrawal_block_tactics"),
+    "platform_names": ("fraud_mechanism", "platform_names"),
+    "wallet_addresses": ("financial_tracking", "wallet_addresses"),
+}
+NUMERIC_FIELDS = {
+    "estimated_loss_usd": ("financial_tracking", "estimated_loss_usd"),
+}
+ALL_FIELDS = {**CATEGORICAL_FIELDS, **MULTI_LABEL_FIELDS, **NUMERIC_FIELDS}
+# 자유 서술 범주형 필드: 정규화 키로 비교 ("Facebook → WhatsApp" / "WhatsApp (no migration)" -> whatsapp)
+NORMALIZED_FIELDS = {"communication_migration"}
+
+LOSS_BANDS = [0.10, 0.25, 0.50]
+NO_VALUE = "(none)"              # 전문가가 명시적으로 null(해당 없음)을 기입한 필드
+NOT_ANNOTATED = "(not annotated)"  # 주석 템플릿 기본값: 아직 주석하지 않은 필드 (비교에서 제외)
+LLM_RATER = "llm"
+
+DEFAULT_BOOTSTRAP = 2000
+DEFAULT_SEED = 42
+
+
+def loss_stratum(loss):
+    if loss is None:
+        return "unknown"
+    if loss < 50_000:
+        return "<50k"
+    if loss < 250_000:
+        return "50k-250k"
+    return ">=250k"
+
+
+def pb_label(pb_id):
+    return f"pb_{int(pb_id):03d}"
+
+
+def flatten_profile(profile):
+    """프로파일 -> 검증 필드 평탄화 dict"""
+    flat = {}
+    for field, path in ALL_FIELDS.items():
+        flat[field] = get_path(profile, path)
+    flat["estimated_loss_usd"] = as_loss(flat["estimated_loss_usd"])
+    return flat
+
+
+def load_profiles(inputs):
+    """({pb 라벨: 평탄화 프로파일}, 제외된 비표준 프로파일 라벨) (pb 번호가 없으면 case 키 사용)"""
+    profiles, excluded = {}, []
+    for key, pb_id, profile in iter_profile_files(inputs):
+        label = pb_label(pb_id) if pb_id is not None and str(pb_id).isdigit() else key
+        if not is_standard_profile(profile):
+            excluded.append(label)
+            continue
+        profiles[label] = flatten_profile(profile)
+    return profiles, sorted(excluded)
+
+
+# ----------------------------------------------------------------------
+# 층화 표본 추출
+# ----------------------------------------------------------------------
+def stratified_sample(profiles, fraction=0.1, seed=DEFAULT_SEED):
+    """platform_type x 피해액 구간 층별 비례 배분 (최대 잔여 방식), 같은 seed면 같은 표본"""
+    strata = {}
+    for label in sorted(profiles):
+        flat = profiles[label]
+        platform = (as_values(flat["platform_type"]) or [NO_VALUE])[0]
+        strata.setdefault((platform, loss_stratum(flat["estimated_loss_usd"])), []).append(label)
+
+    total = len(profiles)
+    size = max(1, math.ceil(total * fraction))
+    quotas = {key: len(members) * size / total for key, members in strata.items()}
+    alloc = {key: int(q) for key, q in quotas.items()}
+    remainder = sorted(strata, key=lambda key: (-(quotas[key] - alloc[key]), key))
+    for key in remainder[:size - sum(alloc.values())]:
+        alloc[key] += 1
+
+    rng = random.Random(seed)
+    sample = []
+    for key in sorted(strata):
+        for label in rng.sample(strata[key], alloc[key]):
+            sample.append((label, key))
+    return sorted(sample)
+
+
+def build_sample_file(profiles, sample, cases_by_pb, fraction, seed):
+    """VALIDATION_SAMPLE_10PERCENT.json 형식의 검증 표본 생성"""
+    samples = []
+    for i, (label, (platform, loss_band)) in enumerate(sample, start=1):
+        case = cases_by_pb.get(label, {})
+        flat = profiles[label]
+        samples.append({
+            "sample_id": i,
+            "case_id": label,
+            "original_case_id": case.get("original_case_id"),
+            "selection_reason": f"Stratum: platform_type={platform}, loss={loss_band}",
+            "original_narrative": case.get("complaint_narrative", ""),
+            "llm_extraction": flat,
+            # 평가자가 값을 직접 기입 (일치도 계산용)
+            "human_annotation": {field: NOT_ANNOTATED for field in ALL_FIELDS},
+            "human_validation": {field: {"correct": None, "notes": ""} for field in ALL_FIELDS},
+        })
+
+    return {
+        "validation_metadata": {
+            "title": f"{fraction:.0%} Stratified Sample Validation Dataset",
+            "purpose": "Human expert validation of LLM TTP extraction accuracy",
+            "methodology": "Inter-rater reliability assessment between LLM and human experts",
+            "total_ttp_profiles": len(profiles),
+            "sample_size": len(samples),
+            "sample_percentage": f"{len(samples) / max(len(profiles), 1):.1%}",
+            "selection_criteria": "Stratified random sampling by platform_type x loss band "
+                                  "(largest-remainder proportional allocation)",
+            "seed": seed,
+            "generated_at": date.today().isoformat(),
+        },
+        "validation_instructions": {
+            "task": "Fill human_annotation with the values you extract from the original narrative",
+            "fields_to_validate": list(ALL_FIELDS),
+            "notes": "Use the same value vocabulary as llm_extraction; set null if not applicable "
+                     f"(no value in the narrative). Fields left as \"{NOT_ANNOTATED}\" are excluded "
+                     "from agreement. "
+                     "human_validation (correct/notes) may be used for binary scoring instead.",
+        },
+        "validation_samples": samples,
+    }
+
+
+# ----------------------------------------------------------------------
+# 주석 입력
+# ----------------------------------------------------------------------
+def _annotation(raw):
+    """주석 dict -> {필드: 값}: 명시적 null은 NO_VALUE, NOT_ANNOTATED/누락 필드는 제외"""
+    raw = raw or {}
+    if NOT_ANNOTATED not in raw.values() and all(v is None for v in raw.values()):
+        return {}  # 이전 템플릿(전 필드 null)을 그대로 둔 표본은 미주석으로 간주
+    return {k: NO_VALUE if v is None else v for k, v in raw.items() if v != NOT_ANNOTATED}
+
+
+def load_annotations(path):
+    """주석 파일 -> (평가자명, {pb 라벨: {필드: 값}}, {pb 라벨: {필드: 정답 여부}})
+
+    지원 형식: 검증 표본 파일(human_annotation / human_validation), {"annotator", "annotations"}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    annotator = data.get("annotator") or data.get("validation_metadata", {}).get("annotator") or Path(path).stem
+    values, verdicts = {}, {}
+    if "validation_samples" in data:
+        for sample in data["validation_samples"]:
+            label = sample.get("case_id")
+            annotation = _annotation(sample.get("human_annotation"))
+            if annotation:
+                values[label] = annotation
+            judged = {k: v["correct"] for k, v in (sample.get("human_validation") or {}).items()
+                      if isinstance(v, dict) and isinstance(v.get("correct"), bool)}
+            if judged:
+                verdicts[label] = judged
+    else:
+        values = {label: _annotation(raw) for label, raw in (data.get("annotations") or {}).items()}
+        values = {label: annotation for label, annotation in values.items() if annotation}
+    return annotator, values, verdicts
+
+
+# ----------------------------------------------------------------------
+# 일치도 지표 (부트스트랩 벡터화)
+# ----------------------------------------------------------------------
+class Bootstrap:
+    """(B, n) 재표본 인덱스를 공유하여 지표를 재표본 축으로 한 번에 계산"""
+
+    def __init__(self, n_resamples=DEFAULT_BOOTSTRAP, seed=DEFAULT_SEED):
+        self.n_resamples = n_resamples
+        self.seed = seed
+        self._indices = {}
+
+    def indices(self, n):
+        np = require_numpy()
+        if n not in self._indices:
+            rng = np.random.default_rng([self.seed, n])
+            self._indices[n] = rng.integers(0, n, size=(self.n_resamples, n))
+        return self._indices[n]
+
+    @staticmethod
+    def interval(samples, point):
+        np = require_numpy()
+        samples = np.asarray(samples, dtype=float)
+        samples = samples[~np.isnan(samples)]
+        if not len(samples):
+            return {"value": _round(point), "ci95": [None, None]}
+        low, high = np.percentile(samples, [2.5, 97.5])
+        return {"value": _round(point), "ci95": [_round(low), _round(high)]}
+
+
+def _round(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return round(float(value), 4)
+
+
+def _onehot_codes(labels_a, labels_b):
+    np = require_numpy()
+    vocab = {v: i for i, v in enumerate(sorted(set(labels_a) | set(labels_b)))}
+    a = np.asarray([vocab[v] for v in labels_a], dtype=np.int64)
+    b = np.asarray([vocab[v] for v in labels_b], dtype=np.int64)
+    eye = np.eye(len(vocab), dtype=np.float64)
+    return eye[a], eye[b]
+
+
+def cohen_kappa(labels_a, labels_b, bootstrap):
+    """Cohen's kappa (점추정 + 부트스트랩 95% CI)"""
+    np = require_numpy()
+    A, B = _onehot_codes(labels_a, labels_b)
+
+    def kappa(a, b):
+        # a, b: (..., n, K)
+        po = (a * b).sum(axis=-1).mean(axis=-1)
+        pe = (a.mean(axis=-2) * b.mean(axis=-2)).sum(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(pe < 1, (po - pe) / (1 - pe), np.where(po == 1, 1.0, np.nan))
+
+    idx = bootstrap.indices(len(labels_a))
+    return bootstrap.interval(kappa(A[idx], B[idx]), kappa(A, B))
+
+
+def fleiss_kappa(ratings, bootstrap):
+    """Fleiss' kappa: ratings = 케이스별 평가자 라벨 리스트 (평가자 수 동일)"""
+    np = require_numpy()
+    vocab = {v: i for i, v in enumerate(sorted({v for row in ratings for v in row}))}
+    counts = np.zeros((len(ratings), len(vocab)))
+    for i, row in enumerate(ratings):
+        for v in row:
+            counts[i, vocab[v]] += 1
+    r = len(ratings[0])
+
+    def kappa(m):
+        # m: (..., n, K)
+        p_i = ((m * m).sum(axis=-1) - r) / (r * (r - 1))
+        p_bar = p_i.mean(axis=-1)
+        p_j = m.sum(axis=-2) / (m.shape[-2] * r)
+        pe = (p_j * p_j).sum(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(pe < 1, (p_bar - pe) / (1 - pe), np.where(p_bar == 1, 1.0, np.nan))
+
+    idx = bootstrap.indices(len(ratings))
+    return bootstrap.interval(kappa(counts[idx]), kappa(counts))
+
+
+def set_agreement(sets_a, sets_b, bootstrap):
+    """다중 라벨: 케이스별 Jaccard 평균 + micro F1 (b를 기준 정답으로)"""
+    np = require_numpy()
+    tp = np.asarray([len(a & b) for a, b in zip(sets_a, sets_b)], dtype=float)
+    fp = np.asarray([len(a - b) for a, b in zip(sets_a, sets_b)], dtype=float)
+    fn = np.asarray([len(b - a) for a, b in zip(sets_a, sets_b)], dtype=float)
+    union = tp + fp + fn
+    jaccard = np.where(union > 0, tp / np.where(union > 0, union, 1), 1.0)  # 둘 다 비어 있으면 완전 일치
+
+    def f1(tp_s, fp_s, fn_s):
+        denom = 2 * tp_s + fp_s + fn_s
+        return np.where(denom > 0, 2 * tp_s / np.where(denom > 0, denom, 1), 1.0)
+
+    idx = bootstrap.indices(len(sets_a))
+    return {
+        "jaccard": bootstrap.interval(jaccard[idx].mean(axis=1), jaccard.mean()),
+        "micro_f1": bootstrap.interval(f1(tp[idx].sum(1), fp[idx].sum(1), fn[idx].sum(1)),
+                                       f1(tp.sum(), fp.sum(), fn.sum())),
+    }
+
+
+def loss_agreement(values_a, values_b, bootstrap):
+    """피해액: b 기준 상대 오차 구간별 비율 + 상대 오차 중앙값"""
+    np = require_numpy()
+    a = np.asarray(values_a, dtype=float)
+    b = np.asarray(values_b, dtype=float)
+    rel = np.abs(a - b) / np.maximum(np.abs(b), 1.0)
+    idx = bootstrap.indices(len(a))
+    result = {"median_relative_error": bootstrap.interval(np.median(rel[idx], axis=1), np.median(rel))}
+    for band in LOSS_BANDS:
+        within = (rel <= band).astype(float)
+        result[f"within_{int(band * 100)}pct"] = bootstrap.interval(within[idx].mean(axis=1), within.mean())
+    return result
+
+
+def binary_accuracy(flags, bootstrap):
+    np = require_numpy()
+    flags = np.asarray(flags, dtype=float)
+    idx = bootstrap.indices(len(flags))
+    return bootstrap.interval(flags[idx].mean(axis=1), flags.mean())
+
+
+def _categorical(value, field=None):
+    if field in NORMALIZED_FIELDS:
+        labels = [label for label in map(normalize_label, as_values(value)) if label]
+        return labels[0] if labels else NO_VALUE
+    return (as_values(value) or [NO_VALUE])[0]
+
+
+def _label_set(value):
+    return set(as_values(value)) - {NO_VALUE}
+
+
+def compare_field(field, raters, bootstrap):
+    """raters: {평가자: {pb 라벨: 값}} -> 필드 일치도 (LLM vs 평가자, 평가자 쌍, 전체)"""
+    names = sorted(raters, key=lambda n: (n != LLM_RATER, n))
+    result = {"pairs": {}}
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            common = sorted(set(raters[a]) & set(raters[b]))
+            if len(common) < 2:
+                continue
+            va = [raters[a][c] for c in common]
+            vb = [raters[b][c] for c in common]
+            if field in CATEGORICAL_FIELDS:
+                metrics = {"cohen_kappa": cohen_kappa([_categorical(v, field) for v in va],
+                                                      [_categorical(v, field) for v in vb], bootstrap)}
+            elif field in MULTI_LABEL_FIELDS:
+                metrics = set_agreement([_label_set(v) for v in va], [_label_set(v) for v in vb], bootstrap)
+            else:
+                # 값 기입 여부(명시적 "피해액 없음" 포함) 일치 + 둘 다 값이 있는 케이스의 상대 오차
+                metrics = {"value_presence": binary_accuracy([(x is None) == (y is None) for x, y in zip(va, vb)],
+                                                             bootstrap)}
+                valued = [(x, y) for x, y in zip(va, vb) if x is not None and y is not None]
+                metrics["n_valued"] = len(valued)
+                if len(valued) >= 2:
+                    metrics.update(loss_agreement(*zip(*valued), bootstrap))
+            result["pairs"][f"{a} vs {b}"] = {"n": len(common), **metrics}
+
+    if field in CATEGORICAL_FIELDS and len(names) >= 3:
+        common = sorted(set.intersection(*(set(raters[n]) for n in names)))
+        if len(common) >= 2:
+            ratings = [[_categorical(raters[n][c], field) for n in names] for c in common]
+            result["fleiss_kappa"] = {"n": len(common), "raters": names, **fleiss_kappa(ratings, bootstrap)}
+    return result
+
+
+def agreement_report(profiles, annotation_files, n_resamples=DEFAULT_BOOTSTRAP, seed=DEFAULT_SEED):
+    """LLM 프로파일 + 주석 파일 -> 필드별 일치도 리포트"""
+    bootstrap = Bootstrap(n_resamples, seed)
+    annotators = {}
+    verdicts = {}
+    for path in annotation_files:
+        name, values, judged = load_annotations(path)
+        annotators[name] = values
+        if judged:
+            verdicts[name] = judged
+
+    annotated = set().union(*(set(v) for v in annotators.values())) if annotators else set()
+    report = {
+        "metadata": {
+            "annotators": sorted(annotators),
+            "annotated_cases": len(annotated),
+            "bootstrap_resamples": n_resamples,
+            "seed": seed,
+        },
+        "fields": {},
+        "binary_accuracy": {},
+    }
+
+    for field in ALL_FIELDS:
+        raters = {LLM_RATER: {label: profiles[label][field] for label in annotated if label in profiles}}
+        for name, values in annotators.items():
+            raters[name] = {label: v[field] for label, v in values.items() if field in v}
+        if field in NUMERIC_FIELDS:
+            raters = {n: {c: as_loss(v) for c, v in r.items()} for n, r in raters.items()}
+        raters = {n: r for n, r in raters.items() if r}
+        if len(raters) >= 2:
+            report["fields"][field] = compare_field(field, raters, bootstrap)
+
+    # human_validation correct/incorrect 판정만 있는 경우: 필드별 LLM 정확도
+    for name, judged in verdicts.items():
+        fields = sorted({f for v in judged.values() for f in v})
+        report["binary_accuracy"][name] = {}
+        for field in fields:
+            flags = [v[field] for v in judged.values() if field in v]
+            if len(flags) >= 2:
+                report["binary_accuracy"][name][field] = {"n": len(flags), **binary_accuracy(flags, bootstrap)}
+    return report
+
+
+def print_report(report):
+    print(f"[+] 평가자: {', '.join(report['metadata']['annotators'])}, "
+          f"주석 케이스 {report['metadata']['annotated_cases']}건")
+    for field, result in report["fields"].items():
+        for pair, metrics in result["pairs"].items():
+            parts = []
+            for key, value in metrics.items():
+                if isinstance(value, dict) and "value" in value and value["value"] is not None:
+                    low, high = value["ci95"]
+                    ci = f" [{low:.2f}, {high:.2f}]" if low is not None else ""
+                    parts.append(f"{key} {value['value']:.2f}{ci}")
+            print(f"    {field} ({pair}, n={metrics['n']}): {', '.join(parts)}")
+        if "fleiss_kappa" in result:
+            fk = result["fleiss_kappa"]
+            print(f"    {field} (Fleiss, n={fk['n']}): {fk['value']}")
+    for name, fields in report["binary_accuracy"].items():
+        for field, value in fields.items():
+            print(f"    [{name}] {field} 정확도 {value['value']:.2f} (n={value['n']})")
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Validation sampling and inter-rater agreement")
+    parser.add_argument("--profiles", action="append",
+                       help="Profile directory or JSON file, repeatable (default: ttp_results/individual)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"Random seed (default: {DEFAULT_SEED})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sample = sub.add_parser("sample", help="Draw a stratified validation sample")
+    p_sample.add_argument("--fraction", type=float, default=0.1, help="Sample fraction (default: 0.1)")
+    p_sample.add_argument("--cases", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                         help="Case dataset for original narratives")
+    p_sample.add_argument("--output", type=str, default="ttp_results/validation_sample.json",
+                         help="Sample output file")
+
+    p_agree = sub.add_parser("agree", help="Compute agreement from annotation files")
+    p_agree.add_argument("annotations", nargs="+", help="Annotation files (validation sample format or "
+                                                        "{\"annotator\": ..., \"annotations\": {...}})")
+    p_agree.add_argument("--bootstrap", type=int, default=DEFAULT_BOOTSTRAP,
+                        help=f"Bootstrap resamples (default: {DEFAULT_BOOTSTRAP})")
+    p_agree.add_argument("--output", type=str, default="ttp_results/validation_agreement.json",
+                        help="Agreement report output file")
+
+    args = parser.parse_args()
+    profiles, excluded = load_profiles(args.profiles or ["ttp_results/individual"])
+    print(f"[*] 프로파일 적재: {len(profiles)}건")
+    if excluded:
+        print(f"[!] 표준 스키마가 아닌 프로파일 {len(excluded)}건 제외: {', '.join(excluded)}")
+
+    if args.command == "sample":
+        cases_by_pb = {}
+        if Path(args.cases).exists():
+            with open(args.cases, "r", encoding="utf-8") as f:
+                for case in json.load(f):
+                    if str(case.get("pb_case_id", "")).isdigit():
+                        cases_by_pb[pb_label(case["pb_case_id"])] = case
+        sample = stratified_sample(profiles, fraction=args.fraction, seed=args.seed)
+        data = build_sample_file(profiles, sample, cases_by_pb, args.fraction, args.seed)
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"[+] 표본 {len(sample)}건 저장: {args.output}")
+
+    elif args.command == "agree":
+        start = time.time()
+        report = agreement_report(profiles, args.annotations, n_resamples=args.bootstrap, seed=args.seed)
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print_report(report)
+        print(f"[+] 일치도 리포트 저장: {args.output} ({time.time() - start:.2f}초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""
+지갑 거래 그래프 및 union-find 군집화
+- 익스플로러 캐시(wallet_verifier.py SQLite) 또는 로컬 덤프(JSON/JSONL)에서 거래 적재
+- 주소를 정수 ID로 매핑하고 CSR 인접 구조(indptr/indices, 정/역방향)로 저장 (.npz)
+- union-find 군집화
+  - 공통 입력(common-input): BTC 다중 입력 거래의 입력 주소는 동일 소유자
+  - 거래소 입금 주소(known-deposit): 출금이 모두 거래소로 가는 주소에 송금한 주소들은 동일 소유자
+- 군집을 프로파일의 케이스/플랫폼에 매핑하여 케이스 간 공유 인프라 탐지
+- 거래소 도달성: 거래소에서 역방향 다중 출발점 BFS (벡터화 frontier 확장) -> 주소별 최소 홉 수 O(1) 조회
+"""
+
+import json
+import sqlite3
+from array import array
+from pathlib import Path
+
+from ttp_stats import require_numpy
+
+UNREACHABLE = -1
+
+
+def normalize_address(address):
+    address = address.strip()
+    return address.lower() if address.startswith("0x") else address
+
+
+class UnionFind:
+    """경로 압축 + 랭크 union-find (정수 ID)"""
+
+    def __init__(self, n=0):
+        self.parent = list(range(n))
+        self.rank = [0] * n
+
+    def add(self):
+        self.parent.append(len(self.parent))
+        self.rank.append(0)
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if self.rank[ra] < self.rank[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        if self.rank[ra] == self.rank[rb]:
+            self.rank[ra] += 1
+        return True
+
+    def roots(self):
+        return [self.find(i) for i in range(len(self.parent))]
+
+
+class GraphBuilder:
+    """거래 적재 -> 주소 ID / 간선 배열 / 공통 입력 union"""
+
+    def __init__(self):
+        self.ids = {}
+        self.addresses = []
+        self.src = array("q")
+        self.dst = array("q")
+        self.uf = UnionFind()
+        self.transactions = 0
+        self.common_input_unions = 0
+
+    def intern(self, address):
+        address = normalize_address(address)
+        node = self.ids.get(address)
+        if node is None:
+            node = self.ids[address] = len(self.addresses)
+            self.addresses.append(address)
+            self.uf.add()
+        return node
+
+    def add_transfer(self, inputs, outputs):
+        """입력 주소들 -> 출력 주소들 (다중 입력이면 공통 입력 union)"""
+        ins = [self.intern(a) for a in dict.fromkeys(inputs) if a]
+        outs = [self.intern(a) for a in dict.fromkeys(outputs) if a]
+        self.transactions += 1
+        for i in ins:
+            for o in outs:
+                if i != o:
+                    self.src.append(i)
+                    self.dst.append(o)
+        for other in ins[1:]:
+            self.common_input_unions += int(self.uf.union(ins[0], other))
+
+    def add_record(self, tx):
+        """Etherscan txlist / Blockchain.info tx / {"from","to"} 간선 레코드"""
+        if "inputs" in tx and "out" in tx:
+            inputs = [i.get("prev_out", {}).get("addr") for i in tx["inputs"]]
+            outputs = [o.get("addr") for o in tx["out"]]
+            self.add_transfer(inputs, outputs)
+        elif tx.get("from") and tx.get("to"):
+            if str(tx.get("isError", "0")) == "1":
+                return
+            self.add_transfer([tx["from"]], [tx["to"]])
+
+    def ingest_payload(self, payload):
+        """익스플로러 응답 JSON (txlist result / rawaddr / multiaddr txs)"""
+        if isinstance(payload, list):
+            for tx in payload:
+                if isinstance(tx, dict):
+                    self.add_record(tx)
+        elif isinstance(payload, dict):
+            if isinstance(payload.get("result"), list):
+                self.ingest_payload(payload["result"])
+            elif isinstance(payload.get("txs"), list):
+                self.ingest_payload(payload["txs"])
+            else:
+                self.add_record(payload)
+
+    def ingest_cache(self, path):
+        """wallet_verifier.py 익스플로러 캐시의 거래 응답 적재"""
+        conn = sqlite3.connect(str(path))
+        try:
+            rows = conn.execute("SELECT key, body FROM cache WHERE key LIKE '%txlist%' OR key LIKE '%rawaddr%'")
+            for _, body in rows:
+                self.ingest_payload(json.loads(body))
+        finally:
+            conn.close()
+
+    def ingest_dump(self, path):
+        """JSONL(레코드/응답 1줄 1개) 또는 JSON 덤프 적재"""
+        with open(path, "r", encoding="utf-8") as f:
+            if str(path).endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        self.ingest_payload(json.loads(line))
+            else:
+                self.ingest_payload(json.load(f))
+
+    def build(self, labels=None):
+        np = require_numpy()
+        graph = WalletGraph.from_edges(self.addresses,
+                                       np.frombuffer(self.src, dtype=np.int64),
+                                       np.frombuffer(self.dst, dtype=np.int64),
+                                       labels=labels)
+        graph.deposit_unions = graph.apply_deposit_heuristic(self.uf)
+        graph.common_input_unions = self.common_input_unions
+        graph.set_clusters(self.uf)
+        return graph
+
+
+class WalletGraph:
+    def __init__(self, addresses, indptr, indices, rindptr, rindices, labels=None, cluster=None):
+        self.addresses = addresses       # (n,) str
+        self.indptr = indptr             # 정방향 CSR
+        self.indices = indices
+        self.rindptr = rindptr           # 역방향 CSR
+        self.rindices = rindices
+        self.labels = labels or {}       # 정규화 주소 -> 거래소명
+        self.cluster = cluster           # (n,) 군집 대표 ID
+        self.deposit_unions = 0
+        self.common_input_unions = 0
+        self._ids = None
+        self._exchange_dist = {}         # max_hops -> (dist, parent)
+        self._groups = None
+
+    def __len__(self):
+        return len(self.addresses)
+
+    @property
+    def n_edges(self):
+        return len(self.indices)
+
+    @staticmethod
+    def _csr(src, dst, n):
+        """간선 배열 -> CSR (src*n+dst 키 정렬 후 중복 간선 제거)"""
+        np = require_numpy()
+        keys = np.sort(src.astype(np.int64) * n + dst.astype(np.int64))
+        if len(keys):
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+        return indptr, (keys % n).astype(np.int32 if n < 2 ** 31 else np.int64)
+
+    @classmethod
+    def from_edges(cls, addresses, src, dst, labels=None):
+        """간선 배열 -> 정/역방향 CSR"""
+        np = require_numpy()
+        n = len(addresses)
+        indptr, indices = cls._csr(src, dst, n)
+        rindptr, rindices = cls._csr(dst, src, n)
+        labels = {normalize_address(a): name for a, name in (labels or {}).items()}
+        return cls(np.asarray(addresses, dtype=str), indptr, indices, rindptr, rindices, labels)
+
+    def node(self, address):
+        if self._ids is None:
+            self._ids = {a: i for i, a in enumerate(self.addresses.tolist())}
+        return self._ids.get(normalize_address(address))
+
+    def successors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def predecessors(self, node):
+        return self.rindices[self.rindptr[node]:self.rindptr[node + 1]]
+
+    def exchange_nodes(self):
+        np = require_numpy()
+        nodes = [self.node(a) for a in self.labels]
+        return np.asarray(sorted(n for n in nodes if n is not None), dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # 군집화
+    # ------------------------------------------------------------------
+    def apply_deposit_heuristic(self, uf):
+        """출금이 모두 거래소로 향하는 주소(입금 주소)에 송금한 비거래소 주소들을 union"""
+        np = require_numpy()
+        exchanges = self.exchange_nodes()
+        if not len(exchanges):
+            return 0
+        is_exchange = np.zeros(len(self), dtype=bool)
+        is_exchange[exchanges] = True
+
+        out_degree = np.diff(self.indptr)
+        # 간선별 출발 노드, 도착이 거래소인지 -> 노드별 거래소행 출금 수
+        edge_src = np.repeat(np.arange(len(self)), out_degree)
+        to_exchange = np.bincount(edge_src[is_exchange[self.indices]], minlength=len(self))
+        deposits = np.flatnonzero((out_degree > 0) & (to_exchange == out_degree) & ~is_exchange)
+
+        unions = 0
+        for deposit in deposits:
+            senders = [int(s) for s in self.predecessors(deposit) if not is_exchange[s]]
+            for other in senders[1:]:
+                unions += int(uf.union(senders[0], other))
+        return unions
+
+    def set_clusters(self, uf):
+        np = require_numpy()
+        self.cluster = np.asarray(uf.roots(), dtype=np.int64)
+        self._groups = None
+
+    def _cluster_groups(self):
+        """군집 ID 순 정렬 1회로 전체 군집 구성 그룹화 -> (정렬 노드, 군집 ID, 구간 경계) (결과 캐시)"""
+        if self._groups is None:
+            np = require_numpy()
+            order = np.argsort(self.cluster, kind="stable")
+            roots, starts = np.unique(self.cluster[order], return_index=True)
+            self._groups = (order, roots, np.append(starts, len(order)))
+        return self._groups
+
+    def cluster_members(self, node):
+        np = require_numpy()
+        order, roots, bounds = self._cluster_groups()
+        i = int(np.searchsorted(roots, self.cluster[node]))
+        return order[bounds[i]:bounds[i + 1]]
+
+    # ------------------------------------------------------------------
+    # 도달성
+    # ------------------------------------------------------------------
+    def _expand(self, frontier, indptr, indices):
+        """frontier 노드들의 이웃을 한 번에 수집 (CSR 구간 gather)"""
+        np = require_numpy()
+        starts = indptr[frontier]
+        lengths = indptr[frontier + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        return indices[offsets].astype(np.int64), np.repeat(frontier, lengths)
+
+    def bfs(self, sources, reverse=False, max_hops=None):
+        """다중 출발점 BFS -> (거리 배열, 부모 배열)"""
+        np = require_numpy()
+        indptr, indices = (self.rindptr, self.rindices) if reverse else (self.indptr, self.indices)
+        dist = np.full(len(self), UNREACHABLE, dtype=np.int32)
+        parent = np.full(len(self), UNREACHABLE, dtype=np.int64)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64))
+        dist[frontier] = 0
+        hops = 0
+        while len(frontier) and (max_hops is None or hops < max_hops):
+            hops += 1
+            nbrs, origin = self._expand(frontier, indptr, indices)
+            fresh = dist[nbrs] == UNREACHABLE
+            nbrs, origin = nbrs[fresh], origin[fresh]
+            nbrs, first = np.unique(nbrs, return_index=True)
+            dist[nbrs] = hops
+            parent[nbrs] = origin[first]
+            frontier = nbrs
+        return dist, parent
+
+    def exchange_distances(self, max_hops=None):
+        """거래소까지의 최소 홉 수 (거래소에서 역방향 BFS 1회, max_hops별 결과 캐시)"""
+        if max_hops not in self._exchange_dist:
+            self._exchange_dist[max_hops] = self.bfs(self.exchange_nodes(), reverse=True, max_hops=max_hops)
+        return self._exchange_dist[max_hops]
+
+    def path_to_exchange(self, address):
+        """주소 -> 가장 가까운 거래소까지의 경로 (주소 리스트, 없으면 None)"""
+        node = self.node(address)
+        if node is None:
+            return None
+        dist, parent = self.exchange_distances()
+        if dist[node] == UNREACHABLE:
+            return None
+        path = [node]
+        while dist[path[-1]] > 0:
+            path.append(int(parent[path[-1]]))
+        return [str(self.addresses[n]) for n in path]
+
+    # ------------------------------------------------------------------
+    # 저장
+    # ------------------------------------------------------------------
+    def save(self, path):
+        np = require_numpy()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, addresses=self.addresses, indptr=self.indptr, indices=self.indices,
+                                rindptr=self.rindptr, rindices=self.rindices, cluster=self.cluster,
+                                labels=np.asarray(json.dumps(self.labels, ensure_ascii=False)),
+                                unions=np.asarray([self.common_input_unions, self.deposit_unions], dtype=np.int64))
+
+    @classmethod
+    def load(cls, path):
+        np = require_numpy()
+        with np.load(path, allow_pickle=False) as data:
+            graph = cls(data["addresses"], data["indptr"], data["indices"], data["rindptr"], data["rindices"],
+                        json.loads(str(data["labels"])), data["cluster"])
+            if "unions" in data.files:  # union 횟수가 없는 이전 저장본은 0
+                graph.common_input_unions, graph.deposit_unions = (int(v) for v in data["unions"])
+        return graph
+
+
+def cluster_report(graph, wallets):
+    """프로파일 지갑이 속한 군집 -> 케이스/플랫폼/거래소 도달성"""
+    dist, _ = graph.exchange_distances()
+    clusters = {}
+    unseen = []
+    for w in wallets:
+        node = graph.node(w["address"])
+        if node is None:
+            unseen.append(w["address"])
+            continue
+        entry = clusters.setdefault(int(graph.cluster[node]), {"wallets": [], "cases": set(), "platforms": set()})
+        entry["wallets"].append(w["address"])
+        entry["cases"].add(w["case"])
+        if w["platform"]:
+            entry["platforms"].add(w["platform"])
+
+    rows = []
+    for root, entry in clusters.items():
+        members = graph.cluster_members(root)
+        member_dist = dist[members]
+        reachable = member_dist[member_dist != UNREACHABLE]
+        rows.append({
+            "cluster_id": root,
+            "size": int(len(members)),
+            "cases": sorted(entry["cases"]),
+            "platforms": sorted(entry["platforms"]),
+            "profile_wallets": sorted(entry["wallets"]),
+            "shared_infrastructure": len(entry["cases"]) > 1,
+            "min_hops_to_exchange": int(reachable.min()) if len(reachable) else None,
+            "exchange_labels_in_cluster": sorted({graph.labels[a] for a in graph.addresses[members].tolist()
+                                                  if a in graph.labels}),
+        })
+    rows.sort(key=lambda r: (not r["shared_infrastructure"], -len(r["cases"]), -r["size"], r["cluster_id"]))
+    return {
+        "metadata": {
+            "nodes": len(graph),
+            "edges": graph.n_edges,
+            "common_input_unions": graph.common_input_unions,
+            "deposit_unions": graph.deposit_unions,
+            "profile_wallets": len(wallets),
+            "profile_wallets_without_transactions": unseen,
+        },
+        "clusters": rows,
+    }
+
+
+def main():
+    import argparse
+    import time
+
+    from wallet_verifier import collect_wallets
+
+    parser = argparse.ArgumentParser(description="Wallet transaction graph and scam infrastructure clustering")
+    parser.add_argument("--graph", type=str, default="ttp_results/wallet_graph.npz", help="Graph file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Build the graph from cached explorer responses and dumps")
+    p_build.add_argument("--cache", type=str, default="ttp_results/explorer_cache.sqlite",
+                        help="wallet_verifier.py response cache")
+    p_build.add_argument("--dumps", nargs="*", default=[], help="Transaction dumps (.json / .jsonl)")
+    p_build.add_argument("--exchange-labels", type=str, help="JSON map of known exchange address -> name")
+
+    p_clusters = sub.add_parser("clusters", help="Map clusters to cases and platforms")
+    p_clusters.add_argument("--profiles", nargs="+", default=["ttp_results/individual"],
+                           help="Profile directories or JSON files")
+    p_clusters.add_argument("--output", type=str, default="ttp_results/wallet_clusters.json", help="Output JSON")
+
+    p_reach = sub.add_parser("reach", help="Shortest path from an address to a known exchange")
+    p_reach.add_argument("addresses", nargs="+", help="Wallet addresses")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.time()
+        builder = GraphBuilder()
+        if args.cache and Path(args.cache).exists():
+            builder.ingest_cache(args.cache)
+        for dump in args.dumps:
+            builder.ingest_dump(dump)
+        labels = None
+        if args.exchange_labels:
+            with open(args.exchange_labels, "r", encoding="utf-8") as f:
+                labels = json.load(f)
+        graph = builder.build(labels)
+        graph.save(args.graph)
+        print(f"[+] 그래프 저장: {args.graph} (주소 {len(graph):,}개, 간선 {graph.n_edges:,}개, "
+              f"거래 {builder.transactions:,}건, {time.time() - start:.1f}초)")
+        print(f"    union: 공통 입력 {graph.common_input_unions}회, 입금 주소 {graph.deposit_unions}회")
+        return
+
+    graph = WalletGraph.load(args.graph)
+    if args.command == "clusters":
+        wallets, _ = collect_wallets(args.profiles)
+        report = cluster_report(graph, wallets)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        shared = [c for c in report["clusters"] if c["shared_infrastructure"]]
+        print(f"[+] 군집 {len(report['clusters'])}개 (케이스 간 공유 {len(shared)}개) 저장: {args.output}")
+        for c in shared:
+            print(f"    {', '.join(c['cases'])}: 주소 {c['size']}개, 거래소까지 {c['min_hops_to_exchange']}홉")
+
+    elif args.command == "reach":
+        for address in args.addresses:
+            path = graph.path_to_exchange(address)
+            if path is None:
+                print(f"[!] {address}: 거래소 도달 경로 없음")
+            else:
+                print(f"[+] {address}: {len(path) - 1}홉 -> {graph.labels.get(path[-1], path[-1])}")
+                print("    " + " -> ".join(p[:12] + "..." for p in path))
+
+
+if __name__ == "__main__":
+    main()
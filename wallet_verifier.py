@@ -0,0 +1,602 @@
+"""
+블록체인 익스플로러 기반 지갑 검증 및 리포트 재생성
+- TTP 프로파일의 지갑 주소 수집 (체인 판별: ETH / BTC / XRP, 레거시/자유형식 스키마 포함)
+- Etherscan 호환 API (balancemulti 20개 단위 배치 + txlist), Blockchain.info 호환 API (multiaddr 배치 + rawaddr)
+- SQLite 영구 캐시 (TTL), API별 토큰 버킷 요청 제한, 429/5xx/NOTOK 지수 백오프 재시도
+- 거래 상대방을 거래소 라벨 파일과 대조하여 거래소 연결 탐지
+- 조회 실패(HTTP 4xx 등) 배치는 건너뛰고 리포트에 기록
+- 기본 출력은 ttp_results/wallet_verification.json, wallet_tracking_summary.json
+  (수작업 WALLET_VERIFICATION_REPORT.json, blockchain_tracking_summary.json 은 메모 참고용으로만 읽음)
+- 오프라인 테스트: mock_explorer_server.py
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from ttp_aggregate import get_path
+from ttp_stats import as_loss, iter_profile_files, wallet_chain
+
+ETHERSCAN_URL = "https://api.etherscan.io/api"
+BLOCKCHAIN_INFO_URL = "https://blockchain.info"
+ETHERSCAN_BATCH = 20       # balancemulti 최대 주소 수
+BLOCKCHAIN_INFO_BATCH = 50
+ETH_TXLIST_LIMIT = 10000   # txlist 1페이지 최대 건수
+BTC_TX_PAGE = 50
+DEFAULT_TTL = 24 * 3600
+MAX_RETRIES = 4
+
+WEI_PER_ETH = 10 ** 18
+SATOSHI_PER_BTC = 10 ** 8
+CRITICAL_LOSS_USD = 250_000
+
+# 표준 스키마 지갑 목록 (이 순서로 먼저 수집, 이후 프로파일 전체에서 주소 형식 문자열 탐색)
+WALLET_PATHS = [("financial_tracking", "wallet_addresses"), ("financial_tracking", "additional_traced_addresses")]
+# 플랫폼명/피해액: 표준 경로 우선, 없으면 레거시 스키마 경로
+PLATFORM_PATHS = [("fraud_mechanism", "platform_names"), ("scam_overview", "platform_name"),
+                  ("fraud_infrastructure", "platform_name"), ("attack_chain", "platform_introduction", "platform_name"),
+                  ("platform_introduction", "platform_name"), ("platform_details", "platform_name"),
+                  ("case_metadata", "platform_name")]
+LOSS_PATHS = [("financial_tracking", "estimated_loss_usd"), ("total_loss_usd",), ("financial_loss",),
+              ("financial_impact", "total_loss_usd"), ("financial_intelligence", "total_loss_usd"),
+              ("financial_details", "total_loss_usd"), ("final_extraction", "total_loss"),
+              ("executive_summary", "total_loss")]
+
+
+class RateLimiter:
+    """토큰 버킷 (rate: 초당 요청 수, burst: 최대 연속 요청 수)"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ExplorerCache:
+    """요청 URL -> 응답 JSON 영구 캐시 (TTL 초과 시 재조회)"""
+
+    def __init__(self, path="ttp_results/explorer_cache.sqlite", ttl=DEFAULT_TTL):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, fetched_at REAL, body TEXT)")
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT fetched_at, body FROM cache WHERE key = ?", (key,)).fetchone()
+        if row and time.time() - row[0] < self.ttl:
+            self.hits += 1
+            return json.loads(row[1])
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                              (key, time.time(), json.dumps(value)))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ExplorerAPI:
+    """캐시/요청 제한/재시도가 적용된 JSON GET 클라이언트"""
+
+    def __init__(self, name, base_url, rate, cache=None, api_key=None, api_key_param="apikey", refresh=False):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.limiter = RateLimiter(rate)
+        self.cache = cache
+        self.api_key = api_key
+        self.api_key_param = api_key_param
+        self.refresh = refresh
+        self.requests = 0
+        self.retries = 0
+
+    def _is_rate_limited(self, payload):
+        """Etherscan은 HTTP 200 + NOTOK 으로 요청 제한을 알림"""
+        return (isinstance(payload, dict) and payload.get("status") == "0"
+                and "rate limit" in str(payload.get("result", "")).lower())
+
+    def get_json(self, path, params=None):
+        query = urllib.parse.urlencode(sorted((params or {}).items()), safe=",|")
+        key = f"{self.name}:{path}?{query}"  # API 키는 캐시 키에서 제외
+        if self.cache and not self.refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        full_params = dict(params or {})
+        if self.api_key:
+            full_params[self.api_key_param] = self.api_key
+        url = f"{self.base_url}{path}"
+        if full_params:
+            url += "?" + urllib.parse.urlencode(full_params, safe=",|")
+
+        delay = 1.0
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire()
+            self.requests += 1
+            try:
+                with urllib.request.urlopen(url, timeout=30) as resp:
+                    payload = json.loads(resp.read().decode("utf-8"))
+                if not self._is_rate_limited(payload):
+                    # NOTOK(잘못된 키 등) 응답은 캐시하지 않음
+                    if self.cache and not (isinstance(payload, dict) and payload.get("message") == "NOTOK"):
+                        self.cache.put(key, payload)
+                    return payload
+                error = "rate limit"
+            except urllib.error.HTTPError as e:
+                if e.code != 429 and e.code < 500:
+                    raise
+                error = f"HTTP {e.code}"
+            except (urllib.error.URLError, OSError) as e:
+                error = str(e)
+
+            if attempt == MAX_RETRIES:
+                raise RuntimeError(f"{self.name} 요청 실패 ({error}): {path}")
+            self.retries += 1
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+def _iso_date(timestamp):
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _activity_period(first, last):
+    days = (int(last) - int(first)) / 86400
+    if days < 31:
+        return f"~{max(1, round(days))} days"
+    if days < 730:
+        return f"~{round(days / 30.4)} months"
+    return f"~{days / 365.25:.1f} years"
+
+
+def _format_amount(value, unit):
+    text = f"{value:.8f}".rstrip("0").rstrip(".")
+    return f"{text} {unit}"
+
+
+def btc_address_type(address):
+    if address.startswith("bc1p"):
+        return "P2TR (Taproot)"
+    if address.startswith("bc1q"):
+        return "P2WPKH (Native SegWit)" if len(address) == 42 else "P2WSH (Native SegWit)"
+    if address.startswith("3"):
+        return "P2SH (Legacy SegWit)"
+    if address.startswith("1"):
+        return "P2PKH (Legacy)"
+    return "unknown"
+
+
+def _scammer_names(profile):
+    persona = get_path(profile, ("impersonation_and_psychology", "scammer_persona"))
+    personas = persona if isinstance(persona, list) else [persona]
+    names = []
+    for p in personas:
+        if not isinstance(p, dict):
+            continue
+        for v in [p.get("name")] + list(p.get("aliases") or []):
+            if isinstance(v, str) and v and v not in names:
+                names.append(v)
+    return names
+
+
+def _strings(node):
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, dict):
+        for value in node.values():
+            yield from _strings(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _strings(value)
+
+
+def profile_wallets(profile):
+    """표준 지갑 목록 + 프로파일 어디에든 있는 주소 형식 문자열 (레거시 iocs.wallets 등), 순서 유지"""
+    found = []
+    for path in WALLET_PATHS:
+        found += [a.strip() for a in get_path(profile, path) or [] if isinstance(a, str) and a.strip()]
+    found += [v.strip() for v in _strings(profile) if wallet_chain(v.strip()) != "other"]
+    return list(dict.fromkeys(found))
+
+
+def _first_value(profile, paths, convert):
+    for path in paths:
+        value = convert(get_path(profile, path))
+        if value:
+            return value
+    return None
+
+
+def _platform_names(value):
+    items = value if isinstance(value, list) else [value]
+    return ", ".join(p for p in items if isinstance(p, str) and p.strip())
+
+
+def collect_wallets(inputs):
+    """프로파일 -> 지갑 목록 [{address, chain, case, platform, estimated_loss_usd, scammer_names}]"""
+    wallets = {}
+    cases = {}
+    for key, pb_id, profile in iter_profile_files(inputs):
+        case = f"pb_{int(pb_id):03d}" if pb_id is not None and str(pb_id).isdigit() else key
+        loss = _first_value(profile, LOSS_PATHS, as_loss)
+        platform = _first_value(profile, PLATFORM_PATHS, _platform_names) or ""
+        cases[case] = {"case": case, "platform": platform, "loss_usd": loss, "wallet_count": 0}
+        for address in profile_wallets(profile):
+            chain = wallet_chain(address)
+            dedupe = address.lower() if chain == "ethereum_ETH" else address
+            cases[case]["wallet_count"] += 1
+            if dedupe in wallets:
+                continue
+            wallets[dedupe] = {
+                "address": address,
+                "chain": chain,
+                "case": case,
+                "platform": cases[case]["platform"],
+                "estimated_loss_usd": loss,
+                "scammer_names": _scammer_names(profile),
+            }
+    return list(wallets.values()), cases
+
+
+class WalletVerifier:
+    def __init__(self, etherscan, blockchain_info, exchange_labels=None):
+        self.etherscan = etherscan
+        self.blockchain_info = blockchain_info
+        self.exchange_labels = {k.lower(): v for k, v in (exchange_labels or {}).items()}
+        self.failures = []      # 건너뛴 요청 [{api, action, addresses, error}]
+
+    def _get(self, api, action, addresses, path, params):
+        """요청 실패(재시도 소진, HTTP 4xx)는 기록하고 None -> 해당 주소만 LOOKUP_FAILED"""
+        try:
+            return api.get_json(path, params)
+        except (urllib.error.HTTPError, RuntimeError) as e:
+            error = f"HTTP {e.code}" if isinstance(e, urllib.error.HTTPError) else str(e)
+            print(f"[!] {api.name} {action} 실패, 건너뜀 ({len(addresses)}개 주소): {error}")
+            self.failures.append({"api": api.name, "action": action, "addresses": list(addresses), "error": error})
+            return None
+
+    def _exchanges(self, counterparties):
+        return sorted({self.exchange_labels[c.lower()] for c in counterparties if c and c.lower() in self.exchange_labels})
+
+    def verify_ethereum(self, addresses):
+        """balancemulti 배치 + 주소별 txlist"""
+        results = {}
+        for i in range(0, len(addresses), ETHERSCAN_BATCH):
+            chunk = addresses[i:i + ETHERSCAN_BATCH]
+            payload = self._get(self.etherscan, "balancemulti", chunk, "",
+                                {"module": "account", "action": "balancemulti",
+                                 "address": ",".join(chunk), "tag": "latest"})
+            balances = {}
+            if payload and payload.get("status") == "1":
+                balances = {r["account"].lower(): int(r["balance"]) for r in payload["result"]}
+            for address in chunk:
+                results[address] = {"balance_wei": balances.get(address.lower())}
+
+        for address in addresses:
+            entry = results[address]
+            payload = self._get(self.etherscan, "txlist", [address], "",
+                                {"module": "account", "action": "txlist", "address": address,
+                                 "startblock": 0, "endblock": 99999999, "page": 1,
+                                 "offset": ETH_TXLIST_LIMIT, "sort": "asc"})
+            if payload is None:
+                entry["exchange_connections"] = []
+                continue
+            txs = payload.get("result") if isinstance(payload.get("result"), list) else []
+            entry["transaction_count"] = len(txs)
+            entry["transaction_count_truncated"] = len(txs) >= ETH_TXLIST_LIMIT
+            if txs:
+                entry["first_ts"] = int(txs[0]["timeStamp"])
+                entry["last_ts"] = int(txs[-1]["timeStamp"])
+            peers = {tx.get("from") for tx in txs} | {tx.get("to") for tx in txs}
+            peers.discard(None)
+            entry["exchange_connections"] = self._exchanges(p for p in peers if p.lower() != address.lower())
+        return results
+
+    def verify_bitcoin(self, addresses):
+        """multiaddr 배치 + 주소별 rawaddr (최근 거래, 필요 시 최초 거래)"""
+        results = {}
+        for i in range(0, len(addresses), BLOCKCHAIN_INFO_BATCH):
+            chunk = addresses[i:i + BLOCKCHAIN_INFO_BATCH]
+            payload = self._get(self.blockchain_info, "multiaddr", chunk, "/multiaddr",
+                                {"active": "|".join(chunk), "n": 0}) or {}
+            for row in payload.get("addresses", []):
+                results[row["address"]] = {
+                    "n_tx": row["n_tx"], "total_received": row["total_received"],
+                    "total_sent": row["total_sent"], "final_balance": row["final_balance"],
+                }
+
+        for address in addresses:
+            entry = results.setdefault(address, {"n_tx": 0})
+            if not entry["n_tx"]:
+                entry["exchange_connections"] = []
+                continue
+            page = self._get(self.blockchain_info, "rawaddr", [address], f"/rawaddr/{address}",
+                             {"limit": BTC_TX_PAGE, "offset": 0})
+            if page is None:
+                entry["exchange_connections"] = []
+                continue
+            txs = page.get("txs", [])
+            first_tx = txs[-1] if entry["n_tx"] <= BTC_TX_PAGE else None
+            if first_tx is None:
+                oldest = self._get(self.blockchain_info, "rawaddr", [address], f"/rawaddr/{address}",
+                                   {"limit": 1, "offset": entry["n_tx"] - 1}) or {}
+                first_tx = (oldest.get("txs") or [None])[0]
+            if txs:
+                entry["last_ts"] = txs[0]["time"]
+            if first_tx:
+                entry["first_ts"] = first_tx["time"]
+            peers = {i["prev_out"].get("addr") for tx in txs for i in tx.get("inputs", []) if "prev_out" in i}
+            peers |= {o.get("addr") for tx in txs for o in tx.get("out", [])}
+            peers.discard(None)
+            peers.discard(address)
+            entry["exchange_connections"] = self._exchanges(peers)
+        return results
+
+
+def _priority(loss):
+    return "CRITICAL" if loss and loss >= CRITICAL_LOSS_USD else "HIGH"
+
+
+def _previous_notes(previous):
+    notes = {}
+    for key in ("ethereum_wallets_verified", "bitcoin_wallets_verified"):
+        for w in (previous or {}).get(key, []):
+            if w.get("notes"):
+                notes[w["address"].lower()] = w["notes"]
+    return notes
+
+
+def build_verification_report(wallets, eth, btc, sources, previous=None, failures=()):
+    """WALLET_VERIFICATION_REPORT.json 형식"""
+    notes = _previous_notes(previous)
+    eth_rows, btc_rows, xrp_rows = [], [], []
+    exchanges = {}
+
+    for w in wallets:
+        address = w["address"]
+        if w["chain"] == "ethereum_ETH":
+            r = eth.get(address, {})
+            row = {"address": address, "case": w["case"],
+                   "status": "VERIFIED" if r.get("balance_wei") is not None else "LOOKUP_FAILED"}
+            if r.get("balance_wei") is not None:
+                row["balance"] = _format_amount(r["balance_wei"] / WEI_PER_ETH, "ETH")
+            row["transaction_count"] = r.get("transaction_count", 0)
+            if r.get("transaction_count_truncated"):
+                row["transaction_count"] = f"{ETH_TXLIST_LIMIT}+"
+            if "first_ts" in r:
+                row["first_tx"] = _iso_date(r["first_ts"])
+                row["last_tx"] = _iso_date(r["last_ts"])
+                row["activity_period"] = _activity_period(r["first_ts"], r["last_ts"])
+            row["exchange_connections"] = r.get("exchange_connections", [])
+            if address.lower() in notes:
+                row["notes"] = notes[address.lower()]
+            eth_rows.append(row)
+        elif w["chain"] == "bitcoin_BTC":
+            r = btc.get(address, {})
+            row = {"address": address, "case": w["case"],
+                   "status": "VERIFIED" if "total_received" in r else "LOOKUP_FAILED",
+                   "type": btc_address_type(address)}
+            if "total_received" in r:
+                row["total_received"] = _format_amount(r["total_received"] / SATOSHI_PER_BTC, "BTC")
+                row["total_sent"] = _format_amount(r["total_sent"] / SATOSHI_PER_BTC, "BTC")
+                row["final_balance"] = _format_amount(r["final_balance"] / SATOSHI_PER_BTC, "BTC")
+            row["transaction_count"] = r.get("n_tx", 0)
+            if "first_ts" in r:
+                row["first_tx"] = _iso_date(r["first_ts"])
+                row["last_tx"] = _iso_date(r["last_ts"])
+            row["exchange_connections"] = r.get("exchange_connections", [])
+            if address.lower() in notes:
+                row["notes"] = notes[address.lower()]
+            btc_rows.append(row)
+        else:
+            xrp_rows.append({"address": address, "case": w["case"], "status": "PENDING_VERIFICATION",
+                             "notes": f"No explorer client for chain '{w['chain']}'. Manual verification required."})
+            continue
+        for name in row["exchange_connections"]:
+            exchanges.setdefault(name, []).append(address)
+
+    def tx_count(row):
+        count = row["transaction_count"]
+        return int(str(count).rstrip("+"))
+
+    verified_eth = [r for r in eth_rows if r["status"] == "VERIFIED"]
+    verified_btc = [r for r in btc_rows if r["status"] == "VERIFIED"]
+    btc_volume = sum(btc.get(r["address"], {}).get("total_received", 0) for r in verified_btc)
+    report = {
+        "verification_report": {
+            "generated_at": date.today().isoformat(),
+            "verification_method": "Blockchain Explorer API Queries (wallet_verifier.py)",
+            "sources": sources,
+        },
+        "summary": {
+            "total_wallets_verified": len(verified_eth) + len(verified_btc),
+            "ethereum_verified": len(verified_eth),
+            "bitcoin_verified": len(verified_btc),
+            "xrp_pending": len(xrp_rows),
+            "lookup_failed": len(eth_rows) + len(btc_rows) - len(verified_eth) - len(verified_btc),
+            "total_btc_volume_tracked": _format_amount(btc_volume / SATOSHI_PER_BTC, "BTC"),
+            "total_eth_transactions": sum(tx_count(r) for r in verified_eth),
+            "total_btc_transactions": sum(tx_count(r) for r in verified_btc),
+            "key_exchange_connections": sorted(exchanges),
+            "failed_requests": len(failures),
+        },
+        "failed_requests": list(failures),
+        "ethereum_wallets_verified": eth_rows,
+        "bitcoin_wallets_verified": btc_rows,
+        "xrp_wallets": xrp_rows,
+        "high_priority_findings": {
+            "exchange_connections_detected": [
+                f"{name} ({', '.join(a[:10] + '...' for a in addrs)})" for name, addrs in sorted(exchanges.items())
+            ],
+        },
+    }
+    if verified_btc:
+        top = max(verified_btc, key=lambda r: btc[r["address"]]["total_received"])
+        report["high_priority_findings"]["highest_volume_btc_address"] = {
+            "address": top["address"], "total_volume": top["total_received"],
+            "transactions": top["transaction_count"], "case": top["case"]}
+    if verified_eth:
+        top = max(verified_eth, key=tx_count)
+        report["high_priority_findings"]["highest_activity_eth_address"] = {
+            "address": top["address"], "transaction_count": top["transaction_count"], "case": top["case"]}
+
+    # 수작업 항목 유지
+    for key in ("investigation_recommendations",):
+        if previous and key in previous:
+            report[key] = previous[key]
+    if previous:
+        findings = previous.get("high_priority_findings", {})
+        if "critical_forensic_findings" in findings:
+            report["high_priority_findings"]["critical_forensic_findings"] = findings["critical_forensic_findings"]
+    return report
+
+
+def build_tracking_summary(wallets, cases, dataset_total=None, previous=None, top=18):
+    """blockchain_tracking_summary.json 형식"""
+    groups = {"ethereum": [], "bitcoin": [], "xrp": [], "other": []}
+    for w in wallets:
+        row = {"address": w["address"], "case": w["case"], "platform": w["platform"],
+               "estimated_loss_usd": w["estimated_loss_usd"], "scammer_names": w["scammer_names"]}
+        if w["chain"] == "bitcoin_BTC":
+            row["address_type"] = btc_address_type(w["address"])
+        row["priority"] = _priority(w["estimated_loss_usd"])
+        group = {"ethereum_ETH": "ethereum", "bitcoin_BTC": "bitcoin", "xrp_XRP": "xrp"}.get(w["chain"], "other")
+        groups[group].append(row)
+    if not groups["other"]:
+        del groups["other"]
+
+    losses = [c for c in cases.values() if c["loss_usd"]]
+    high_value = sorted(losses, key=lambda c: (-c["loss_usd"], c["case"]))[:top]
+    total_loss = sum(c["loss_usd"] for c in losses)
+    summary = {
+        "summary": {
+            "generated_at": date.today().isoformat(),
+            "total_ttp_profiles_created": len(cases),
+            "total_cases_in_dataset": dataset_total,
+            "cases_with_wallet_addresses": sum(1 for c in cases.values() if c["wallet_count"]),
+            "total_unique_wallets": len(wallets),
+            "total_eth_wallets": len(groups["ethereum"]),
+            "total_btc_wallets": len(groups["bitcoin"]),
+            "total_xrp_wallets": len(groups["xrp"]),
+            "high_value_cases_profiled": sum(1 for c in losses if c["loss_usd"] >= 100_000),
+            "total_estimated_losses_tracked": f"${total_loss:,.0f}",
+        },
+        "wallet_addresses": groups,
+        "high_value_cases": [{"case": c["case"], "platform": c["platform"], "loss_usd": int(c["loss_usd"]),
+                              "wallet_count": c["wallet_count"]} for c in high_value],
+    }
+    for key in ("brand_impersonation_cases", "investigation_recommendations"):
+        if previous and key in previous:
+            summary[key] = previous[key]
+    return summary
+
+
+def _load_json(path):
+    if path and Path(path).exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Verify scam wallets via blockchain explorers and regenerate reports")
+    parser.add_argument("inputs", nargs="*", default=["ttp_results/individual"],
+                       help="Profile directories or JSON files (default: ttp_results/individual)")
+    parser.add_argument("--etherscan-url", type=str, default=ETHERSCAN_URL, help="Etherscan-compatible API URL")
+    parser.add_argument("--blockchain-info-url", type=str, default=BLOCKCHAIN_INFO_URL,
+                       help="Blockchain.info-compatible API URL")
+    parser.add_argument("--etherscan-rate", type=float, default=5.0, help="Etherscan requests/sec (default: 5)")
+    parser.add_argument("--blockchain-info-rate", type=float, default=1.0,
+                       help="Blockchain.info requests/sec (default: 1)")
+    parser.add_argument("--cache", type=str, default="ttp_results/explorer_cache.sqlite", help="Response cache")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help=f"Cache TTL sec (default: {DEFAULT_TTL})")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached responses")
+    parser.add_argument("--exchange-labels", type=str, help="JSON map of known exchange address -> name")
+    parser.add_argument("--dataset", type=str, default="pig_butchering_cases/pig_butchering_data.json",
+                       help="Case dataset used for totals")
+    parser.add_argument("--report", type=str, default="ttp_results/wallet_verification.json",
+                       help="Verification report output")
+    parser.add_argument("--summary", type=str, default="ttp_results/wallet_tracking_summary.json",
+                       help="Tracking summary output")
+    parser.add_argument("--previous-report", type=str, default="ttp_results/WALLET_VERIFICATION_REPORT.json",
+                       help="Curated report to carry notes and recommendations from (read only)")
+    parser.add_argument("--previous-summary", type=str, default="ttp_results/blockchain_tracking_summary.json",
+                       help="Curated summary to carry brand/recommendation sections from (read only)")
+
+    args = parser.parse_args()
+
+    wallets, cases = collect_wallets(args.inputs)
+    by_chain = {}
+    for w in wallets:
+        by_chain.setdefault(w["chain"], []).append(w["address"])
+    print(f"[*] 지갑 {len(wallets)}개 수집 (케이스 {len(cases)}건): "
+          + ", ".join(f"{k} {len(v)}" for k, v in sorted(by_chain.items())))
+
+    cache = ExplorerCache(args.cache, ttl=args.ttl)
+    etherscan = ExplorerAPI("etherscan", args.etherscan_url, args.etherscan_rate, cache,
+                            api_key=os.getenv("ETHERSCAN_API_KEY"), refresh=args.refresh)
+    blockchain_info = ExplorerAPI("blockchain_info", args.blockchain_info_url, args.blockchain_info_rate, cache,
+                                  refresh=args.refresh)
+    verifier = WalletVerifier(etherscan, blockchain_info, _load_json(args.exchange_labels))
+
+    start = time.time()
+    eth = verifier.verify_ethereum(by_chain.get("ethereum_ETH", []))
+    btc = verifier.verify_bitcoin(by_chain.get("bitcoin_BTC", []))
+    elapsed = time.time() - start
+    print(f"[+] 조회 완료 ({elapsed:.1f}초): Etherscan {etherscan.requests}회, Blockchain.info "
+          f"{blockchain_info.requests}회, 재시도 {etherscan.retries + blockchain_info.retries}회, "
+          f"캐시 적중 {cache.hits}/{cache.hits + cache.misses}")
+    cache.close()
+
+    dataset = _load_json(args.dataset)
+    sources = [args.etherscan_url, args.blockchain_info_url]
+    report = build_verification_report(wallets, eth, btc, sources, previous=_load_json(args.previous_report),
+                                       failures=verifier.failures)
+    summary = build_tracking_summary(wallets, cases, dataset_total=len(dataset) if dataset else None,
+                                     previous=_load_json(args.previous_summary))
+
+    for path, data in ((args.report, report), (args.summary, summary)):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"[+] 저장: {args.report}, {args.summary}")
+    print(f"    검증 {report['summary']['total_wallets_verified']}개, "
+          f"거래소 연결: {', '.join(report['summary']['key_exchange_connections']) or '없음'}")
+    if verifier.failures:
+        print(f"[!] 실패한 요청 {len(verifier.failures)}건 (failed_requests 참고)")
+
+
+if __name__ == "__main__":
+    main()